@@ -1,20 +1,29 @@
-from fastapi import FastAPI, Depends, HTTPException, Body, Path, Query
+from fastapi import FastAPI, Depends, HTTPException, Body, Path, Query, Response
 from sqlalchemy.orm import Session
 from typing import List, Optional
 import os
 from datetime import datetime
-from api.database import SessionLocal, Licitacao, create_db_tables, get_db
+from api.database import SessionLocal, Licitacao, create_db_tables, engine, get_db
+from api.pagination import keyset_paginate, CURSOR_HEADER
+from api.projections import resolver_campos, colunas, colunas_do_modelo, linha_para_dict
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
 import asyncio
-from web_scraping.mcp_playwright import search_new_licitacoes_correios
-import openai
 from dotenv import load_dotenv
 
 # Importar novos endpoints para geração de editais
 from api.edital_endpoints import router as edital_router
 from api.scraping_endpoints import router as scraping_router
 from api.feedback_endpoints import router as feedback_router
+from api.search_endpoints import router as search_router
+from api.monitoring_endpoints import router as monitoring_router, router_metricas
+from services.feedback_worker import worker_feedback
+from services.feedback_automation import automacao_feedback
+from services.scraping_scheduler import agendador_scraping
+from services.scrape_runs import marcar_interrompidas
+from crewai_agents.llm_registry import registro_llm
+from monitoring.metrics import MiddlewareMetricas, instrumentar_engine, metricas
+from monitoring.tracing import MiddlewareRastreamento, rastreador, rastrear_consultas
 
 load_dotenv()
 
@@ -56,6 +65,29 @@ class LicitacaoResponse(LicitacaoBase):
     """Modelo de resposta para endpoints que retornam licitações."""
     data_processamento: datetime
 
+class LicitacaoListaResponse(LicitacaoBase):
+    """
+    Item da listagem de licitações. Apenas os campos da projeção (colunas da
+    lista e as pedidas em `fields`) aparecem na resposta.
+    """
+    data_processamento: Optional[datetime] = None
+    modalidade: Optional[str] = None
+    tipo_licitacao: Optional[str] = None
+    numero_edital: Optional[str] = None
+    data_publicacao: Optional[str] = None
+    uasg: Optional[str] = None
+    dependencia: Optional[str] = None
+    uf: Optional[str] = None
+    quantidade_itens: Optional[str] = None
+    nup: Optional[str] = None
+
+# Colunas retornadas por padrão na listagem (sem os textos longos das análises)
+LICITACAO_CAMPOS_LISTA = (
+    "id", "objeto", "resumo", "data_abertura", "prazo_proposta", "valor_estimado",
+    "link_original", "status", "risco_geral", "modalidade", "tipo_licitacao",
+    "numero_edital", "uf", "data_processamento"
+)
+
 class BuscaLicitacoesRequest(BaseModel):
     """
     Modelo para requisição de busca manual de licitações.
@@ -75,6 +107,9 @@ app = FastAPI(
 app.include_router(edital_router)
 app.include_router(scraping_router)
 app.include_router(feedback_router)
+app.include_router(search_router)
+app.include_router(monitoring_router)
+app.include_router(router_metricas)
 
 # Habilitar CORS para que o frontend React possa se comunicar
 app.add_middleware(
@@ -83,33 +118,138 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[CURSOR_HEADER],
+)
+
+# Rastreamento: span por requisição (e suas BackgroundTasks), com as consultas SQL como filhos
+app.add_middleware(MiddlewareRastreamento)
+rastrear_consultas(engine)
+
+# Métricas do Prometheus (GET /metrics): duração por rota, consultas SQL e filas.
+# Adicionado por último para envolver os demais middlewares
+app.add_middleware(MiddlewareMetricas)
+instrumentar_engine(engine)
+metricas.medidor_fila(
+    "fila_feedback_itens", "Itens da fila de processamento de feedback por status",
+    worker_feedback.contagem_fila, ("status",)
+)
+metricas.medidor_fila(
+    "llm_modelos_carregados", "LLMs locais carregados em memória neste processo",
+    lambda: sum(m["carregado"] for m in registro_llm.status().values())
 )
 
 @app.on_event("startup")
 async def startup_event():
     """
     Evento executado ao iniciar a API. Garante que as tabelas do banco estejam criadas
-    e configura a chave da OpenAI a partir das variáveis de ambiente.
+    e inicia os serviços em segundo plano. Dependências pesadas (playwright,
+    openai, crewai) são importadas apenas nos endpoints que as usam.
     """
     create_db_tables()
     print("API Iniciada e tabelas do DB verificadas/criadas.")
-    # Configuração do OpenAI
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    openai.api_key = OPENAI_API_KEY
+    # Coletas que ficaram em "executando" após uma parada do processo
+    db = SessionLocal()
+    try:
+        marcar_interrompidas(db)
+    finally:
+        db.close()
+    # Worker que processa em lotes os feedbacks registrados
+    await worker_feedback.iniciar()
+    # Envio das solicitações e lembretes de feedback vencidos
+    await automacao_feedback.iniciar()
+    # Coletas de scraping agendadas no banco (expressões cron)
+    await agendador_scraping.iniciar()
+    # LLM local: carregado no primeiro uso, descarregado quando ocioso.
+    # Com LLM_AQUECER_NO_STARTUP=true, o carregamento começa em segundo plano já no startup
+    registro_llm.iniciar_monitor()
+    if os.getenv("LLM_AQUECER_NO_STARTUP", "false").lower() == "true":
+        registro_llm.aquecer()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Evento executado ao encerrar a API. Interrompe o worker e a automação de
+    feedback e o agendador de scraping; itens ainda não processados permanecem
+    na fila para a próxima execução. Por último, exporta os spans pendentes.
+    """
+    await worker_feedback.parar()
+    await automacao_feedback.parar()
+    await agendador_scraping.parar()
+    registro_llm.parar_monitor()
+    await asyncio.to_thread(rastreador.parar)
 
-@app.get("/api/licitacoes/", response_model=List[LicitacaoResponse])
-def read_licitacoes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@app.get("/api/licitacoes/", response_model=List[LicitacaoListaResponse], response_model_exclude_unset=True)
+def read_licitacoes(
+    response: Response,
+    fields: Optional[str] = Query(
+        None,
+        description="Campos extras separados por vírgula (ex.: analise_juridica_texto,risco_geral) ou 'todos'"
+    ),
+    cursor: Optional[str] = Query(None, description="Cursor retornado no cabeçalho X-Next-Cursor da página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    skip: Optional[int] = Query(
+        None, ge=0, deprecated=True,
+        description="Paginação por deslocamento (legado); use o cursor de X-Next-Cursor"
+    ),
+    uf: Optional[str] = None,
+    modalidade: Optional[str] = None,
+    status: Optional[str] = None,
+    risco_geral: Optional[str] = None,
+    processado_desde: Optional[datetime] = None,
+    processado_ate: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
     """
-    Retorna uma lista de licitações processadas.
+    Retorna uma lista de licitações processadas, da mais recente para a mais antiga.
+    Por padrão apenas as colunas da visão de lista são lidas do banco; os textos das
+    análises podem ser incluídos com o parâmetro `fields`.
+    A paginação é feita por cursor (keyset) sobre (data_processamento, id): o cursor
+    da próxima página é devolvido no cabeçalho X-Next-Cursor e fica ausente na última página.
+    Licitações sem data de processamento vêm depois das demais.
     Parâmetros:
-        skip (int): Quantidade de registros a pular (paginação).
+        fields (str): Campos extras a incluir na projeção (opcional).
+        cursor (str): Cursor da página anterior (opcional).
         limit (int): Quantidade máxima de registros a retornar.
+        skip (int): Registros a pular (obsoleto, aceito durante a transição para o cursor;
+            a resposta traz o cabeçalho Deprecation e também o X-Next-Cursor).
+        uf, modalidade, status, risco_geral (str): Filtros por igualdade (opcionais).
+        processado_desde, processado_ate (datetime): Intervalo de data de processamento (opcional).
         db (Session): Sessão do banco de dados.
     Retorno:
-        Lista de licitações processadas.
+        Lista de licitações processadas com os campos selecionados.
     """
-    licitacoes = db.query(Licitacao).offset(skip).limit(limit).all()
-    return licitacoes
+    if skip is not None and cursor:
+        raise HTTPException(status_code=400, detail="Use cursor ou skip, não ambos")
+
+    campos = resolver_campos(
+        fields,
+        disponiveis=colunas_do_modelo(Licitacao),
+        padrao=LICITACAO_CAMPOS_LISTA,
+        obrigatorios=("id", "data_processamento")
+    )
+    query = db.query(*colunas(Licitacao, campos))
+
+    if uf:
+        query = query.filter(Licitacao.uf == uf)
+    if modalidade:
+        query = query.filter(Licitacao.modalidade == modalidade)
+    if status:
+        query = query.filter(Licitacao.status == status)
+    if risco_geral:
+        query = query.filter(Licitacao.risco_geral == risco_geral)
+    if processado_desde:
+        query = query.filter(Licitacao.data_processamento >= processado_desde)
+    if processado_ate:
+        query = query.filter(Licitacao.data_processamento <= processado_ate)
+
+    licitacoes, proximo_cursor = keyset_paginate(
+        query, (Licitacao.data_processamento, Licitacao.id), cursor, limit, offset=skip or 0
+    )
+    if skip is not None:
+        response.headers["Deprecation"] = "true"
+    if proximo_cursor:
+        response.headers[CURSOR_HEADER] = proximo_cursor
+    return [linha_para_dict(linha) for linha in licitacoes]
 
 @app.get("/api/licitacoes/{licitacao_id}", response_model=LicitacaoResponse)
 def read_licitacao(licitacao_id: str, db: Session = Depends(get_db)):
@@ -141,6 +281,7 @@ def forcar_busca_licitacoes(request: BuscaLicitacoesRequest = Body(...)):
     Endpoint para forçar a busca manual de licitações via CrewAI.
     Executa scraping e retorna os resultados encontrados conforme datas informadas.
     """
+    from web_scraping.mcp_playwright import search_new_licitacoes_correios
     licitacoes = asyncio.run(search_new_licitacoes_correios(
         data_inicial=request.data_inicial,
         data_final=request.data_final
@@ -161,6 +302,9 @@ def gerar_analise_licitacao(id: str = Query(...), db: Session = Depends(get_db))
     lic = db.query(Licitacao).filter(Licitacao.id == id).first()
     if not lic:
         raise HTTPException(status_code=404, detail="Licitação não encontrada")
+    # Importado no primeiro uso para não pesar no startup da API
+    import openai
+    openai.api_key = os.getenv("OPENAI_API_KEY")
     # Função auxiliar para consultar a OpenAI
     def chatgpt(prompt):
         """
@@ -1,5 +1,5 @@
 import os
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, Float, JSON, Boolean
+from sqlalchemy import create_engine, event, Column, Integer, String, Text, DateTime, Float, JSON, Boolean, Index
 from sqlalchemy.orm import sessionmaker, declarative_base
 from datetime import datetime
 from dotenv import load_dotenv
@@ -12,11 +12,80 @@ DATA_DIR = os.path.abspath(os.path.join(BASE_DIR, '../../data'))
 os.makedirs(DATA_DIR, exist_ok=True)
 # Caminho do arquivo do banco SQLite3
 DB_PATH = os.path.join(DATA_DIR, 'licitacoes.db')
-# URL de conexão para o SQLAlchemy
-DATABASE_URL = f"sqlite:///{DB_PATH}"
+# URL de conexão para o SQLAlchemy (SQLite local por padrão; PostgreSQL via DATABASE_URL)
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{DB_PATH}"
+# Provedores como o Heroku usam o esquema "postgres://", não aceito pelo SQLAlchemy 2
+if DATABASE_URL.startswith("postgres://"):
+    DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
-# Cria o engine do SQLAlchemy para SQLite3
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+def _env_int(nome: str, padrao: int) -> int:
+    """Lê um inteiro de variável de ambiente, usando o padrão se ausente."""
+    valor = os.getenv(nome)
+    return int(valor) if valor else padrao
+
+
+def _configurar_sqlite(engine) -> None:
+    """
+    Aplica PRAGMAs de concorrência a cada nova conexão SQLite.
+    WAL permite leitores simultâneos a um escritor; busy_timeout faz escritores
+    concorrentes aguardarem o lock em vez de falharem com 'database is locked'.
+    """
+    busy_timeout_ms = _env_int("SQLITE_BUSY_TIMEOUT_MS", 30000)
+    mmap_size = _env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)
+    cache_size_kb = _env_int("SQLITE_CACHE_SIZE_KB", 64 * 1024)
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={busy_timeout_ms}")
+        cursor.execute(f"PRAGMA mmap_size={mmap_size}")
+        cursor.execute(f"PRAGMA cache_size=-{cache_size_kb}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+
+
+def criar_engine(url: str = None, **kwargs):
+    """
+    Cria o engine do SQLAlchemy conforme o banco configurado.
+
+    - SQLite: conexões compartilháveis entre threads e PRAGMAs de WAL,
+      synchronous=NORMAL, busy_timeout e mmap.
+    - PostgreSQL e demais: pool dimensionado com pre-ping e reciclagem,
+      ajustável por DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT e DB_POOL_RECYCLE.
+
+    Args:
+        url: URL de conexão (padrão: DATABASE_URL)
+        **kwargs: Parâmetros extras repassados ao create_engine
+
+    Returns:
+        Engine: Engine configurado
+    """
+    url = url or DATABASE_URL
+
+    if url.startswith("sqlite"):
+        connect_args = kwargs.pop("connect_args", {})
+        connect_args.setdefault("check_same_thread", False)
+        connect_args.setdefault("timeout", _env_int("SQLITE_BUSY_TIMEOUT_MS", 30000) / 1000)
+        novo_engine = create_engine(url, connect_args=connect_args, **kwargs)
+        _configurar_sqlite(novo_engine)
+        return novo_engine
+
+    opcoes = {
+        "pool_size": _env_int("DB_POOL_SIZE", 10),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", 20),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 30),
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 1800),
+        "pool_pre_ping": True,
+    }
+    opcoes.update(kwargs)
+    return create_engine(url, **opcoes)
+
+
+# Cria o engine do SQLAlchemy para o banco configurado
+engine = criar_engine()
 # Cria a fábrica de sessões para o banco
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # Base para os modelos ORM
@@ -61,6 +130,16 @@ class Licitacao(Base):
     quantidade_itens = Column(String, nullable=True)
     nup = Column(String, nullable=True)
 
+    # Índices compostos para a listagem paginada por cursor (data_processamento, id),
+    # com e sem os filtros mais usados pelo frontend
+    __table_args__ = (
+        Index("ix_licitacoes_processamento_id", "data_processamento", "id"),
+        Index("ix_licitacoes_uf_processamento", "uf", "data_processamento", "id"),
+        Index("ix_licitacoes_modalidade_processamento", "modalidade", "data_processamento", "id"),
+        Index("ix_licitacoes_status_processamento", "status", "data_processamento", "id"),
+        Index("ix_licitacoes_risco_processamento", "risco_geral", "data_processamento", "id"),
+    )
+
     def __repr__(self):
         """
         Retorna uma representação resumida da licitação para debug/log.
@@ -74,7 +153,27 @@ def create_db_tables():
     Deve ser chamada no início da aplicação para garantir a estrutura do banco.
     """
     print("Criando tabelas do banco de dados (se não existirem)...")
+    # Registra os modelos de feedback, scraping e monitoramento na mesma metadata antes de criar as tabelas
+    import api.database_feedback  # noqa: F401
+    import api.database_scraping  # noqa: F401
+    import api.database_monitoring  # noqa: F401
     Base.metadata.create_all(bind=engine)
+    # create_all não adiciona índices novos a tabelas já existentes
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    # Índices de busca textual (FTS5 no SQLite, tsvector no PostgreSQL)
+    from api.search_index import criar_indices_busca
+    criar_indices_busca(engine)
+    # Bases com feedbacks anteriores aos rollups: popula feedback_rollup_diario uma vez
+    from api.feedback_rollups import preencher_rollups_vazios
+    db = SessionLocal()
+    try:
+        linhas = preencher_rollups_vazios(db)
+    finally:
+        db.close()
+    if linhas:
+        print(f"Rollups de feedback reconstruídos a partir dos feedbacks existentes ({linhas} linhas).")
     print("Tabelas verificadas/criadas.")
 
 
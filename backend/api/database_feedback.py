@@ -3,13 +3,14 @@ Modelos de banco de dados para sistema de feedback e melhoria contínua.
 Coleta opiniões de setores requisitantes, empresas licitantes e setor de licitação.
 """
 
-from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, JSON, ForeignKey
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, Text, Boolean, JSON, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
-Base = declarative_base()
+# Mesma Base dos demais modelos: as tabelas são criadas por create_db_tables
+# e as chaves estrangeiras resolvem para editais_gerados
+from api.database import Base
 
 class FeedbackSetor(Base):
     """
@@ -18,7 +19,7 @@ class FeedbackSetor(Base):
     __tablename__ = "feedback_setor"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    edital_id = Column(String, ForeignKey("edital_gerado.id"), nullable=False)
+    edital_id = Column(String, ForeignKey("editais_gerados.id"), nullable=False, index=True)
     
     # Dados do setor
     setor_nome = Column(String, nullable=False)
@@ -48,12 +49,12 @@ class FeedbackSetor(Base):
     funcionalidades_desejadas = Column(JSON)  # Novas funcionalidades desejadas
     
     # Metadados
-    data_feedback = Column(DateTime, default=datetime.now)
+    data_feedback = Column(DateTime, default=datetime.now, index=True)
     ip_origem = Column(String)
     user_agent = Column(String)
     
     # Relacionamento
-    edital = relationship("EditalGerado", back_populates="feedbacks_setor")
+    edital = relationship("EditalGerado", backref="feedbacks_setor")
 
 class FeedbackEmpresa(Base):
     """
@@ -62,7 +63,7 @@ class FeedbackEmpresa(Base):
     __tablename__ = "feedback_empresa"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    edital_id = Column(String, ForeignKey("edital_gerado.id"), nullable=False)
+    edital_id = Column(String, ForeignKey("editais_gerados.id"), nullable=False, index=True)
     
     # Dados da empresa
     empresa_cnpj = Column(String, nullable=False)
@@ -100,11 +101,11 @@ class FeedbackEmpresa(Base):
     recomendaria_outros_fornecedores = Column(Boolean)
     
     # Metadados
-    data_feedback = Column(DateTime, default=datetime.now)
+    data_feedback = Column(DateTime, default=datetime.now, index=True)
     forma_coleta = Column(String)  # email, formulario, telefone, presencial
     
     # Relacionamento
-    edital = relationship("EditalGerado", back_populates="feedbacks_empresa")
+    edital = relationship("EditalGerado", backref="feedbacks_empresa")
 
 class FeedbackLicitacao(Base):
     """
@@ -113,7 +114,7 @@ class FeedbackLicitacao(Base):
     __tablename__ = "feedback_licitacao"
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    edital_id = Column(String, ForeignKey("edital_gerado.id"), nullable=False)
+    edital_id = Column(String, ForeignKey("editais_gerados.id"), nullable=False, index=True)
     
     # Dados do avaliador
     avaliador_nome = Column(String, nullable=False)
@@ -155,11 +156,11 @@ class FeedbackLicitacao(Base):
     facilidade_acompanhamento = Column(Boolean)
     
     # Metadados
-    data_feedback = Column(DateTime, default=datetime.now)
+    data_feedback = Column(DateTime, default=datetime.now, index=True)
     fase_licitacao = Column(String)  # preparacao, publicacao, julgamento, homologacao
     
     # Relacionamento
-    edital = relationship("EditalGerado", back_populates="feedbacks_licitacao")
+    edital = relationship("EditalGerado", backref="feedbacks_licitacao")
 
 class SessaoFeedback(Base):
     """
@@ -305,12 +306,104 @@ class ConfiguracaoFeedback(Base):
     data_modificacao = Column(DateTime, default=datetime.now)
     modificado_por = Column(String)
 
-# Adicionar relacionamentos aos modelos existentes
-def add_feedback_relationships():
-    """Adiciona relacionamentos de feedback aos modelos existentes"""
-    from api.database import EditalGerado
-    
-    # Adicionar relacionamentos ao EditalGerado
-    EditalGerado.feedbacks_setor = relationship("FeedbackSetor", back_populates="edital")
-    EditalGerado.feedbacks_empresa = relationship("FeedbackEmpresa", back_populates="edital")
-    EditalGerado.feedbacks_licitacao = relationship("FeedbackLicitacao", back_populates="edital")
+class FeedbackRollupDiario(Base):
+    """
+    Agregado diário de satisfação por tipo de stakeholder e dimensão.
+    Atualizado incrementalmente a cada feedback registrado, permite calcular
+    médias e distribuições de qualquer período somando uma linha por dia.
+    """
+    __tablename__ = "feedback_rollup_diario"
+    
+    dia = Column(Date, primary_key=True)
+    tipo_stakeholder = Column(String, primary_key=True)  # setor, empresa, licitacao
+    dimensao = Column(String, primary_key=True)  # geral, edital, setor
+    chave = Column(String, primary_key=True, default="")  # "" (geral), edital_id ou nome do setor
+    
+    # Contadores
+    total_feedbacks = Column(Integer, nullable=False, default=0)
+    total_avaliados = Column(Integer, nullable=False, default=0)  # Feedbacks com média calculada (satisfacao_individual)
+    soma_satisfacao = Column(Float, nullable=False, default=0.0)  # Soma das médias individuais
+    
+    # Histograma das médias individuais arredondadas (1-5)
+    faixa_1 = Column(Integer, nullable=False, default=0)
+    faixa_2 = Column(Integer, nullable=False, default=0)
+    faixa_3 = Column(Integer, nullable=False, default=0)
+    faixa_4 = Column(Integer, nullable=False, default=0)
+    faixa_5 = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("ix_feedback_rollup_dimensao_dia", "dimensao", "tipo_stakeholder", "dia"),
+    )
+
+class SentimentoTexto(Base):
+    """
+    Cache de sentimento de textos de feedback, indexado pelo hash do texto.
+    Evita reprocessar NLP a cada análise sobre os mesmos textos.
+    """
+    __tablename__ = "sentimento_texto"
+    
+    texto_hash = Column(String, primary_key=True)  # sha256 do texto normalizado
+    motor = Column(String, primary_key=True)  # Motor e versão (ex.: lexico-v1, textblob)
+    polaridade = Column(Float, nullable=False)  # -1 (negativo) a 1 (positivo)
+    rotulo = Column(String, nullable=False)  # negativo, neutro, positivo
+    data_calculo = Column(DateTime, default=datetime.now)
+
+class FeedbackProcessamento(Base):
+    """
+    Fila de processamento dos feedbacks registrados e resultado da análise.
+    Cada feedback entra como pendente na mesma transação do registro; o worker
+    (services/feedback_worker.py) consome a fila em lotes, classifica os
+    textos, calcula sentimento e atualiza os rollups diários.
+    """
+    __tablename__ = "feedback_processamento"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Ordem de chegada na fila
+    feedback_id = Column(String, nullable=False, unique=True)
+    tipo_stakeholder = Column(String, nullable=False)  # setor, empresa, licitacao
+    
+    # Controle da fila
+    status = Column(String, nullable=False, default="pendente")  # pendente, processando, processado, erro
+    tentativas = Column(Integer, nullable=False, default=0)
+    reservado_por = Column(String)  # Identificador do worker que reservou o item
+    reservado_em = Column(DateTime)
+    data_registro = Column(DateTime, nullable=False, default=datetime.now)
+    data_processamento = Column(DateTime)
+    erro = Column(Text)
+    
+    # Resultado da análise
+    area_principal = Column(String)  # Área de problema mais citada nos textos
+    palavras_chave = Column(JSON)
+    impacto_estimado = Column(Integer)  # 1-5, maior impacto entre as sugestões
+    polaridade_media = Column(Float)  # -1 a 1
+    sentimento = Column(String)  # negativo, neutro, positivo
+    
+    __table_args__ = (
+        Index("ix_feedback_processamento_fila", "status", "id"),
+    )
+
+class AgendamentoFeedback(Base):
+    """
+    Solicitações de feedback e lembretes agendados por edital.
+    Criados quando o edital muda de status; o serviço de automação lê apenas
+    os itens vencidos pelo índice (status, due_at).
+    """
+    __tablename__ = "feedback_agendamento"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    edital_id = Column(String, ForeignKey("editais_gerados.id"), nullable=False, index=True)
+    tipo_stakeholder = Column(String, nullable=False)  # setor, empresa, licitacao
+    numero_lembrete = Column(Integer, nullable=False, default=0)  # 0 = solicitação inicial
+    due_at = Column(DateTime, nullable=False)
+    destinatarios = Column(JSON)  # Lista de emails
+    
+    # Controle
+    status = Column(String, nullable=False, default="pendente")  # pendente, processando, enviado, respondido, cancelado
+    reservado_em = Column(DateTime)
+    data_criacao = Column(DateTime, default=datetime.now)
+    data_envio = Column(DateTime)
+    erro = Column(Text)
+    
+    __table_args__ = (
+        Index("ix_feedback_agendamento_vencimento", "status", "due_at"),
+        UniqueConstraint("edital_id", "tipo_stakeholder", "numero_lembrete", name="uq_feedback_agendamento_envio"),
+    )
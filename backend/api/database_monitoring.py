@@ -0,0 +1,46 @@
+"""
+Modelos de banco de dados do monitoramento.
+Consumo de tokens, tempo e custo das chamadas de LLM e das tarefas dos agentes CrewAI.
+"""
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, Index
+from datetime import datetime
+import uuid
+
+from api.database import Base
+
+class UsoLLM(Base):
+    """
+    Uma chamada de LLM ou a execução de uma tarefa/etapa de uma crew,
+    registrada por monitoring/llm_usage.py. As chamadas feitas dentro de uma
+    etapa herdam a etapa, o agente e os identificadores da execução.
+    """
+    __tablename__ = "uso_llm"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    tipo = Column(String, nullable=False)  # chamada, tarefa
+    
+    # Execução a que o consumo pertence
+    request_id = Column(String, index=True)  # Geração de edital
+    licitacao_id = Column(String, index=True)  # Processamento de licitação
+    fluxo = Column(String)  # geracao_edital, processamento_licitacao
+    etapa = Column(String)
+    agente = Column(String)
+    modelo = Column(String)
+    
+    # Consumo
+    tokens_prompt = Column(Integer, nullable=False, default=0)
+    tokens_resposta = Column(Integer, nullable=False, default=0)
+    tokens_estimados = Column(Boolean, nullable=False, default=True)  # Sem contagem do servidor de inferência
+    duracao_ms = Column(Float, nullable=False, default=0.0)
+    tentativas = Column(Integer, nullable=False, default=1)
+    custo = Column(Float, nullable=False, default=0.0)
+    
+    sucesso = Column(Boolean, nullable=False, default=True)
+    erro = Column(Text)
+    data_registro = Column(DateTime, nullable=False, default=datetime.now)
+    
+    __table_args__ = (
+        Index("ix_uso_llm_fluxo_etapa", "fluxo", "etapa"),
+        Index("ix_uso_llm_data", "data_registro"),
+    )
@@ -0,0 +1,153 @@
+"""
+Modelos de banco de dados para coleta automatizada (web scraping).
+Agendamentos da coleta com expressões cron, histórico de execuções
+e base de conhecimento de licitações bem-sucedidas.
+"""
+
+from sqlalchemy import Column, String, Integer, Float, DateTime, Text, Boolean, JSON, Index, UniqueConstraint
+from datetime import datetime
+import uuid
+
+from api.database import Base
+
+class AgendamentoScraping(Base):
+    """
+    Agendamento recorrente de coleta, executado pelo agendador interno
+    (services/scraping_scheduler.py) conforme a expressão cron.
+    """
+    __tablename__ = "agendamento_scraping"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    nome = Column(String)
+    alvo = Column(String, nullable=False)  # gov_procurement, correios
+    expressao_cron = Column(String, nullable=False)  # Ex.: "0 6 * * 1" (segundas às 06:00)
+    parametros = Column(JSON)  # categorias, sites, dias_retroativos...
+    
+    # Políticas de execução
+    ativo = Column(Boolean, nullable=False, default=True)
+    jitter_segundos = Column(Integer, nullable=False, default=0)  # Atraso aleatório para espalhar execuções
+    recuperar_perdidas = Column(Boolean, nullable=False, default=True)  # Executa uma vez ao voltar após execuções perdidas
+    
+    # Estado
+    proxima_execucao = Column(DateTime, nullable=False)
+    em_execucao = Column(Boolean, nullable=False, default=False)
+    execucao_iniciada_em = Column(DateTime)
+    ultima_execucao = Column(DateTime)
+    ultima_conclusao = Column(DateTime)
+    ultimo_status = Column(String)  # sucesso, erro, pulada
+    ultimo_erro = Column(Text)
+    execucoes_puladas = Column(Integer, nullable=False, default=0)  # Sobreposição com a execução anterior
+    
+    data_criacao = Column(DateTime, default=datetime.now)
+    
+    __table_args__ = (
+        Index("ix_agendamento_scraping_vencimento", "ativo", "proxima_execucao"),
+    )
+
+class ExecucaoScraping(Base):
+    """
+    Registro de cada execução de coleta (manual, agendada ou via API), com as
+    métricas de volume e tempo usadas para acompanhar a vazão e ajustar a concorrência.
+    """
+    __tablename__ = "scrape_runs"
+    
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    alvo = Column(String, nullable=False)  # gov_procurement, correios
+    origem = Column(String, nullable=False, default="manual")  # manual, agendado
+    agendamento_id = Column(String, index=True)
+    parametros = Column(JSON)
+    
+    # Situação
+    status = Column(String, nullable=False, default="executando")  # executando, sucesso, parcial, erro, interrompido
+    iniciado_em = Column(DateTime, nullable=False, default=datetime.now)
+    finalizado_em = Column(DateTime)
+    duracao_segundos = Column(Float)
+    
+    # Métricas
+    paginas = Column(Integer, nullable=False, default=0)
+    linhas_extraidas = Column(Integer, nullable=False, default=0)
+    bytes_baixados = Column(Integer, nullable=False, default=0)
+    erros = Column(Integer, nullable=False, default=0)
+    ultimo_erro = Column(Text)
+    duracao_por_site = Column(JSON)  # {site: segundos}
+    
+    __table_args__ = (
+        Index("ix_scrape_runs_alvo_inicio", "alvo", "iniciado_em"),
+        Index("ix_scrape_runs_status_inicio", "status", "iniciado_em"),
+    )
+
+class LicitacaoConhecimento(Base):
+    """
+    Licitação bem-sucedida da base de conhecimento, coletada pelo scraper
+    (web_scraping/gov_procurement_scraper.py). Cada edital de um site é único:
+    coletas repetidas atualizam a linha existente.
+    """
+    __tablename__ = "base_conhecimento"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    numero_edital = Column(String, nullable=False)
+    site_origem = Column(String, nullable=False)
+    
+    objeto = Column(Text)
+    categoria = Column(String)
+    tipo_licitacao = Column(String)
+    modalidade = Column(String)
+    orgao = Column(String)
+    valor_estimado = Column(Float)
+    valor_contratado = Column(Float)
+    numero_propostas = Column(Integer)
+    data_abertura = Column(String)
+    data_resultado = Column(String)
+    especificacoes_tecnicas = Column(JSON)  # Lista de especificações
+    criterio_julgamento = Column(String)
+    prazo_execucao = Column(Integer)  # Dias
+    fatores_sucesso = Column(JSON)  # Lista de fatores
+    observacoes = Column(Text)
+    url_fonte = Column(String)
+    
+    data_coleta = Column(DateTime, nullable=False, default=datetime.now)
+    data_atualizacao = Column(DateTime, nullable=False, default=datetime.now)
+    
+    __table_args__ = (
+        UniqueConstraint("numero_edital", "site_origem", name="uq_base_conhecimento_edital_site"),
+        Index("ix_base_conhecimento_categoria_tipo", "categoria", "tipo_licitacao"),
+    )
+
+class InsightConhecimento(Base):
+    """
+    Snapshot materializado das estatísticas da base de conhecimento por
+    categoria e tipo de licitação. Atualizado apenas nos grupos afetados
+    quando licitações são gravadas (services/knowledge_base_insights.py), permite
+    responder às análises lendo um snapshot por grupo em vez de todas as licitações.
+    """
+    __tablename__ = "base_conhecimento_insights"
+    
+    categoria = Column(String, primary_key=True, default="")  # "" para licitações sem categoria
+    tipo_licitacao = Column(String, primary_key=True, default="")
+    
+    total = Column(Integer, nullable=False, default=0)
+    
+    # Valores (valor_contratado ou, na falta, valor_estimado)
+    total_com_valor = Column(Integer, nullable=False, default=0)
+    soma_valores = Column(Float, nullable=False, default=0.0)
+    valor_minimo = Column(Float)
+    valor_maximo = Column(Float)
+    valor_mediana = Column(Float)
+    
+    # Prazos de execução (dias) e número de propostas
+    total_com_prazo = Column(Integer, nullable=False, default=0)
+    soma_prazos = Column(Float, nullable=False, default=0.0)
+    prazo_minimo = Column(Integer)
+    prazo_maximo = Column(Integer)
+    total_com_propostas = Column(Integer, nullable=False, default=0)
+    soma_propostas = Column(Integer, nullable=False, default=0)
+    
+    # Frequências {valor: quantidade}
+    fatores_sucesso = Column(JSON)
+    especificacoes = Column(JSON)
+    criterios_julgamento = Column(JSON)
+    modalidades = Column(JSON)
+    sites_origem = Column(JSON)
+    meses_resultado = Column(JSON)  # {"AAAA-MM": quantidade}
+    
+    data_atualizacao = Column(DateTime, nullable=False, default=datetime.now)
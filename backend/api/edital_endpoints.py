@@ -3,7 +3,7 @@ Endpoints da API para geração de editais de licitação.
 Fornece interface REST para o sistema de geração automatizada.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
@@ -11,6 +11,10 @@ import json
 import uuid
 
 from api.database import get_db, EditalRequest, EditalGerado, HistoricoEdital, TemplateEdital
+from api.projections import resolver_campos, colunas_do_modelo
+from api.edital_queries import listar_editais, obter_edital_com_solicitacao
+from services.feedback_automation import automacao_feedback
+from monitoring.metrics import metricas
 from api.edital_models import (
     EditalRequest as EditalRequestModel,
     EditalResponse,
@@ -19,11 +23,13 @@ from api.edital_models import (
     StatusEdital,
     NivelRisco
 )
-from crewai_agents.edital_main import run_edital_generation_crew
 
 # Router para endpoints de edital
 router = APIRouter(prefix="/api/editais", tags=["Geração de Editais"])
 
+# Colunas de EditalGerado lidas por padrão na listagem (sem conteúdo e análises)
+EDITAL_CAMPOS_LISTA = ("id", "numero_edital", "request_id", "status", "data_criacao", "criado_por", "versao")
+
 @router.post("/gerar", response_model=dict)
 async def gerar_edital(
     request: EditalRequestModel,
@@ -105,8 +111,15 @@ async def processar_geracao_edital(request_data: dict, request_id: str, user_id:
         user_id: ID do usuário
     """
     try:
+        # CrewAI é importado apenas quando um edital é gerado
+        from crewai_agents.edital_main import run_edital_generation_crew
+        
         # Executar o processo de geração
-        resultado = run_edital_generation_crew(request_data, user_id)
+        metricas.editais_em_andamento.inc()
+        try:
+            resultado = run_edital_generation_crew(request_data, user_id)
+        finally:
+            metricas.editais_em_andamento.dec()
         
         # Atualizar status no banco
         db = next(get_db())
@@ -170,41 +183,42 @@ def listar_editais_gerados(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    fields: Optional[str] = Query(
+        None,
+        description="Campos extras do edital separados por vírgula (ex.: analise_risco,conteudo_edital) ou 'todos'"
+    ),
     db: Session = Depends(get_db)
 ):
     """
     Lista editais gerados com filtros opcionais.
+    Apenas as colunas da visão de lista são lidas do banco; o conteúdo e as
+    análises do edital só são carregados quando solicitados em `fields`.
     
     Args:
         skip: Registros a pular (paginação)
         limit: Limite de registros
         status: Filtro por status
+        fields: Campos extras a incluir na projeção
         db: Sessão do banco de dados
     
     Returns:
         List[dict]: Lista de editais gerados
     """
-    query = db.query(EditalGerado)
-    
-    if status:
-        query = query.filter(EditalGerado.status == status)
-    
-    editais = query.offset(skip).limit(limit).all()
+    campos = resolver_campos(
+        fields,
+        disponiveis=colunas_do_modelo(EditalGerado),
+        padrao=EDITAL_CAMPOS_LISTA,
+        obrigatorios=("id", "request_id", "data_criacao")
+    )
+    # Objeto da solicitação vem no mesmo SELECT via JOIN
+    editais = listar_editais(db, campos, status=status, skip=skip, limit=limit)
     
     resultado = []
     for edital in editais:
-        # Buscar dados da solicitação original
-        request_data = db.query(EditalRequest).filter(EditalRequest.id == edital.request_id).first()
-        
-        resultado.append({
-            "id": edital.id,
-            "numero_edital": edital.numero_edital,
-            "objeto": request_data.objeto if request_data else "N/A",
-            "status": edital.status,
-            "data_criacao": edital.data_criacao.isoformat(),
-            "criado_por": edital.criado_por,
-            "versao": edital.versao
-        })
+        item = dict(edital._mapping)
+        item["objeto"] = edital.objeto if edital.objeto is not None else "N/A"
+        item["data_criacao"] = edital.data_criacao.isoformat()
+        resultado.append(item)
     
     return resultado
 
@@ -220,13 +234,13 @@ def obter_edital(edital_id: str, db: Session = Depends(get_db)):
     Returns:
         dict: Dados completos do edital
     """
-    edital = db.query(EditalGerado).filter(EditalGerado.id == edital_id).first()
+    # Edital e solicitação original em uma única consulta
+    encontrado = obter_edital_com_solicitacao(db, edital_id)
     
-    if not edital:
+    if not encontrado:
         raise HTTPException(status_code=404, detail="Edital não encontrado")
     
-    # Buscar dados da solicitação original
-    request_data = db.query(EditalRequest).filter(EditalRequest.id == edital.request_id).first()
+    edital, request_data = encontrado
     
     return {
         "id": edital.id,
@@ -282,6 +296,8 @@ def atualizar_status_edital(
     status_anterior = edital.status
     edital.status = novo_status.value
     edital.data_modificacao = datetime.now()
+    # Solicitações de feedback decorrentes do novo status, na mesma transação
+    automacao_feedback.agendar_por_status(db, edital, novo_status.value)
     
     db.commit()
     
@@ -368,14 +384,13 @@ def registrar_resultado_edital(
     Returns:
         dict: Confirmação do registro
     """
-    # Buscar edital
-    edital = db.query(EditalGerado).filter(EditalGerado.id == edital_id).first()
+    # Buscar edital e dados da solicitação
+    encontrado = obter_edital_com_solicitacao(db, edital_id)
     
-    if not edital:
+    if not encontrado:
         raise HTTPException(status_code=404, detail="Edital não encontrado")
     
-    # Buscar dados da solicitação
-    request_data = db.query(EditalRequest).filter(EditalRequest.id == edital.request_id).first()
+    edital, request_data = encontrado
     
     # Criar registro no histórico
     historico = HistoricoEdital(
@@ -394,6 +409,8 @@ def registrar_resultado_edital(
     )
     
     db.add(historico)
+    # Resultado registrado: agenda o feedback do setor de licitação
+    automacao_feedback.agendar_por_status(db, edital, "resultado")
     db.commit()
     
     return {
@@ -0,0 +1,67 @@
+"""
+Camada de consultas para editais gerados.
+Carrega o edital junto com os dados da solicitação original (EditalRequest)
+em uma única consulta com JOIN, evitando uma ida extra ao banco por edital.
+"""
+
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from api.database import EditalGerado, EditalRequest
+from api.projections import colunas
+
+
+def _join_solicitacao(query):
+    """Anexa a solicitação original via LEFT OUTER JOIN (editais podem não ter solicitação)."""
+    return query.outerjoin(EditalRequest, EditalRequest.id == EditalGerado.request_id)
+
+
+def listar_editais(
+    db: Session,
+    campos: Sequence[str],
+    status: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List:
+    """
+    Lista editais com o objeto da solicitação original em uma única consulta.
+
+    Args:
+        db: Sessão do banco de dados
+        campos: Colunas de EditalGerado a selecionar
+        status: Filtro por status (opcional)
+        skip: Registros a pular
+        limit: Limite de registros
+
+    Returns:
+        List: Linhas com as colunas pedidas e a coluna extra `objeto`
+    """
+    query = _join_solicitacao(
+        db.query(*colunas(EditalGerado, campos), EditalRequest.objeto.label("objeto"))
+    )
+
+    if status:
+        query = query.filter(EditalGerado.status == status)
+
+    return query.order_by(EditalGerado.data_criacao.desc(), EditalGerado.id.desc()).offset(skip).limit(limit).all()
+
+
+def obter_edital_com_solicitacao(db: Session, edital_id: str) -> Optional[Tuple[EditalGerado, Optional[EditalRequest]]]:
+    """
+    Busca um edital e sua solicitação original em uma única consulta.
+
+    Args:
+        db: Sessão do banco de dados
+        edital_id: ID do edital
+
+    Returns:
+        Optional[Tuple]: (edital, solicitação ou None), ou None se o edital não existir
+    """
+    linha = _join_solicitacao(db.query(EditalGerado, EditalRequest)).filter(
+        EditalGerado.id == edital_id
+    ).first()
+
+    if linha is None:
+        return None
+    return linha[0], linha[1]
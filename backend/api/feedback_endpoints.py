@@ -3,7 +3,8 @@ Endpoints da API para sistema de feedback e melhoria contínua.
 Coleta e analisa feedback de todos os stakeholders.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta
@@ -16,6 +17,8 @@ from api.database_feedback import (
     FeedbackSetor, FeedbackEmpresa, FeedbackLicitacao, 
     SessaoFeedback, AnaliseImpacto, ConfiguracaoFeedback
 )
+from api.feedback_rollups import consultar_rollups, metricas_satisfacao, reconstruir_rollups
+from services.feedback_worker import enfileirar_feedback, worker_feedback
 
 # Router para endpoints de feedback
 router = APIRouter(prefix="/api/feedback", tags=["Sistema de Feedback"])
@@ -126,7 +129,6 @@ class FeedbackLicitacaoRequest(BaseModel):
 @router.post("/setor")
 def registrar_feedback_setor(
     feedback: FeedbackSetorRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -156,10 +158,11 @@ def registrar_feedback_setor(
         )
         
         db.add(feedback_db)
+        db.flush()
+        # Análise e rollups ficam com o worker, que processa a fila em lotes
+        enfileirar_feedback(db, "setor", feedback_db.id)
         db.commit()
-        
-        # Processar feedback em background
-        background_tasks.add_task(processar_feedback_setor, feedback_db.id)
+        worker_feedback.notificar()
         
         return {
             "sucesso": True,
@@ -175,7 +178,6 @@ def registrar_feedback_setor(
 @router.post("/empresa")
 def registrar_feedback_empresa(
     feedback: FeedbackEmpresaRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -211,10 +213,11 @@ def registrar_feedback_empresa(
         )
         
         db.add(feedback_db)
+        db.flush()
+        # Análise e rollups ficam com o worker, que processa a fila em lotes
+        enfileirar_feedback(db, "empresa", feedback_db.id)
         db.commit()
-        
-        # Processar feedback em background
-        background_tasks.add_task(processar_feedback_empresa, feedback_db.id)
+        worker_feedback.notificar()
         
         return {
             "sucesso": True,
@@ -230,7 +233,6 @@ def registrar_feedback_empresa(
 @router.post("/licitacao")
 def registrar_feedback_licitacao(
     feedback: FeedbackLicitacaoRequest,
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
 ):
     """
@@ -268,10 +270,11 @@ def registrar_feedback_licitacao(
         )
         
         db.add(feedback_db)
+        db.flush()
+        # Análise e rollups ficam com o worker, que processa a fila em lotes
+        enfileirar_feedback(db, "licitacao", feedback_db.id)
         db.commit()
-        
-        # Processar feedback em background
-        background_tasks.add_task(processar_feedback_licitacao, feedback_db.id)
+        worker_feedback.notificar()
         
         return {
             "sucesso": True,
@@ -284,6 +287,25 @@ def registrar_feedback_licitacao(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao registrar feedback: {str(e)}")
 
+def _top_frequencias(db: Session, coluna, filtro, limite: int = 5) -> Dict[str, int]:
+    """
+    Conta as ocorrências de cada valor de uma coluna de texto via GROUP BY.
+
+    Args:
+        db: Sessão do banco de dados
+        coluna: Coluna agrupada
+        filtro: Condição do período
+        limite: Quantidade de valores mais frequentes
+
+    Returns:
+        Dict[str, int]: Valores mais frequentes e suas contagens, em ordem decrescente
+    """
+    total = func.count().label("total")
+    linhas = db.query(coluna, total).filter(
+        filtro, coluna.isnot(None), coluna != ""
+    ).group_by(coluna).order_by(total.desc()).limit(limite).all()
+    return {valor: quantidade for valor, quantidade in linhas}
+
 @router.get("/analytics/dashboard")
 def dashboard_feedback(
     periodo_dias: int = Query(30, description="Período em dias para análise"),
@@ -291,50 +313,29 @@ def dashboard_feedback(
 ):
     """
     Dashboard com analytics consolidados de feedback.
+    Totais e satisfação vêm dos rollups diários (uma linha por dia e tipo de
+    stakeholder); problemas e sugestões são agrupados no banco (GROUP BY)
+    sobre o índice de data_feedback.
     """
     try:
-        data_inicio = datetime.now() - timedelta(days=periodo_dias)
-        
-        # Estatísticas gerais
-        total_feedbacks_setor = db.query(FeedbackSetor).filter(
-            FeedbackSetor.data_feedback >= data_inicio
-        ).count()
-        
-        total_feedbacks_empresa = db.query(FeedbackEmpresa).filter(
-            FeedbackEmpresa.data_feedback >= data_inicio
-        ).count()
-        
-        total_feedbacks_licitacao = db.query(FeedbackLicitacao).filter(
-            FeedbackLicitacao.data_feedback >= data_inicio
-        ).count()
-        
-        # Médias de satisfação
-        feedbacks_setor = db.query(FeedbackSetor).filter(
-            FeedbackSetor.data_feedback >= data_inicio
-        ).all()
+        # Janela alinhada ao início do dia, granularidade dos rollups
+        data_inicio = datetime.combine((datetime.now() - timedelta(days=periodo_dias)).date(), datetime.min.time())
+        filtro_setor = FeedbackSetor.data_feedback >= data_inicio
         
-        if feedbacks_setor:
-            media_satisfacao_setor = sum([
-                (f.facilidade_uso + f.qualidade_edital + f.adequacao_requisitos + 
-                 f.tempo_processamento + f.clareza_especificacoes) / 5
-                for f in feedbacks_setor
-            ]) / len(feedbacks_setor)
-        else:
-            media_satisfacao_setor = 0
-        
-        # Principais problemas identificados
-        problemas_frequentes = {}
-        for feedback in feedbacks_setor:
-            if feedback.problemas_encontrados:
-                problemas_frequentes[feedback.problemas_encontrados] = \
-                    problemas_frequentes.get(feedback.problemas_encontrados, 0) + 1
+        # Totais por tipo de stakeholder a partir dos rollups do período
+        resumo = {
+            rollup["tipo_stakeholder"]: metricas_satisfacao(rollup)
+            for rollup in consultar_rollups(db, data_inicio.date())
+        }
+        vazio = {"total_feedbacks": 0, "media": 0}
+        total_feedbacks_setor = resumo.get("setor", vazio)["total_feedbacks"]
+        total_feedbacks_empresa = resumo.get("empresa", vazio)["total_feedbacks"]
+        total_feedbacks_licitacao = resumo.get("licitacao", vazio)["total_feedbacks"]
+        media_satisfacao_setor = resumo.get("setor", vazio)["media"]
         
-        # Sugestões mais comuns
-        sugestoes_frequentes = {}
-        for feedback in feedbacks_setor:
-            if feedback.sugestoes_melhoria:
-                sugestoes_frequentes[feedback.sugestoes_melhoria] = \
-                    sugestoes_frequentes.get(feedback.sugestoes_melhoria, 0) + 1
+        # Principais problemas identificados e sugestões mais comuns
+        problemas_frequentes = _top_frequencias(db, FeedbackSetor.problemas_encontrados, filtro_setor)
+        sugestoes_frequentes = _top_frequencias(db, FeedbackSetor.sugestoes_melhoria, filtro_setor)
         
         return {
             "periodo_analise": f"{periodo_dias} dias",
@@ -351,16 +352,71 @@ def dashboard_feedback(
                 "escala": "1-5 (1=Muito Insatisfeito, 5=Muito Satisfeito)"
             },
             "insights": {
-                "problemas_mais_frequentes": dict(sorted(problemas_frequentes.items(), 
-                                                        key=lambda x: x[1], reverse=True)[:5]),
-                "sugestoes_mais_comuns": dict(sorted(sugestoes_frequentes.items(), 
-                                                   key=lambda x: x[1], reverse=True)[:5])
+                "problemas_mais_frequentes": problemas_frequentes,
+                "sugestoes_mais_comuns": sugestoes_frequentes
             }
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar dashboard: {str(e)}")
 
+@router.get("/analytics/rollups")
+def consultar_rollups_feedback(
+    periodo_dias: int = Query(30, description="Período em dias para análise"),
+    dimensao: str = Query("geral", description="Dimensão: geral, edital ou setor"),
+    tipo_stakeholder: Optional[str] = Query(None, description="setor, empresa ou licitacao"),
+    chave: Optional[str] = Query(None, description="ID do edital ou nome do setor"),
+    db: Session = Depends(get_db)
+):
+    """
+    Satisfação agregada por dimensão a partir dos rollups diários.
+    """
+    if dimensao not in ("geral", "edital", "setor"):
+        raise HTTPException(status_code=400, detail="Dimensão inválida. Use: geral, edital ou setor")
+    
+    try:
+        data_inicio = (datetime.now() - timedelta(days=periodo_dias)).date()
+        rollups = consultar_rollups(db, data_inicio, dimensao=dimensao, tipo=tipo_stakeholder, chave=chave)
+        
+        return {
+            "periodo_analise": f"{periodo_dias} dias",
+            "dimensao": dimensao,
+            "resultados": [
+                {
+                    "tipo_stakeholder": rollup["tipo_stakeholder"],
+                    "chave": rollup["chave"],
+                    **metricas_satisfacao(rollup)
+                }
+                for rollup in rollups
+            ]
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar rollups: {str(e)}")
+
+@router.post("/analytics/rollups/reconstruir")
+def reconstruir_rollups_feedback(db: Session = Depends(get_db)):
+    """
+    Recalcula os rollups diários a partir de todos os feedbacks registrados.
+    """
+    try:
+        linhas = reconstruir_rollups(db)
+        return {"sucesso": True, "linhas_rollup": linhas, "data_reconstrucao": datetime.now().isoformat()}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao reconstruir rollups: {str(e)}")
+
+@router.get("/processamento/status")
+def status_processamento_feedback(db: Session = Depends(get_db)):
+    """
+    Situação da fila de processamento de feedback: itens por status,
+    atraso do pendente mais antigo e métricas de lote e de atraso do worker.
+    """
+    try:
+        return worker_feedback.status(db)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao consultar processamento: {str(e)}")
+
 @router.get("/relatorio/melhorias")
 def relatorio_melhorias_implementadas(
     db: Session = Depends(get_db)
@@ -397,21 +453,6 @@ def relatorio_melhorias_implementadas(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
 
-# Funções de processamento em background
-async def processar_feedback_setor(feedback_id: str):
-    """Processa feedback do setor em background"""
-    # Aqui seria implementada análise automática do feedback
-    # Por exemplo: identificar padrões, gerar alertas, etc.
-    print(f"Processando feedback do setor: {feedback_id}")
-
-async def processar_feedback_empresa(feedback_id: str):
-    """Processa feedback da empresa em background"""
-    print(f"Processando feedback da empresa: {feedback_id}")
-
-async def processar_feedback_licitacao(feedback_id: str):
-    """Processa feedback do setor de licitação em background"""
-    print(f"Processando feedback do setor de licitação: {feedback_id}")
-
 @router.post("/sessao")
 def agendar_sessao_feedback(
     titulo: str,
@@ -0,0 +1,267 @@
+"""
+Agregados diários (rollups) das métricas de feedback.
+
+Cada feedback registrado incrementa as linhas do dia em feedback_rollup_diario
+para as dimensões geral, edital e setor. O worker de processamento
+(services/feedback_worker.py) soma os incrementos de um lote inteiro antes de
+gravar, com um upsert por linha de rollup afetada. Consultas de
+satisfação para qualquer período somam uma linha por dia (O(dias)) em vez de
+percorrer todos os feedbacks (O(linhas)).
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from api.database_feedback import (
+    FeedbackSetor, FeedbackEmpresa, FeedbackLicitacao, FeedbackProcessamento, FeedbackRollupDiario
+)
+
+# Notas (1-5) que compõem a satisfação individual de cada tipo de stakeholder:
+# (obrigatórias, com padrão 3). Mesmo critério de FeedbackAnalysisTool._calcular_satisfacao
+CAMPOS_SATISFACAO = {
+    "setor": (("facilidade_uso", "qualidade_edital", "adequacao_requisitos"),
+              ("tempo_processamento", "clareza_especificacoes")),
+    "empresa": ((), ("clareza_objeto", "adequacao_especificacoes", "prazo_elaboracao_proposta",
+                     "criterios_julgamento", "valor_estimado")),
+    "licitacao": (("qualidade_tecnica", "conformidade_legal"), ("adequacao_modalidade", "clareza_redacao")),
+}
+# Nas empresas 0 é "sem nota"; nos demais tipos 0 é nota e o divisor é fixo
+ZERO_SEM_NOTA = ("empresa",)
+
+MODELOS_FEEDBACK = {
+    "setor": FeedbackSetor,
+    "empresa": FeedbackEmpresa,
+    "licitacao": FeedbackLicitacao,
+}
+
+FAIXAS = (1, 2, 3, 4, 5)
+METRICAS = ("total_feedbacks", "total_avaliados", "soma_satisfacao") + tuple(f"faixa_{f}" for f in FAIXAS)
+CHAVE_PRIMARIA = ("dia", "tipo_stakeholder", "dimensao", "chave")
+
+
+def satisfacao_individual(tipo: str, feedback) -> Optional[float]:
+    """
+    Média das notas de um feedback, ou None se ele não conta como avaliado.
+
+    - empresa: média das notas preenchidas (None e 0 ficam de fora);
+    - setor e licitação: 0 é nota; sem alguma nota obrigatória o feedback não
+      é avaliado, e notas com padrão não preenchidas valem 3.
+    """
+    obrigatorios, com_padrao = CAMPOS_SATISFACAO[tipo]
+    if tipo in ZERO_SEM_NOTA:
+        notas = [nota for nota in (getattr(feedback, campo) for campo in com_padrao) if nota]
+        return sum(notas) / len(notas) if notas else None
+
+    notas = [getattr(feedback, campo) for campo in obrigatorios]
+    if any(nota is None for nota in notas):
+        return None
+    notas += [3 if getattr(feedback, campo) is None else getattr(feedback, campo) for campo in com_padrao]
+    return sum(notas) / len(notas)
+
+
+def _dimensoes(tipo: str, feedback) -> List[Tuple[str, str]]:
+    """Pares (dimensão, chave) incrementados por um feedback."""
+    dimensoes = [("geral", ""), ("edital", feedback.edital_id)]
+    if tipo == "setor" and feedback.setor_nome:
+        dimensoes.append(("setor", feedback.setor_nome))
+    return dimensoes
+
+
+def _incrementos(tipo: str, feedback) -> Dict[str, Any]:
+    """Valores somados às métricas do rollup por um único feedback."""
+    incrementos = {metrica: 0 for metrica in METRICAS}
+    incrementos["total_feedbacks"] = 1
+    media = satisfacao_individual(tipo, feedback)
+    if media is not None:
+        incrementos["total_avaliados"] = 1
+        incrementos["soma_satisfacao"] = media
+        faixa = int(round(media))
+        if faixa in FAIXAS:
+            incrementos[f"faixa_{faixa}"] = 1
+    return incrementos
+
+
+def _upsert(db: Session, valores: Dict[str, Any]) -> None:
+    """Insere a linha do rollup ou soma as métricas à linha existente."""
+    dialeto = db.get_bind().dialect.name
+    tabela = FeedbackRollupDiario.__table__
+
+    if dialeto in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialeto == "sqlite" else pg_insert
+        stmt = insert(tabela).values(**valores)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(CHAVE_PRIMARIA),
+            set_={m: tabela.c[m] + stmt.excluded[m] for m in METRICAS}
+        )
+        db.execute(stmt)
+        return
+
+    # Demais bancos: leitura e atualização dentro da transação corrente
+    linha = db.get(FeedbackRollupDiario, tuple(valores[c] for c in CHAVE_PRIMARIA))
+    if linha is None:
+        db.add(FeedbackRollupDiario(**valores))
+    else:
+        for metrica in METRICAS:
+            setattr(linha, metrica, getattr(linha, metrica) + valores[metrica])
+
+
+def atualizar_rollups(db: Session, tipo: str, feedback) -> None:
+    """
+    Incrementa os rollups do dia com um feedback recém-criado.
+    A gravação só é efetivada no commit da sessão recebida.
+
+    Args:
+        db: Sessão do banco de dados
+        tipo: Tipo de stakeholder (setor, empresa, licitacao)
+        feedback: Instância de FeedbackSetor, FeedbackEmpresa ou FeedbackLicitacao
+    """
+    atualizar_rollups_lote(db, [(tipo, feedback)])
+
+
+def atualizar_rollups_lote(db: Session, itens: List[Tuple[str, Any]]) -> int:
+    """
+    Incrementa os rollups com um lote de feedbacks.
+    Os incrementos são somados em memória, então cada linha de rollup
+    (dia, tipo, dimensão, chave) recebe um único upsert por lote.
+
+    Args:
+        db: Sessão do banco de dados
+        itens: Pares (tipo de stakeholder, feedback)
+
+    Returns:
+        int: Quantidade de linhas de rollup atualizadas
+    """
+    acumulado = defaultdict(lambda: {metrica: 0 for metrica in METRICAS})
+    for tipo, feedback in itens:
+        dia = (feedback.data_feedback or datetime.now()).date()
+        incrementos = _incrementos(tipo, feedback)
+        for dimensao, chave in _dimensoes(tipo, feedback):
+            linha = acumulado[(dia, tipo, dimensao, chave)]
+            for metrica in METRICAS:
+                linha[metrica] += incrementos[metrica]
+
+    for chave, metricas in acumulado.items():
+        _upsert(db, {**dict(zip(CHAVE_PRIMARIA, chave)), **metricas})
+    return len(acumulado)
+
+
+def _nao_processados():
+    """Ids dos feedbacks ainda na fila do worker (fora dos rollups até serem processados)."""
+    return select(FeedbackProcessamento.feedback_id).where(FeedbackProcessamento.status != "processado")
+
+
+def reconstruir_rollups(db: Session) -> int:
+    """
+    Recalcula todos os rollups a partir dos feedbacks brutos.
+    Usada para popular a tabela em bases que já tinham feedbacks antes dos
+    rollups existirem, ou para corrigir divergências. Feedbacks ainda na fila
+    de processamento ficam de fora: o worker os soma ao processá-los.
+
+    Returns:
+        int: Quantidade de linhas de rollup gravadas
+    """
+    acumulado = defaultdict(lambda: {metrica: 0 for metrica in METRICAS})
+
+    for tipo, modelo in MODELOS_FEEDBACK.items():
+        for feedback in db.query(modelo).filter(modelo.id.not_in(_nao_processados())).yield_per(1000):
+            dia = (feedback.data_feedback or datetime.now()).date()
+            incrementos = _incrementos(tipo, feedback)
+            for dimensao, chave in _dimensoes(tipo, feedback):
+                linha = acumulado[(dia, tipo, dimensao, chave)]
+                for metrica in METRICAS:
+                    linha[metrica] += incrementos[metrica]
+
+    db.query(FeedbackRollupDiario).delete()
+    db.bulk_insert_mappings(FeedbackRollupDiario, [
+        dict(zip(CHAVE_PRIMARIA, chave), **metricas) for chave, metricas in acumulado.items()
+    ])
+    db.commit()
+    return len(acumulado)
+
+
+def preencher_rollups_vazios(db: Session) -> int:
+    """
+    Executa reconstruir_rollups uma única vez, quando feedback_rollup_diario
+    está vazia mas já existem feedbacks processados (bases anteriores aos
+    rollups, em que create_db_tables acabou de criar a tabela). Com a tabela
+    populada, não faz nada.
+
+    Returns:
+        int: Quantidade de linhas de rollup gravadas (0 se nada foi feito)
+    """
+    if db.query(FeedbackRollupDiario.dia).first() is not None:
+        return 0
+    if not any(
+        db.query(modelo.id).filter(modelo.id.not_in(_nao_processados())).first()
+        for modelo in MODELOS_FEEDBACK.values()
+    ):
+        return 0
+    return reconstruir_rollups(db)
+
+
+def consultar_rollups(
+    db: Session,
+    inicio: date,
+    fim: Optional[date] = None,
+    dimensao: str = "geral",
+    tipo: Optional[str] = None,
+    chave: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Soma os rollups diários de um período.
+
+    Args:
+        db: Sessão do banco de dados
+        inicio: Primeiro dia do período (inclusive)
+        fim: Último dia do período (inclusive, padrão: sem limite)
+        dimensao: geral, edital ou setor
+        tipo: Filtra um tipo de stakeholder (opcional)
+        chave: Filtra um edital ou setor específico (opcional)
+
+    Returns:
+        List[Dict]: Uma entrada por (tipo_stakeholder, chave) com as métricas somadas
+    """
+    r = FeedbackRollupDiario
+    query = db.query(
+        r.tipo_stakeholder, r.chave, *[func.sum(getattr(r, m)).label(m) for m in METRICAS]
+    ).filter(r.dimensao == dimensao, r.dia >= inicio)
+
+    if fim is not None:
+        query = query.filter(r.dia <= fim)
+    if tipo is not None:
+        query = query.filter(r.tipo_stakeholder == tipo)
+    if chave is not None:
+        query = query.filter(r.chave == chave)
+
+    linhas = query.group_by(r.tipo_stakeholder, r.chave).all()
+    return [dict(linha._mapping) for linha in linhas]
+
+
+def metricas_satisfacao(rollup: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converte métricas somadas de rollup em média e distribuição percentual.
+
+    Args:
+        rollup: Entrada retornada por consultar_rollups
+
+    Returns:
+        Dict: total de feedbacks, total avaliado, média e distribuição (% por faixa 1-5)
+    """
+    avaliados = rollup["total_avaliados"] or 0
+    media = rollup["soma_satisfacao"] / avaliados if avaliados else 0
+    distribuicao = {
+        f: round((rollup[f"faixa_{f}"] or 0) / avaliados * 100, 1) if avaliados else 0.0
+        for f in FAIXAS
+    }
+    return {
+        "total_feedbacks": rollup["total_feedbacks"] or 0,
+        "total_respostas": avaliados,
+        "media": round(media, 2),
+        "distribuicao": distribuicao
+    }
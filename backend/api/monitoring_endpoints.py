@@ -0,0 +1,100 @@
+"""
+Endpoints da API para monitoramento.
+Métricas do Prometheus (GET /metrics) e consumo dos agentes: tokens, tempo,
+tentativas e custo por etapa, agente, modelo e execução (tabela uso_llm).
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from api.database import get_db
+from monitoring.llm_usage import AGRUPAMENTOS, listar_uso, resumir_uso, uso_para_dict
+from monitoring.metrics import TIPO_CONTEUDO, metricas
+
+# Router para endpoints de monitoramento
+router = APIRouter(prefix="/api/monitoramento", tags=["Monitoramento"])
+# GET /metrics fica na raiz, onde o Prometheus coleta por padrão
+router_metricas = APIRouter(tags=["Monitoramento"])
+
+@router_metricas.get("/metrics", include_in_schema=False)
+def metricas_prometheus():
+    """
+    Métricas do processo no formato de exposição do Prometheus.
+    """
+    return Response(content=metricas.gerar(), media_type=TIPO_CONTEUDO)
+
+TIPOS_USO = ("tarefa", "chamada")
+
+@router.get("/uso-llm/resumo")
+def resumo_uso_llm(
+    agrupar_por: str = "etapa",
+    tipo: str = "tarefa",
+    request_id: Optional[str] = None,
+    licitacao_id: Optional[str] = None,
+    fluxo: Optional[str] = None,
+    dias: Optional[int] = Query(None, ge=1, le=365),
+    db: Session = Depends(get_db)
+):
+    """
+    Consumo agregado, com os grupos de maior custo e tempo primeiro.
+    
+    Args:
+        agrupar_por: etapa, agente, modelo, fluxo, request_id ou licitacao_id
+        tipo: tarefa (etapas das crews) ou chamada (chamadas de LLM)
+        request_id: Filtro por geração de edital
+        licitacao_id: Filtro por licitação processada
+        fluxo: Filtro por fluxo (geracao_edital, processamento_licitacao, busca_licitacoes)
+        dias: Apenas os últimos N dias
+    
+    Returns:
+        dict: Totais por grupo e total geral
+    """
+    if agrupar_por not in AGRUPAMENTOS:
+        raise HTTPException(status_code=400, detail=f"Agrupamento inválido. Use: {', '.join(AGRUPAMENTOS)}")
+    if tipo not in TIPOS_USO:
+        raise HTTPException(status_code=400, detail=f"Tipo inválido. Use: {', '.join(TIPOS_USO)}")
+    
+    try:
+        grupos = resumir_uso(
+            db, agrupar_por=agrupar_por, tipo=tipo, request_id=request_id,
+            licitacao_id=licitacao_id, fluxo=fluxo, dias=dias
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao resumir uso de LLM: {str(e)}")
+    
+    return {
+        "agrupar_por": agrupar_por,
+        "tipo": tipo,
+        "grupos": grupos,
+        "total": {
+            campo: round(sum(g[campo] for g in grupos), 6)
+            for campo in ("registros", "tokens_prompt", "tokens_resposta", "tokens_total",
+                          "duracao_total_ms", "tentativas", "custo", "falhas")
+        }
+    }
+
+@router.get("/uso-llm")
+def listar_uso_llm(
+    request_id: Optional[str] = None,
+    licitacao_id: Optional[str] = None,
+    tipo: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db)
+):
+    """
+    Registros de uso (mais recentes primeiro).
+    
+    Args:
+        request_id: Filtro por geração de edital
+        licitacao_id: Filtro por licitação processada
+        tipo: tarefa ou chamada
+        limit: Quantidade máxima de registros
+    """
+    if tipo and tipo not in TIPOS_USO:
+        raise HTTPException(status_code=400, detail=f"Tipo inválido. Use: {', '.join(TIPOS_USO)}")
+    registros = listar_uso(db, request_id=request_id, licitacao_id=licitacao_id, tipo=tipo, limit=limit)
+    return {
+        "registros": [uso_para_dict(r) for r in registros],
+        "total": len(registros)
+    }
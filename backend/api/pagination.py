@@ -0,0 +1,135 @@
+"""
+Utilitários de paginação por cursor (keyset) para os endpoints de listagem.
+O cursor codifica os valores da última linha retornada, de modo que a próxima
+página é obtida com um filtro indexado em vez de OFFSET, mantendo o tempo de
+resposta constante independentemente da profundidade da página.
+Colunas de ordenação que aceitam NULL ficam com os NULLs no fim da ordem
+decrescente, e o filtro do cursor os inclui, para que nenhuma linha fique inacessível.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# Cabeçalho HTTP usado para devolver o cursor da próxima página
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _serializar_valor(valor: Any) -> Any:
+    """Converte valores de coluna em algo serializável em JSON."""
+    if isinstance(valor, datetime):
+        return {"dt": valor.isoformat()}
+    return valor
+
+
+def _desserializar_valor(valor: Any) -> Any:
+    """Operação inversa de _serializar_valor."""
+    if isinstance(valor, dict) and "dt" in valor:
+        return datetime.fromisoformat(valor["dt"])
+    return valor
+
+
+def encode_cursor(valores: Sequence[Any]) -> str:
+    """
+    Codifica os valores de ordenação da última linha em um cursor opaco.
+
+    Args:
+        valores: Valores das colunas de ordenação, na mesma ordem da consulta
+
+    Returns:
+        str: Cursor em base64 seguro para URL
+    """
+    bruto = json.dumps([_serializar_valor(v) for v in valores], separators=(",", ":"))
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, tamanho: int) -> List[Any]:
+    """
+    Decodifica um cursor gerado por encode_cursor.
+
+    Args:
+        cursor: Cursor recebido do cliente
+        tamanho: Quantidade esperada de valores de ordenação
+
+    Returns:
+        List[Any]: Valores das colunas de ordenação
+
+    Raises:
+        HTTPException: 400 se o cursor for inválido
+    """
+    try:
+        preenchimento = "=" * (-len(cursor) % 4)
+        bruto = base64.urlsafe_b64decode(cursor + preenchimento).decode("utf-8")
+        valores = [_desserializar_valor(v) for v in json.loads(bruto)]
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+
+    if len(valores) != tamanho:
+        raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+    return valores
+
+
+def _aceita_nulo(coluna) -> bool:
+    return getattr(coluna, "nullable", True) and not getattr(coluna, "primary_key", False)
+
+
+def _posterior(coluna, valor):
+    """Condição para a coluna vir depois de `valor` na ordem decrescente com NULLs no fim."""
+    if valor is None:
+        return None
+    if _aceita_nulo(coluna):
+        return or_(coluna < valor, coluna.is_(None))
+    return coluna < valor
+
+
+def _igual(coluna, valor):
+    return coluna.is_(None) if valor is None else coluna == valor
+
+
+def keyset_paginate(query, colunas: Sequence, cursor: Optional[str], limit: int,
+                    offset: int = 0) -> Tuple[list, Optional[str]]:
+    """
+    Aplica ordenação decrescente e paginação por cursor a uma consulta.
+
+    As colunas devem formar uma chave única (ex.: data + id) e estar cobertas
+    por um índice composto na mesma ordem para que o filtro seja eficiente.
+
+    Args:
+        query: Consulta SQLAlchemy já filtrada
+        colunas: Colunas de ordenação (a última deve ser única e não nula)
+        cursor: Cursor da página anterior, se houver
+        limit: Quantidade máxima de registros
+        offset: Registros a pular (apenas para o parâmetro legado `skip`, sem cursor)
+
+    Returns:
+        Tuple[list, Optional[str]]: Registros da página e cursor da próxima página
+    """
+    if cursor:
+        valores = decode_cursor(cursor, len(colunas))
+        # (c1 < v1) OR (c1 = v1 AND c2 < v2) OR ..., com NULL depois de qualquer valor
+        condicoes = []
+        for i, coluna in enumerate(colunas):
+            posterior = _posterior(coluna, valores[i])
+            if posterior is not None:
+                condicoes.append(and_(*[_igual(colunas[j], valores[j]) for j in range(i)], posterior))
+        if not condicoes:
+            raise HTTPException(status_code=400, detail="Cursor de paginação inválido")
+        query = query.filter(or_(*condicoes))
+
+    query = query.order_by(*[
+        coluna.desc().nulls_last() if _aceita_nulo(coluna) else coluna.desc() for coluna in colunas
+    ])
+    # Busca um registro extra para saber se existe próxima página
+    registros = query.offset(offset).limit(limit + 1).all()
+
+    proximo_cursor = None
+    if len(registros) > limit:
+        registros = registros[:limit]
+        ultimo = registros[-1]
+        proximo_cursor = encode_cursor([getattr(ultimo, coluna.key) for coluna in colunas])
+
+    return registros, proximo_cursor
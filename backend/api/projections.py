@@ -0,0 +1,67 @@
+"""
+Projeções de colunas para os endpoints de listagem.
+Permite selecionar no SQL apenas as colunas exibidas nas listas, evitando
+carregar e serializar colunas de texto longo em cada linha. O parâmetro
+`fields` dos endpoints adiciona colunas extras sob demanda.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException
+
+# Valor de `fields` que seleciona todas as colunas do modelo
+TODOS_CAMPOS = ("todos", "*")
+
+
+def resolver_campos(
+    fields: Optional[str],
+    disponiveis: Sequence[str],
+    padrao: Sequence[str],
+    obrigatorios: Sequence[str] = ()
+) -> List[str]:
+    """
+    Resolve a lista final de campos de uma projeção.
+
+    Args:
+        fields: Campos extras separados por vírgula, ou "todos" para todas as colunas
+        disponiveis: Colunas que podem ser solicitadas
+        padrao: Colunas retornadas quando nada extra é pedido
+        obrigatorios: Colunas sempre incluídas (ex.: chaves de paginação)
+
+    Returns:
+        List[str]: Campos na ordem de declaração do modelo
+
+    Raises:
+        HTTPException: 400 se algum campo solicitado não existir
+    """
+    selecionados = set(padrao) | set(obrigatorios)
+
+    if fields:
+        pedidos = [campo.strip() for campo in fields.split(",") if campo.strip()]
+        if any(campo in TODOS_CAMPOS for campo in pedidos):
+            selecionados = set(disponiveis)
+        else:
+            invalidos = [campo for campo in pedidos if campo not in disponiveis]
+            if invalidos:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Campos inválidos em 'fields': {', '.join(invalidos)}"
+                )
+            selecionados.update(pedidos)
+
+    return [campo for campo in disponiveis if campo in selecionados]
+
+
+def colunas_do_modelo(model) -> List[str]:
+    """Retorna os nomes das colunas mapeadas de um modelo ORM."""
+    return [coluna.key for coluna in model.__table__.columns]
+
+
+def colunas(model, campos: Iterable[str]) -> list:
+    """Converte nomes de campos nas colunas correspondentes do modelo."""
+    return [getattr(model, campo) for campo in campos]
+
+
+def linha_para_dict(linha) -> Dict[str, Any]:
+    """Converte uma linha de resultado (Row) de uma projeção em dicionário."""
+    return dict(linha._mapping)
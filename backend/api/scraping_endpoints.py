@@ -3,20 +3,37 @@ Endpoints da API para web scraping e gestão da base de conhecimento.
 Permite executar coleta de dados e consultar insights.
 """
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Depends, Query
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import datetime
 import json
 import asyncio
+import uuid
 
 from api.database import get_db
-from web_scraping.gov_procurement_scraper import GovProcurementScraper
-from crewai_agents.knowledge_base_tools import KnowledgeBaseTool, KnowledgeBaseAnalyticsTool
+from api.database_scraping import AgendamentoScraping, ExecucaoScraping
+from services.cron import ExpressaoCron
+from services.knowledge_base_insights import analisar_base, reconstruir_insights, resumo_base
+from services.knowledge_base_store import contar_licitacoes
+from services.scraping_scheduler import EXECUTORES, FREQUENCIAS_CRON, calcular_proxima
+from services.scrape_runs import (
+    execucao_para_dict, listar_execucoes, marcar_interrompidas, registrar_execucao, resumir_execucoes
+)
 
 # Router para endpoints de scraping
 router = APIRouter(prefix="/api/scraping", tags=["Web Scraping e Base de Conhecimento"])
 
+# Categorias usadas quando a coleta não especifica nenhuma
+CATEGORIAS_PADRAO = [
+    'serviços de limpeza',
+    'equipamentos de informática',
+    'material de escritório',
+    'serviços de segurança',
+    'serviços de manutenção'
+]
+
 @router.post("/executar")
 async def executar_scraping(
     background_tasks: BackgroundTasks,
@@ -38,13 +55,7 @@ async def executar_scraping(
     try:
         # Categorias padrão se não especificadas
         if categorias is None:
-            categorias = [
-                'serviços de limpeza',
-                'equipamentos de informática',
-                'material de escritório',
-                'serviços de segurança',
-                'serviços de manutenção'
-            ]
+            categorias = CATEGORIAS_PADRAO
         
         # Iniciar scraping em background
         background_tasks.add_task(
@@ -80,43 +91,95 @@ async def executar_scraping_background(
         salvar_automatico: Se deve salvar automaticamente
     """
     try:
-        print(f"🚀 Iniciando scraping para categorias: {categorias}")
-        
-        # Criar instância do scraper
-        scraper = GovProcurementScraper()
-        
-        # Executar scraping
-        licitacoes = await scraper.scrape_all_sites(categorias)
-        
-        if licitacoes and salvar_automatico:
-            # Salvar na base de conhecimento
-            filepath = await scraper.save_to_knowledge_base(licitacoes)
-            print(f"✅ Scraping concluído. {len(licitacoes)} licitações salvas em {filepath}")
-        else:
-            print(f"⚠️ Scraping concluído mas nenhuma licitação foi encontrada")
+        # Métricas da execução gravadas em scrape_runs
+        async with registrar_execucao("gov_procurement", {"categorias": categorias, "sites": sites}):
+            print(f"🚀 Iniciando scraping para categorias: {categorias}")
+            
+            # Playwright é importado apenas quando uma coleta é executada
+            from web_scraping.gov_procurement_scraper import GovProcurementScraper
+            
+            # Criar instância do scraper
+            scraper = GovProcurementScraper()
+            
+            # Executar scraping
+            licitacoes = await scraper.scrape_all_sites(categorias)
+            
+            if licitacoes and salvar_automatico:
+                # Salvar na base de conhecimento
+                total = await scraper.save_to_knowledge_base(licitacoes)
+                print(f"✅ Scraping concluído. {total} licitações gravadas na base de conhecimento")
+            else:
+                print(f"⚠️ Scraping concluído mas nenhuma licitação foi encontrada")
             
     except Exception as e:
         print(f"❌ Erro durante scraping em background: {str(e)}")
 
 @router.get("/status")
-def verificar_status_scraping():
+def verificar_status_scraping(db: Session = Depends(get_db)):
     """
-    Verifica o status atual do scraping.
-    Nota: Em produção, isso seria implementado com Redis ou banco de dados.
+    Verifica o status atual do scraping a partir das execuções registradas.
     """
-    # Simulação de status - em produção usaria Redis/DB para tracking
+    try:
+        marcar_interrompidas(db)
+        em_andamento = listar_execucoes(db, status="executando", limit=20)
+        concluidas = db.query(ExecucaoScraping).filter(ExecucaoScraping.status != "executando") \
+            .order_by(ExecucaoScraping.iniciado_em.desc()).first()
+        proxima = db.query(func.min(AgendamentoScraping.proxima_execucao)) \
+            .filter(AgendamentoScraping.ativo.is_(True)).scalar()
+        
+        return {
+            "status": "executando" if em_andamento else "disponivel",
+            "em_andamento": [execucao_para_dict(e) for e in em_andamento],
+            "ultimo_scraping": concluidas.finalizado_em.isoformat() if concluidas and concluidas.finalizado_em else None,
+            "ultima_execucao": execucao_para_dict(concluidas) if concluidas else None,
+            "proxima_execucao": proxima.isoformat() if proxima else None,
+            "total_licitacoes_base": contar_licitacoes(db),
+            "categorias_disponiveis": [
+                "servicos",
+                "bens", 
+                "obras"
+            ]
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao verificar status: {str(e)}")
+
+@router.get("/execucoes")
+def historico_execucoes(
+    alvo: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """
+    Histórico de execuções de scraping com métricas por execução.
+    
+    Args:
+        alvo: Filtro por coleta (gov_procurement, correios)
+        status: Filtro por status (executando, sucesso, parcial, erro, interrompido)
+        limit: Quantidade máxima de execuções
+    
+    Returns:
+        dict: Execuções (mais recentes primeiro) e médias de duração e vazão por alvo
+    """
+    marcar_interrompidas(db)
+    execucoes = listar_execucoes(db, alvo=alvo, status=status, limit=limit)
     return {
-        "status": "disponivel",
-        "ultimo_scraping": "2024-01-15T10:30:00",
-        "proxima_execucao": "2024-01-22T10:30:00",
-        "total_licitacoes_base": 150,
-        "categorias_disponiveis": [
-            "servicos",
-            "bens", 
-            "obras"
-        ]
+        "execucoes": [execucao_para_dict(e) for e in execucoes],
+        "total": len(execucoes),
+        "resumo": resumir_execucoes(execucoes)
     }
 
+@router.get("/execucoes/{execucao_id}")
+def obter_execucao(execucao_id: str, db: Session = Depends(get_db)):
+    """
+    Detalhes de uma execução de scraping.
+    """
+    execucao = db.query(ExecucaoScraping).filter(ExecucaoScraping.id == execucao_id).first()
+    if not execucao:
+        raise HTTPException(status_code=404, detail="Execução não encontrada")
+    return execucao_para_dict(execucao)
+
 @router.get("/base-conhecimento/consultar")
 def consultar_base_conhecimento(
     categoria: str,
@@ -135,7 +198,8 @@ def consultar_base_conhecimento(
         dict: Licitações similares e insights
     """
     try:
-        # Usar ferramenta de consulta
+        # Usar ferramenta de consulta (crewai_tools importado no primeiro uso)
+        from crewai_agents.knowledge_base_tools import KnowledgeBaseTool
         kb_tool = KnowledgeBaseTool()
         resultado = kb_tool._run(categoria, objeto or "", tipo_licitacao or "")
         
@@ -152,9 +216,10 @@ def consultar_base_conhecimento(
         raise HTTPException(status_code=500, detail=f"Erro ao consultar base: {str(e)}")
 
 @router.get("/base-conhecimento/analytics")
-def analytics_base_conhecimento(tipo_analise: str = "geral"):
+def analytics_base_conhecimento(tipo_analise: str = "geral", db: Session = Depends(get_db)):
     """
-    Gera análises estatísticas da base de conhecimento.
+    Gera análises estatísticas da base de conhecimento a partir dos
+    snapshots por categoria e tipo de licitação.
     
     Args:
         tipo_analise: Tipo de análise (geral, categoria, tendencias)
@@ -163,17 +228,10 @@ def analytics_base_conhecimento(tipo_analise: str = "geral"):
         dict: Relatório de análise
     """
     try:
-        # Usar ferramenta de analytics
-        analytics_tool = KnowledgeBaseAnalyticsTool()
-        resultado = analytics_tool._run(tipo_analise)
-        
-        # Parsear resultado JSON
-        data = json.loads(resultado)
-        
         return {
             "sucesso": True,
             "tipo_analise": tipo_analise,
-            "dados": data,
+            "dados": analisar_base(db, tipo_analise),
             "data_analise": datetime.now().isoformat()
         }
         
@@ -181,7 +239,7 @@ def analytics_base_conhecimento(tipo_analise: str = "geral"):
         raise HTTPException(status_code=500, detail=f"Erro na análise: {str(e)}")
 
 @router.get("/base-conhecimento/resumo")
-def resumo_base_conhecimento():
+def resumo_base_conhecimento(db: Session = Depends(get_db)):
     """
     Retorna resumo geral da base de conhecimento.
     
@@ -189,114 +247,108 @@ def resumo_base_conhecimento():
         dict: Resumo com estatísticas principais
     """
     try:
-        # Carregar dados da base
-        kb_tool = KnowledgeBaseTool()
-        data = kb_tool._load_knowledge_base()
-        
-        if not data:
-            return {
-                "total_licitacoes": 0,
-                "categorias": [],
-                "ultima_atualizacao": None,
-                "status": "vazia"
-            }
-        
-        # Calcular estatísticas básicas
-        categorias = {}
-        tipos = {}
-        sites = {}
-        
-        for item in data:
-            # Contar categorias
-            cat = item.get('categoria', 'indefinida')
-            categorias[cat] = categorias.get(cat, 0) + 1
-            
-            # Contar tipos
-            tipo = item.get('tipo_licitacao', 'indefinido')
-            tipos[tipo] = tipos.get(tipo, 0) + 1
-            
-            # Contar sites
-            site = item.get('site_origem', 'indefinido')
-            sites[site] = sites.get(site, 0) + 1
-        
-        return {
-            "total_licitacoes": len(data),
-            "distribuicao_categorias": categorias,
-            "distribuicao_tipos": tipos,
-            "sites_origem": sites,
-            "ultima_atualizacao": datetime.now().isoformat(),
-            "status": "ativa"
-        }
+        return resumo_base(db)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar resumo: {str(e)}")
 
+@router.post("/base-conhecimento/insights/reconstruir")
+def reconstruir_insights_base(db: Session = Depends(get_db)):
+    """
+    Recalcula os snapshots de estatísticas a partir de todas as licitações da base.
+    """
+    try:
+        grupos = reconstruir_insights(db)
+        return {"sucesso": True, "grupos": grupos, "data_reconstrucao": datetime.now().isoformat()}
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao reconstruir insights: {str(e)}")
+
 @router.post("/agendar")
 def agendar_scraping_automatico(
     categorias: List[str],
     frequencia: str = "semanal",
-    ativo: bool = True
+    ativo: bool = True,
+    expressao_cron: Optional[str] = None,
+    alvo: str = "gov_procurement",
+    jitter_segundos: int = 300,
+    recuperar_perdidas: bool = True,
+    db: Session = Depends(get_db)
 ):
     """
     Agenda execução automática de scraping.
     
     Args:
         categorias: Lista de categorias para monitorar
-        frequencia: Frequência da execução (diaria, semanal, mensal)
+        frequencia: Frequência da execução (diaria, semanal, mensal), usada sem expressao_cron
         ativo: Se o agendamento está ativo
+        expressao_cron: Expressão cron de 5 campos (ex.: "0 6 * * 1-5"); tem precedência sobre a frequência
+        alvo: Coleta a executar (gov_procurement, correios)
+        jitter_segundos: Atraso aleatório máximo somado a cada execução
+        recuperar_perdidas: Se execuções perdidas com a API parada rodam uma vez ao voltar
     
     Returns:
         dict: Confirmação do agendamento
     """
+    if alvo not in EXECUTORES:
+        raise HTTPException(status_code=400, detail=f"Alvo inválido. Use: {', '.join(EXECUTORES)}")
+    expressao = expressao_cron or FREQUENCIAS_CRON.get(frequencia, FREQUENCIAS_CRON["semanal"])
     try:
-        # Em produção, isso seria salvo no banco e executado via Celery/cron
-        agendamento = {
-            "id": f"scraping_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "categorias": categorias,
-            "frequencia": frequencia,
-            "ativo": ativo,
-            "data_criacao": datetime.now().isoformat(),
-            "proxima_execucao": calcular_proxima_execucao(frequencia)
-        }
+        ExpressaoCron(expressao)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    try:
+        agendamento = AgendamentoScraping(
+            id=f"scraping_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}",
+            alvo=alvo,
+            expressao_cron=expressao,
+            parametros={"categorias": categorias},
+            ativo=ativo,
+            jitter_segundos=max(jitter_segundos, 0),
+            recuperar_perdidas=recuperar_perdidas,
+            data_criacao=datetime.now()
+        )
+        agendamento.proxima_execucao = calcular_proxima(agendamento, datetime.now())
+        db.add(agendamento)
+        db.commit()
         
         return {
             "sucesso": True,
-            "agendamento": agendamento,
-            "mensagem": f"Scraping agendado para {len(categorias)} categorias com frequência {frequencia}"
+            "agendamento": _agendamento_para_dict(agendamento),
+            "mensagem": f"Scraping agendado para {len(categorias)} categorias ({expressao})"
         }
         
     except Exception as e:
+        db.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao agendar: {str(e)}")
 
 @router.get("/agendamentos")
-def listar_agendamentos():
+def listar_agendamentos(incluir_inativos: bool = False, db: Session = Depends(get_db)):
     """
-    Lista agendamentos ativos de scraping.
+    Lista agendamentos de scraping.
+    
+    Args:
+        incluir_inativos: Se inclui agendamentos cancelados
     
     Returns:
         dict: Lista de agendamentos
     """
-    # Simulação - em produção viria do banco de dados
-    agendamentos_simulados = [
-        {
-            "id": "scraping_20240115_103000",
-            "categorias": ["servicos", "bens"],
-            "frequencia": "semanal",
-            "ativo": True,
-            "ultima_execucao": "2024-01-15T10:30:00",
-            "proxima_execucao": "2024-01-22T10:30:00"
-        }
-    ]
+    query = db.query(AgendamentoScraping)
+    if not incluir_inativos:
+        query = query.filter(AgendamentoScraping.ativo.is_(True))
+    agendamentos = [_agendamento_para_dict(a) for a in query.order_by(AgendamentoScraping.proxima_execucao)]
     
     return {
-        "agendamentos": agendamentos_simulados,
-        "total": len(agendamentos_simulados)
+        "agendamentos": agendamentos,
+        "total": len(agendamentos)
     }
 
 @router.delete("/agendamentos/{agendamento_id}")
-def cancelar_agendamento(agendamento_id: str):
+def cancelar_agendamento(agendamento_id: str, db: Session = Depends(get_db)):
     """
     Cancela um agendamento de scraping.
+    Uma coleta já em andamento termina normalmente.
     
     Args:
         agendamento_id: ID do agendamento
@@ -304,7 +356,13 @@ def cancelar_agendamento(agendamento_id: str):
     Returns:
         dict: Confirmação do cancelamento
     """
-    # Em produção, removeria do banco e cancelaria no Celery
+    agendamento = db.query(AgendamentoScraping).filter(AgendamentoScraping.id == agendamento_id).first()
+    if not agendamento:
+        raise HTTPException(status_code=404, detail="Agendamento não encontrado")
+    
+    agendamento.ativo = False
+    db.commit()
+    
     return {
         "sucesso": True,
         "agendamento_id": agendamento_id,
@@ -312,27 +370,25 @@ def cancelar_agendamento(agendamento_id: str):
         "data_cancelamento": datetime.now().isoformat()
     }
 
-def calcular_proxima_execucao(frequencia: str) -> str:
-    """
-    Calcula próxima execução baseada na frequência.
-    
-    Args:
-        frequencia: Frequência (diaria, semanal, mensal)
-    
-    Returns:
-        str: Data/hora da próxima execução
-    """
-    from datetime import timedelta
+def _agendamento_para_dict(agendamento: AgendamentoScraping) -> dict:
+    """Representação de um agendamento para as respostas da API"""
+    def iso(valor):
+        return valor.isoformat() if valor else None
     
-    now = datetime.now()
-    
-    if frequencia == "diaria":
-        proxima = now + timedelta(days=1)
-    elif frequencia == "semanal":
-        proxima = now + timedelta(weeks=1)
-    elif frequencia == "mensal":
-        proxima = now + timedelta(days=30)
-    else:
-        proxima = now + timedelta(weeks=1)  # Padrão semanal
-    
-    return proxima.isoformat()
+    return {
+        "id": agendamento.id,
+        "alvo": agendamento.alvo,
+        "expressao_cron": agendamento.expressao_cron,
+        "categorias": (agendamento.parametros or {}).get("categorias", []),
+        "ativo": agendamento.ativo,
+        "jitter_segundos": agendamento.jitter_segundos,
+        "recuperar_perdidas": agendamento.recuperar_perdidas,
+        "em_execucao": agendamento.em_execucao,
+        "ultima_execucao": iso(agendamento.ultima_execucao),
+        "ultima_conclusao": iso(agendamento.ultima_conclusao),
+        "ultimo_status": agendamento.ultimo_status,
+        "ultimo_erro": agendamento.ultimo_erro,
+        "execucoes_puladas": agendamento.execucoes_puladas,
+        "proxima_execucao": iso(agendamento.proxima_execucao),
+        "data_criacao": iso(agendamento.data_criacao)
+    }
@@ -0,0 +1,50 @@
+"""
+Endpoints da API para busca textual em licitações e editais gerados.
+"""
+
+import time
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+
+from api.database import engine
+from api.search_index import FONTES, buscar
+
+# Router para endpoints de busca
+router = APIRouter(prefix="/api/busca", tags=["Busca Textual"])
+
+
+@router.get("/")
+def buscar_documentos(
+    q: str = Query(..., min_length=2, description="Termos de busca"),
+    tipo: Optional[str] = Query(None, description="Restringe a busca: 'licitacoes' ou 'editais'"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Busca textual com ranking por relevância e destaque dos termos.
+
+    Args:
+        q: Termos de busca (acentos são ignorados)
+        tipo: Fonte a consultar; todas quando omitido
+        limit: Limite de resultados
+
+    Returns:
+        dict: Resultados ordenados por relevância e tempo da consulta
+    """
+    if tipo and tipo not in FONTES:
+        raise HTTPException(status_code=400, detail=f"Tipo inválido. Use: {', '.join(FONTES)}")
+
+    fontes = [tipo] if tipo else list(FONTES)
+    inicio = time.perf_counter()
+
+    try:
+        resultados = buscar(engine, q, fontes, limit=limit)[:limit]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
+
+    return {
+        "consulta": q,
+        "total": len(resultados),
+        "tempo_ms": round((time.perf_counter() - inicio) * 1000, 2),
+        "resultados": resultados
+    }
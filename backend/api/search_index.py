@@ -0,0 +1,253 @@
+"""
+Índice de busca textual sobre licitações e editais gerados.
+
+- SQLite: tabelas virtuais FTS5 com cópia do texto, tokenizador unicode61 sem
+  acentos e triggers que mantêm o índice a cada INSERT/UPDATE/DELETE. Ranking
+  por bm25, destaque com highlight/snippet. As tabelas de origem têm chave
+  primária texto, então o rowid delas não é estável (VACUUM pode renumerá-lo)
+  e não serve de ligação: uma tabela auxiliar (<tabela>_fts_chaves) dá a cada
+  id um inteiro próprio, usado como rowid no FTS5, e os triggers removem as
+  linhas do índice por rowid (busca direta, sem percorrer o índice).
+- PostgreSQL: coluna tsvector gerada com a configuração 'portuguese'
+  (stemming) e índice GIN. Ranking por ts_rank, destaque com ts_headline.
+- Outros bancos: busca simples com LIKE, sem ranking.
+
+O dialeto é detectado a partir do engine, então o mesmo código atende o
+SQLite local e o PostgreSQL configurado via DATABASE_URL.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# Marcadores usados para destacar os termos encontrados
+MARCA_INICIO = "<mark>"
+MARCA_FIM = "</mark>"
+
+
+@dataclass(frozen=True)
+class FonteBusca:
+    """Tabela indexada: coluna de título e coluna de texto longo."""
+    tipo: str
+    tabela: str
+    coluna_titulo: str
+    coluna_texto: str
+
+    @property
+    def tabela_fts(self) -> str:
+        return f"{self.tabela}_fts"
+
+    @property
+    def tabela_chaves(self) -> str:
+        return f"{self.tabela}_fts_chaves"
+
+
+FONTES = {
+    "licitacoes": FonteBusca("licitacao", "licitacoes", "objeto", "resumo"),
+    "editais": FonteBusca("edital", "editais_gerados", "numero_edital", "conteudo_edital"),
+}
+
+_TERMO = re.compile(r"\w+", re.UNICODE)
+
+
+def _termos(consulta: str) -> List[str]:
+    """Extrai os termos da consulta, descartando operadores e pontuação."""
+    return _TERMO.findall(consulta.lower())
+
+
+def _consulta_fts5(consulta: str) -> str:
+    """
+    Converte o texto digitado em uma expressão FTS5 segura.
+    Cada termo vira um prefixo entre aspas ("licit"*), o que também aproxima
+    plurais e flexões do português, já que o FTS5 não tem stemmer nativo.
+    """
+    return " ".join(f'"{termo}"*' for termo in _termos(consulta))
+
+
+# === SQLite (FTS5) ===
+
+def _sql_remover_fts5(fonte: FonteBusca, chave: str) -> str:
+    """DELETE da linha do índice de um registro, pelo rowid obtido da tabela de chaves."""
+    return (
+        f"DELETE FROM {fonte.tabela_fts} WHERE rowid = "
+        f"(SELECT rid FROM {fonte.tabela_chaves} WHERE id = {chave})"
+    )
+
+
+def _sql_inserir_fts5(fonte: FonteBusca, registro: str) -> str:
+    """INSERT da linha do índice de um registro (a chave já deve existir)."""
+    fts, c1, c2 = fonte.tabela_fts, fonte.coluna_titulo, fonte.coluna_texto
+    return (
+        f"INSERT INTO {fts}(rowid, {c1}, {c2}) VALUES ("
+        f"(SELECT rid FROM {fonte.tabela_chaves} WHERE id = {registro}.id), {registro}.{c1}, {registro}.{c2})"
+    )
+
+
+def _criar_fts5(conn, fonte: FonteBusca) -> None:
+    """Cria a tabela FTS5, a tabela de chaves e os triggers de sincronização de uma fonte."""
+    t, fts, chaves = fonte.tabela, fonte.tabela_fts, fonte.tabela_chaves
+    c1, c2 = fonte.coluna_titulo, fonte.coluna_texto
+
+    definicao = conn.execute(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :nome"),
+        {"nome": fts}
+    ).scalar()
+    if definicao is not None and ("content=" in definicao or "UNINDEXED" in definicao):
+        # Versões anteriores do índice: ligadas pelo rowid da origem ou por uma
+        # coluna id UNINDEXED (que obrigava a percorrer o índice a cada remoção)
+        conn.execute(text(f"DROP TABLE {fts}"))
+        for sufixo in ("ai", "ad", "au"):
+            conn.execute(text(f"DROP TRIGGER IF EXISTS {fts}_{sufixo}"))
+        definicao = None
+
+    conn.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {chaves} (rid INTEGER PRIMARY KEY, id TEXT NOT NULL UNIQUE)"
+    ))
+    conn.execute(text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{c1}, {c2}, tokenize='unicode61 remove_diacritics 2')"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {t} BEGIN "
+        f"INSERT INTO {chaves}(id) VALUES (new.id); "
+        f"{_sql_inserir_fts5(fonte, 'new')}; END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {t} BEGIN "
+        f"{_sql_remover_fts5(fonte, 'old.id')}; "
+        f"DELETE FROM {chaves} WHERE id = old.id; END"
+    ))
+    conn.execute(text(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF id, {c1}, {c2} ON {t} BEGIN "
+        f"{_sql_remover_fts5(fonte, 'old.id')}; "
+        f"UPDATE {chaves} SET id = new.id WHERE id = old.id; "
+        f"{_sql_inserir_fts5(fonte, 'new')}; END"
+    ))
+
+    if definicao is None:
+        # Indexa os registros já existentes uma única vez
+        conn.execute(text(f"DELETE FROM {chaves}"))
+        conn.execute(text(f"INSERT INTO {chaves}(id) SELECT id FROM {t}"))
+        conn.execute(text(
+            f"INSERT INTO {fts}(rowid, {c1}, {c2}) "
+            f"SELECT k.rid, t.{c1}, t.{c2} FROM {t} t JOIN {chaves} k ON k.id = t.id"
+        ))
+
+
+def _buscar_fts5(conn, fonte: FonteBusca, consulta: str, limit: int) -> List[Dict[str, Any]]:
+    fts, chaves = fonte.tabela_fts, fonte.tabela_chaves
+    # Colunas do índice: 0 = título, 1 = texto
+    sql = text(
+        f"SELECT k.id AS id, "
+        f"highlight({fts}, 0, :ini, :fim) AS titulo, "
+        f"snippet({fts}, 1, :ini, :fim, '…', 24) AS trecho, "
+        f"bm25({fts}, 2.0, 1.0) AS rank "
+        f"FROM {fts} JOIN {chaves} k ON k.rid = {fts}.rowid "
+        f"WHERE {fts} MATCH :consulta ORDER BY rank LIMIT :limit"
+    )
+    linhas = conn.execute(sql, {
+        "ini": MARCA_INICIO, "fim": MARCA_FIM,
+        "consulta": _consulta_fts5(consulta), "limit": limit
+    })
+    # bm25 é negativo e menor é melhor; invertido para que maior seja melhor
+    return [_resultado(fonte, l.id, l.titulo, l.trecho, -l.rank) for l in linhas]
+
+
+# === PostgreSQL (tsvector) ===
+
+def _criar_tsvector(conn, fonte: FonteBusca) -> None:
+    """Cria a coluna tsvector gerada e o índice GIN de uma fonte."""
+    t, c1, c2 = fonte.tabela, fonte.coluna_titulo, fonte.coluna_texto
+    conn.execute(text(
+        f"ALTER TABLE {t} ADD COLUMN IF NOT EXISTS busca_tsv tsvector GENERATED ALWAYS AS ("
+        f"setweight(to_tsvector('portuguese', coalesce({c1}, '')), 'A') || "
+        f"setweight(to_tsvector('portuguese', coalesce({c2}, '')), 'B')) STORED"
+    ))
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS ix_{t}_busca_tsv ON {t} USING GIN (busca_tsv)"))
+
+
+def _buscar_tsvector(conn, fonte: FonteBusca, consulta: str, limit: int) -> List[Dict[str, Any]]:
+    t, c1, c2 = fonte.tabela, fonte.coluna_titulo, fonte.coluna_texto
+    opcoes = f"StartSel={MARCA_INICIO}, StopSel={MARCA_FIM}, MaxWords=35, MinWords=15"
+    sql = text(
+        f"SELECT t.id AS id, "
+        f"ts_headline('portuguese', coalesce(t.{c1}, ''), q, :opcoes) AS titulo, "
+        f"ts_headline('portuguese', coalesce(t.{c2}, ''), q, :opcoes) AS trecho, "
+        f"ts_rank(t.busca_tsv, q) AS rank "
+        f"FROM {t} t, websearch_to_tsquery('portuguese', :consulta) q "
+        f"WHERE t.busca_tsv @@ q ORDER BY rank DESC LIMIT :limit"
+    )
+    linhas = conn.execute(sql, {"opcoes": opcoes, "consulta": consulta, "limit": limit})
+    return [_resultado(fonte, l.id, l.titulo, l.trecho, float(l.rank)) for l in linhas]
+
+
+# === Fallback genérico ===
+
+def _buscar_like(conn, fonte: FonteBusca, consulta: str, limit: int) -> List[Dict[str, Any]]:
+    t, c1, c2 = fonte.tabela, fonte.coluna_titulo, fonte.coluna_texto
+    condicoes, params = [], {"limit": limit}
+    for i, termo in enumerate(_termos(consulta)):
+        params[f"t{i}"] = f"%{termo}%"
+        condicoes.append(f"(lower({c1}) LIKE :t{i} OR lower({c2}) LIKE :t{i})")
+    sql = text(f"SELECT id, {c1} AS titulo, {c2} AS trecho FROM {t} WHERE {' AND '.join(condicoes)} LIMIT :limit")
+    return [_resultado(fonte, l.id, l.titulo, (l.trecho or "")[:200], 0.0) for l in conn.execute(sql, params)]
+
+
+def _resultado(fonte: FonteBusca, id_: Any, titulo: Optional[str], trecho: Optional[str], score: float) -> Dict[str, Any]:
+    return {"tipo": fonte.tipo, "id": id_, "titulo": titulo, "trecho": trecho, "score": round(score, 6)}
+
+
+# === API pública ===
+
+def criar_indices_busca(engine: Engine) -> None:
+    """
+    Cria (se necessário) os índices de busca textual para o dialeto do engine.
+    Idempotente: pode ser chamada a cada inicialização da aplicação.
+    """
+    dialeto = engine.dialect.name
+    if dialeto not in ("sqlite", "postgresql"):
+        print(f"Busca textual sem índice para o dialeto '{dialeto}' (usando LIKE).")
+        return
+
+    with engine.begin() as conn:
+        for fonte in FONTES.values():
+            if dialeto == "sqlite":
+                _criar_fts5(conn, fonte)
+            else:
+                _criar_tsvector(conn, fonte)
+
+
+def buscar(engine: Engine, consulta: str, fontes: List[str], limit: int = 20) -> List[Dict[str, Any]]:
+    """
+    Executa a busca textual nas fontes informadas.
+
+    Args:
+        engine: Engine do banco de dados
+        consulta: Texto digitado pelo usuário
+        fontes: Chaves de FONTES a consultar ("licitacoes", "editais")
+        limit: Máximo de resultados por fonte
+
+    Returns:
+        List[Dict]: Resultados ordenados por relevância (score maior primeiro)
+    """
+    if not _termos(consulta):
+        return []
+
+    dialeto = engine.dialect.name
+    if dialeto == "sqlite":
+        executor = _buscar_fts5
+    elif dialeto == "postgresql":
+        executor = _buscar_tsvector
+    else:
+        executor = _buscar_like
+
+    resultados = []
+    with engine.connect() as conn:
+        for chave in fontes:
+            resultados.extend(executor(conn, FONTES[chave], consulta, limit))
+
+    resultados.sort(key=lambda r: r["score"], reverse=True)
+    return resultados
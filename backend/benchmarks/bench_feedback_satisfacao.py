@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark do cálculo de satisfação do FeedbackAnalysisTool.
+Compara a implementação original (laço Python sobre listas de dicionários)
+com o caminho colunar em NumPy, sobre feedbacks sintéticos.
+
+Uso:
+    python benchmarks/bench_feedback_satisfacao.py --registros 1000000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crewai_agents.feedback_analysis_tools import FeedbackAnalysisTool
+
+
+def gerar_feedbacks(registros: int, semente: int = 42) -> dict:
+    """Gera feedbacks sintéticos divididos entre os três stakeholders (listas de dicionários)."""
+    rng = np.random.default_rng(semente)
+    por_tipo = registros // 3
+
+    def notas(campos, n):
+        matriz = rng.integers(1, 6, size=(n, len(campos))).tolist()
+        return [dict(zip(campos, linha)) for linha in matriz]
+
+    return {
+        "feedback_setor": notas(["facilidade_uso", "qualidade_edital", "adequacao_requisitos",
+                                 "tempo_processamento", "clareza_especificacoes"], por_tipo),
+        "feedback_empresa": notas(["clareza_objeto", "adequacao_especificacoes", "prazo_elaboracao_proposta",
+                                   "criterios_julgamento", "valor_estimado"], por_tipo),
+        "feedback_licitacao": notas(["qualidade_tecnica", "conformidade_legal",
+                                     "adequacao_modalidade", "clareza_redacao"], registros - 2 * por_tipo),
+    }
+
+
+def para_colunas(data: dict) -> dict:
+    """Converte listas de dicionários no formato colunar ({campo: [valores]})."""
+    return {
+        chave: {campo: [f[campo] for f in feedbacks] for campo in feedbacks[0]}
+        for chave, feedbacks in data.items()
+    }
+
+
+def satisfacao_original(data: dict) -> dict:
+    """Implementação anterior (laço Python), mantida como referência."""
+    def distribuicao(valores):
+        faixas = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        for valor in valores:
+            faixa = int(round(valor))
+            if faixa in faixas:
+                faixas[faixa] += 1
+        return {k: round(v / len(valores) * 100, 1) for k, v in faixas.items()}
+
+    setor, empresa, licitacao = [], [], []
+    for f in data.get("feedback_setor", []):
+        if all(k in f for k in ["facilidade_uso", "qualidade_edital", "adequacao_requisitos"]):
+            setor.append((f["facilidade_uso"] + f["qualidade_edital"] + f["adequacao_requisitos"] +
+                          f.get("tempo_processamento", 3) + f.get("clareza_especificacoes", 3)) / 5)
+    for f in data.get("feedback_empresa", []):
+        notas = [f.get(k, 3) for k in ["clareza_objeto", "adequacao_especificacoes",
+                                       "prazo_elaboracao_proposta", "criterios_julgamento", "valor_estimado"]]
+        empresa.append(sum(v for v in notas if v) / len([v for v in notas if v]))
+    for f in data.get("feedback_licitacao", []):
+        if all(k in f for k in ["qualidade_tecnica", "conformidade_legal"]):
+            licitacao.append((f["qualidade_tecnica"] + f["conformidade_legal"] +
+                              f.get("adequacao_modalidade", 3) + f.get("clareza_redacao", 3)) / 4)
+
+    resultado = {}
+    for nome, valores in (("setores", setor), ("empresas", empresa), ("licitacao", licitacao)):
+        if valores:
+            resultado[nome] = {
+                "media": round(statistics.mean(valores), 2),
+                "mediana": round(statistics.median(valores), 2),
+                "total_respostas": len(valores),
+                "distribuicao": distribuicao(valores)
+            }
+    return resultado
+
+
+def cronometrar(funcao, *args, repeticoes: int = 3) -> float:
+    """Menor tempo (s) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--registros", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"📊 Gerando {args.registros:,} feedbacks sintéticos...")
+    data = gerar_feedbacks(args.registros)
+    colunar = para_colunas(data)
+    ferramenta = FeedbackAnalysisTool()
+
+    # Os dois caminhos devem produzir as mesmas métricas
+    esperado = satisfacao_original(data)
+    obtido = ferramenta._calcular_satisfacao(data)["por_stakeholder"]
+    for nome, metricas in esperado.items():
+        for campo, valor in metricas.items():
+            assert obtido[nome][campo] == valor, f"{nome}.{campo}: {obtido[nome][campo]} != {valor}"
+    print("✅ Resultados idênticos à implementação original")
+
+    t_original = cronometrar(satisfacao_original, data, repeticoes=args.repeticoes)
+    t_lista = cronometrar(ferramenta._calcular_satisfacao, data, repeticoes=args.repeticoes)
+    t_colunar = cronometrar(ferramenta._calcular_satisfacao, colunar, repeticoes=args.repeticoes)
+
+    print(f"\n{'Implementação':<32}{'Tempo (s)':>12}{'Speedup':>10}")
+    print("-" * 54)
+    print(f"{'Original (laço Python)':<32}{t_original:>12.3f}{1.0:>9.1f}x")
+    print(f"{'NumPy (lista de dicionários)':<32}{t_lista:>12.3f}{t_original / t_lista:>9.1f}x")
+    print(f"{'NumPy (entrada colunar)':<32}{t_colunar:>12.3f}{t_original / t_colunar:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
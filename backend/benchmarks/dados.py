@@ -0,0 +1,206 @@
+"""
+Dados sintéticos para os benchmarks (benchmarks/suite.py).
+
+Os geradores são determinísticos (semente fixa) para que as medições sejam
+comparáveis entre execuções. Textos e listas vêm de conjuntos pequenos e são
+compartilhados entre registros, para que a escala de 1M caiba em memória.
+"""
+
+import json
+from typing import Any, Dict, List
+
+import numpy as np
+
+CATEGORIAS = ["bens", "servicos", "obras", "servicos_engenharia"]
+TIPOS_LICITACAO = ["pregao", "concorrencia", "tomada_precos", "dispensa"]
+MODALIDADES = ["eletronica", "presencial"]
+CRITERIOS = ["menor_preco", "tecnica_preco", "maior_desconto"]
+NIVEIS_RISCO = ["baixo", "medio", "alto", "critico"]
+UFS = ["DF", "SP", "RJ", "MG", "RS", "BA", "PE", "PR"]
+OBJETOS = [
+    "servico de limpeza predial e conservacao",
+    "aquisicao de veiculos utilitarios para entrega",
+    "manutencao preventiva de equipamentos de triagem",
+    "servico de vigilancia patrimonial armada",
+    "aquisicao de uniformes e equipamentos de protecao",
+    "locacao de galpao logistico",
+    "servico de transporte de cargas postais",
+    "reforma de agencia com adequacao de acessibilidade",
+]
+FATORES_SUCESSO = [
+    "especificacoes claras", "pesquisa de precos ampla", "prazo adequado de proposta",
+    "criterios objetivos de julgamento", "divulgacao ampliada", "lotes regionais",
+]
+ESPECIFICACOES = [
+    "certificacao ISO 9001", "garantia minima de 12 meses", "atendimento em 24 horas",
+    "equipe com NR-10", "entrega em todo o territorio nacional", "assistencia tecnica local",
+]
+TEXTOS_FEEDBACK = [
+    "O edital estava claro e bem organizado",
+    "Prazo muito curto para elaborar a proposta",
+    "Especificacoes confusas e excessivamente restritivas",
+    "Processo rapido, sem problemas",
+    "Valor estimado abaixo do praticado no mercado",
+    "Criterios de julgamento pouco objetivos",
+]
+SUGESTOES = [
+    "Ampliar o prazo de propostas", "Publicar planilha de custos editavel",
+    "Dividir o objeto em lotes regionais", "Incluir glossario de termos tecnicos",
+]
+
+# Variações distintas usadas pelos casos que chamam a função uma vez por registro
+VARIANTES = 1000
+
+
+def _rng(semente: int = 42) -> np.random.Generator:
+    return np.random.default_rng(semente)
+
+
+def licitacoes_conhecimento(n: int, semente: int = 42) -> List[Dict[str, Any]]:
+    """Licitações no formato da base de conhecimento (KnowledgeBaseTool)."""
+    rng = _rng(semente)
+    categorias = rng.integers(0, len(CATEGORIAS), n).tolist()
+    tipos = rng.integers(0, len(TIPOS_LICITACAO), n).tolist()
+    objetos = rng.integers(0, len(OBJETOS), n).tolist()
+    valores = np.round(rng.lognormal(12, 1.2, n), 2).tolist()
+    prazos = rng.integers(0, 365, n).tolist()
+    propostas = rng.integers(0, 30, n).tolist()
+    criterios = rng.integers(0, len(CRITERIOS), n).tolist()
+    modalidades = rng.integers(0, len(MODALIDADES), n).tolist()
+    # Listas compartilhadas: poucas combinações, referenciadas por todos os registros
+    fatores = [FATORES_SUCESSO[i:i + 3] for i in range(len(FATORES_SUCESSO))]
+    especificacoes = [ESPECIFICACOES[i:i + 2] for i in range(len(ESPECIFICACOES))]
+    return [
+        {
+            "numero_edital": f"{i:07d}/2024",
+            "objeto": OBJETOS[objetos[i]],
+            "categoria": CATEGORIAS[categorias[i]],
+            "tipo_licitacao": TIPOS_LICITACAO[tipos[i]],
+            "modalidade": MODALIDADES[modalidades[i]],
+            "orgao": "Correios",
+            "valor_contratado": valores[i],
+            "prazo_execucao": prazos[i],
+            "numero_propostas": propostas[i],
+            "criterio_julgamento": CRITERIOS[criterios[i]],
+            "fatores_sucesso": fatores[i % len(fatores)],
+            "especificacoes_tecnicas": especificacoes[i % len(especificacoes)],
+        }
+        for i in range(n)
+    ]
+
+
+def requisitos_json(n: int = VARIANTES, semente: int = 42) -> List[str]:
+    """Requisitos de licitação em JSON (entrada do ValidarConformidadeTool)."""
+    rng = _rng(semente)
+    resultado = []
+    for i in range(n):
+        itens = [
+            {
+                "descricao": f"Item {j}",
+                "especificacoes_tecnicas": [
+                    {"descricao": ESPECIFICACOES[k % len(ESPECIFICACOES)], "obrigatorio": bool(k % 3)}
+                    for k in range(int(rng.integers(1, 16)))
+                ],
+            }
+            for j in range(int(rng.integers(1, 6)))
+        ]
+        resultado.append(json.dumps({
+            "tipo_licitacao": TIPOS_LICITACAO[i % len(TIPOS_LICITACAO)],
+            "categoria": CATEGORIAS[i % len(CATEGORIAS)],
+            "valor_total_estimado": float(rng.lognormal(12, 1.2)),
+            "prazo_proposta": int(rng.integers(1, 45)),
+            "requisitos_juridicos": [{"descricao": "Regularidade fiscal e trabalhista"}] if i % 2 else [],
+            "itens": itens,
+        }, ensure_ascii=False))
+    return resultado
+
+
+def analises_json(n: int = VARIANTES, semente: int = 42) -> List[str]:
+    """Análises jurídica, técnica e financeira em JSON (entrada do CalcularRiscoTool)."""
+    rng = _rng(semente)
+    niveis = rng.integers(0, len(NIVEIS_RISCO), (n, 3)).tolist()
+    return [
+        json.dumps({
+            "analise_juridica": {"risco_juridico": NIVEIS_RISCO[j]},
+            "analise_tecnica": {"risco_tecnico": NIVEIS_RISCO[t]},
+            "analise_financeira": {"risco_financeiro": NIVEIS_RISCO[f]},
+        })
+        for j, t, f in niveis
+    ]
+
+
+def feedbacks(n: int, semente: int = 42) -> Dict[str, List[Dict[str, Any]]]:
+    """Feedbacks dos três stakeholders com notas e textos livres (entrada do FeedbackAnalysisTool)."""
+    rng = _rng(semente)
+    por_tipo = n // 3
+    textos = rng.integers(0, len(TEXTOS_FEEDBACK), n).tolist()
+    sugestoes = rng.integers(0, len(SUGESTOES), n).tolist()
+
+    def notas(campos, quantidade):
+        return [dict(zip(campos, linha)) for linha in rng.integers(1, 6, (quantidade, len(campos))).tolist()]
+
+    setor = notas(["facilidade_uso", "qualidade_edital", "adequacao_requisitos",
+                   "tempo_processamento", "clareza_especificacoes"], por_tipo)
+    empresa = notas(["clareza_objeto", "adequacao_especificacoes", "prazo_elaboracao_proposta",
+                     "criterios_julgamento", "valor_estimado"], por_tipo)
+    licitacao = notas(["qualidade_tecnica", "conformidade_legal", "adequacao_modalidade",
+                       "clareza_redacao"], n - 2 * por_tipo)
+    for i, feedback in enumerate(setor):
+        feedback["comentarios_adicionais"] = TEXTOS_FEEDBACK[textos[i]]
+        feedback["sugestoes_melhoria"] = SUGESTOES[sugestoes[i]]
+    for i, feedback in enumerate(empresa, start=por_tipo):
+        feedback["dificuldades_encontradas"] = TEXTOS_FEEDBACK[textos[i]]
+    return {"feedback_setor": setor, "feedback_empresa": empresa, "feedback_licitacao": licitacao}
+
+
+def linhas_correios(n: int = VARIANTES, semente: int = 42) -> List[Dict[str, Any]]:
+    """Linhas da tabela de resultados dos Correios no formato lido do navegador."""
+    rng = _rng(semente)
+    objetos = rng.integers(0, len(OBJETOS), n).tolist()
+    linhas = []
+    for i in range(n):
+        celulas = [
+            ["Objeto:", OBJETOS[objetos[i]]],
+            ["Número:", f"{i:05d}/2024", "Tipo:", TIPOS_LICITACAO[i % len(TIPOS_LICITACAO)]],
+            ["Publicação:", "01/03/2024", "Abertura:", "15/03/2024 10:00"],
+            ["Modalidade:", "Pregão Eletrônico", "UASG:", f"{400000 + i % 999}"],
+            ["Dependência:", "CS - Brasília", "UF:", UFS[i % len(UFS)]],
+            ["Itens:", str(1 + i % 40), "NUP:", f"53180.{i:06d}/2024-11"],
+        ]
+        # Algumas linhas sem NUP/UF (células ausentes na página)
+        if i % 10 == 0:
+            celulas = celulas[:4] + [celulas[4][:2]]
+        linhas.append({"celulas": celulas, "objeto": OBJETOS[objetos[i]], "url": f"detalhe.php?id={i}"})
+    return linhas
+
+
+def registros_licitacao(n: int, prefixo: str = "bench") -> List[Dict[str, Any]]:
+    """Licitações no formato de salvar_licitacao_no_banco, com ids únicos."""
+    return [
+        {
+            "id": f"{prefixo}-{i}",
+            "objeto": OBJETOS[i % len(OBJETOS)],
+            "data_abertura": "15/03/2024 10:00",
+            "modalidade": "Pregão Eletrônico",
+            "link_original": f"detalhe.php?id={i}",
+            "numero_edital": f"{i:07d}/2024",
+            "tipo_licitacao": TIPOS_LICITACAO[i % len(TIPOS_LICITACAO)],
+            "data_publicacao": "01/03/2024",
+            "uasg": str(400000 + i % 999),
+            "dependencia": "CS - Brasília",
+            "uf": UFS[i % len(UFS)],
+            "quantidade_itens": str(1 + i % 40),
+            "nup": f"53180.{i:07d}/2024-11",
+        }
+        for i in range(n)
+    ]
+
+
+def documento_docx(caminho: str, paragrafos: int):
+    """Grava um edital .docx com `paragrafos` parágrafos (requer python-docx)."""
+    from docx import Document
+
+    documento = Document()
+    for i in range(paragrafos):
+        documento.add_paragraph(f"{i + 1}. {OBJETOS[i % len(OBJETOS)]}; {ESPECIFICACOES[i % len(ESPECIFICACOES)]}.")
+    documento.save(caminho)
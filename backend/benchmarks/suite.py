@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Suíte de microbenchmarks dos caminhos quentes em Python puro.
+
+Cada caso roda sobre dados sintéticos (benchmarks/dados.py) nas escalas
+1k, 100k e 1m. Os tempos são normalizados por uma carga de calibração fixa,
+medida junto de cada caso (tempo relativo = tempo do caso / tempo da
+calibração), e comparados com a baseline relativa gravada em
+benchmarks/baselines.json: um caso regride quando o tempo relativo passa de
+baseline * (1 + tolerância).
+
+Casos cujas dependências não estão instaladas (python-docx, pypdf) aparecem
+como indisponíveis; escalas acima do limite de um caso são puladas. Sem o
+crewai_tools, as ferramentas dos agentes são importadas com a classe base
+simplificada de crewai_agents/feedback_analysis_tools.py (ver `_ferramenta`). O banco usado pelos casos é sempre um SQLite temporário.
+
+Por serem relativas, as baselines valem entre máquinas de velocidades
+diferentes; uma mudança de versão do Python ou das dependências ainda pede
+uma nova gravação com --salvar-baseline.
+
+Uso:
+    python benchmarks/suite.py [--escala 1k 100k] [--casos calcular_risco ...]
+                               [--repeticoes 3] [--tolerancia 0.25] [--salvar-baseline]
+
+Saída: 0 sem regressões, 1 se algum caso regrediu.
+"""
+
+import argparse
+import functools
+import importlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import types
+from contextlib import contextmanager, redirect_stdout
+from typing import Any, Callable, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import dados
+
+ESCALAS = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+TOLERANCIA_PADRAO = float(os.getenv("BENCH_TOLERANCIA", "0.25"))
+
+
+class Caso:
+    """Um benchmark: prepara os dados fora da medição e devolve a função medida."""
+
+    def __init__(self, nome: str, descricao: str, preparar: Callable[[int, str], Callable[[], Any]],
+                 limite: int = ESCALAS["1m"], tolerancia: Optional[float] = None):
+        self.nome = nome
+        self.descricao = descricao
+        self.preparar = preparar
+        self.limite = limite
+        self.tolerancia = tolerancia
+
+
+CASOS: Dict[str, Caso] = {}
+
+
+def caso(nome: str, descricao: str, limite: int = ESCALAS["1m"], tolerancia: Optional[float] = None):
+    """Registra um caso. A função recebe (registros, diretório temporário) e devolve a função medida."""
+    def registrar(preparar):
+        CASOS[nome] = Caso(nome, descricao, preparar, limite, tolerancia)
+        return preparar
+    return registrar
+
+
+def _carga_calibracao():
+    """Carga fixa em Python puro (dicionários, strings e ordenação), a unidade dos tempos relativos."""
+    contagem: Dict[str, int] = {}
+    for i in range(200_000):
+        chave = f"item-{i % 997}"
+        contagem[chave] = contagem.get(chave, 0) + len(chave.upper().split("-"))
+    sorted(contagem.items(), key=lambda item: (item[1], item[0]))
+
+
+def calibrar(repeticoes: int = 5) -> float:
+    """Menor tempo, em segundos, da carga de calibração entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        _carga_calibracao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def _repetir(funcao: Callable[[Any], Any], entradas: List[Any], n: int) -> Callable[[], None]:
+    """Chama `funcao` n vezes, percorrendo as entradas em ciclo."""
+    def executar():
+        for i in range(n):
+            funcao(entradas[i % len(entradas)])
+    return executar
+
+
+@functools.lru_cache(maxsize=None)
+def _ferramenta(modulo: str, classe: str):
+    """
+    Classe de uma ferramenta dos agentes. Sem o crewai_tools instalado, o
+    módulo é importado com o BaseTool simplificado de feedback_analysis_tools
+    (os casos medem só a lógica das ferramentas, que não depende dele); o
+    substituto e o módulo importado com ele não ficam em sys.modules.
+    """
+    try:
+        return getattr(importlib.import_module(modulo), classe)
+    except ImportError as e:
+        if e.name not in ("crewai_tools", "crewai_tools.tools"):
+            raise
+    from crewai_agents.feedback_analysis_tools import BaseTool
+
+    tools = types.ModuleType("crewai_tools.tools")
+    tools.BaseTool = BaseTool
+    pacote = types.ModuleType("crewai_tools")
+    pacote.tools = tools
+    sys.modules.update({"crewai_tools": pacote, "crewai_tools.tools": tools})
+    try:
+        return getattr(importlib.import_module(modulo), classe)
+    finally:
+        for nome in ("crewai_tools", "crewai_tools.tools", modulo):
+            sys.modules.pop(nome, None)
+        pai, _, nome = modulo.rpartition(".")
+        if pai in sys.modules and hasattr(sys.modules[pai], nome):
+            delattr(sys.modules[pai], nome)
+
+
+# === Casos ===
+
+@caso("kb_similares", "KnowledgeBaseTool._find_similar_licitacoes sobre n licitações")
+def _kb_similares(n: int, diretorio: str):
+    ferramenta = _ferramenta("crewai_agents.knowledge_base_tools", "KnowledgeBaseTool")()
+    base = dados.licitacoes_conhecimento(n)
+    return lambda: ferramenta._find_similar_licitacoes(base, "servicos", "servico de limpeza predial", "pregao")
+
+
+@caso("kb_insights", "KnowledgeBaseTool._extract_insights sobre n licitações")
+def _kb_insights(n: int, diretorio: str):
+    ferramenta = _ferramenta("crewai_agents.knowledge_base_tools", "KnowledgeBaseTool")()
+    base = dados.licitacoes_conhecimento(n)
+    return lambda: ferramenta._extract_insights(base)
+
+
+@caso("calcular_risco", "CalcularRiscoTool._run, n chamadas")
+def _calcular_risco(n: int, diretorio: str):
+    ferramenta = _ferramenta("crewai_agents.edital_tools", "CalcularRiscoTool")()
+    return _repetir(ferramenta._run, dados.analises_json(), n)
+
+
+@caso("validar_conformidade", "ValidarConformidadeTool._run, n chamadas")
+def _validar_conformidade(n: int, diretorio: str):
+    ferramenta = _ferramenta("crewai_agents.edital_tools", "ValidarConformidadeTool")()
+    return _repetir(ferramenta._run, dados.requisitos_json(), n)
+
+
+@caso("feedback_analise", "FeedbackAnalysisTool._run (completa) sobre n feedbacks")
+def _feedback_analise(n: int, diretorio: str):
+    from crewai_agents.feedback_analysis_tools import FeedbackAnalysisTool
+
+    ferramenta = FeedbackAnalysisTool()
+    entrada = json.dumps(dados.feedbacks(n), ensure_ascii=False)
+    return lambda: ferramenta._run(entrada, "completa")
+
+
+@caso("extrair_documento", "extract_text_from_document em um .docx com n parágrafos", limite=ESCALAS["100k"])
+def _extrair_documento(n: int, diretorio: str):
+    from web_scraping.document_processor import extract_text_from_document
+
+    caminho = os.path.join(diretorio, f"edital_{n}.docx")
+    if not os.path.exists(caminho):
+        dados.documento_docx(caminho, n)
+    return lambda: extract_text_from_document(caminho)
+
+
+@caso("correios_linhas", "Conversão de n linhas de resultado dos Correios")
+def _correios_linhas(n: int, diretorio: str):
+    from web_scraping.mcp_playwright import _linha_correios, _registro_correios
+
+    linhas = dados.linhas_correios()
+
+    def executar():
+        for i in range(n):
+            _registro_correios(_linha_correios(linhas[i % len(linhas)]), i)
+    return executar
+
+
+# Limitado pelo disco (commit e fsync do SQLite a cada licitação), que a
+# calibração em CPU não acompanha: a variação entre execuções chega a ~30%
+@caso("salvar_licitacao", "salvar_licitacao_no_banco, n licitações novas (SQLite)",
+      limite=ESCALAS["100k"], tolerancia=1.0)
+def _salvar_licitacao(n: int, diretorio: str):
+    from web_scraping.mcp_playwright import salvar_licitacao_no_banco
+
+    # Ids novos a cada preparação: toda chamada insere
+    registros = dados.registros_licitacao(n, prefixo=f"bench-{time.time_ns()}")
+    return _repetir(salvar_licitacao_no_banco, registros, n)
+
+
+# === Execução ===
+
+@contextmanager
+def banco_temporario(diretorio: str):
+    """
+    Aponta api.database.SessionLocal para um SQLite em `diretorio` durante a suíte,
+    para que os casos nunca escrevam no banco configurado em DATABASE_URL.
+    """
+    import api.database as database
+    import api.database_feedback  # noqa: F401
+    import api.database_scraping  # noqa: F401
+    import api.database_monitoring  # noqa: F401
+    from sqlalchemy.orm import sessionmaker
+
+    engine = database.criar_engine(f"sqlite:///{os.path.join(diretorio, 'benchmarks.db')}")
+    database.Base.metadata.create_all(bind=engine)
+    original = database.SessionLocal
+    database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    try:
+        yield
+    finally:
+        database.SessionLocal = original
+        engine.dispose()
+
+
+def medir(caso_atual: Caso, n: int, repeticoes: int, diretorio: str) -> Dict[str, Any]:
+    """
+    Menor tempo entre as repetições, em segundos e relativo à calibração. Os
+    dados são preparados antes de cada repetição (fora da medição), para que
+    caches e inserções de uma não afetem a outra. A calibração roda junto de
+    cada repetição, sob a mesma carga da máquina que o caso.
+    """
+    tempos, calibracoes = [], []
+    for _ in range(repeticoes):
+        executar = caso_atual.preparar(n, diretorio)
+        calibracoes.append(calibrar(2))
+        # As funções medidas imprimem progresso; a saída não interessa aqui
+        with redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            executar()
+            tempos.append(time.perf_counter() - inicio)
+    melhor = min(tempos)
+    return {
+        "segundos": round(melhor, 6),
+        "relativo": round(melhor / min(calibracoes), 4),
+        "por_item_us": round(melhor / n * 1e6, 3),
+        "repeticoes": repeticoes,
+    }
+
+
+def comparar(resultado: Dict[str, Any], baseline: Optional[float], tolerancia: float) -> Dict[str, Any]:
+    """
+    Inclui no resultado a razão entre o tempo relativo e a baseline (também
+    relativa) e o status (ok, regressao, sem_baseline).
+    """
+    if not baseline:
+        return {**resultado, "status": "sem_baseline"}
+    razao = resultado["relativo"] / baseline
+    return {
+        **resultado,
+        "baseline": baseline,
+        "razao": round(razao, 3),
+        "status": "regressao" if razao > 1 + tolerancia else "ok",
+    }
+
+
+def carregar_baselines(caminho: str = BASELINES) -> Dict[str, Any]:
+    if not os.path.exists(caminho):
+        return {"casos": {}}
+    with open(caminho, "r", encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+
+def salvar_baselines(resultados: List[Dict[str, Any]], caminho: str = BASELINES):
+    """Grava os tempos relativos medidos como baseline (mantém os casos/escalas não medidos)."""
+    baselines = carregar_baselines(caminho)
+    baselines["ambiente"] = {"python": platform.python_version(), "plataforma": platform.platform()}
+    baselines["unidade"] = "tempo do caso / tempo da calibração"
+    for resultado in resultados:
+        if "relativo" in resultado:
+            baselines["casos"].setdefault(resultado["caso"], {})[resultado["escala"]] = resultado["relativo"]
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump(baselines, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+        arquivo.write("\n")
+
+
+def executar_suite(casos: List[str], escalas: List[str], repeticoes: Optional[int] = None,
+                   tolerancia: float = TOLERANCIA_PADRAO, baselines: Optional[Dict[str, Any]] = None,
+                   diretorio: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Executa os casos nas escalas pedidas.
+
+    Args:
+        casos: Nomes dos casos (ver CASOS)
+        escalas: Escalas (ver ESCALAS)
+        repeticoes: Repetições por medição (padrão: 3, ou 1 na escala de 1m)
+        tolerancia: Aumento relativo tolerado sobre a baseline
+        baselines: Baselines gravadas (padrão: benchmarks/baselines.json)
+        diretorio: Diretório para arquivos e banco temporários
+
+    Returns:
+        List[Dict]: Um resultado por caso e escala, com status ok, regressao,
+        sem_baseline, indisponivel ou acima_do_limite
+    """
+    baselines = carregar_baselines() if baselines is None else baselines
+    resultados = []
+    with tempfile.TemporaryDirectory(dir=diretorio) as temporario, banco_temporario(temporario):
+        for nome in casos:
+            caso_atual = CASOS[nome]
+            for escala in escalas:
+                n = ESCALAS[escala]
+                resultado = {"caso": nome, "escala": escala}
+                if n > caso_atual.limite:
+                    resultados.append({**resultado, "status": "acima_do_limite"})
+                    continue
+                try:
+                    vezes = repeticoes or (1 if n >= ESCALAS["1m"] else 3)
+                    medicao = medir(caso_atual, n, vezes, temporario)
+                except ImportError as e:
+                    resultados.append({**resultado, "status": "indisponivel", "erro": str(e)})
+                    break
+                baseline = baselines.get("casos", {}).get(nome, {}).get(escala)
+                limite = caso_atual.tolerancia if caso_atual.tolerancia is not None else tolerancia
+                resultados.append(comparar({**resultado, **medicao}, baseline, limite))
+    return resultados
+
+
+def imprimir(resultados: List[Dict[str, Any]]):
+    print(f"\n{'Caso':<22}{'Escala':>7}{'Tempo (s)':>12}{'µs/item':>11}{'Relativo':>11}{'Baseline':>11}{'Razão':>8}  Status")
+    print("-" * 96)
+    for r in resultados:
+        if "segundos" not in r:
+            print(f"{r['caso']:<22}{r['escala']:>7}{'-':>12}{'-':>11}{'-':>11}{'-':>11}{'-':>8}  {r['status']} {r.get('erro', '')}")
+            continue
+        baseline = f"{r['baseline']:.4f}" if "baseline" in r else "-"
+        razao = f"{r['razao']:.2f}x" if "razao" in r else "-"
+        print(f"{r['caso']:<22}{r['escala']:>7}{r['segundos']:>12.4f}{r['por_item_us']:>11.2f}"
+              f"{r['relativo']:>11.4f}{baseline:>11}{razao:>8}  {r['status']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--casos", nargs="+", choices=sorted(CASOS), default=list(CASOS))
+    parser.add_argument("--escala", nargs="+", choices=list(ESCALAS), default=["1k"])
+    parser.add_argument("--repeticoes", type=int, default=None)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument("--salvar-baseline", action="store_true", help="Grava os tempos medidos em baselines.json")
+    parser.add_argument("--saida", help="Grava os resultados em JSON neste arquivo")
+    args = parser.parse_args()
+
+    resultados = executar_suite(args.casos, args.escala, args.repeticoes, args.tolerancia)
+    imprimir(resultados)
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resultados, arquivo, ensure_ascii=False, indent=2)
+    if args.salvar_baseline:
+        salvar_baselines(resultados)
+        print(f"\n💾 Baselines gravadas em {BASELINES}")
+        return 0
+
+    sem_baseline = [r for r in resultados if r["status"] == "sem_baseline"]
+    if sem_baseline:
+        print(f"\n⚠️  {len(sem_baseline)} medição(ões) sem baseline; grave-as com --salvar-baseline")
+
+    regressoes = [r for r in resultados if r["status"] == "regressao"]
+    if regressoes:
+        print(f"\n❌ {len(regressoes)} regressão(ões) acima da tolerância")
+        return 1
+    print("\n✅ Nenhuma regressão")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
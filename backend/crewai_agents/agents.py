@@ -10,44 +10,12 @@ import os
 from textwrap import dedent
 from crewai_tools import ScrapeWebsiteTool
 
-# Integração com LlamaIndex
-from llama_index.llms.llama_cpp import LlamaCPP
+# LLM local (LlamaIndex) carregado sob demanda pelo registro de modelos
+# (CustomLLM_LlamaIndex continua importável a partir deste módulo)
+from crewai_agents.llm_registry import CustomLLM_LlamaIndex, llm_compartilhado  # noqa: F401
 
 load_dotenv()
 
-class CustomLLM_LlamaIndex:
-    """
-    Wrapper para CrewAI usar LlamaIndex (LlamaCPP) como LLM local.
-    Permite que os agentes CrewAI utilizem um modelo open source local ao invés de OpenAI.
-    """
-    def __init__(self, model_path=None):
-        # Caminho do modelo Llama local
-        self.model_path = model_path or os.getenv("LLAMA_MODEL_PATH", "./models/llama-2-7b-chat.ggmlv3.q4_0.bin")
-        # Instancia o modelo LlamaCPP
-        self.llm = LlamaCPP(
-            model_path=self.model_path,
-            temperature=0.7,
-            max_new_tokens=256,
-        )
-
-    def chat_completion(self, messages, temperature, max_tokens):
-        """
-        Recebe uma lista de mensagens (como no formato OpenAI) e retorna a resposta do modelo Llama.
-        Args:
-            messages (list): Lista de dicionários com chaves 'role' e 'content'.
-            temperature (float): Temperatura do modelo.
-            max_tokens (int): Máximo de tokens na resposta.
-        Returns:
-            str: Resposta do modelo Llama.
-        """
-        # Concatena as mensagens para um único prompt
-        prompt = "\n".join([m.get("content", "") for m in messages])
-        response = self.llm.complete(prompt)
-        return response
-
-# Instância global do LLM para os agentes
-llm_instance = CustomLLM_LlamaIndex()
-
 class LicitacaoAgents:
     """
     Classe que centraliza a criação dos agentes CrewAI para o fluxo de licitações.
@@ -66,8 +34,8 @@ class LicitacaoAgents:
         self.gerar_minuta_tool = GerarMinutaDocumentoTool()
         self.enviar_email_tool = EnviarEmailNotificacaoTool()
         self.enviar_teams_tool = EnviarMensagemTeamsTool()
-        # LLM local (LlamaIndex)
-        self.llm = llm_instance
+        # LLM local (LlamaIndex), compartilhado e carregado no primeiro uso
+        self.llm = llm_compartilhado()
 
     def coletor_de_editais(self):
         """
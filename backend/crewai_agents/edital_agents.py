@@ -19,8 +19,8 @@ from dotenv import load_dotenv
 import os
 from textwrap import dedent
 
-# Integração com LlamaIndex (mesmo LLM dos agentes existentes)
-from crewai_agents.llamaindex_utils import llm_instance
+# Integração com LlamaIndex (mesmo LLM dos agentes existentes, carregado no primeiro uso)
+from crewai_agents.llm_registry import llm_compartilhado
 
 load_dotenv()
 
@@ -51,7 +51,7 @@ class EditalAgents:
         self.feedback_prediction_tool = FeedbackPredictionTool()
 
         # LLM compartilhado
-        self.llm = llm_instance
+        self.llm = llm_compartilhado()
 
     def coletor_requisitos(self):
         """
@@ -0,0 +1,351 @@
+"""
+Resultados estruturados das etapas da geração de editais.
+
+Cada etapa de run_edital_generation_crew (crewai_agents/edital_main.py) tem a
+saída convertida uma única vez em um registro tipado e guardada em
+`ResultadosEtapas`. As etapas seguintes recebem apenas um resumo dos campos de
+que precisam, em vez do texto completo de todas as etapas anteriores:
+
+- análises especializadas: campos da solicitação de cada área + resumo da validação;
+- risco: nível de risco, pontos de atenção e sugestões de cada análise;
+- geração: solicitação + sugestões das análises + mitigação do risco;
+- otimização: apenas o edital gerado;
+- coordenação: o edital otimizado (uma vez) e os resumos das demais etapas.
+
+O tamanho do prompt e a duração de cada etapa ficam em `metricas`.
+"""
+
+import json
+import re
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+# Estimativa usada nas métricas (textos em português, tokenizadores tipo BPE)
+CARACTERES_POR_TOKEN = 4
+# Limites dos resumos repassados às etapas seguintes
+LIMITE_ITENS = 5
+LIMITE_TEXTO = 300
+# Trecho guardado quando a saída do agente não é JSON
+LIMITE_TEXTO_LIVRE = 600
+
+AREAS_ANALISE = ("juridica", "tecnica", "financeira")
+
+# Campos da solicitação usados por cada análise especializada
+CAMPOS_POR_AREA = {
+    "juridica": (
+        "objeto", "tipo_licitacao", "modalidade", "valor_total_estimado", "prazo_proposta",
+        "requisitos_juridicos", "permite_consorcio", "exige_visita_tecnica", "criterio_julgamento",
+    ),
+    "tecnica": ("objeto", "categoria", "itens", "requisitos_tecnicos", "prazo_execucao", "exige_visita_tecnica"),
+    "financeira": ("objeto", "categoria", "itens", "valor_total_estimado", "prazo_execucao"),
+}
+
+_BLOCO_JSON = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def extrair_json(texto: str) -> Optional[Dict[str, Any]]:
+    """
+    Objeto JSON da saída de um agente (texto puro, bloco ```json``` ou JSON no meio do texto).
+
+    Returns:
+        dict ou None se não houver um objeto JSON válido
+    """
+    texto = (texto or "").strip()
+    candidatos = [texto] + _BLOCO_JSON.findall(texto)
+    inicio, fim = texto.find("{"), texto.rfind("}")
+    if 0 <= inicio < fim:
+        candidatos.append(texto[inicio:fim + 1])
+    for candidato in candidatos:
+        try:
+            dados = json.loads(candidato)
+        except (ValueError, TypeError):
+            continue
+        if isinstance(dados, dict):
+            return dados
+    return None
+
+
+def _primeiro(dados: Dict[str, Any], *chaves: str) -> Any:
+    for chave in chaves:
+        if dados.get(chave) not in (None, "", [], {}):
+            return dados[chave]
+    return None
+
+
+def _texto_curto(valor: Any, limite: int = LIMITE_TEXTO) -> str:
+    texto = valor if isinstance(valor, str) else json.dumps(valor, ensure_ascii=False)
+    return texto if len(texto) <= limite else texto[:limite].rstrip() + "…"
+
+
+def _lista(dados: Dict[str, Any], *chaves: str) -> List[str]:
+    valor = _primeiro(dados, *chaves)
+    if valor is None:
+        return []
+    if not isinstance(valor, list):
+        valor = [valor]
+    return [_texto_curto(v) for v in valor[:LIMITE_ITENS]]
+
+
+def _nivel(valor: Any) -> Optional[str]:
+    # Classificações podem vir como texto ou como {"nivel": ..., "justificativa": ...}
+    if isinstance(valor, dict):
+        valor = _primeiro(valor, "nivel", "classificacao", "valor")
+    return str(valor).lower() if valor not in (None, "") else None
+
+
+def _numero(valor: Any) -> Optional[float]:
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _texto_livre(texto: str, dados: Optional[Dict[str, Any]]) -> Optional[str]:
+    # None indica saída em JSON; texto (mesmo vazio) indica formato livre
+    return None if dados is not None else _texto_curto(texto.strip(), LIMITE_TEXTO_LIVRE)
+
+
+@dataclass
+class ValidacaoRequisitos:
+    """Etapa 1: validação dos requisitos."""
+    status: Optional[str] = None
+    complexidade: Optional[str] = None
+    problemas: List[str] = field(default_factory=list)
+    sugestoes: List[str] = field(default_factory=list)
+    texto_livre: Optional[str] = None
+
+    @classmethod
+    def de_texto(cls, texto: str) -> "ValidacaoRequisitos":
+        dados = extrair_json(texto)
+        d = dados or {}
+        return cls(
+            status=_nivel(_primeiro(d, "status", "status_validacao")),
+            complexidade=_nivel(_primeiro(d, "complexidade", "classificacao_complexidade")),
+            problemas=_lista(d, "problemas", "problemas_identificados", "inconsistencias"),
+            sugestoes=_lista(d, "sugestoes", "sugestoes_melhoria"),
+            texto_livre=_texto_livre(texto, dados),
+        )
+
+
+@dataclass
+class AnaliseEspecializada:
+    """Etapa 2: análise jurídica, técnica ou financeira."""
+    area: str
+    risco: Optional[str] = None
+    conforme: Optional[bool] = None
+    pontos_atencao: List[str] = field(default_factory=list)
+    sugestoes: List[str] = field(default_factory=list)
+    valor_sugerido: Optional[float] = None
+    texto_livre: Optional[str] = None
+
+    @classmethod
+    def de_texto(cls, area: str, texto: str) -> "AnaliseEspecializada":
+        dados = extrair_json(texto)
+        d = dados or {}
+        conforme = _primeiro(d, "conforme", "viabilidade", "orcamento_adequado")
+        return cls(
+            area=area,
+            risco=_nivel(_primeiro(
+                d, "risco_juridico", "risco_tecnico", "risco_financeiro",
+                "classificacao_risco", "nivel_risco", "risco"
+            )),
+            conforme=conforme if isinstance(conforme, bool) else None,
+            pontos_atencao=_lista(d, "pontos_atencao", "problemas", "riscos"),
+            sugestoes=_lista(d, "sugestoes_melhoria", "sugestoes", "recomendacoes"),
+            valor_sugerido=_numero(_primeiro(d, "valor_sugerido")),
+            texto_livre=_texto_livre(texto, dados),
+        )
+
+
+@dataclass
+class RiscoConsolidado:
+    """Etapa 3: risco consolidado."""
+    risco_geral: Optional[str] = None
+    probabilidade_sucesso: Optional[float] = None
+    fatores_risco: List[str] = field(default_factory=list)
+    medidas_mitigacao: List[str] = field(default_factory=list)
+    recomendacao: Optional[str] = None
+    texto_livre: Optional[str] = None
+
+    @classmethod
+    def de_texto(cls, texto: str) -> "RiscoConsolidado":
+        dados = extrair_json(texto)
+        d = dados or {}
+        recomendacao = _primeiro(d, "recomendacao", "recomendacao_final")
+        return cls(
+            risco_geral=_nivel(_primeiro(d, "risco_geral", "risco_consolidado", "nivel_risco")),
+            probabilidade_sucesso=_numero(_primeiro(d, "probabilidade_sucesso")),
+            fatores_risco=_lista(d, "fatores_risco", "fatores_criticos"),
+            medidas_mitigacao=_lista(d, "medidas_mitigacao", "mitigacao"),
+            recomendacao=_texto_curto(recomendacao) if recomendacao is not None else None,
+            texto_livre=_texto_livre(texto, dados),
+        )
+
+
+@dataclass
+class EditalProduzido:
+    """Etapas 4 e 5: edital gerado ou otimizado."""
+    conteudo: str
+    template: Optional[str] = None
+    observacoes: List[str] = field(default_factory=list)
+
+    @classmethod
+    def de_texto(cls, texto: str) -> "EditalProduzido":
+        dados = extrair_json(texto)
+        if dados is None:
+            return cls(conteudo=texto.strip())
+        conteudo = _primeiro(dados, "conteudo_edital", "edital_otimizado", "edital", "conteudo")
+        if conteudo is None:
+            conteudo = dados
+        template = _primeiro(dados, "template_utilizado", "template")
+        return cls(
+            conteudo=conteudo if isinstance(conteudo, str) else json.dumps(conteudo, ensure_ascii=False),
+            template=str(template) if template is not None else None,
+            observacoes=_lista(dados, "otimizacoes_aplicadas", "otimizacoes", "observacoes"),
+        )
+
+
+def _json(dados: Dict[str, Any]) -> str:
+    return json.dumps(dados, ensure_ascii=False, separators=(",", ":"))
+
+
+def _sem_vazios(dados: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in dados.items() if v not in (None, "", [], {})}
+
+
+def _resumo(registro) -> Dict[str, Any]:
+    return _sem_vazios(asdict(registro)) if registro is not None else {}
+
+
+class ResultadosEtapas:
+    """
+    Registros das etapas de uma geração de edital e os contextos de cada etapa.
+    """
+
+    def __init__(self, requisitos: Dict[str, Any]):
+        self.requisitos = requisitos
+        self.validacao: Optional[ValidacaoRequisitos] = None
+        self.analises: Dict[str, AnaliseEspecializada] = {}
+        self.risco: Optional[RiscoConsolidado] = None
+        self.edital_gerado: Optional[EditalProduzido] = None
+        self.edital_otimizado: Optional[EditalProduzido] = None
+        self.metricas: Dict[str, Dict[str, Any]] = {}
+
+    # === Registro das saídas ===
+
+    def registrar_validacao(self, texto: str) -> ValidacaoRequisitos:
+        self.validacao = ValidacaoRequisitos.de_texto(str(texto))
+        return self.validacao
+
+    def registrar_analise(self, area: str, texto: str) -> AnaliseEspecializada:
+        self.analises[area] = AnaliseEspecializada.de_texto(area, str(texto))
+        return self.analises[area]
+
+    def registrar_risco(self, texto: str) -> RiscoConsolidado:
+        self.risco = RiscoConsolidado.de_texto(str(texto))
+        return self.risco
+
+    def registrar_edital(self, texto: str, otimizado: bool = False) -> EditalProduzido:
+        edital = EditalProduzido.de_texto(str(texto))
+        if otimizado:
+            self.edital_otimizado = edital
+        else:
+            self.edital_gerado = edital
+        return edital
+
+    @property
+    def edital_final(self) -> Optional[EditalProduzido]:
+        """Edital otimizado ou, se a otimização não produziu conteúdo, o gerado."""
+        if self.edital_otimizado is not None and self.edital_otimizado.conteudo:
+            return self.edital_otimizado
+        return self.edital_gerado
+
+    # === Contextos das etapas ===
+
+    def _validacao_resumida(self) -> Dict[str, Any]:
+        return _resumo(self.validacao)
+
+    def _analises_resumidas(self, *campos: str) -> Dict[str, Any]:
+        return {
+            area: _sem_vazios({campo: getattr(analise, campo) for campo in campos})
+            for area, analise in self.analises.items()
+        }
+
+    def contexto_analise(self, area: str) -> str:
+        """Campos da solicitação usados pela área e resumo da validação."""
+        return _json({
+            "requisitos": {c: self.requisitos[c] for c in CAMPOS_POR_AREA[area] if c in self.requisitos},
+            "validacao": self._validacao_resumida(),
+        })
+
+    def contexto_risco(self) -> str:
+        """Classificações e pontos de atenção das análises."""
+        return _json({
+            "complexidade": self.validacao.complexidade if self.validacao else None,
+            "valor_total_estimado": self.requisitos.get("valor_total_estimado"),
+            "analises": self._analises_resumidas(
+                "risco", "conforme", "pontos_atencao", "sugestoes", "valor_sugerido", "texto_livre"
+            ),
+        })
+
+    def contexto_geracao(self) -> str:
+        """Solicitação completa, sugestões das análises e mitigação do risco."""
+        return _json({
+            "requisitos": self.requisitos,
+            "sugestoes_validacao": self.validacao.sugestoes if self.validacao else [],
+            "analises": self._analises_resumidas("sugestoes", "valor_sugerido"),
+            "risco": _sem_vazios({
+                "risco_geral": self.risco.risco_geral,
+                "medidas_mitigacao": self.risco.medidas_mitigacao,
+            }) if self.risco else {},
+        })
+
+    def contexto_otimizacao(self) -> str:
+        """Apenas o edital gerado."""
+        edital = self.edital_gerado
+        return _json(_resumo(edital))
+
+    def contexto_coordenacao(self) -> str:
+        """Edital final (uma única vez) e resumos das etapas anteriores."""
+        edital = self.edital_final
+        return _json({
+            "objeto": self.requisitos.get("objeto"),
+            "validacao": self._validacao_resumida(),
+            "analises": self._analises_resumidas("risco", "conforme", "pontos_atencao"),
+            "risco": _resumo(self.risco),
+            "otimizacoes_aplicadas": self.edital_otimizado.observacoes if self.edital_otimizado else [],
+            "edital_final": _sem_vazios({
+                "conteudo": edital.conteudo,
+                "template": edital.template,
+            }) if edital else {},
+        })
+
+    # === Métricas ===
+
+    @contextmanager
+    def medir(self, etapa: str, *prompts: str):
+        """
+        Registra o tamanho dos contextos enviados à etapa e a duração do bloco.
+        """
+        caracteres = sum(len(p) for p in prompts)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metricas[etapa] = {
+                "caracteres_contexto": caracteres,
+                "tokens_estimados": caracteres // CARACTERES_POR_TOKEN,
+                "duracao_s": round(time.perf_counter() - inicio, 3),
+            }
+
+    def registros(self) -> Dict[str, Any]:
+        """Registros de todas as etapas (para persistência ou depuração)."""
+        return {
+            "validacao": _resumo(self.validacao),
+            "analises": {area: _resumo(a) for area, a in self.analises.items()},
+            "risco": _resumo(self.risco),
+            "edital_gerado": _resumo(self.edital_gerado),
+            "edital_otimizado": _resumo(self.edital_otimizado),
+        }
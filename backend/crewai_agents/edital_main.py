@@ -8,10 +8,16 @@ import json
 from crewai import Crew, Process
 from crewai_agents.edital_agents import EditalAgents
 from crewai_agents.edital_tasks import EditalTasks
+from crewai_agents.edital_etapas import AREAS_ANALISE, ResultadosEtapas, extrair_json
 from api.database import create_db_tables, SessionLocal, EditalRequest, EditalGerado
 from api.edital_models import EditalRequest as EditalRequestModel, StatusEdital
+from services.feedback_automation import automacao_feedback
+from monitoring.llm_usage import contabilizador_uso
+from monitoring.tracing import rastreador
+from contextlib import contextmanager
 from datetime import datetime
 import uuid
+from typing import Optional
 
 def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
     """
@@ -36,7 +42,31 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
     # Gerar ID único para esta solicitação
     request_id = str(uuid.uuid4())
     
+    # Tokens, tempo e custo de cada etapa ficam em uso_llm com o request_id
+    with rastreador.span("edital.geracao", **{"edital.request_id": request_id, "usuario": user_id}), \
+            contabilizador_uso.execucao("geracao_edital", request_id=request_id):
+        return _executar_etapas(agents, tasks, request_data, request_id, user_id)
+
+@contextmanager
+def _etapa(etapas: ResultadosEtapas, nome: str, agente: str, *contextos: str):
+    """
+    Executa uma etapa dentro de um span, medindo o contexto recebido e
+    contabilizando o uso de LLM da etapa.
+    """
+    with rastreador.span(f"crew.{nome}", **{"crew.etapa": nome, "crew.agente": agente}), \
+            etapas.medir(nome, *contextos), \
+            contabilizador_uso.tarefa(nome, agente=agente):
+        yield
+
+def _executar_etapas(agents: EditalAgents, tasks: EditalTasks, request_data: dict, request_id: str, user_id: str) -> dict:
+    """
+    Executa as etapas da geração de edital (ver run_edital_generation_crew).
+    """
     try:
+        # Saídas de cada etapa, convertidas uma única vez em registros tipados.
+        # As etapas seguintes recebem só os campos de que precisam.
+        etapas = ResultadosEtapas(request_data)
+
         # === ETAPA 1: COLETA E VALIDAÇÃO DE REQUISITOS ===
         print("\n📋 Etapa 1: Coletando e validando requisitos...")
         
@@ -55,22 +85,19 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             verbose=1
         )
         
-        resultado_coleta = crew_coleta.kickoff()
-        print(f"✅ Requisitos validados: {resultado_coleta}")
-        
-        # Verificar se requisitos foram aprovados
-        try:
-            dados_coleta = json.loads(str(resultado_coleta))
-            if dados_coleta.get('status') != 'aprovado':
-                return {
-                    "sucesso": False,
-                    "etapa": "validacao_requisitos",
-                    "erro": "Requisitos não aprovados",
-                    "detalhes": dados_coleta
-                }
-        except:
-            # Se não conseguir parsear, continuar (pode ser formato diferente)
-            pass
+        with _etapa(etapas, "validacao_requisitos", coletor_agente.role, requisitos_json):
+            resultado_coleta = crew_coleta.kickoff()
+        validacao = etapas.registrar_validacao(resultado_coleta)
+        print(f"✅ Requisitos validados: {validacao.status or resultado_coleta}")
+        
+        # Verificar se requisitos foram aprovados (saída fora de JSON: formato diferente, continuar)
+        if validacao.texto_livre is None and validacao.status != 'aprovado':
+            return {
+                "sucesso": False,
+                "etapa": "validacao_requisitos",
+                "erro": "Requisitos não aprovados",
+                "detalhes": etapas.registros()["validacao"]
+            }
         
         # === ETAPA 2: ANÁLISES ESPECIALIZADAS ===
         print("\n🔍 Etapa 2: Realizando análises especializadas...")
@@ -80,10 +107,15 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
         tecnico_agente = agents.analisador_tecnico()
         financeiro_agente = agents.analisador_financeiro()
         
+        agentes_analise = ", ".join(a.role for a in (juridico_agente, tecnico_agente, financeiro_agente))
+        
+        # Cada análise recebe apenas os campos da solicitação da sua área
+        contextos = {area: etapas.contexto_analise(area) for area in AREAS_ANALISE}
+        
         # Tarefas de análise (executadas em paralelo)
-        juridico_task = tasks.analisar_juridico_task(juridico_agente, str(resultado_coleta))
-        tecnico_task = tasks.analisar_tecnico_task(tecnico_agente, str(resultado_coleta))
-        financeiro_task = tasks.analisar_financeiro_task(financeiro_agente, str(resultado_coleta))
+        juridico_task = tasks.analisar_juridico_task(juridico_agente, contextos["juridica"])
+        tecnico_task = tasks.analisar_tecnico_task(tecnico_agente, contextos["tecnica"])
+        financeiro_task = tasks.analisar_financeiro_task(financeiro_agente, contextos["financeira"])
         
         crew_analises = Crew(
             agents=[juridico_agente, tecnico_agente, financeiro_agente],
@@ -92,7 +124,11 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             verbose=1
         )
         
-        resultado_analises = crew_analises.kickoff()
+        with _etapa(etapas, "analises_especializadas", agentes_analise, *contextos.values()):
+            resultado_analises = crew_analises.kickoff()
+        # O resultado da crew traz só a última tarefa; cada análise vem da sua tarefa
+        for area, task in zip(AREAS_ANALISE, (juridico_task, tecnico_task, financeiro_task)):
+            etapas.registrar_analise(area, task.output if task.output is not None else "")
         print(f"✅ Análises especializadas concluídas")
         
         # === ETAPA 3: ANÁLISE DE RISCO CONSOLIDADA ===
@@ -100,15 +136,12 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
         
         risco_agente = agents.especialista_risco()
         
-        # Consolidar análises para o cálculo de risco
-        analises_consolidadas = {
-            "requisitos_validados": str(resultado_coleta),
-            "analises_especializadas": str(resultado_analises)
-        }
+        # Classificações e pontos de atenção das análises
+        analises_consolidadas = etapas.contexto_risco()
         
         risco_task = tasks.calcular_risco_task(
             agent=risco_agente,
-            analises_consolidadas=json.dumps(analises_consolidadas, ensure_ascii=False)
+            analises_consolidadas=analises_consolidadas
         )
         
         crew_risco = Crew(
@@ -118,7 +151,9 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             verbose=1
         )
         
-        resultado_risco = crew_risco.kickoff()
+        with _etapa(etapas, "calculo_risco", risco_agente.role, analises_consolidadas):
+            resultado_risco = crew_risco.kickoff()
+        etapas.registrar_risco(resultado_risco)
         print(f"✅ Análise de risco concluída")
         
         # === ETAPA 4: GERAÇÃO DO EDITAL ===
@@ -126,17 +161,12 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
         
         gerador_agente = agents.gerador_edital()
         
-        # Consolidar todos os dados para geração
-        dados_consolidados = {
-            "requisitos": request_data,
-            "validacao": str(resultado_coleta),
-            "analises": str(resultado_analises),
-            "risco": str(resultado_risco)
-        }
+        # Solicitação, sugestões das análises e medidas de mitigação
+        dados_consolidados = etapas.contexto_geracao()
         
         gerar_task = tasks.gerar_edital_task(
             agent=gerador_agente,
-            dados_consolidados=json.dumps(dados_consolidados, ensure_ascii=False)
+            dados_consolidados=dados_consolidados
         )
         
         crew_geracao = Crew(
@@ -146,17 +176,20 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             verbose=1
         )
         
-        resultado_geracao = crew_geracao.kickoff()
+        with _etapa(etapas, "geracao_edital", gerador_agente.role, dados_consolidados):
+            resultado_geracao = crew_geracao.kickoff()
+        etapas.registrar_edital(resultado_geracao)
         print(f"✅ Edital gerado")
         
         # === ETAPA 5: OTIMIZAÇÃO E REVISÃO ===
         print("\n🔧 Etapa 5: Otimizando edital...")
         
         otimizador_agente = agents.revisor_otimizador()
+        edital_gerado = etapas.contexto_otimizacao()
         
         otimizar_task = tasks.otimizar_edital_task(
             agent=otimizador_agente,
-            edital_gerado=str(resultado_geracao)
+            edital_gerado=edital_gerado
         )
         
         crew_otimizacao = Crew(
@@ -166,7 +199,9 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             verbose=1
         )
         
-        resultado_otimizacao = crew_otimizacao.kickoff()
+        with _etapa(etapas, "otimizacao", otimizador_agente.role, edital_gerado):
+            resultado_otimizacao = crew_otimizacao.kickoff()
+        etapas.registrar_edital(resultado_otimizacao, otimizado=True)
         print(f"✅ Edital otimizado")
         
         # === ETAPA 6: COORDENAÇÃO FINAL ===
@@ -174,18 +209,12 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
         
         coordenador_agente = agents.coordenador_processo()
         
-        resultados_completos = {
-            "requisitos": request_data,
-            "validacao": str(resultado_coleta),
-            "analises": str(resultado_analises),
-            "risco": str(resultado_risco),
-            "edital_gerado": str(resultado_geracao),
-            "edital_otimizado": str(resultado_otimizacao)
-        }
+        # Edital final uma única vez, com os resumos das demais etapas
+        resultados_completos = etapas.contexto_coordenacao()
         
         coordenar_task = tasks.coordenar_processo_task(
             agent=coordenador_agente,
-            resultados_completos=json.dumps(resultados_completos, ensure_ascii=False)
+            resultados_completos=resultados_completos
         )
         
         crew_coordenacao = Crew(
@@ -195,9 +224,13 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             verbose=1
         )
         
-        resultado_final = crew_coordenacao.kickoff()
+        with _etapa(etapas, "coordenacao_final", coordenador_agente.role, resultados_completos):
+            resultado_final = crew_coordenacao.kickoff()
         print(f"✅ Processo coordenado e finalizado")
         
+        for etapa, metrica in etapas.metricas.items():
+            print(f"   📏 {etapa}: ~{metrica['tokens_estimados']} tokens de contexto, {metrica['duracao_s']}s")
+        
         # === ETAPA 7: SALVAMENTO NO BANCO ===
         print("\n💾 Etapa 7: Salvando no banco de dados...")
         
@@ -205,7 +238,8 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             request_id=request_id,
             request_data=request_data,
             resultado_final=str(resultado_final),
-            user_id=user_id
+            user_id=user_id,
+            etapas=etapas
         )
         
         print(f"✅ Edital salvo com ID: {edital_id}")
@@ -225,6 +259,7 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
                 "salvamento"
             ],
             "resultado_final": str(resultado_final),
+            "metricas_etapas": etapas.metricas,
             "data_processamento": datetime.now().isoformat()
         }
         
@@ -240,7 +275,8 @@ def run_edital_generation_crew(request_data: dict, user_id: str = "sistema"):
             "data_erro": datetime.now().isoformat()
         }
 
-def salvar_edital_no_banco(request_id: str, request_data: dict, resultado_final: str, user_id: str) -> str:
+def salvar_edital_no_banco(request_id: str, request_data: dict, resultado_final: str, user_id: str,
+                           etapas: Optional[ResultadosEtapas] = None) -> str:
     """
     Salva o edital gerado no banco de dados.
     
@@ -249,6 +285,7 @@ def salvar_edital_no_banco(request_id: str, request_data: dict, resultado_final:
         request_data: Dados originais da solicitação
         resultado_final: Resultado final do processo
         user_id: ID do usuário
+        etapas: Registros das etapas (análises e edital otimizado)
     
     Returns:
         str: ID do edital salvo
@@ -284,27 +321,36 @@ def salvar_edital_no_banco(request_id: str, request_data: dict, resultado_final:
         
         db.add(edital_request)
         
-        # Extrair dados do resultado final (tentar parsear JSON)
-        try:
-            dados_resultado = json.loads(resultado_final)
-            conteudo_edital = dados_resultado.get('conteudo_edital', resultado_final)
-        except:
-            conteudo_edital = resultado_final
+        # Extrair dados do resultado final; sem conteudo_edital, usar o edital otimizado
+        dados_resultado = extrair_json(resultado_final) or {}
+        edital_final = etapas.edital_final if etapas else None
+        conteudo_edital = dados_resultado.get('conteudo_edital') or (
+            edital_final.conteudo if edital_final else resultado_final
+        )
+        if not isinstance(conteudo_edital, str):
+            conteudo_edital = json.dumps(conteudo_edital, ensure_ascii=False)
+        
+        # Registros das análises (placeholder quando a etapa não foi registrada)
+        registros = etapas.registros() if etapas else {"analises": {}, "risco": {}}
+        pendente = {"status": "analisado"}
         
         # Salvar edital gerado
         edital_gerado = EditalGerado(
             id=edital_id,
             request_id=request_id,
-            analise_juridica={"status": "analisado"},  # Placeholder
-            analise_tecnica={"status": "analisado"},   # Placeholder
-            analise_financeira={"status": "analisado"}, # Placeholder
-            analise_risco={"status": "analisado"},     # Placeholder
+            analise_juridica=registros["analises"].get("juridica") or pendente,
+            analise_tecnica=registros["analises"].get("tecnica") or pendente,
+            analise_financeira=registros["analises"].get("financeira") or pendente,
+            analise_risco=registros["risco"] or pendente,
             conteudo_edital=conteudo_edital,
             status="rascunho",
             criado_por=user_id
         )
         
         db.add(edital_gerado)
+        db.flush()
+        # Agenda a solicitação de feedback do setor requisitante
+        automacao_feedback.agendar_por_status(db, edital_gerado, "rascunho")
         db.commit()
         
         return edital_id
@@ -8,6 +8,7 @@ import os
 from datetime import datetime
 from typing import Dict, List, Any
 from crewai_tools.tools import BaseTool
+from monitoring.tracing import rastreador
 from api.database import SessionLocal, EditalRequest, EditalGerado, HistoricoEdital, TemplateEdital
 from api.edital_models import NivelRisco, CategoriaObjeto, TipoLicitacao
 import uuid
@@ -25,6 +26,7 @@ if os.path.exists(PRECOS_REFERENCIA_PATH):
     with open(PRECOS_REFERENCIA_PATH, 'r', encoding='utf-8') as f:
         _PRECOS_REFERENCIA = json.load(f)
 
+@rastreador.ferramenta
 class AnalisarRequisitosTool(BaseTool):
     """
     Ferramenta para analisar e validar requisitos de entrada.
@@ -97,6 +99,7 @@ class AnalisarRequisitosTool(BaseTool):
         except Exception as e:
             return json.dumps({"erro": f"Erro ao analisar requisitos: {str(e)}"})
 
+@rastreador.ferramenta
 class ConsultarHistoricoTool(BaseTool):
     """
     Ferramenta para consultar histórico de editais similares.
@@ -184,6 +187,7 @@ class ConsultarHistoricoTool(BaseTool):
         else:
             return "Categoria com baixa taxa de sucesso. Revisar cuidadosamente os fatores de fracasso."
 
+@rastreador.ferramenta
 class ValidarConformidadeTool(BaseTool):
     """
     Ferramenta para validar conformidade jurídica com a Lei 14.133/2021.
@@ -266,6 +270,7 @@ class ValidarConformidadeTool(BaseTool):
         except Exception as e:
             return json.dumps({"erro": f"Erro na validação jurídica: {str(e)}"})
 
+@rastreador.ferramenta
 class CalcularRiscoTool(BaseTool):
     """
     Ferramenta para calcular risco consolidado de fracasso.
@@ -362,6 +367,7 @@ class CalcularRiscoTool(BaseTool):
         except Exception as e:
             return json.dumps({"erro": f"Erro no cálculo de risco: {str(e)}"})
 
+@rastreador.ferramenta
 class AnalisarMercadoTool(BaseTool):
     """
     Ferramenta para análise de mercado e preços.
@@ -435,6 +441,7 @@ class AnalisarMercadoTool(BaseTool):
         except Exception as e:
             return json.dumps({"erro": f"Erro na análise de mercado: {str(e)}"})
 
+@rastreador.ferramenta
 class ConsultarTemplatesTool(BaseTool):
     """
     Ferramenta para consultar templates de editais.
@@ -521,6 +528,7 @@ Prazo para propostas: {{PRAZO_PROPOSTA}} dias
 {{DISPOSICOES_GERAIS}}
 """
 
+@rastreador.ferramenta
 class GerarEditalTool(BaseTool):
     """
     Ferramenta para gerar o conteúdo final do edital.
@@ -649,6 +657,7 @@ class GerarEditalTool(BaseTool):
 
         return disposicoes
 
+@rastreador.ferramenta
 class OtimizarEditalTool(BaseTool):
     """
     Ferramenta para otimizar o edital gerado.
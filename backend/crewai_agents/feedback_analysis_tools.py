@@ -14,10 +14,73 @@ class BaseTool:
         raise NotImplementedError
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter
+from operator import itemgetter
 import re
-from textblob import TextBlob
-import statistics
+import numpy as np
 
+from crewai_agents.keyword_matcher import ClassificadorPalavrasChave
+from monitoring.tracing import rastreador
+
+# Notas (1-5) usadas na satisfação de cada stakeholder: (campos obrigatórios, campos com padrão 3)
+CAMPOS_SATISFACAO = {
+    "feedback_setor": (
+        ("facilidade_uso", "qualidade_edital", "adequacao_requisitos"),
+        ("tempo_processamento", "clareza_especificacoes")
+    ),
+    "feedback_empresa": (
+        (),
+        ("clareza_objeto", "adequacao_especificacoes", "prazo_elaboracao_proposta",
+         "criterios_julgamento", "valor_estimado")
+    ),
+    "feedback_licitacao": (
+        ("qualidade_tecnica", "conformidade_legal"),
+        ("adequacao_modalidade", "clareza_redacao")
+    ),
+}
+# Stakeholders em que nota 0 significa "não avaliado" e fica fora da média do feedback;
+# nos demais, 0 é uma nota e a média divide pelo número de critérios
+ZERO_SEM_NOTA = ("feedback_empresa",)
+NOMES_STAKEHOLDER = {
+    "feedback_setor": "setores",
+    "feedback_empresa": "empresas",
+    "feedback_licitacao": "licitacao",
+}
+
+# Palavras-chave relacionadas a licitações
+PALAVRAS_RELEVANTES = [
+    "especificação", "prazo", "valor", "critério", "habilitação",
+    "documentação", "clareza", "tempo", "processo", "sistema",
+    "interface", "usabilidade", "conformidade", "legal", "técnico"
+]
+# Áreas de problema, em ordem de prioridade de classificação
+AREAS_PROBLEMA = {
+    "interface": ["interface", "usabilidade", "navegação", "tela"],
+    "especificacoes_tecnicas": ["especificação", "técnico", "requisito"],
+    "conformidade_legal": ["legal", "conformidade", "lei", "norma"],
+    "performance": ["prazo", "tempo", "demora", "lento"],
+    "aspectos_financeiros": ["valor", "preço", "custo", "orçamento"],
+}
+# Impacto estimado de sugestões (1-5), do maior para o menor
+IMPACTO_SUGESTAO = {
+    5: ["automatizar", "integrar", "otimizar", "melhorar", "reduzir tempo"],
+    3: ["ajustar", "corrigir", "atualizar", "modificar"],
+}
+# Facilidade de implementação (1-5), na ordem de verificação
+FACILIDADE_IMPLEMENTACAO = {
+    5: ["texto", "mensagem", "label", "cor", "tamanho", "ordem"],
+    3: ["campo", "validação", "formato", "layout"],
+    1: ["integração", "algoritmo", "banco", "arquitetura"],
+}
+
+# Autômato único com todas as tabelas: cada texto é percorrido uma só vez
+CLASSIFICADOR = ClassificadorPalavrasChave({
+    "palavra": {palavra: [palavra] for palavra in PALAVRAS_RELEVANTES},
+    "area": AREAS_PROBLEMA,
+    "impacto": IMPACTO_SUGESTAO,
+    "facilidade": FACILIDADE_IMPLEMENTACAO,
+})
+
+@rastreador.ferramenta
 class FeedbackAnalysisTool(BaseTool):
     """
     Ferramenta para análise automática de feedback usando IA.
@@ -48,6 +111,8 @@ class FeedbackAnalysisTool(BaseTool):
                 insights = self._analise_sugestoes(data)
             elif tipo_analise == "tendencias":
                 insights = self._analise_tendencias(data)
+            elif tipo_analise == "satisfacao_periodo":
+                insights = self._calcular_satisfacao({"rollups": self._carregar_rollups(data)})
             else:
                 insights = self._analise_completa(data)
             
@@ -63,6 +128,7 @@ class FeedbackAnalysisTool(BaseTool):
             "analise_satisfacao": {},
             "problemas_identificados": {},
             "sugestoes_priorizadas": {},
+            "analise_sentimento": {},
             "tendencias": {},
             "recomendacoes_acoes": {},
             "impacto_estimado": {},
@@ -78,6 +144,9 @@ class FeedbackAnalysisTool(BaseTool):
         # Priorização de sugestões
         insights["sugestoes_priorizadas"] = self._priorizar_sugestoes(data)
         
+        # Sentimento dos textos livres (cache calculado no registro do feedback)
+        insights["analise_sentimento"] = self._analisar_sentimento(data)
+        
         # Análise de tendências
         insights["tendencias"] = self._analisar_tendencias(data)
         
@@ -98,74 +167,209 @@ class FeedbackAnalysisTool(BaseTool):
             "evolucao_temporal": {}
         }
         
-        # Coletar todas as avaliações numéricas
-        avaliacoes_setor = []
-        avaliacoes_empresa = []
-        avaliacoes_licitacao = []
+        # Agregados diários já somados: não é preciso percorrer os feedbacks
+        if "rollups" in data:
+            return self._satisfacao_de_rollups(data["rollups"], satisfacao)
+        
+        # Matriz de notas por stakeholder (linhas = feedbacks, colunas = critérios)
+        medias_individuais = []
+        for chave, nome in NOMES_STAKEHOLDER.items():
+            campos, notas = self._matriz_notas(
+                data.get(chave, []), *CAMPOS_SATISFACAO[chave], zero_sem_nota=chave in ZERO_SEM_NOTA
+            )
+            if not notas.size:
+                continue
+            
+            # Notas NaN (sem avaliação) não entram na média do feedback
+            validas = ~np.isnan(notas)
+            zeradas = np.where(validas, notas, 0)
+            quantidade = validas.sum(axis=1)
+            com_nota = quantidade > 0
+            medias = zeradas.sum(axis=1)[com_nota] / quantidade[com_nota]
+            if not medias.size:
+                continue
+            
+            satisfacao["por_stakeholder"][nome] = self._estatisticas(medias)
+            # Média por critério com soma e contagem (sem o aviso de np.nanmean
+            # para critérios que nenhum feedback avaliou)
+            satisfacao["por_categoria"][nome] = {
+                campo: round(float(soma / avaliados), 2)
+                for campo, soma, avaliados in zip(campos, zeradas.sum(axis=0), validas.sum(axis=0))
+                if avaliados
+            }
+            medias_individuais.append(medias)
         
-        # Processar feedback dos setores
-        for feedback in data.get("feedback_setor", []):
-            if all(key in feedback for key in ["facilidade_uso", "qualidade_edital", "adequacao_requisitos"]):
-                media = (feedback["facilidade_uso"] + feedback["qualidade_edital"] + 
-                        feedback["adequacao_requisitos"] + feedback.get("tempo_processamento", 3) + 
-                        feedback.get("clareza_especificacoes", 3)) / 5
-                avaliacoes_setor.append(media)
+        # Satisfação geral
+        if medias_individuais:
+            todas_avaliacoes = np.concatenate(medias_individuais)
+            media_geral = float(todas_avaliacoes.mean())
+            satisfacao["geral"] = {
+                "media": round(media_geral, 2),
+                "total_respostas": int(todas_avaliacoes.size),
+                "nivel": self._classificar_satisfacao(media_geral)
+            }
         
-        # Processar feedback das empresas
-        for feedback in data.get("feedback_empresa", []):
-            avaliacoes_numericas = [
-                feedback.get("clareza_objeto", 3),
-                feedback.get("adequacao_especificacoes", 3),
-                feedback.get("prazo_elaboracao_proposta", 3),
-                feedback.get("criterios_julgamento", 3),
-                feedback.get("valor_estimado", 3)
+        return satisfacao
+    
+    def _matriz_notas(self, feedbacks, obrigatorios: tuple, com_padrao: tuple, zero_sem_nota: bool = False):
+        """
+        Monta a matriz de notas de um stakeholder em formato colunar.
+        
+        Aceita lista de dicionários (um por feedback) ou dicionário de colunas
+        ({"campo": [notas...]}), já no formato colunar.
+        
+        - zero_sem_nota: notas None ou 0 viram NaN (fora da média), e campos
+          ausentes valem 3;
+        - caso contrário, 0 é nota; feedbacks sem algum campo obrigatório (ausente
+          ou None) são descartados e campos com padrão ausentes ou None valem 3.
+        
+        Returns:
+            Tuple[tuple, np.ndarray]: Campos (colunas) e matriz float de notas
+        """
+        campos = obrigatorios + com_padrao
+        
+        if isinstance(feedbacks, dict):
+            total = max((len(v) for v in feedbacks.values()), default=0)
+            colunas = [
+                np.asarray(feedbacks[c], dtype=float) if c in feedbacks else np.full(total, 3.0 if c in com_padrao else np.nan)
+                for c in campos
             ]
-            media = sum(v for v in avaliacoes_numericas if v) / len([v for v in avaliacoes_numericas if v])
-            avaliacoes_empresa.append(media)
+            notas = np.column_stack(colunas) if total else np.empty((0, len(campos)))
+            if obrigatorios:
+                presentes = ~np.isnan(notas[:, :len(obrigatorios)]).any(axis=1)
+                notas = notas[presentes]
+        else:
+            try:
+                # Caminho rápido: todos os feedbacks têm todos os campos (extração em C)
+                notas = np.array(list(map(itemgetter(*campos), feedbacks)), dtype=float)
+            except KeyError:
+                selecionados = [f for f in feedbacks if all(c in f for c in obrigatorios)]
+                notas = np.array(
+                    [[f.get(c, 3) if c in com_padrao else f[c] for c in campos] for f in selecionados],
+                    dtype=float
+                )
+            notas = notas.reshape(-1, len(campos))
+        
+        if zero_sem_nota:
+            notas[notas == 0] = np.nan
+            return campos, notas
+        
+        # None (NaN) equivale ao campo ausente
+        if obrigatorios:
+            notas = notas[~np.isnan(notas[:, :len(obrigatorios)]).any(axis=1)]
+        padroes = notas[:, len(obrigatorios):]
+        padroes[np.isnan(padroes)] = 3.0
+        return campos, notas
+    
+    def _estatisticas(self, medias: np.ndarray) -> Dict:
+        """Média, mediana, percentis e distribuição de um vetor de satisfação"""
+        p25, mediana, p75, p90 = np.percentile(medias, [25, 50, 75, 90])
+        return {
+            "media": round(float(medias.mean()), 2),
+            "mediana": round(float(mediana), 2),
+            "percentis": {"p25": round(float(p25), 2), "p75": round(float(p75), 2), "p90": round(float(p90), 2)},
+            "total_respostas": int(medias.size),
+            "distribuicao": self._calcular_distribuicao(medias)
+        }
+    
+    def _carregar_rollups(self, data: Dict) -> List[Dict]:
+        """
+        Carrega do banco os rollups diários do período pedido.
         
-        # Processar feedback do setor de licitação
-        for feedback in data.get("feedback_licitacao", []):
-            if all(key in feedback for key in ["qualidade_tecnica", "conformidade_legal"]):
-                media = (feedback["qualidade_tecnica"] + feedback["conformidade_legal"] + 
-                        feedback.get("adequacao_modalidade", 3) + feedback.get("clareza_redacao", 3)) / 4
-                avaliacoes_licitacao.append(media)
-        
-        # Calcular estatísticas
-        if avaliacoes_setor:
-            satisfacao["por_stakeholder"]["setores"] = {
-                "media": round(statistics.mean(avaliacoes_setor), 2),
-                "mediana": round(statistics.median(avaliacoes_setor), 2),
-                "total_respostas": len(avaliacoes_setor),
-                "distribuicao": self._calcular_distribuicao(avaliacoes_setor)
-            }
+        Args:
+            data: {"periodo_dias": N} ou {"data_inicio": "AAAA-MM-DD", "data_fim": "AAAA-MM-DD"}
+        """
+        from api.database import SessionLocal
+        from api.feedback_rollups import consultar_rollups
         
-        if avaliacoes_empresa:
-            satisfacao["por_stakeholder"]["empresas"] = {
-                "media": round(statistics.mean(avaliacoes_empresa), 2),
-                "mediana": round(statistics.median(avaliacoes_empresa), 2),
-                "total_respostas": len(avaliacoes_empresa),
-                "distribuicao": self._calcular_distribuicao(avaliacoes_empresa)
-            }
+        if data.get("data_inicio"):
+            inicio = datetime.fromisoformat(data["data_inicio"]).date()
+        else:
+            inicio = (datetime.now() - timedelta(days=int(data.get("periodo_dias", 30)))).date()
+        fim = datetime.fromisoformat(data["data_fim"]).date() if data.get("data_fim") else None
         
-        if avaliacoes_licitacao:
-            satisfacao["por_stakeholder"]["licitacao"] = {
-                "media": round(statistics.mean(avaliacoes_licitacao), 2),
-                "mediana": round(statistics.median(avaliacoes_licitacao), 2),
-                "total_respostas": len(avaliacoes_licitacao),
-                "distribuicao": self._calcular_distribuicao(avaliacoes_licitacao)
+        db = SessionLocal()
+        try:
+            return consultar_rollups(db, inicio, fim)
+        finally:
+            db.close()
+    
+    def _satisfacao_de_rollups(self, rollups: List[Dict], satisfacao: Dict) -> Dict:
+        """Calcula métricas de satisfação a partir de rollups diários somados por stakeholder"""
+        nomes = {"setor": "setores", "empresa": "empresas", "licitacao": "licitacao"}
+        soma_geral = 0.0
+        total_geral = 0
+        
+        for rollup in rollups:
+            avaliados = rollup.get("total_avaliados") or 0
+            if not avaliados:
+                continue
+            faixas = {f: rollup.get(f"faixa_{f}") or 0 for f in range(1, 6)}
+            
+            # Mediana estimada pela faixa que contém a metade das respostas
+            acumulado, mediana = 0, 0
+            for faixa, quantidade in faixas.items():
+                acumulado += quantidade
+                if acumulado * 2 >= avaliados:
+                    mediana = faixa
+                    break
+            
+            satisfacao["por_stakeholder"][nomes.get(rollup["tipo_stakeholder"], rollup["tipo_stakeholder"])] = {
+                "media": round(rollup["soma_satisfacao"] / avaliados, 2),
+                "mediana": mediana,
+                "total_respostas": avaliados,
+                "distribuicao": {f: round(q / avaliados * 100, 1) for f, q in faixas.items()}
             }
+            soma_geral += rollup["soma_satisfacao"]
+            total_geral += avaliados
         
-        # Satisfação geral
-        todas_avaliacoes = avaliacoes_setor + avaliacoes_empresa + avaliacoes_licitacao
-        if todas_avaliacoes:
+        if total_geral:
+            media = soma_geral / total_geral
             satisfacao["geral"] = {
-                "media": round(statistics.mean(todas_avaliacoes), 2),
-                "total_respostas": len(todas_avaliacoes),
-                "nivel": self._classificar_satisfacao(statistics.mean(todas_avaliacoes))
+                "media": round(media, 2),
+                "total_respostas": total_geral,
+                "nivel": self._classificar_satisfacao(media)
             }
         
         return satisfacao
     
+    def _analisar_sentimento(self, data: Dict) -> Dict:
+        """
+        Resume o sentimento dos textos livres por stakeholder.
+        Usa os sentimentos já calculados no cache do banco; apenas textos
+        ainda não vistos são pontuados (em lote).
+        """
+        from services.sentiment_service import consultar_sentimentos, textos_do_feedback
+        
+        textos_por_stakeholder = {
+            NOMES_STAKEHOLDER[chave]: [
+                texto
+                for feedback in data.get(chave, []) if isinstance(feedback, dict)
+                for texto in textos_do_feedback(chave.replace("feedback_", ""), feedback)
+            ]
+            for chave in NOMES_STAKEHOLDER
+        }
+        sentimentos = consultar_sentimentos(
+            texto for textos in textos_por_stakeholder.values() for texto in textos
+        )
+        
+        resultado = {}
+        for nome, textos in textos_por_stakeholder.items():
+            avaliados = [(texto, sentimentos[texto]) for texto in textos if texto in sentimentos]
+            if not avaliados:
+                continue
+            rotulos = Counter(s["rotulo"] for _, s in avaliados)
+            polaridades = np.array([s["polaridade"] for _, s in avaliados])
+            mais_negativos = sorted(avaliados, key=lambda item: item[1]["polaridade"])[:3]
+            resultado[nome] = {
+                "polaridade_media": round(float(polaridades.mean()), 3),
+                "total_textos": len(avaliados),
+                "distribuicao": {r: rotulos.get(r, 0) for r in ("negativo", "neutro", "positivo")},
+                "textos_mais_negativos": [texto for texto, s in mais_negativos if s["rotulo"] == "negativo"]
+            }
+        
+        return resultado
+    
     def _identificar_problemas(self, data: Dict) -> Dict:
         """Identifica problemas recorrentes no feedback"""
         problemas = {
@@ -231,11 +435,11 @@ class FeedbackAnalysisTool(BaseTool):
         problemas_counter = Counter()
         problemas_criticos = []
         
-        for problema in textos_problemas:
-            # Extrair palavras-chave do problema
-            palavras_chave = self._extrair_palavras_chave(problema["texto"])
-            
-            for palavra in palavras_chave:
+        classificacoes = self.classificar_textos([problema["texto"] for problema in textos_problemas])
+        
+        for problema, classificacao in zip(textos_problemas, classificacoes):
+            # Palavras-chave do problema
+            for palavra in classificacao["palavras_chave"]:
                 problemas_counter[palavra] += 1
             
             # Identificar problemas críticos (baixa satisfação)
@@ -251,9 +455,8 @@ class FeedbackAnalysisTool(BaseTool):
         
         # Classificar por área de impacto
         areas_impacto = defaultdict(int)
-        for problema in textos_problemas:
-            area = self._classificar_area_problema(problema["texto"])
-            areas_impacto[area] += 1
+        for classificacao in classificacoes:
+            areas_impacto[classificacao["area"]] += 1
         
         problemas["areas_impacto"] = dict(areas_impacto)
         
@@ -306,18 +509,18 @@ class FeedbackAnalysisTool(BaseTool):
                 })
         
         # Análise de frequência
+        classificacoes = self.classificar_textos([sugestao["texto"] for sugestao in todas_sugestoes])
         sugestoes_counter = Counter()
-        for sugestao in todas_sugestoes:
-            palavras_chave = self._extrair_palavras_chave(sugestao["texto"])
-            for palavra in palavras_chave:
+        for classificacao in classificacoes:
+            for palavra in classificacao["palavras_chave"]:
                 sugestoes_counter[palavra] += 1
         
         sugestoes["sugestoes_frequentes"] = dict(sugestoes_counter.most_common(10))
         
         # Priorização por impacto e facilidade
-        for sugestao in todas_sugestoes:
-            impacto = self._estimar_impacto_sugestao(sugestao)
-            facilidade = self._estimar_facilidade_implementacao(sugestao)
+        for sugestao, classificacao in zip(todas_sugestoes, classificacoes):
+            impacto = classificacao["impacto"]
+            facilidade = classificacao["facilidade"]
             
             if impacto >= 4:
                 sugestoes["sugestoes_impacto_alto"].append({
@@ -335,85 +538,70 @@ class FeedbackAnalysisTool(BaseTool):
         
         return sugestoes
     
-    def _extrair_palavras_chave(self, texto: str) -> List[str]:
-        """Extrai palavras-chave relevantes do texto"""
-        # Palavras-chave relacionadas a licitações
-        palavras_relevantes = [
-            "especificação", "prazo", "valor", "critério", "habilitação",
-            "documentação", "clareza", "tempo", "processo", "sistema",
-            "interface", "usabilidade", "conformidade", "legal", "técnico"
-        ]
+    def classificar_textos(self, textos: List[str]) -> List[Dict]:
+        """
+        Classifica vários textos de feedback de uma vez.
+        Cada texto distinto é percorrido uma única vez pelo autômato de
+        palavras-chave, que cobre todas as tabelas de classificação.
         
-        texto_lower = texto.lower()
-        palavras_encontradas = []
+        Args:
+            textos: Textos de problemas ou sugestões
+        
+        Returns:
+            List[Dict]: Para cada texto, palavras_chave, area, impacto (1-5) e facilidade (1-5)
+        """
+        # Textos diferentes costumam ter o mesmo conjunto de etiquetas
+        interpretacoes = {}
+        resultados = []
+        for etiquetas in CLASSIFICADOR.analisar_lote(textos):
+            if etiquetas not in interpretacoes:
+                interpretacoes[etiquetas] = self._interpretar_rotulos(etiquetas)
+            resultados.append(dict(interpretacoes[etiquetas]))
+        return resultados
+    
+    def _interpretar_rotulos(self, etiquetas) -> Dict:
+        """Converte as etiquetas encontradas pelo classificador nas métricas do feedback"""
+        rotulos = defaultdict(set)
+        for tabela, rotulo, _ in etiquetas:
+            rotulos[tabela].add(rotulo)
         
-        for palavra in palavras_relevantes:
-            if palavra in texto_lower:
-                palavras_encontradas.append(palavra)
+        area = next((a for a in AREAS_PROBLEMA if a in rotulos["area"]), "outros")
+        impacto = next((n for n in IMPACTO_SUGESTAO if n in rotulos["impacto"]), 2)
+        facilidade = next((n for n in FACILIDADE_IMPLEMENTACAO if n in rotulos["facilidade"]), 3)
         
-        return palavras_encontradas
+        return {
+            "palavras_chave": [p for p in PALAVRAS_RELEVANTES if p in rotulos["palavra"]],
+            "area": area,
+            "impacto": impacto,
+            "facilidade": facilidade
+        }
+    
+    def _extrair_palavras_chave(self, texto: str) -> List[str]:
+        """Extrai palavras-chave relevantes do texto"""
+        return self.classificar_textos([texto])[0]["palavras_chave"]
     
     def _classificar_area_problema(self, texto: str) -> str:
         """Classifica problema por área"""
-        texto_lower = texto.lower()
-        
-        if any(word in texto_lower for word in ["interface", "usabilidade", "navegação", "tela"]):
-            return "interface"
-        elif any(word in texto_lower for word in ["especificação", "técnico", "requisito"]):
-            return "especificacoes_tecnicas"
-        elif any(word in texto_lower for word in ["legal", "conformidade", "lei", "norma"]):
-            return "conformidade_legal"
-        elif any(word in texto_lower for word in ["prazo", "tempo", "demora", "lento"]):
-            return "performance"
-        elif any(word in texto_lower for word in ["valor", "preço", "custo", "orçamento"]):
-            return "aspectos_financeiros"
-        else:
-            return "outros"
+        return self.classificar_textos([texto])[0]["area"]
     
     def _estimar_impacto_sugestao(self, sugestao: Dict) -> int:
         """Estima impacto da sugestão (1-5)"""
-        texto = sugestao["texto"].lower()
-        
-        # Palavras que indicam alto impacto
-        alto_impacto = ["automatizar", "integrar", "otimizar", "melhorar", "reduzir tempo"]
-        medio_impacto = ["ajustar", "corrigir", "atualizar", "modificar"]
-        
-        if any(word in texto for word in alto_impacto):
-            return 5
-        elif any(word in texto for word in medio_impacto):
-            return 3
-        else:
-            return 2
+        return self.classificar_textos([sugestao["texto"]])[0]["impacto"]
     
     def _estimar_facilidade_implementacao(self, sugestao: Dict) -> int:
         """Estima facilidade de implementação (1-5)"""
-        texto = sugestao["texto"].lower()
-        
-        # Palavras que indicam facilidade
-        facil = ["texto", "mensagem", "label", "cor", "tamanho", "ordem"]
-        medio = ["campo", "validação", "formato", "layout"]
-        dificil = ["integração", "algoritmo", "banco", "arquitetura"]
-        
-        if any(word in texto for word in facil):
-            return 5
-        elif any(word in texto for word in medio):
-            return 3
-        elif any(word in texto for word in dificil):
-            return 1
-        else:
-            return 3
+        return self.classificar_textos([sugestao["texto"]])[0]["facilidade"]
     
-    def _calcular_distribuicao(self, valores: List[float]) -> Dict:
-        """Calcula distribuição de valores"""
-        distribuicao = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
-        
-        for valor in valores:
-            faixa = int(round(valor))
-            if faixa in distribuicao:
-                distribuicao[faixa] += 1
-        
-        total = len(valores)
-        return {k: round(v/total*100, 1) for k, v in distribuicao.items()}
+    def _calcular_distribuicao(self, valores) -> Dict:
+        """Calcula distribuição (% por faixa 1-5) de valores arredondados"""
+        valores = np.asarray(valores, dtype=float)
+        # np.rint arredonda .5 para o par mais próximo, como round()
+        faixas = np.rint(valores)
+        faixas = faixas[(faixas >= 1) & (faixas <= 5)].astype(np.int64)
+        contagem = np.bincount(faixas, minlength=6)[1:6]
+        
+        total = valores.size
+        return {k: round(float(v) / total * 100, 1) for k, v in zip(range(1, 6), contagem)}
     
     def _classificar_satisfacao(self, media: float) -> str:
         """Classifica nível de satisfação"""
@@ -471,6 +659,7 @@ class FeedbackAnalysisTool(BaseTool):
             "recomendacoes_urgentes": len([r for r in insights.get("recomendacoes_acoes", []) if r.get("prioridade") == "alta"])
         }
 
+@rastreador.ferramenta
 class FeedbackPredictionTool(BaseTool):
     """
     Ferramenta para predição de problemas baseada em padrões de feedback.
@@ -0,0 +1,260 @@
+"""
+Casamento de múltiplas palavras-chave em uma única passada pelo texto.
+
+Implementa um autômato de Aho-Corasick construído uma vez a partir de
+tabelas de palavras-chave. Texto e palavras-chave são normalizados (minúsculas
+e sem acentos), de modo que "especificação" e "especificacao" casam igual.
+O casamento é por substring, como o operador `in` usado anteriormente.
+"""
+
+import re
+import unicodedata
+from collections import deque
+from typing import Dict, FrozenSet, Hashable, Iterable, List, Set, Tuple
+
+
+def _tabela_sem_acentos() -> Dict[int, str]:
+    """Mapeia letras latinas acentuadas (Latin-1 e Latin Extended) para a letra base."""
+    tabela = {}
+    for codigo in range(0xC0, 0x250):
+        caractere = chr(codigo)
+        base = "".join(c for c in unicodedata.normalize("NFKD", caractere) if not unicodedata.combining(c))
+        if base and base != caractere:
+            tabela[codigo] = base
+    return tabela
+
+
+_TABELA_ACENTOS = _tabela_sem_acentos()
+_SEM_ACENTOS = str.maketrans(_TABELA_ACENTOS)
+
+# Letra base -> variantes acentuadas em minúsculas ("a" -> "áàâãä...")
+_VARIANTES: Dict[str, List[str]] = {}
+for _codigo, _base in _TABELA_ACENTOS.items():
+    if len(_base) == 1 and chr(_codigo) == chr(_codigo).casefold():
+        _VARIANTES.setdefault(_base.casefold(), []).append(chr(_codigo))
+
+
+def _regex_sem_acentos(padrao: str) -> str:
+    """Regex que casa o padrão (já sem acentos) com ou sem acentos no texto."""
+    partes = []
+    for caractere in padrao:
+        variantes = _VARIANTES.get(caractere)
+        partes.append(f"[{caractere}{''.join(variantes)}]" if variantes else re.escape(caractere))
+    return "".join(partes)
+
+
+# Sequência de letras/dígitos (inclui letras acentuadas)
+_PALAVRA = re.compile(r"[^\W_]+")
+
+
+def dobrar_acentos(texto: str) -> str:
+    """Converte para minúsculas e remove acentos e cedilhas."""
+    # translate cobre o caso comum em C; NFKD só para acentos já decompostos ou raros
+    texto = texto.casefold().translate(_SEM_ACENTOS)
+    if texto.isascii():
+        return texto
+    decomposto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+
+class AhoCorasick:
+    """
+    Autômato de Aho-Corasick sobre texto normalizado.
+    A busca percorre o texto uma vez, independentemente da quantidade de padrões.
+    """
+
+    def __init__(self, padroes: Iterable[str]):
+        self.padroes: List[str] = []
+        self._transicoes: List[Dict[str, int]] = [{}]
+        self._falha: List[int] = [0]
+        self._saidas: List[Tuple[int, ...]] = [()]
+
+        saidas: List[List[int]] = [[]]
+        for padrao in padroes:
+            normalizado = dobrar_acentos(padrao)
+            if not normalizado:
+                continue
+            indice = len(self.padroes)
+            self.padroes.append(normalizado)
+
+            estado = 0
+            for caractere in normalizado:
+                proximo = self._transicoes[estado].get(caractere)
+                if proximo is None:
+                    proximo = len(self._transicoes)
+                    self._transicoes[estado][caractere] = proximo
+                    self._transicoes.append({})
+                    self._falha.append(0)
+                    saidas.append([])
+                estado = proximo
+            saidas[estado].append(indice)
+
+        # Links de falha em largura; saídas herdam as do estado de falha
+        fila = deque(self._transicoes[0].values())
+        while fila:
+            estado = fila.popleft()
+            for caractere, proximo in self._transicoes[estado].items():
+                fila.append(proximo)
+                falha = self._falha[estado]
+                while falha and caractere not in self._transicoes[falha]:
+                    falha = self._falha[falha]
+                destino = self._transicoes[falha].get(caractere, 0)
+                self._falha[proximo] = destino if destino != proximo else 0
+                saidas[proximo].extend(saidas[self._falha[proximo]])
+
+        self._saidas = [tuple(s) for s in saidas]
+
+        # Tabela de transições completa (DFA): as falhas são resolvidas na
+        # construção, então a busca faz uma única consulta de dicionário por caractere
+        alfabeto = {c for transicoes in self._transicoes for c in transicoes}
+        self._dfa: List[Dict[str, int]] = [dict() for _ in self._transicoes]
+        for estado in self._ordem_largura():
+            for caractere in alfabeto:
+                destino = self._transicoes[estado].get(caractere)
+                if destino is None:
+                    destino = self._dfa[self._falha[estado]].get(caractere, 0) if estado else 0
+                if destino:
+                    self._dfa[estado][caractere] = destino
+
+        # Variantes acentuadas levam ao mesmo estado da letra base, então o
+        # texto só precisa de casefold (em C) antes da busca
+        for transicoes in self._dfa:
+            for caractere, destino in list(transicoes.items()):
+                for variante in _VARIANTES.get(caractere, ()):
+                    transicoes[variante] = destino
+
+        # Atalhos usados no laço de busca
+        self._transicao = [transicoes.get for transicoes in self._dfa]
+        self._terminais = frozenset(estado for estado, saida in enumerate(self._saidas) if saida)
+
+    def _ordem_largura(self) -> List[int]:
+        """Estados em ordem de largura (cada estado após o seu estado de falha)."""
+        ordem, fila = [], deque([0])
+        while fila:
+            estado = fila.popleft()
+            ordem.append(estado)
+            fila.extend(self._transicoes[estado].values())
+        return ordem
+
+    def encontrar(self, texto: str, normalizado: bool = False) -> Set[int]:
+        """
+        Retorna os índices dos padrões presentes no texto.
+
+        Args:
+            texto: Texto a analisar
+            normalizado: True se o texto já está em minúsculas (casefold) e NFC
+        """
+        if not normalizado:
+            texto = texto.casefold()
+            if not texto.isascii():
+                # Acentos decompostos (letra + marca combinante) viram o caractere composto
+                texto = unicodedata.normalize("NFC", texto)
+
+        transicao, terminais = self._transicao, self._terminais
+        visitados: Set[int] = set()
+        estado = 0
+        for caractere in texto:
+            estado = transicao[estado](caractere, 0)
+            if estado in terminais:
+                visitados.add(estado)
+
+        encontrados: Set[int] = set()
+        for estado in visitados:
+            encontrados.update(self._saidas[estado])
+        return encontrados
+
+
+class ClassificadorPalavrasChave:
+    """
+    Classifica textos a partir de várias tabelas de palavras-chave de uma vez.
+
+    As tabelas são mapeamentos {rótulo: [palavras-chave]}. Um texto é
+    analisado em uma única passada e o resultado indica, para cada tabela,
+    os rótulos e as palavras-chave encontrados.
+
+    Palavras-chave formadas só por letras/dígitos nunca atravessam uma
+    fronteira de palavra, então o texto é quebrado em palavras (em C, via
+    regex) e cada palavra distinta passa pelo autômato uma única vez, com o
+    resultado memorizado entre textos. Palavras-chave compostas ("reduzir
+    tempo") usam um segundo autômato sobre o texto inteiro.
+
+    Exemplo:
+        classificador = ClassificadorPalavrasChave({
+            "area": {"interface": ["tela", "navegação"], "performance": ["lento"]},
+        })
+        classificador.rotulos("Tela muito lenta")  # {"area": {"interface", "performance"}}
+    """
+
+    # Limite de palavras memorizadas antes de reiniciar o cache
+    MAX_CACHE_PALAVRAS = 100_000
+
+    def __init__(self, tabelas: Dict[str, Dict[Hashable, Iterable[str]]]):
+        simples: List[Tuple[str, Hashable, str]] = []
+        compostas: List[Tuple[str, Hashable, str]] = []
+        for tabela, rotulos in tabelas.items():
+            for rotulo, lista in rotulos.items():
+                for palavra in lista:
+                    destino = simples if _PALAVRA.fullmatch(palavra) else compostas
+                    destino.append((tabela, rotulo, palavra))
+
+        self._etiquetas_simples = simples
+        self._etiquetas_compostas = compostas
+        self._automato_simples = AhoCorasick(p for _, _, p in simples)
+        # Poucas e longas: uma regex com classes de letras acentuadas, executada em C
+        self._indices_compostas: Dict[str, List[int]] = {}
+        for indice, (_, _, palavra) in enumerate(compostas):
+            self._indices_compostas.setdefault(dobrar_acentos(palavra), []).append(indice)
+        self._regex_compostas = re.compile("(?=(" + "|".join(
+            _regex_sem_acentos(p) for p in sorted(self._indices_compostas, key=len, reverse=True)
+        ) + "))") if compostas else None
+        self._cache_palavras: Dict[str, FrozenSet[Tuple[str, Hashable, str]]] = {}
+
+    def _etiquetas_da_palavra(self, palavra: str) -> FrozenSet[Tuple[str, Hashable, str]]:
+        etiquetas = self._cache_palavras.get(palavra)
+        if etiquetas is None:
+            if len(self._cache_palavras) >= self.MAX_CACHE_PALAVRAS:
+                self._cache_palavras.clear()
+            etiquetas = frozenset(
+                self._etiquetas_simples[i]
+                for i in self._automato_simples.encontrar(palavra, normalizado=True)
+            )
+            self._cache_palavras[palavra] = etiquetas
+        return etiquetas
+
+    def analisar(self, texto: str) -> FrozenSet[Tuple[str, Hashable, str]]:
+        """Etiquetas (tabela, rótulo, palavra-chave) presentes no texto."""
+        texto = texto.casefold()
+        if not texto.isascii():
+            texto = unicodedata.normalize("NFC", texto)
+
+        etiquetas: Set[Tuple[str, Hashable, str]] = set()
+        cache = self._cache_palavras
+        for palavra in set(_PALAVRA.findall(texto)):
+            encontradas = cache.get(palavra)
+            if encontradas is None:
+                encontradas = self._etiquetas_da_palavra(palavra)
+            if encontradas:
+                etiquetas.update(encontradas)
+
+        if self._regex_compostas is not None:
+            for trecho in set(self._regex_compostas.findall(texto)):
+                for indice in self._indices_compostas.get(dobrar_acentos(trecho), ()):
+                    etiquetas.add(self._etiquetas_compostas[indice])
+        return frozenset(etiquetas)
+
+    def rotulos(self, texto: str) -> Dict[str, Set[Hashable]]:
+        """Rótulos encontrados no texto, agrupados por tabela."""
+        resultado: Dict[str, Set[Hashable]] = {}
+        for tabela, rotulo, _ in self.analisar(texto):
+            resultado.setdefault(tabela, set()).add(rotulo)
+        return resultado
+
+    def analisar_lote(self, textos: Iterable[str]) -> List[FrozenSet[Tuple[str, Hashable, str]]]:
+        """Analisa vários textos reaproveitando o resultado de textos repetidos."""
+        cache: Dict[str, FrozenSet[Tuple[str, Hashable, str]]] = {}
+        resultados = []
+        for texto in textos:
+            if texto not in cache:
+                cache[texto] = self.analisar(texto)
+            resultados.append(cache[texto])
+        return resultados
@@ -7,10 +7,16 @@ import json
 import os
 from typing import List, Dict, Any, Optional
 from crewai_tools.tools import BaseTool
+from monitoring.tracing import rastreador
 from datetime import datetime
 import re
 from collections import defaultdict
 
+from api.database import SessionLocal
+from services.knowledge_base_insights import analisar_base
+from services.knowledge_base_store import carregar_licitacoes
+
+@rastreador.ferramenta
 class KnowledgeBaseTool(BaseTool):
     """
     Ferramenta para consultar base de conhecimento de licitações bem-sucedidas.
@@ -21,8 +27,8 @@ class KnowledgeBaseTool(BaseTool):
     def __init__(self):
         super().__init__()
         self.knowledge_base_path = "data/"
-        self.cached_data = None
-        self.last_load_time = None
+        # Cache por categoria: categoria -> (momento da carga, licitações)
+        self.cached_data = {}
     
     def _run(self, categoria: str, objeto: str = "", tipo_licitacao: str = "") -> str:
         """
@@ -38,7 +44,7 @@ class KnowledgeBaseTool(BaseTool):
         """
         try:
             # Carregar dados da base de conhecimento
-            knowledge_data = self._load_knowledge_base()
+            knowledge_data = self._load_knowledge_base(categoria)
             
             if not knowledge_data:
                 return json.dumps({
@@ -76,28 +82,27 @@ class KnowledgeBaseTool(BaseTool):
         except Exception as e:
             return json.dumps({"erro": f"Erro ao consultar base de conhecimento: {str(e)}"})
     
-    def _load_knowledge_base(self) -> List[Dict]:
-        """Carrega dados da base de conhecimento"""
+    def _load_knowledge_base(self, categoria: str = "") -> List[Dict]:
+        """
+        Carrega dados da base de conhecimento. Com categoria, lê do banco apenas
+        as licitações dela (índice categoria, tipo_licitacao); o tipo de
+        licitação e o objeto continuam pesando só na pontuação de similaridade.
+        """
         # Cache simples para evitar recarregar constantemente
         current_time = datetime.now()
-        if (self.cached_data is not None and 
-            self.last_load_time is not None and 
-            (current_time - self.last_load_time).seconds < 300):  # Cache por 5 minutos
-            return self.cached_data
-        
-        all_data = []
-        
-        # Procurar arquivos de base de conhecimento
-        if os.path.exists(self.knowledge_base_path):
-            for filename in os.listdir(self.knowledge_base_path):
-                if filename.startswith('knowledge_base_') and filename.endswith('.json'):
-                    filepath = os.path.join(self.knowledge_base_path, filename)
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            all_data.extend(data)
-                    except Exception as e:
-                        print(f"Erro ao carregar {filename}: {str(e)}")
+        cache = self.cached_data.get(categoria)
+        if cache is not None and (current_time - cache[0]).seconds < 300:  # Cache por 5 minutos
+            return cache[1]
+        
+        # Licitações coletadas pelo scraper (tabela base_conhecimento)
+        db = SessionLocal()
+        try:
+            all_data = carregar_licitacoes(db, categoria=categoria or None)
+        except Exception as e:
+            print(f"Erro ao carregar base de conhecimento: {str(e)}")
+            all_data = []
+        finally:
+            db.close()
         
         # Carregar também dados do histórico existente
         historico_path = os.path.join(self.knowledge_base_path, "historico_editais.json")
@@ -114,8 +119,7 @@ class KnowledgeBaseTool(BaseTool):
             except Exception as e:
                 print(f"Erro ao carregar histórico: {str(e)}")
         
-        self.cached_data = all_data
-        self.last_load_time = current_time
+        self.cached_data[categoria] = (current_time, all_data)
         return all_data
     
     def _convert_historico_to_knowledge(self, historico_item: Dict) -> Optional[Dict]:
@@ -147,17 +151,17 @@ class KnowledgeBaseTool(BaseTool):
         for licitacao in data:
             score = 0
             
-            # Pontuação por categoria
-            if licitacao.get('categoria', '').lower() == categoria.lower():
+            # Pontuação por categoria (colunas vazias da base chegam como None)
+            if (licitacao.get('categoria') or '').lower() == categoria.lower():
                 score += 10
             
             # Pontuação por tipo de licitação
-            if tipo_licitacao and licitacao.get('tipo_licitacao', '').lower() == tipo_licitacao.lower():
+            if tipo_licitacao and (licitacao.get('tipo_licitacao') or '').lower() == tipo_licitacao.lower():
                 score += 5
             
             # Pontuação por similaridade do objeto
             if objeto_words:
-                licitacao_words = set(licitacao.get('objeto', '').lower().split())
+                licitacao_words = set((licitacao.get('objeto') or '').lower().split())
                 common_words = objeto_words.intersection(licitacao_words)
                 if common_words:
                     score += len(common_words) * 2
@@ -328,6 +332,7 @@ class KnowledgeBaseTool(BaseTool):
         
         return recommendations
 
+@rastreador.ferramenta
 class ScrapingSchedulerTool(BaseTool):
     """
     Ferramenta para agendar e executar coleta de dados de licitações.
@@ -380,6 +385,7 @@ class ScrapingSchedulerTool(BaseTool):
         
         return next_exec.strftime("%Y-%m-%d %H:%M:%S")
 
+@rastreador.ferramenta
 class KnowledgeBaseAnalyticsTool(BaseTool):
     """
     Ferramenta para análise estatística da base de conhecimento.
@@ -397,107 +403,13 @@ class KnowledgeBaseAnalyticsTool(BaseTool):
         Returns:
             Relatório de análise em JSON
         """
+        # Estatísticas lidas dos snapshots por categoria e tipo de licitação
+        db = SessionLocal()
         try:
-            kb_tool = KnowledgeBaseTool()
-            data = kb_tool._load_knowledge_base()
-            
-            if not data:
-                return json.dumps({
-                    "erro": "Base de conhecimento vazia",
-                    "sugestao": "Execute o scraper para coletar dados"
-                })
-            
-            if tipo_analise == "geral":
-                analise = self._analise_geral(data)
-            elif tipo_analise == "categoria":
-                analise = self._analise_por_categoria(data)
-            elif tipo_analise == "tendencias":
-                analise = self._analise_tendencias(data)
-            else:
-                analise = self._analise_geral(data)
-            
+            analise = analisar_base(db, tipo_analise)
             return json.dumps(analise, ensure_ascii=False, indent=2)
             
         except Exception as e:
             return json.dumps({"erro": f"Erro na análise: {str(e)}"})
-    
-    def _analise_geral(self, data: List[Dict]) -> Dict:
-        """Análise geral da base de conhecimento"""
-        total = len(data)
-        
-        # Contagem por categoria
-        categorias = defaultdict(int)
-        for item in data:
-            cat = item.get('categoria', 'indefinida')
-            categorias[cat] += 1
-        
-        # Contagem por tipo de licitação
-        tipos = defaultdict(int)
-        for item in data:
-            tipo = item.get('tipo_licitacao', 'indefinido')
-            tipos[tipo] += 1
-        
-        # Análise de valores
-        valores = [item.get('valor_contratado') or item.get('valor_estimado') for item in data]
-        valores = [v for v in valores if v and v > 0]
-        
-        return {
-            "total_licitacoes": total,
-            "distribuicao_categorias": dict(categorias),
-            "distribuicao_tipos": dict(tipos),
-            "estatisticas_valores": {
-                "total_com_valor": len(valores),
-                "valor_minimo": min(valores) if valores else 0,
-                "valor_maximo": max(valores) if valores else 0,
-                "valor_medio": sum(valores) / len(valores) if valores else 0
-            },
-            "data_analise": datetime.now().isoformat()
-        }
-    
-    def _analise_por_categoria(self, data: List[Dict]) -> Dict:
-        """Análise detalhada por categoria"""
-        categorias_data = defaultdict(list)
-        
-        for item in data:
-            cat = item.get('categoria', 'indefinida')
-            categorias_data[cat].append(item)
-        
-        resultado = {}
-        
-        for categoria, items in categorias_data.items():
-            # Análise específica da categoria
-            valores = [item.get('valor_contratado') or item.get('valor_estimado') for item in items]
-            valores = [v for v in valores if v and v > 0]
-            
-            propostas = [item.get('numero_propostas') for item in items]
-            propostas = [p for p in propostas if p and p > 0]
-            
-            resultado[categoria] = {
-                "total": len(items),
-                "valor_medio": sum(valores) / len(valores) if valores else 0,
-                "propostas_media": sum(propostas) / len(propostas) if propostas else 0,
-                "sites_origem": list(set(item.get('site_origem', '') for item in items))
-            }
-        
-        return resultado
-    
-    def _analise_tendencias(self, data: List[Dict]) -> Dict:
-        """Análise de tendências temporais"""
-        # Agrupar por mês/ano
-        tendencias = defaultdict(int)
-        
-        for item in data:
-            data_resultado = item.get('data_resultado', '')
-            if data_resultado:
-                try:
-                    # Extrair ano-mês
-                    ano_mes = data_resultado[:7]  # YYYY-MM
-                    tendencias[ano_mes] += 1
-                except:
-                    continue
-        
-        return {
-            "tendencias_temporais": dict(sorted(tendencias.items())),
-            "periodo_analise": f"{min(tendencias.keys())} a {max(tendencias.keys())}" if tendencias else "N/A",
-            "total_periodos": len(tendencias)
-        }
+        finally:
+            db.close()
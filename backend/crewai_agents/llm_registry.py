@@ -0,0 +1,358 @@
+"""
+Registro dos LLMs locais usados pelos agentes CrewAI.
+
+Os modelos (arquivos GGML/GGUF de vários GB) não são mais carregados na
+importação dos agentes. Cada modelo é registrado com uma função de carga e:
+- é carregado no primeiro uso, uma única vez por processo (mesmo com chamadas concorrentes);
+- pode ser pré-carregado em segundo plano após o startup (`aquecer`);
+- é descarregado depois de ficar ocioso por `LLM_TEMPO_OCIOSO_S` segundos,
+  nunca durante uma chamada em andamento.
+
+Os agentes recebem `llm_compartilhado()`, um proxy que obtém o modelo do
+registro a cada chamada, então um modelo descarregado volta a ser carregado
+quando for usado de novo. Com LLM_INFERENCE_URL definida, o modelo padrão é
+um cliente do servidor local de inferência (services/inference_server.py).
+As chamadas do proxy são contabilizadas em uso_llm (monitoring/llm_usage.py).
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+
+from dotenv import load_dotenv
+
+from monitoring.llm_usage import ContabilizadorUso, chamada_atual, contabilizador_uso
+from monitoring.metrics import metricas
+from monitoring.tracing import CLIENTE, rastreador
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+MODELO_PADRAO = "local"
+# Modelo ocioso por mais que isso é descarregado (0 desativa)
+TEMPO_OCIOSO_S = float(os.getenv("LLM_TEMPO_OCIOSO_S", "900"))
+# Intervalo entre verificações de modelos ociosos
+INTERVALO_MONITOR_S = float(os.getenv("LLM_INTERVALO_MONITOR_S", "60"))
+# Tentativas por chamada ao servidor de inferência (fila cheia ou falha de conexão)
+TENTATIVAS_INFERENCIA = int(os.getenv("LLM_INFERENCE_TENTATIVAS", "3"))
+
+
+class CustomLLM_LlamaIndex:
+    """
+    Wrapper para CrewAI usar LlamaIndex (LlamaCPP) como LLM local.
+    Permite que os agentes CrewAI utilizem um modelo open source local ao invés de OpenAI.
+    """
+    def __init__(self, model_path=None):
+        # Importado aqui: llama_index/llama_cpp só são necessários quando o modelo é carregado
+        from llama_index.llms.llama_cpp import LlamaCPP
+
+        # Caminho do modelo Llama local
+        self.model_path = model_path or os.getenv("LLAMA_MODEL_PATH", "./models/llama-2-7b-chat.ggmlv3.q4_0.bin")
+        # Instancia o modelo LlamaCPP
+        self.llm = LlamaCPP(
+            model_path=self.model_path,
+            temperature=0.7,
+            max_new_tokens=256,
+        )
+
+    def chat_completion(self, messages, temperature, max_tokens):
+        """
+        Recebe uma lista de mensagens (como no formato OpenAI) e retorna a resposta do modelo Llama.
+        Args:
+            messages (list): Lista de dicionários com chaves 'role' e 'content'.
+            temperature (float): Temperatura do modelo.
+            max_tokens (int): Máximo de tokens na resposta.
+        Returns:
+            str: Resposta do modelo Llama.
+        """
+        # Concatena as mensagens para um único prompt
+        prompt = "\n".join([m.get("content", "") for m in messages])
+        response = self.llm.complete(prompt)
+        return response
+
+
+class ClienteInferencia:
+    """
+    Cliente do servidor local de inferência (services/inference_server.py),
+    com a mesma interface de CustomLLM_LlamaIndex. Usado quando LLM_INFERENCE_URL
+    está definida: o modelo fica carregado uma única vez no servidor, que
+    gera em lote os pedidos de todas as crews.
+    """
+    def __init__(self, url: Optional[str] = None, timeout: float = 600.0, tentativas: int = TENTATIVAS_INFERENCIA):
+        import httpx
+
+        self.tentativas = max(tentativas, 1)
+        url = url or os.getenv("LLM_INFERENCE_URL", "")
+        if url.startswith("unix://"):
+            # unix:///caminho/do/socket
+            transporte = httpx.HTTPTransport(uds=url[len("unix://"):])
+            self.cliente = httpx.Client(transport=transporte, base_url="http://inferencia", timeout=timeout)
+        else:
+            self.cliente = httpx.Client(base_url=url.rstrip("/"), timeout=timeout)
+
+    def chat_completion(self, messages, temperature, max_tokens):
+        """
+        Envia as mensagens ao servidor e retorna o texto gerado.
+        Args:
+            messages (list): Lista de dicionários com chaves 'role' e 'content'.
+            temperature (float): Temperatura do modelo.
+            max_tokens (int): Máximo de tokens na resposta.
+        Returns:
+            str: Resposta do modelo.
+        """
+        import httpx
+
+        corpo = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        # Propaga o trace corrente ao servidor de inferência
+        traceparent = rastreador.traceparent_atual()
+        cabecalhos = {"traceparent": traceparent} if traceparent else None
+        for tentativa in range(1, self.tentativas + 1):
+            try:
+                resposta = self.cliente.post("/v1/chat/completions", json=corpo, headers=cabecalhos)
+                # 503: fila do servidor cheia; tentar de novo após uma pausa
+                if resposta.status_code != 503 or tentativa == self.tentativas:
+                    break
+            except httpx.TransportError:
+                if tentativa == self.tentativas:
+                    chamada_atual().anotar(tentativas=tentativa)
+                    raise
+            time.sleep(0.5 * 2 ** (tentativa - 1))
+        chamada_atual().anotar(tentativas=tentativa)
+        resposta.raise_for_status()
+        dados = resposta.json()
+        uso = dados.get("usage") or {}
+        chamada_atual().anotar(tokens_prompt=uso.get("prompt_tokens"), tokens_resposta=uso.get("completion_tokens"))
+        return dados["choices"][0]["message"]["content"]
+
+
+def _carregar_modelo_padrao():
+    """Servidor de inferência (LLM_INFERENCE_URL) ou o modelo carregado neste processo."""
+    if os.getenv("LLM_INFERENCE_URL"):
+        return ClienteInferencia()
+    return CustomLLM_LlamaIndex()
+
+
+class _EntradaModelo:
+    """Estado de um modelo registrado."""
+
+    def __init__(self, carregar: Callable[[], Any]):
+        self.carregar = carregar
+        self.instancia: Any = None
+        self.trava = threading.Lock()
+        self.em_uso = 0
+        self.ultimo_uso: Optional[float] = None
+        self.carregado_em: Optional[float] = None
+        self.tempo_carga_s: Optional[float] = None
+        self.cargas = 0
+        self.erro: Optional[str] = None
+
+
+class RegistroLLM:
+    """
+    Instâncias compartilhadas dos LLMs do processo, carregadas sob demanda.
+    """
+
+    def __init__(self, tempo_ocioso: float = TEMPO_OCIOSO_S, relogio: Callable[[], float] = time.monotonic):
+        self.tempo_ocioso = tempo_ocioso
+        self._relogio = relogio
+        self._modelos: Dict[str, _EntradaModelo] = {}
+        self._parar = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def registrar(self, nome: str, carregar: Callable[[], Any]):
+        """Registra (ou substitui) a função que carrega um modelo."""
+        self._modelos[nome] = _EntradaModelo(carregar)
+
+    def _entrada(self, nome: str) -> _EntradaModelo:
+        if nome not in self._modelos:
+            raise KeyError(f"Modelo não registrado: {nome}")
+        return self._modelos[nome]
+
+    def _garantir_carregado(self, entrada: _EntradaModelo, nome: str) -> Any:
+        # Chamado com a trava da entrada: apenas uma thread carrega o modelo
+        if entrada.instancia is None:
+            inicio = time.perf_counter()
+            try:
+                entrada.instancia = entrada.carregar()
+            except Exception as e:
+                entrada.erro = str(e)
+                raise
+            entrada.tempo_carga_s = round(time.perf_counter() - inicio, 3)
+            entrada.carregado_em = self._relogio()
+            entrada.cargas += 1
+            entrada.erro = None
+            logger.info(f"LLM '{nome}' carregado em {entrada.tempo_carga_s}s")
+        return entrada.instancia
+
+    @contextmanager
+    def usar(self, nome: str = MODELO_PADRAO):
+        """
+        Fornece o modelo (carregando-o se preciso) e impede que ele seja
+        descarregado enquanto o bloco estiver em execução.
+        """
+        entrada = self._entrada(nome)
+        with entrada.trava:
+            instancia = self._garantir_carregado(entrada, nome)
+            entrada.em_uso += 1
+        try:
+            yield instancia
+        finally:
+            with entrada.trava:
+                entrada.em_uso -= 1
+                entrada.ultimo_uso = self._relogio()
+
+    def obter(self, nome: str = MODELO_PADRAO) -> Any:
+        """Instância compartilhada do modelo, carregada no primeiro uso."""
+        entrada = self._entrada(nome)
+        with entrada.trava:
+            instancia = self._garantir_carregado(entrada, nome)
+            entrada.ultimo_uso = self._relogio()
+            return instancia
+
+    def aquecer(self, nome: str = MODELO_PADRAO, em_segundo_plano: bool = True) -> Optional[threading.Thread]:
+        """
+        Carrega o modelo antes do primeiro uso.
+        Em segundo plano, erros de carga são apenas registrados no log.
+        """
+        def carregar():
+            try:
+                self.obter(nome)
+            except Exception as e:
+                logger.error(f"Erro ao aquecer LLM '{nome}': {str(e)}")
+
+        if not em_segundo_plano:
+            self.obter(nome)
+            return None
+        thread = threading.Thread(target=carregar, name=f"aquecer-llm-{nome}", daemon=True)
+        thread.start()
+        return thread
+
+    def descarregar(self, nome: str) -> bool:
+        """Libera a instância do modelo se ela não estiver em uso."""
+        entrada = self._entrada(nome)
+        with entrada.trava:
+            if entrada.instancia is None or entrada.em_uso:
+                return False
+            entrada.instancia = None
+            entrada.carregado_em = None
+        logger.info(f"LLM '{nome}' descarregado")
+        return True
+
+    def descarregar_ociosos(self) -> int:
+        """
+        Descarrega os modelos sem uso há mais de `tempo_ocioso` segundos.
+
+        Returns:
+            int: Quantidade de modelos descarregados
+        """
+        if not self.tempo_ocioso:
+            return 0
+        agora = self._relogio()
+        descarregados = 0
+        for nome, entrada in list(self._modelos.items()):
+            referencia = entrada.ultimo_uso or entrada.carregado_em
+            if entrada.instancia is not None and referencia is not None and agora - referencia >= self.tempo_ocioso:
+                descarregados += self.descarregar(nome)
+        return descarregados
+
+    def iniciar_monitor(self, intervalo: float = INTERVALO_MONITOR_S):
+        """Inicia a thread que descarrega modelos ociosos."""
+        if self._monitor is not None and self._monitor.is_alive():
+            return
+        self._parar.clear()
+
+        def monitorar():
+            while not self._parar.wait(intervalo):
+                try:
+                    self.descarregar_ociosos()
+                except Exception as e:
+                    logger.error(f"Erro ao descarregar LLMs ociosos: {str(e)}")
+
+        self._monitor = threading.Thread(target=monitorar, name="monitor-llm", daemon=True)
+        self._monitor.start()
+
+    def parar_monitor(self):
+        """Interrompe a thread de descarga de modelos ociosos."""
+        self._parar.set()
+        if self._monitor is not None:
+            self._monitor.join(timeout=5)
+        self._monitor = None
+
+    def status(self) -> Dict[str, Any]:
+        """Situação de cada modelo registrado."""
+        agora = self._relogio()
+        return {
+            nome: {
+                "carregado": entrada.instancia is not None,
+                "em_uso": entrada.em_uso,
+                "cargas": entrada.cargas,
+                "tempo_carga_s": entrada.tempo_carga_s,
+                "ocioso_s": round(agora - entrada.ultimo_uso, 1) if entrada.ultimo_uso is not None else None,
+                "erro": entrada.erro,
+            }
+            for nome, entrada in self._modelos.items()
+        }
+
+
+class LLMCompartilhado:
+    """
+    Proxy entregue aos agentes no lugar do modelo.
+    Cada chamada obtém o modelo do registro, sem manter referência própria,
+    para que a descarga por ociosidade realmente libere a memória.
+    
+    Expõe apenas chat_completion, o único método dos modelos usado pelos
+    agentes. Outros atributos (model, model_name, temperature...) não são
+    repassados ao modelo: frameworks que inspecionam o LLM ao montar os
+    agentes recebem AttributeError sem que o modelo seja carregado.
+    """
+
+    def __init__(self, registro: "RegistroLLM", nome: str = MODELO_PADRAO,
+                 contabilizador: ContabilizadorUso = contabilizador_uso):
+        self._registro = registro
+        self._nome = nome
+        self._contabilizador = contabilizador
+
+    def chat_completion(self, messages, temperature, max_tokens):
+        """Mesma interface de CustomLLM_LlamaIndex.chat_completion, com o consumo contabilizado."""
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        inicio = time.perf_counter()
+        resultado = "erro"
+        try:
+            with rastreador.span("llm.chat_completion", CLIENTE, **{"llm.modelo": self._nome}) as span_llm, \
+                    self._contabilizador.chamada(self._nome, prompt) as chamada:
+                with self._registro.usar(self._nome) as modelo:
+                    resposta = modelo.chat_completion(messages, temperature, max_tokens)
+                chamada.resposta(resposta)
+                span_llm.definir("llm.tokens_prompt", chamada.tokens_prompt)
+                span_llm.definir("llm.tokens_resposta", chamada.tokens_resposta)
+                span_llm.definir("llm.tentativas", chamada.tentativas)
+            resultado = "sucesso"
+            return resposta
+        finally:
+            # Inclui a carga do modelo quando ele ainda não estava em memória
+            metricas.llm_chamadas.rotulos(self._nome, resultado).inc()
+            metricas.llm_duracao.rotulos(self._nome).observar(time.perf_counter() - inicio)
+
+    def __copy__(self) -> "LLMCompartilhado":
+        return LLMCompartilhado(self._registro, self._nome, self._contabilizador)
+
+    def __deepcopy__(self, memo) -> "LLMCompartilhado":
+        # O registro é do processo: cópias (ex.: agentes copiados) usam o mesmo modelo
+        return self.__copy__()
+
+    def __repr__(self) -> str:
+        return f"LLMCompartilhado({self._nome!r})"
+
+
+# Registro do processo, com o modelo Llama local (ou o servidor de inferência) como padrão
+registro_llm = RegistroLLM()
+registro_llm.registrar(MODELO_PADRAO, _carregar_modelo_padrao)
+
+
+def llm_compartilhado(nome: str = MODELO_PADRAO) -> LLMCompartilhado:
+    """LLM a ser passado aos agentes CrewAI (carregado apenas quando usado)."""
+    return LLMCompartilhado(registro_llm, nome)
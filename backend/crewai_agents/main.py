@@ -9,6 +9,8 @@ import json
 import os
 from dotenv import load_dotenv
 from api.database import create_db_tables
+from monitoring.llm_usage import contabilizador_uso
+from monitoring.tracing import rastreador
 from datetime import datetime
 
 load_dotenv()
@@ -54,8 +56,11 @@ def run_licitacao_crew():
         full_output=True
     )
 
-    # Executa a busca
-    result_busca = crew_busca.kickoff()
+    # Executa a busca (tokens e tempo registrados em uso_llm)
+    with rastreador.span("crew.buscar_licitacoes", **{"crew.agente": coletor_agente.role}), \
+            contabilizador_uso.execucao("busca_licitacoes"), \
+            contabilizador_uso.tarefa("buscar_licitacoes", agente=coletor_agente.role):
+        result_busca = crew_busca.kickoff()
     
     # Tenta parsear o resultado da busca
     licitacoes_encontradas_str = result_busca['final_output'].raw_output
@@ -129,32 +134,41 @@ def run_licitacao_crew():
         )
         salvar_task.human_input = False
 
-        # Cria a Crew para processar a licitação completa
-        crew_processamento_licitacao = Crew(
-            agents=[
-                coletor_agente,
-                analisador_agente,
-                avaliador_juridico_agente,
-                analisador_mercado_agente,
-                gerente_agente, # Incluir o gerente aqui
-                estruturador_agente
-            ],
-            tasks=[
-                baixar_e_extrair_task,
-                analisar_task,
-                avaliar_juridica_task,
-                analisar_mercado_task,
-                consolidar_e_recomendar_task, # Incluir a tarefa do gerente
-                salvar_task
-            ],
-            process=Process.sequential,
-            verbose=2, # Nível de detalhe da execução
-            full_output=True,
-            max_rpm=29 # Limita as requisições por minuto ao LLM para evitar exceder cotas
-        )
+        # Tarefas da licitação, na ordem de execução, com o nome da etapa em uso_llm
+        tarefas_licitacao = [
+            ("baixar_e_extrair_edital", baixar_e_extrair_task),
+            ("analisar_edital", analisar_task),
+            ("avaliar_conformidade_juridica", avaliar_juridica_task),
+            ("analisar_mercado", analisar_mercado_task),
+            ("consolidar_e_recomendar", consolidar_e_recomendar_task), # Incluir a tarefa do gerente
+            ("salvar_dados", salvar_task),
+        ]
 
         try:
-            licitacao_result = crew_processamento_licitacao.kickoff()
+            # Uma etapa por tarefa: o task_callback troca etapa e agente a cada tarefa concluída
+            with rastreador.span("crew.processamento_licitacao", **{"licitacao.id": licitacao_id}), \
+                    contabilizador_uso.execucao("processamento_licitacao", licitacao_id=licitacao_id), \
+                    contabilizador_uso.etapas_sequenciais(
+                        [(etapa, task.agent.role) for etapa, task in tarefas_licitacao]
+                    ) as proxima_etapa:
+                # Cria a Crew para processar a licitação completa
+                crew_processamento_licitacao = Crew(
+                    agents=[
+                        coletor_agente,
+                        analisador_agente,
+                        avaliador_juridico_agente,
+                        analisador_mercado_agente,
+                        gerente_agente, # Incluir o gerente aqui
+                        estruturador_agente
+                    ],
+                    tasks=[task for _, task in tarefas_licitacao],
+                    process=Process.sequential,
+                    verbose=2, # Nível de detalhe da execução
+                    full_output=True,
+                    max_rpm=29, # Limita as requisições por minuto ao LLM para evitar exceder cotas
+                    task_callback=proxima_etapa
+                )
+                licitacao_result = crew_processamento_licitacao.kickoff()
             print(f"Processamento da licitação {licitacao_id} concluído.")
             print(licitacao_result['final_output'].raw_output)
         except Exception as e:
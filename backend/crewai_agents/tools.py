@@ -10,6 +10,7 @@ from email.mime.text import MIMEText
 from dotenv import load_dotenv
 import asyncio # Importar asyncio
 from crewai_tools.tools import BaseTool
+from monitoring.tracing import rastreador
 
 import requests # Para enviar requisições HTTP
 
@@ -301,6 +302,7 @@ class CustomTools:
             print(f"Erro ao enviar mensagem para o Teams: {e}")
             return f"Erro ao enviar mensagem para o Teams: {e}"
 
+@rastreador.ferramenta
 class BuscarNovasLicitacoesTool(BaseTool):
     name: str = "Buscar Novas Licitações no Comprasnet"
     description: str = "Busca novas licitações no portal Comprasnet e retorna uma lista JSON de URLs encontradas."
@@ -313,6 +315,7 @@ class BuscarNovasLicitacoesTool(BaseTool):
         return json.dumps(licitacoes)
 
 # Ferramenta customizada para baixar edital
+@rastreador.ferramenta
 class BaixarEditalTool(BaseTool):
     name: str = "Baixar Edital"
     description: str = "Baixa o arquivo do edital de uma URL específica para a pasta de dados brutos. Retorna o caminho do arquivo baixado."
@@ -325,6 +328,7 @@ class BaixarEditalTool(BaseTool):
         return "Erro ao baixar edital ou link não encontrado."
 
 # Ferramenta customizada para extrair texto de documento
+@rastreador.ferramenta
 class ExtrairTextoDocumentoTool(BaseTool):
     name: str = "Extrair Texto de Documento"
     description: str = "Extrai o conteúdo de texto de um arquivo de edital (PDF/DOCX). Retorna o texto limpo do documento."
@@ -336,6 +340,7 @@ class ExtrairTextoDocumentoTool(BaseTool):
         return "Não foi possível extrair texto do documento."
 
 # Ferramenta customizada para salvar dados da licitação
+@rastreador.ferramenta
 class SalvarDadosLicitacaoTool(BaseTool):
     name: str = "Salvar Dados da Licitação"
     description: str = "Salva os dados extraídos de uma licitação no banco de dados. Atualiza campos de notificação se necessário."
@@ -392,6 +397,7 @@ class SalvarDadosLicitacaoTool(BaseTool):
         finally: db.close()
 
 # Ferramenta customizada para consultar Lei 14133/2021
+@rastreador.ferramenta
 class ConsultarLei14133Tool(BaseTool):
     name: str = "Consultar Lei 14133/2021"
     description: str = "Consulta o texto da Lei nº 14.133/2021 em busca de informações relevantes."
@@ -404,6 +410,7 @@ class ConsultarLei14133Tool(BaseTool):
         return "Nenhum trecho relevante encontrado na Lei 14.133/2021 para a sua busca."
 
 # Ferramenta customizada para consultar preços de referência
+@rastreador.ferramenta
 class ConsultarPrecosReferenciaTool(BaseTool):
     name: str = "Consultar Base de Preços de Referência"
     description: str = "Consulta uma base de dados interna de preços de referência para um item ou serviço."
@@ -414,6 +421,7 @@ class ConsultarPrecosReferenciaTool(BaseTool):
         return f"Preço de referência para '{item_ou_servico}' não encontrado na base interna."
 
 # Ferramenta customizada para pesquisar preço na web
+@rastreador.ferramenta
 class PesquisarPrecoWebTool(BaseTool):
     name: str = "Pesquisar Preço na Web"
     description: str = "Realiza uma pesquisa de preço na web para um determinado item ou serviço. (SIMULADO para MVP)"
@@ -428,6 +436,7 @@ class PesquisarPrecoWebTool(BaseTool):
         return "Pesquisa web simulada: Não foi possível determinar um preço específico para este item."
 
 # Ferramenta customizada para obter cotação cambial
+@rastreador.ferramenta
 class ObterCotacaoCambialTool(BaseTool):
     name: str = "Obter Cotação Cambial"
     description: str = "Obtém a cotação atual de uma moeda base em relação a uma moeda alvo."
@@ -450,6 +459,7 @@ class ObterCotacaoCambialTool(BaseTool):
             return f"Erro inesperado ao obter cotação cambial: {e}"
 
 # Ferramenta customizada para gerar minuta de documento
+@rastreador.ferramenta
 class GerarMinutaDocumentoTool(BaseTool):
     name: str = "Gerar Minuta de Documento"
     description: str = "Gera uma minuta de documento em formato de texto para uma licitação específica. Retorna o caminho do arquivo gerado."
@@ -466,6 +476,7 @@ class GerarMinutaDocumentoTool(BaseTool):
             return f"Erro ao gerar minuta de documento: {e}"
 
 # Ferramenta customizada para enviar email de notificação
+@rastreador.ferramenta
 class EnviarEmailNotificacaoTool(BaseTool):
     name: str = "Enviar Email de Notificação"
     description: str = "Envia um e-mail de notificação para o destinatário especificado."
@@ -493,6 +504,7 @@ class EnviarEmailNotificacaoTool(BaseTool):
             return f"Erro ao enviar e-mail de notificação: {e}"
 
 # Ferramenta customizada para enviar mensagem no Teams
+@rastreador.ferramenta
 class EnviarMensagemTeamsTool(BaseTool):
     name: str = "Enviar Mensagem Microsoft Teams"
     description: str = "Envia uma mensagem de notificação para um canal do Microsoft Teams via Webhook."
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Teste de carga local, sem rede: sobe o LLM falso e a API e executa os cenários.
+
+1. Cria um banco SQLite temporário com licitações sintéticas (nunca usa DATABASE_URL);
+2. sobe loadtest/llm_falso.py e a API (uvicorn) com OPENAI_BASE_URL e
+   LLM_INFERENCE_URL apontando para o LLM falso;
+3. executa os cenários do gerador (loadtest/gerador.py) e imprime o relatório;
+4. encerra os processos e apaga o banco.
+
+Uso:
+    python loadtest/executar.py --cenario analise edital --rps 5 --duracao 60 \\
+        --latencia lognormal:0.8,0.5 --tokens 150:400 --taxa-erro 0.02
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from loadtest.gerador import adicionar_argumentos, executar
+
+TEMPO_INICIO_S = 60.0
+
+
+def criar_banco(caminho: str, licitacoes: int):
+    """Cria as tabelas em um SQLite novo e cadastra licitações sintéticas."""
+    from api.database import Base, Licitacao, criar_engine
+    import api.database_feedback  # noqa: F401
+    import api.database_scraping  # noqa: F401
+    import api.database_monitoring  # noqa: F401
+    from sqlalchemy.orm import Session
+
+    engine = criar_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add_all(
+            Licitacao(id=f"carga-{i}", objeto=f"Aquisição de equipamentos de triagem - lote {i}",
+                      modalidade="Pregão Eletrônico", uf="DF", valor_estimado=100000.0 + i)
+            for i in range(licitacoes)
+        )
+        db.commit()
+    engine.dispose()
+
+
+def _esperar(url: str, processo: subprocess.Popen, nome: str):
+    limite = time.monotonic() + TEMPO_INICIO_S
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"{nome} terminou durante o início (código {processo.returncode})")
+        try:
+            if httpx.get(url, timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f"{nome} não respondeu em {TEMPO_INICIO_S:.0f} s")
+
+
+@contextmanager
+def processos(comandos: List[Dict]):
+    """Sobe os processos em ordem, esperando cada um responder, e os encerra no fim."""
+    iniciados = []
+    try:
+        for comando in comandos:
+            processo = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", comando["app"], "--host", "127.0.0.1",
+                 "--port", str(comando["porta"]), "--workers", str(comando.get("workers", 1)),
+                 "--log-level", "warning"],
+                cwd=BACKEND_DIR, env={**os.environ, **comando["ambiente"]},
+            )
+            iniciados.append(processo)
+            _esperar(f"http://127.0.0.1:{comando['porta']}{comando['saude']}", processo, comando["app"])
+        yield
+    finally:
+        for processo in reversed(iniciados):
+            processo.terminate()
+        for processo in iniciados:
+            try:
+                processo.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                processo.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    adicionar_argumentos(parser)
+    parser.add_argument("--latencia", default="lognormal:0.8,0.5", help="Distribuição da latência do LLM falso")
+    parser.add_argument("--ms-por-token", type=float, default=0.0)
+    parser.add_argument("--tokens", default="150:400", help="Tokens por resposta (N ou MIN:MAX)")
+    parser.add_argument("--taxa-erro", type=float, default=0.0, help="Fração de respostas 500 do LLM")
+    parser.add_argument("--taxa-sobrecarga", type=float, default=0.0, help="Fração de respostas 503 do LLM")
+    parser.add_argument("--taxa-limite", type=float, default=0.0, help="Fração de respostas 429 do LLM")
+    parser.add_argument("--licitacoes", type=int, default=200, help="Licitações cadastradas no banco temporário")
+    parser.add_argument("--workers", type=int, default=1, help="Workers uvicorn da API")
+    parser.add_argument("--porta-api", type=int, default=8300)
+    parser.add_argument("--porta-llm", type=int, default=8301)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temporario:
+        banco = os.path.join(temporario, "carga.db")
+        criar_banco(banco, args.licitacoes)
+        url_llm = f"http://127.0.0.1:{args.porta_llm}"
+        llm = {
+            "app": "loadtest.llm_falso:app", "porta": args.porta_llm, "saude": "/health",
+            "ambiente": {
+                "LLM_FALSO_LATENCIA": args.latencia,
+                "LLM_FALSO_MS_POR_TOKEN": str(args.ms_por_token),
+                "LLM_FALSO_TOKENS": args.tokens,
+                "LLM_FALSO_TAXA_ERRO": str(args.taxa_erro),
+                "LLM_FALSO_TAXA_SOBRECARGA": str(args.taxa_sobrecarga),
+                "LLM_FALSO_TAXA_LIMITE": str(args.taxa_limite),
+            },
+        }
+        api = {
+            "app": "api.app:app", "porta": args.porta_api, "saude": "/api/licitacoes/?limit=1",
+            "workers": args.workers,
+            "ambiente": {
+                "DATABASE_URL": f"sqlite:///{banco}",
+                "OPENAI_BASE_URL": f"{url_llm}/v1",
+                "OPENAI_API_KEY": "loadtest",
+                "LLM_INFERENCE_URL": url_llm,
+                "TRACING_EXPORTADOR": "nenhum",
+            },
+        }
+        print(f"🚀 LLM falso em {url_llm} ({args.latencia}, {args.tokens} tokens); API em :{args.porta_api}")
+        with processos([llm, api]):
+            asyncio.run(executar(f"http://127.0.0.1:{args.porta_api}", args))
+
+
+if __name__ == "__main__":
+    main()
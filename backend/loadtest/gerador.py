@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga em malha aberta para a API.
+
+As requisições são disparadas nos instantes de chegada programados para a taxa
+alvo (Poisson ou intervalos constantes), sem esperar as anteriores terminarem:
+se a API ficar lenta, as requisições se acumulam em vez de a carga diminuir.
+A latência é medida a partir do instante programado, para que a espera de
+uma requisição atrasada pelo próprio gerador também conte (sem "coordinated omission").
+
+Cenários:
+- listagem: GET /api/licitacoes/ (sem LLM, referência do custo da API);
+- analise: POST /api/gerar_analise para licitações existentes (7 chamadas de LLM cada);
+- edital: POST /api/editais/gerar (aceite da solicitação; com --aguardar-conclusao,
+  também o tempo até a geração terminar, consultando /api/editais/status).
+
+O relatório traz p50/p95/p99, média e máximo da latência, vazão (respostas 2xx
+por segundo), taxa alcançada e erros por status.
+
+Uso (API já em execução; para subir a API e o LLM falso, ver loadtest/executar.py):
+    python loadtest/gerador.py --url http://localhost:8000 --cenario analise --rps 5 --duracao 60
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Solicitações em andamento acima deste limite são descartadas (e contadas)
+EM_VOO_MAX = 1000
+INTERVALO_STATUS_S = 0.5
+
+
+def percentil(valores: List[float], p: float) -> Optional[float]:
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    if not valores:
+        return None
+    posicao = max(0, min(len(valores) - 1, math.ceil(p * len(valores) / 100) - 1))
+    return valores[posicao]
+
+
+def instantes_chegada(rps: float, duracao: float, distribuicao: str = "poisson",
+                      semente: int = 42) -> List[float]:
+    """Instantes (s desde o início) das requisições para a taxa e duração pedidas."""
+    if distribuicao == "constante":
+        return [i / rps for i in range(int(rps * duracao))]
+    aleatorio = random.Random(semente)
+    instantes, t = [], aleatorio.expovariate(rps)
+    while t < duracao:
+        instantes.append(t)
+        t += aleatorio.expovariate(rps)
+    return instantes
+
+
+# === Cenários ===
+
+class Cenario:
+    """
+    Um tipo de requisição. `preparar` roda uma vez antes da carga (ex.: buscar ids);
+    `requisicao` monta o pedido i; `acompanhar`, se houver, espera o fim do
+    processamento em segundo plano e devolve o status final.
+    """
+
+    def __init__(self, nome: str, descricao: str,
+                 requisicao: Callable[[int, Any], Dict[str, Any]],
+                 preparar: Optional[Callable[[httpx.AsyncClient], Awaitable[Any]]] = None,
+                 acompanhar: Optional[Callable[[httpx.AsyncClient, httpx.Response, float], Awaitable[str]]] = None):
+        self.nome = nome
+        self.descricao = descricao
+        self.requisicao = requisicao
+        self.preparar = preparar
+        self.acompanhar = acompanhar
+
+
+async def _ids_licitacoes(cliente: httpx.AsyncClient) -> List[str]:
+    resposta = await cliente.get("/api/licitacoes/", params={"limit": 500})
+    resposta.raise_for_status()
+    ids = [licitacao["id"] for licitacao in resposta.json()]
+    if not ids:
+        raise RuntimeError("Nenhuma licitação cadastrada para o cenário 'analise'")
+    return ids
+
+
+def solicitacao_edital(i: int) -> Dict[str, Any]:
+    """Solicitação de edital sintética e válida (EditalRequest)."""
+    return {
+        "objeto": f"Contratação de serviço de limpeza predial - carga {i}",
+        "tipo_licitacao": "pregao",
+        "modalidade": "eletronica",
+        "categoria": "servicos",
+        "setor_requisitante": {
+            "nome": "Gerência de Infraestrutura", "responsavel": "Teste de Carga",
+            "email": "carga@correios.com.br", "justificativa": "Manutenção das unidades operacionais",
+        },
+        "itens": [{
+            "numero": 1, "descricao": "Serviço de limpeza e conservação", "unidade": "m²",
+            "quantidade": 1000 + i % 500, "valor_estimado_unitario": 12.5, "categoria": "servicos",
+        }],
+        "valor_total_estimado": 150000.0,
+        "prazo_execucao": 365,
+        "prazo_proposta": 8,
+    }
+
+
+async def _acompanhar_edital(cliente: httpx.AsyncClient, resposta: httpx.Response, limite: float) -> str:
+    request_id = resposta.json()["request_id"]
+    while time.perf_counter() < limite:
+        await asyncio.sleep(INTERVALO_STATUS_S)
+        status = await cliente.get(f"/api/editais/status/{request_id}")
+        if status.status_code == 200 and status.json()["status"] != "processando":
+            return status.json()["status"]
+    return "tempo_esgotado"
+
+
+CENARIOS: Dict[str, Cenario] = {
+    "listagem": Cenario(
+        "listagem", "GET /api/licitacoes/",
+        lambda i, contexto: {"method": "GET", "url": "/api/licitacoes/", "params": {"limit": 50}},
+    ),
+    "analise": Cenario(
+        "analise", "POST /api/gerar_analise",
+        lambda i, ids: {"method": "POST", "url": "/api/gerar_analise", "params": {"id": ids[i % len(ids)]}},
+        preparar=_ids_licitacoes,
+    ),
+    "edital": Cenario(
+        "edital", "POST /api/editais/gerar",
+        lambda i, contexto: {"method": "POST", "url": "/api/editais/gerar", "json": solicitacao_edital(i)},
+        acompanhar=_acompanhar_edital,
+    ),
+}
+
+
+# === Execução ===
+
+class Relatorio:
+    """Resultados de uma execução de cenário."""
+
+    def __init__(self, cenario: str, rps_alvo: float, duracao_alvo: float):
+        self.cenario = cenario
+        self.rps_alvo = rps_alvo
+        self.duracao_alvo = duracao_alvo
+        self.latencias: List[float] = []
+        self.status: Counter = Counter()
+        self.conclusoes: List[float] = []
+        self.status_conclusao: Counter = Counter()
+        self.descartadas = 0
+        self.enviadas = 0
+        self.duracao = 0.0
+
+    def registrar(self, latencia: float, status: str):
+        self.latencias.append(latencia)
+        self.status[status] += 1
+
+    def resumo(self) -> Dict[str, Any]:
+        """Métricas agregadas (latências em ms)."""
+        def estatisticas(valores: List[float]) -> Dict[str, Optional[float]]:
+            ordenados = sorted(valores)
+            def ms(valor):
+                return round(valor * 1000, 1) if valor is not None else None
+            return {
+                "p50_ms": ms(percentil(ordenados, 50)),
+                "p95_ms": ms(percentil(ordenados, 95)),
+                "p99_ms": ms(percentil(ordenados, 99)),
+                "media_ms": ms(sum(ordenados) / len(ordenados)) if ordenados else None,
+                "max_ms": ms(ordenados[-1]) if ordenados else None,
+            }
+
+        sucessos = sum(n for status, n in self.status.items() if status.startswith("2"))
+        resumo = {
+            "cenario": self.cenario,
+            "rps_alvo": self.rps_alvo,
+            "duracao_s": round(self.duracao, 2),
+            "enviadas": self.enviadas,
+            "descartadas": self.descartadas,
+            "rps_alcancado": round(self.enviadas / self.duracao_alvo, 2) if self.duracao_alvo else 0.0,
+            "vazao_rps": round(sucessos / self.duracao, 2) if self.duracao else 0.0,
+            "sucessos": sucessos,
+            "status": dict(self.status),
+            "latencia": estatisticas(self.latencias),
+        }
+        if self.conclusoes or self.status_conclusao:
+            resumo["conclusao"] = {**estatisticas(self.conclusoes), "status": dict(self.status_conclusao)}
+        return resumo
+
+
+async def executar_cenario(cliente: httpx.AsyncClient, cenario: Cenario, rps: float, duracao: float,
+                           distribuicao: str = "poisson", aguardar_conclusao: bool = False,
+                           tempo_limite: float = 60.0, em_voo_max: int = EM_VOO_MAX,
+                           semente: int = 42) -> Relatorio:
+    """
+    Dispara o cenário na taxa pedida durante `duracao` segundos e espera as respostas.
+
+    Args:
+        cliente: Cliente HTTP apontado para a API
+        cenario: Cenário a executar (ver CENARIOS)
+        rps: Requisições por segundo programadas
+        duracao: Duração da fase de disparo (s)
+        distribuicao: Chegadas "poisson" ou "constante"
+        aguardar_conclusao: Acompanhar o processamento em segundo plano (cenários com `acompanhar`)
+        tempo_limite: Tempo máximo por requisição, incluindo o acompanhamento (s)
+        em_voo_max: Requisições simultâneas acima das quais novas chegadas são descartadas
+        semente: Semente das chegadas Poisson
+
+    Returns:
+        Relatorio: Latências, status e vazão
+    """
+    contexto = await cenario.preparar(cliente) if cenario.preparar else None
+    relatorio = Relatorio(cenario.nome, rps, duracao)
+    em_voo = set()
+
+    async def disparar(i: int, programado: float):
+        try:
+            resposta = await cliente.request(**cenario.requisicao(i, contexto), timeout=tempo_limite)
+            status = str(resposta.status_code)
+        except httpx.TimeoutException:
+            resposta, status = None, "timeout"
+        except httpx.HTTPError as e:
+            resposta, status = None, type(e).__name__
+        relatorio.registrar(time.perf_counter() - programado, status)
+
+        if aguardar_conclusao and cenario.acompanhar and resposta is not None and resposta.is_success:
+            final = await cenario.acompanhar(cliente, resposta, programado + tempo_limite)
+            relatorio.status_conclusao[final] += 1
+            if final != "tempo_esgotado":
+                relatorio.conclusoes.append(time.perf_counter() - programado)
+
+    inicio = time.perf_counter()
+    for i, instante in enumerate(instantes_chegada(rps, duracao, distribuicao, semente)):
+        programado = inicio + instante
+        espera = programado - time.perf_counter()
+        if espera > 0:
+            await asyncio.sleep(espera)
+        if len(em_voo) >= em_voo_max:
+            relatorio.descartadas += 1
+            continue
+        tarefa = asyncio.create_task(disparar(i, programado))
+        em_voo.add(tarefa)
+        tarefa.add_done_callback(em_voo.discard)
+        relatorio.enviadas += 1
+
+    if em_voo:
+        await asyncio.gather(*list(em_voo))
+    relatorio.duracao = time.perf_counter() - inicio
+    return relatorio
+
+
+def imprimir(resumo: Dict[str, Any]):
+    print(f"\n📈 Cenário {resumo['cenario']}: {resumo['enviadas']} requisições em {resumo['duracao_s']} s "
+          f"(alvo {resumo['rps_alvo']} rps, alcançado {resumo['rps_alcancado']} rps, "
+          f"{resumo['descartadas']} descartadas)")
+    print(f"   Vazão: {resumo['vazao_rps']} respostas 2xx/s | Status: {resumo['status']}")
+    for titulo, chave in (("Latência", "latencia"), ("Conclusão", "conclusao")):
+        if chave not in resumo:
+            continue
+        lat = resumo[chave]
+        print(f"   {titulo} (ms): p50={lat['p50_ms']} p95={lat['p95_ms']} p99={lat['p99_ms']} "
+              f"média={lat['media_ms']} máx={lat['max_ms']}")
+        if "status" in lat:
+            print(f"   Status final: {lat['status']}")
+
+
+def adicionar_argumentos(parser: argparse.ArgumentParser):
+    """Argumentos comuns ao gerador e a loadtest/executar.py."""
+    parser.add_argument("--cenario", nargs="+", choices=list(CENARIOS), default=["analise"])
+    parser.add_argument("--rps", type=float, default=2.0)
+    parser.add_argument("--duracao", type=float, default=30.0)
+    parser.add_argument("--chegadas", choices=["poisson", "constante"], default="poisson")
+    parser.add_argument("--aguardar-conclusao", action="store_true")
+    parser.add_argument("--tempo-limite", type=float, default=120.0)
+    parser.add_argument("--saida", help="Grava os resumos em JSON neste arquivo")
+
+
+async def executar(url: str, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Executa os cenários pedidos em sequência e imprime os resumos."""
+    resumos = []
+    limites = httpx.Limits(max_connections=EM_VOO_MAX, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=url, limits=limites) as cliente:
+        for nome in args.cenario:
+            relatorio = await executar_cenario(
+                cliente, CENARIOS[nome], args.rps, args.duracao, args.chegadas,
+                args.aguardar_conclusao, args.tempo_limite,
+            )
+            resumo = relatorio.resumo()
+            imprimir(resumo)
+            resumos.append(resumo)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(resumos, arquivo, ensure_ascii=False, indent=2)
+    return resumos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    adicionar_argumentos(parser)
+    args = parser.parse_args()
+    asyncio.run(executar(args.url, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Servidor LLM falso, compatível com a API de chat completions da OpenAI, para
+testes de carga sem rede e sem gastar tokens.
+
+Atende POST /v1/chat/completions (sem streaming), GET /v1/models e GET /health.
+Cada resposta espera uma latência sorteada, devolve um texto com a quantidade
+de tokens sorteada (com `usage` preenchido) ou falha com a taxa configurada:
+
+- LLM_FALSO_LATENCIA: distribuição do tempo até a resposta, em segundos:
+  "fixa:0.5", "uniforme:0.2,1.5", "normal:0.8,0.2" ou "lognormal:0.8,0.5"
+  (mediana e sigma do logaritmo). Padrão: lognormal:0.8,0.5
+- LLM_FALSO_MS_POR_TOKEN: tempo adicional por token gerado (padrão 0)
+- LLM_FALSO_TOKENS: tokens da resposta, "300" ou intervalo "150:400" (limitado por max_tokens)
+- LLM_FALSO_TAXA_ERRO: fração de respostas 500 (padrão 0)
+- LLM_FALSO_TAXA_SOBRECARGA: fração de respostas 503, como a fila cheia do
+  servidor de inferência (padrão 0)
+- LLM_FALSO_TAXA_LIMITE: fração de respostas 429, como o limite de taxa da OpenAI (padrão 0)
+- LLM_FALSO_SEMENTE: semente do sorteio (padrão: aleatória)
+
+Uso:
+    uvicorn loadtest.llm_falso:app --port 8200
+
+A API passa a usar o servidor falso com OPENAI_BASE_URL=http://localhost:8200/v1
+(/api/gerar_analise) e LLM_INFERENCE_URL=http://localhost:8200 (crews).
+loadtest/executar.py sobe os dois processos já configurados.
+"""
+
+import asyncio
+import os
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from monitoring.llm_usage import estimar_tokens
+
+NOME_MODELO = "llm-falso"
+DISTRIBUICOES = ("fixa", "uniforme", "normal", "lognormal")
+_PALAVRAS = (
+    "a licitação deve observar os princípios da legalidade impessoalidade e eficiência "
+    "com especificações claras prazos adequados e critérios objetivos de julgamento "
+    "considerando o risco jurídico técnico e financeiro do objeto"
+).split()
+
+
+class ConfigLLMFalso:
+    """Comportamento do servidor falso: latência, tokens e taxas de erro."""
+
+    def __init__(self, latencia: str = "lognormal:0.8,0.5", ms_por_token: float = 0.0,
+                 tokens: str = "150:400", taxa_erro: float = 0.0, taxa_sobrecarga: float = 0.0,
+                 taxa_limite: float = 0.0, semente: Optional[int] = None):
+        self.distribuicao, self.parametros = ler_distribuicao(latencia)
+        self.ms_por_token = ms_por_token
+        minimo, _, maximo = tokens.partition(":")
+        self.tokens = (int(minimo), int(maximo or minimo))
+        self.taxa_erro = taxa_erro
+        self.taxa_sobrecarga = taxa_sobrecarga
+        self.taxa_limite = taxa_limite
+        self.aleatorio = random.Random(semente)
+
+    @classmethod
+    def do_ambiente(cls) -> "ConfigLLMFalso":
+        semente = os.getenv("LLM_FALSO_SEMENTE")
+        return cls(
+            latencia=os.getenv("LLM_FALSO_LATENCIA", "lognormal:0.8,0.5"),
+            ms_por_token=float(os.getenv("LLM_FALSO_MS_POR_TOKEN", "0")),
+            tokens=os.getenv("LLM_FALSO_TOKENS", "150:400"),
+            taxa_erro=float(os.getenv("LLM_FALSO_TAXA_ERRO", "0")),
+            taxa_sobrecarga=float(os.getenv("LLM_FALSO_TAXA_SOBRECARGA", "0")),
+            taxa_limite=float(os.getenv("LLM_FALSO_TAXA_LIMITE", "0")),
+            semente=int(semente) if semente else None,
+        )
+
+    def sortear_latencia(self) -> float:
+        """Tempo até a resposta (s), sem o tempo por token."""
+        a = self.aleatorio
+        p = self.parametros
+        if self.distribuicao == "fixa":
+            valor = p[0]
+        elif self.distribuicao == "uniforme":
+            valor = a.uniform(p[0], p[1])
+        elif self.distribuicao == "normal":
+            valor = a.gauss(p[0], p[1])
+        else:
+            valor = p[0] * a.lognormvariate(0.0, p[1])
+        return max(0.0, valor)
+
+    def sortear_tokens(self, max_tokens: Optional[int]) -> int:
+        tokens = self.aleatorio.randint(*self.tokens)
+        return min(tokens, max_tokens) if max_tokens else tokens
+
+    def sortear_falha(self) -> Optional[Tuple[int, str, str]]:
+        """(status, tipo, mensagem) de uma falha sorteada, ou None."""
+        sorteio = self.aleatorio.random()
+        for taxa, falha in (
+            (self.taxa_erro, (500, "server_error", "Falha simulada do servidor")),
+            (self.taxa_sobrecarga, (503, "server_overloaded", "Fila de inferência cheia")),
+            (self.taxa_limite, (429, "rate_limit_exceeded", "Limite de requisições simulado")),
+        ):
+            if sorteio < taxa:
+                return falha
+            sorteio -= taxa
+        return None
+
+
+def ler_distribuicao(especificacao: str) -> Tuple[str, List[float]]:
+    """
+    Converte "nome:p1,p2" em (nome, [p1, p2]).
+
+    Raises:
+        ValueError: Distribuição desconhecida ou parâmetros ausentes
+    """
+    nome, _, parametros = especificacao.partition(":")
+    valores = [float(v) for v in parametros.split(",") if v.strip()]
+    necessarios = 1 if nome == "fixa" else 2
+    if nome not in DISTRIBUICOES or len(valores) < necessarios:
+        raise ValueError(f"Distribuição de latência inválida: {especificacao!r} (use {', '.join(DISTRIBUICOES)})")
+    return nome, valores
+
+
+def gerar_texto(tokens: int) -> str:
+    """Texto com aproximadamente `tokens` tokens (uma palavra por token)."""
+    return " ".join(_PALAVRAS[i % len(_PALAVRAS)] for i in range(tokens))
+
+
+class Mensagem(BaseModel):
+    role: str
+    content: Optional[str] = ""
+
+
+class PedidoChat(BaseModel):
+    model: Optional[str] = None
+    messages: List[Mensagem]
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+
+
+def criar_app(config: ConfigLLMFalso) -> FastAPI:
+    """Aplicação HTTP do servidor falso."""
+    aplicacao = FastAPI(title="LLM falso (testes de carga)")
+    contagem = {"requisicoes": 0, "falhas": 0, "tokens_gerados": 0}
+
+    @aplicacao.post("/v1/chat/completions")
+    async def chat_completions(pedido: PedidoChat):
+        contagem["requisicoes"] += 1
+        latencia = config.sortear_latencia()
+        falha = config.sortear_falha()
+        if falha is not None:
+            await asyncio.sleep(latencia)
+            contagem["falhas"] += 1
+            status, tipo, mensagem = falha
+            return JSONResponse(status_code=status, content={"error": {"message": mensagem, "type": tipo}})
+
+        tokens = config.sortear_tokens(pedido.max_tokens)
+        await asyncio.sleep(latencia + tokens * config.ms_por_token / 1000)
+        contagem["tokens_gerados"] += tokens
+        prompt_tokens = estimar_tokens("\n".join(m.content or "" for m in pedido.messages))
+        return {
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": pedido.model or NOME_MODELO,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": gerar_texto(tokens)},
+                "finish_reason": "length" if pedido.max_tokens and tokens >= pedido.max_tokens else "stop",
+            }],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": tokens,
+                      "total_tokens": prompt_tokens + tokens},
+        }
+
+    @aplicacao.get("/v1/models")
+    def modelos() -> Dict[str, Any]:
+        return {"object": "list", "data": [{"id": NOME_MODELO, "object": "model", "owned_by": "loadtest"}]}
+
+    @aplicacao.get("/health")
+    def saude() -> Dict[str, Any]:
+        return {"status": "ok", **contagem}
+
+    return aplicacao
+
+
+# Aplicação usada pelo uvicorn (configurada pelas variáveis LLM_FALSO_*)
+app = criar_app(ConfigLLMFalso.do_ambiente())
@@ -0,0 +1,429 @@
+"""
+Contabilização de tokens, tempo, tentativas e custo das chamadas de LLM (tabela uso_llm).
+
+Cada execução de crew roda dentro de `contabilizador_uso.execucao(...)`, que
+identifica a geração de edital (request_id) ou a licitação processada
+(licitacao_id), e cada etapa dentro de `contabilizador_uso.tarefa(...)`. Numa
+crew sequencial com várias tarefas em um único kickoff, `etapas_sequenciais(...)`
+fornece o `task_callback` que troca a etapa e o agente a cada tarefa concluída.
+As chamadas feitas pelo proxy LLMCompartilhado (crewai_agents/llm_registry.py)
+são registradas com `chamada(...)` e herdam execução, etapa e agente via
+contextvars, sem alterar assinaturas. Fora de uma execução nada é registrado.
+
+Os registros ficam em memória e são gravados em lote no fim da execução
+(ou a cada LIMITE_PENDENTES registros), fora do caminho das chamadas.
+Sem contagem do servidor de inferência, os tokens são estimados pelo tamanho do texto.
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from api.database_monitoring import UsoLLM
+
+logger = logging.getLogger(__name__)
+
+# Custo por 1.000 tokens (0 para o modelo local)
+CUSTO_PROMPT_1K = float(os.getenv("LLM_CUSTO_PROMPT_1K", "0"))
+CUSTO_RESPOSTA_1K = float(os.getenv("LLM_CUSTO_RESPOSTA_1K", "0"))
+CARACTERES_POR_TOKEN = 4
+LIMITE_PENDENTES = 200
+
+AGRUPAMENTOS = {
+    "etapa": UsoLLM.etapa,
+    "agente": UsoLLM.agente,
+    "modelo": UsoLLM.modelo,
+    "fluxo": UsoLLM.fluxo,
+    "request_id": UsoLLM.request_id,
+    "licitacao_id": UsoLLM.licitacao_id,
+}
+
+_CONTEXTO: ContextVar[Optional[Dict[str, Any]]] = ContextVar("contexto_uso_llm", default=None)
+_CHAMADA: ContextVar[Optional["ChamadaLLM"]] = ContextVar("chamada_llm", default=None)
+
+
+def estimar_tokens(texto: Any) -> int:
+    """Estimativa de tokens pelo tamanho do texto."""
+    texto = str(texto or "")
+    return (len(texto) + CARACTERES_POR_TOKEN - 1) // CARACTERES_POR_TOKEN
+
+
+class ChamadaLLM:
+    """
+    Consumo de uma chamada em andamento.
+    O cliente do modelo pode informar a contagem real com `anotar`.
+    """
+
+    def __init__(self, prompt: str = ""):
+        self.tokens_prompt = estimar_tokens(prompt)
+        self.tokens_resposta = 0
+        self.tokens_estimados = True
+        self.tentativas = 1
+        self._contagem_real = False
+
+    def resposta(self, texto: Any):
+        """Estima os tokens da resposta (se o cliente não informou a contagem)."""
+        if not self._contagem_real:
+            self.tokens_resposta = estimar_tokens(texto)
+
+    def anotar(self, tokens_prompt: Optional[int] = None, tokens_resposta: Optional[int] = None,
+               tentativas: Optional[int] = None):
+        """Contagem informada pelo servidor de inferência e tentativas feitas."""
+        if tokens_prompt is not None and tokens_resposta is not None:
+            self.tokens_prompt, self.tokens_resposta = int(tokens_prompt), int(tokens_resposta)
+            self.tokens_estimados = False
+            self._contagem_real = True
+        if tentativas is not None:
+            self.tentativas = tentativas
+
+
+def _totais_vazios() -> Dict[str, Any]:
+    return {"tokens_prompt": 0, "tokens_resposta": 0, "tentativas": 0, "estimados": False}
+
+
+def chamada_atual() -> ChamadaLLM:
+    """Chamada corrente (ou uma avulsa, não registrada)."""
+    return _CHAMADA.get() or ChamadaLLM()
+
+
+class ContabilizadorUso:
+    """
+    Registra o consumo das chamadas de LLM e das tarefas das crews.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        custo_prompt_1k: float = CUSTO_PROMPT_1K,
+        custo_resposta_1k: float = CUSTO_RESPOSTA_1K
+    ):
+        self._session_factory = session_factory
+        self.custo_prompt_1k = custo_prompt_1k
+        self.custo_resposta_1k = custo_resposta_1k
+        self._pendentes: List[Dict[str, Any]] = []
+        self._trava = threading.Lock()
+
+    def custo(self, tokens_prompt: int, tokens_resposta: int) -> float:
+        """Custo de uma quantidade de tokens com os preços configurados."""
+        return round((tokens_prompt * self.custo_prompt_1k + tokens_resposta * self.custo_resposta_1k) / 1000, 6)
+
+    def _adicionar(self, registro: Dict[str, Any]):
+        with self._trava:
+            self._pendentes.append(registro)
+            cheio = len(self._pendentes) >= LIMITE_PENDENTES
+        if cheio:
+            self.gravar_pendentes()
+
+    def gravar_pendentes(self) -> int:
+        """
+        Grava os registros acumulados.
+        Falhas são apenas registradas no log: a contabilização não interrompe as crews.
+
+        Returns:
+            int: Quantidade de registros gravados
+        """
+        with self._trava:
+            pendentes, self._pendentes = self._pendentes, []
+        if not pendentes:
+            return 0
+
+        if self._session_factory is None:
+            from api.database import SessionLocal
+            self._session_factory = SessionLocal
+        db = self._session_factory()
+        try:
+            db.bulk_insert_mappings(UsoLLM, pendentes)
+            db.commit()
+            return len(pendentes)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro ao gravar uso de LLM ({len(pendentes)} registros): {str(e)}")
+            return 0
+        finally:
+            db.close()
+
+    @contextmanager
+    def execucao(self, fluxo: str, request_id: Optional[str] = None, licitacao_id: Optional[str] = None):
+        """
+        Delimita uma execução de crew. Os registros são gravados ao final do bloco.
+
+        Args:
+            fluxo: geracao_edital, processamento_licitacao...
+            request_id: ID da solicitação de edital
+            licitacao_id: ID da licitação processada
+        """
+        token = _CONTEXTO.set({
+            "fluxo": fluxo, "request_id": request_id, "licitacao_id": licitacao_id,
+            "etapa": None, "agente": None, "totais": None,
+        })
+        try:
+            yield
+        finally:
+            _CONTEXTO.reset(token)
+            self.gravar_pendentes()
+
+    def _base(self, contexto: Dict[str, Any], tipo: str, inicio: float) -> Dict[str, Any]:
+        return {
+            "tipo": tipo,
+            "request_id": contexto["request_id"],
+            "licitacao_id": contexto["licitacao_id"],
+            "fluxo": contexto["fluxo"],
+            "etapa": contexto["etapa"],
+            "agente": contexto["agente"],
+            "duracao_ms": round((time.perf_counter() - inicio) * 1000, 3),
+            "data_registro": datetime.now(),
+        }
+
+    @contextmanager
+    def tarefa(self, etapa: str, agente: Optional[str] = None):
+        """
+        Mede uma etapa/tarefa da crew e soma o consumo das chamadas feitas nela.
+
+        Args:
+            etapa: Nome da etapa
+            agente: Agente (ou agentes) que executam a etapa
+        """
+        contexto = _CONTEXTO.get()
+        if contexto is None:
+            yield
+            return
+
+        totais = _totais_vazios()
+        token = _CONTEXTO.set({**contexto, "etapa": etapa, "agente": agente, "totais": totais})
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            yield
+        except Exception as e:
+            erro = str(e) or type(e).__name__
+            raise
+        finally:
+            _CONTEXTO.reset(token)
+            self._registrar_tarefa({**contexto, "etapa": etapa, "agente": agente}, totais, inicio, erro)
+
+    @contextmanager
+    def etapas_sequenciais(self, etapas: List[Tuple[str, Optional[str]]]):
+        """
+        Mede as tarefas de uma crew sequencial executada em um único kickoff.
+        O bloco recebe a função a passar como `task_callback` da Crew: a cada
+        tarefa concluída, a etapa corrente é registrada e a próxima começa com
+        o seu agente. Se o kickoff falhar, a etapa em andamento é registrada com o erro.
+
+        Args:
+            etapas: Pares (etapa, agente), na ordem das tarefas da crew
+        """
+        contexto = _CONTEXTO.get()
+        if contexto is None or not etapas:
+            yield lambda *args, **kwargs: None
+            return
+
+        # Dicionário compartilhado: threads que copiaram o contexto também veem a troca de etapa
+        atual = {**contexto}
+        estado = {"indice": 0, "inicio": 0.0}
+
+        def iniciar(indice: int):
+            etapa, agente = etapas[indice]
+            atual.update(etapa=etapa, agente=agente, totais=_totais_vazios())
+            estado.update(indice=indice, inicio=time.perf_counter())
+
+        def concluir(erro: Optional[str] = None):
+            self._registrar_tarefa(dict(atual), atual["totais"], estado["inicio"], erro)
+
+        def proxima(*args, **kwargs):
+            if estado["indice"] >= len(etapas):
+                return
+            concluir()
+            if estado["indice"] + 1 < len(etapas):
+                iniciar(estado["indice"] + 1)
+            else:
+                estado["indice"] = len(etapas)
+                atual.update(etapa=None, agente=None, totais=None)
+
+        token = _CONTEXTO.set(atual)
+        iniciar(0)
+        erro = None
+        try:
+            yield proxima
+        except Exception as e:
+            erro = str(e) or type(e).__name__
+            raise
+        finally:
+            _CONTEXTO.reset(token)
+            if estado["indice"] < len(etapas):
+                concluir(erro)
+
+    def _registrar_tarefa(self, contexto: Dict[str, Any], totais: Dict[str, Any], inicio: float,
+                          erro: Optional[str]):
+        registro = self._base(contexto, "tarefa", inicio)
+        registro.update(
+            tokens_prompt=totais["tokens_prompt"],
+            tokens_resposta=totais["tokens_resposta"],
+            tokens_estimados=totais["estimados"],
+            tentativas=totais["tentativas"],
+            custo=self.custo(totais["tokens_prompt"], totais["tokens_resposta"]),
+            sucesso=erro is None,
+            erro=erro,
+        )
+        self._adicionar(registro)
+
+    @contextmanager
+    def chamada(self, modelo: str, prompt: str = ""):
+        """
+        Mede uma chamada de LLM. O bloco informa a resposta com `chamada.resposta(texto)`.
+
+        Args:
+            modelo: Nome do modelo no registro de LLMs
+            prompt: Texto enviado (para estimar os tokens)
+        """
+        contexto = _CONTEXTO.get()
+        if contexto is None:
+            yield ChamadaLLM()
+            return
+
+        chamada = ChamadaLLM(prompt)
+        token = _CHAMADA.set(chamada)
+        inicio = time.perf_counter()
+        erro = None
+        try:
+            yield chamada
+        except Exception as e:
+            erro = str(e) or type(e).__name__
+            raise
+        finally:
+            _CHAMADA.reset(token)
+            registro = self._base(contexto, "chamada", inicio)
+            registro.update(
+                modelo=modelo,
+                tokens_prompt=chamada.tokens_prompt,
+                tokens_resposta=chamada.tokens_resposta,
+                tokens_estimados=chamada.tokens_estimados,
+                tentativas=chamada.tentativas,
+                custo=self.custo(chamada.tokens_prompt, chamada.tokens_resposta),
+                sucesso=erro is None,
+                erro=erro,
+            )
+            totais = contexto["totais"]
+            if totais is not None:
+                with self._trava:
+                    totais["tokens_prompt"] += chamada.tokens_prompt
+                    totais["tokens_resposta"] += chamada.tokens_resposta
+                    totais["tentativas"] += chamada.tentativas
+                    totais["estimados"] = totais["estimados"] or chamada.tokens_estimados
+            self._adicionar(registro)
+
+
+def _filtrar(query, request_id: Optional[str], licitacao_id: Optional[str], fluxo: Optional[str],
+             dias: Optional[int]):
+    if request_id:
+        query = query.filter(UsoLLM.request_id == request_id)
+    if licitacao_id:
+        query = query.filter(UsoLLM.licitacao_id == licitacao_id)
+    if fluxo:
+        query = query.filter(UsoLLM.fluxo == fluxo)
+    if dias:
+        query = query.filter(UsoLLM.data_registro >= datetime.now() - timedelta(days=dias))
+    return query
+
+
+def resumir_uso(
+    db: Session,
+    agrupar_por: str = "etapa",
+    tipo: str = "tarefa",
+    request_id: Optional[str] = None,
+    licitacao_id: Optional[str] = None,
+    fluxo: Optional[str] = None,
+    dias: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Totais de tokens, tempo, tentativas e custo agrupados, maiores custos e tempos primeiro.
+
+    Args:
+        db: Sessão do banco de dados
+        agrupar_por: Uma das chaves de AGRUPAMENTOS
+        tipo: tarefa (tempo das etapas) ou chamada (chamadas de LLM)
+        request_id, licitacao_id, fluxo: Filtros opcionais
+        dias: Apenas registros dos últimos N dias
+
+    Returns:
+        list: Um item por grupo
+    """
+    coluna = AGRUPAMENTOS[agrupar_por]
+    query = db.query(
+        coluna,
+        func.count(UsoLLM.id),
+        func.sum(UsoLLM.tokens_prompt),
+        func.sum(UsoLLM.tokens_resposta),
+        func.sum(UsoLLM.duracao_ms),
+        func.max(UsoLLM.duracao_ms),
+        func.sum(UsoLLM.tentativas),
+        func.sum(UsoLLM.custo),
+        func.sum(case((UsoLLM.sucesso.is_(False), 1), else_=0)),
+    ).filter(UsoLLM.tipo == tipo)
+    query = _filtrar(query, request_id, licitacao_id, fluxo, dias).group_by(coluna)
+
+    grupos = [
+        {
+            agrupar_por: valor,
+            "registros": registros,
+            "tokens_prompt": int(prompt or 0),
+            "tokens_resposta": int(resposta or 0),
+            "tokens_total": int((prompt or 0) + (resposta or 0)),
+            "duracao_total_ms": round(duracao or 0, 3),
+            "duracao_media_ms": round((duracao or 0) / registros, 3),
+            "duracao_maxima_ms": round(maxima or 0, 3),
+            "tentativas": int(tentativas or 0),
+            "custo": round(custo or 0, 6),
+            "falhas": int(falhas or 0),
+        }
+        for valor, registros, prompt, resposta, duracao, maxima, tentativas, custo, falhas in query.all()
+    ]
+    return sorted(grupos, key=lambda g: (g["custo"], g["duracao_total_ms"]), reverse=True)
+
+
+def listar_uso(
+    db: Session,
+    request_id: Optional[str] = None,
+    licitacao_id: Optional[str] = None,
+    tipo: Optional[str] = None,
+    limit: int = 100
+) -> List[UsoLLM]:
+    """Registros mais recentes primeiro."""
+    query = _filtrar(db.query(UsoLLM), request_id, licitacao_id, None, None)
+    if tipo:
+        query = query.filter(UsoLLM.tipo == tipo)
+    return query.order_by(UsoLLM.data_registro.desc()).limit(limit).all()
+
+
+def uso_para_dict(uso: UsoLLM) -> Dict[str, Any]:
+    """Representação de um registro de uso."""
+    return {
+        "id": uso.id,
+        "tipo": uso.tipo,
+        "request_id": uso.request_id,
+        "licitacao_id": uso.licitacao_id,
+        "fluxo": uso.fluxo,
+        "etapa": uso.etapa,
+        "agente": uso.agente,
+        "modelo": uso.modelo,
+        "tokens_prompt": uso.tokens_prompt,
+        "tokens_resposta": uso.tokens_resposta,
+        "tokens_estimados": uso.tokens_estimados,
+        "duracao_ms": uso.duracao_ms,
+        "tentativas": uso.tentativas,
+        "custo": uso.custo,
+        "sucesso": uso.sucesso,
+        "erro": uso.erro,
+        "data_registro": uso.data_registro.isoformat(),
+    }
+
+
+# Contabilizador do processo (grava com SessionLocal)
+contabilizador_uso = ContabilizadorUso()
@@ -0,0 +1,386 @@
+"""
+Métricas da API no formato de exposição do Prometheus (GET /metrics).
+
+Contadores, medidores e histogramas com rótulos, mantidos em memória por
+processo (cada worker é coletado separadamente pelo Prometheus). No caminho
+das requisições o custo é uma busca em dicionário e uma soma sob trava;
+o texto de exposição só é montado quando /metrics é consultado.
+Medidores com `funcao` (ex.: tamanho da fila de feedback) são calculados na coleta.
+
+Métricas registradas (ver `metricas` no fim do módulo):
+- http_*: requisições por rota, status e duração (MiddlewareMetricas) e em andamento;
+- db_*: consultas SQL por operação e duração (instrumentar_engine);
+- llm_*: chamadas aos LLMs locais e duração (crewai_agents/llm_registry.py);
+- scraping_*: páginas e tempo por site das coletas (services/scrape_runs.py);
+- fila_* e *_em_andamento: profundidade das filas e trabalhos em execução.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Starlette acrescenta "; charset=utf-8" a respostas text/*
+TIPO_CONTEUDO = "text/plain; version=0.0.4"
+
+BUCKETS_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_DB = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+BUCKETS_LLM = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+BUCKETS_SCRAPING = (0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escapar(valor: Any) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if not float(valor).is_integer() else str(int(valor))
+
+
+def _rotulos(nomes: Tuple[str, ...], valores: Tuple[Any, ...], extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class _ValorContador:
+    __slots__ = ("valor", "_trava")
+
+    def __init__(self):
+        self.valor = 0.0
+        self._trava = threading.Lock()
+
+    def inc(self, valor: float = 1.0):
+        with self._trava:
+            self.valor += valor
+
+
+class _ValorMedidor(_ValorContador):
+    __slots__ = ()
+
+    def dec(self, valor: float = 1.0):
+        with self._trava:
+            self.valor -= valor
+
+    def definir(self, valor: float):
+        self.valor = valor
+
+
+class _ValorHistograma:
+    __slots__ = ("limites", "contagens", "soma", "_trava")
+
+    def __init__(self, limites: Tuple[float, ...]):
+        self.limites = limites
+        self.contagens = [0] * (len(limites) + 1)  # Último: acima do maior limite
+        self.soma = 0.0
+        self._trava = threading.Lock()
+
+    def observar(self, valor: float):
+        i = bisect_left(self.limites, valor)
+        with self._trava:
+            self.contagens[i] += 1
+            self.soma += valor
+
+    def medir(self):
+        """Context manager que observa a duração do bloco em segundos."""
+        return _Cronometro(self)
+
+
+class _Cronometro:
+    __slots__ = ("_destino", "_inicio")
+
+    def __init__(self, destino: _ValorHistograma):
+        self._destino = destino
+
+    def __enter__(self):
+        self._inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._destino.observar(time.perf_counter() - self._inicio)
+        return False
+
+
+class _Metrica:
+    """Base das métricas: um valor por combinação de rótulos."""
+
+    tipo = ""
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.nomes_rotulos = tuple(rotulos)
+        self._valores: Dict[Tuple[Any, ...], Any] = {}
+        self._trava = threading.Lock()
+
+    def _novo(self):
+        raise NotImplementedError
+
+    def rotulos(self, *valores: Any):
+        """Valor da combinação de rótulos (criado no primeiro uso)."""
+        valor = self._valores.get(valores)
+        if valor is None:
+            if len(valores) != len(self.nomes_rotulos):
+                raise ValueError(f"{self.nome} espera os rótulos {self.nomes_rotulos}")
+            with self._trava:
+                valor = self._valores.setdefault(valores, self._novo())
+        return valor
+
+    def _amostras(self) -> List[str]:
+        raise NotImplementedError
+
+    def exposicao(self) -> str:
+        linhas = [f"# HELP {self.nome} {_escapar(self.descricao)}", f"# TYPE {self.nome} {self.tipo}"]
+        linhas.extend(self._amostras())
+        return "\n".join(linhas)
+
+
+class Contador(_Metrica):
+    """Valor que só aumenta (requisições, consultas, erros)."""
+
+    tipo = "counter"
+
+    def _novo(self):
+        return _ValorContador()
+
+    def inc(self, valor: float = 1.0):
+        self.rotulos().inc(valor)
+
+    def _amostras(self) -> List[str]:
+        return [
+            f"{self.nome}{_rotulos(self.nomes_rotulos, r)} {_formatar(v.valor)}"
+            for r, v in list(self._valores.items())
+        ]
+
+
+class Medidor(_Metrica):
+    """
+    Valor que sobe e desce. Com `funcao`, é calculado na coleta: a função
+    retorna um número (sem rótulos) ou um dict {tupla de rótulos: valor}.
+    """
+
+    tipo = "gauge"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                 funcao: Optional[Callable[[], Any]] = None):
+        super().__init__(nome, descricao, rotulos)
+        self.funcao = funcao
+
+    def _novo(self):
+        return _ValorMedidor()
+
+    def inc(self, valor: float = 1.0):
+        self.rotulos().inc(valor)
+
+    def dec(self, valor: float = 1.0):
+        self.rotulos().dec(valor)
+
+    def definir(self, valor: float):
+        self.rotulos().definir(valor)
+
+    def _amostras(self) -> List[str]:
+        if self.funcao is None:
+            valores = {r: v.valor for r, v in list(self._valores.items())}
+        else:
+            try:
+                resultado = self.funcao()
+            except Exception:
+                return []  # Falha na coleta não derruba o /metrics
+            valores = resultado if isinstance(resultado, dict) else {(): resultado}
+        return [
+            f"{self.nome}{_rotulos(self.nomes_rotulos, r if isinstance(r, tuple) else (r,))} {_formatar(v)}"
+            for r, v in valores.items()
+        ]
+
+
+class Histograma(_Metrica):
+    """Distribuição de valores (durações) em buckets cumulativos."""
+
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = BUCKETS_HTTP):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets))
+
+    def _novo(self):
+        return _ValorHistograma(self.buckets)
+
+    def observar(self, valor: float):
+        self.rotulos().observar(valor)
+
+    def medir(self):
+        return self.rotulos().medir()
+
+    def _amostras(self) -> List[str]:
+        linhas = []
+        for r, v in list(self._valores.items()):
+            with v._trava:
+                contagens, soma = list(v.contagens), v.soma
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                le = 'le="' + _formatar(limite) + '"'
+                linhas.append(f"{self.nome}_bucket{_rotulos(self.nomes_rotulos, r, le)} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.nomes_rotulos, r)} {_formatar(soma)}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.nomes_rotulos, r)} {acumulado}")
+        return linhas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas expostas em /metrics."""
+
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def _registrar(self, metrica: _Metrica):
+        if metrica.nome in self._metricas:
+            raise ValueError(f"Métrica já registrada: {metrica.nome}")
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def contador(self, nome: str, descricao: str, rotulos: Iterable[str] = ()) -> Contador:
+        return self._registrar(Contador(nome, descricao, rotulos))
+
+    def medidor(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                funcao: Optional[Callable[[], Any]] = None) -> Medidor:
+        return self._registrar(Medidor(nome, descricao, rotulos, funcao))
+
+    def histograma(self, nome: str, descricao: str, rotulos: Iterable[str] = (),
+                   buckets: Tuple[float, ...] = BUCKETS_HTTP) -> Histograma:
+        return self._registrar(Histograma(nome, descricao, rotulos, buckets))
+
+    def obter(self, nome: str) -> _Metrica:
+        return self._metricas[nome]
+
+    def gerar(self) -> str:
+        """Texto no formato de exposição do Prometheus (0.0.4)."""
+        return "\n".join(m.exposicao() for m in self._metricas.values()) + "\n"
+
+
+class MetricasAPI:
+    """Métricas da API e dos serviços que rodam no mesmo processo."""
+
+    def __init__(self, registro: Optional[RegistroMetricas] = None):
+        self.registro = registro or RegistroMetricas()
+        r = self.registro
+        self.http_requisicoes = r.contador(
+            "http_requisicoes_total", "Requisições HTTP concluídas", ("metodo", "rota", "status"))
+        self.http_duracao = r.histograma(
+            "http_requisicao_duracao_segundos", "Duração das requisições HTTP até o fim da resposta",
+            ("metodo", "rota"), BUCKETS_HTTP)
+        self.http_em_andamento = r.medidor(
+            "http_requisicoes_em_andamento", "Requisições HTTP em processamento")
+        self.db_consultas = r.contador(
+            "db_consultas_total", "Consultas SQL executadas", ("operacao",))
+        self.db_duracao = r.histograma(
+            "db_consulta_duracao_segundos", "Duração das consultas SQL", ("operacao",), BUCKETS_DB)
+        self.llm_chamadas = r.contador(
+            "llm_chamadas_total", "Chamadas aos LLMs", ("modelo", "resultado"))
+        self.llm_duracao = r.histograma(
+            "llm_chamada_duracao_segundos", "Duração das chamadas aos LLMs", ("modelo",), BUCKETS_LLM)
+        self.scraping_paginas = r.contador(
+            "scraping_paginas_total", "Páginas carregadas pelas coletas", ("alvo",))
+        self.scraping_site_duracao = r.histograma(
+            "scraping_site_duracao_segundos", "Tempo gasto por site em cada coleta", ("alvo", "site"),
+            BUCKETS_SCRAPING)
+        self.scraping_em_andamento = r.medidor(
+            "scraping_coletas_em_andamento", "Coletas de scraping em execução", ("alvo",))
+        self.editais_em_andamento = r.medidor(
+            "edital_geracoes_em_andamento", "Gerações de edital em execução em segundo plano")
+
+    def medidor_fila(self, nome: str, descricao: str, funcao: Callable[[], Any],
+                     rotulos: Iterable[str] = ()) -> Medidor:
+        """Registra um medidor de fila calculado na coleta."""
+        return self.registro.medidor(nome, descricao, rotulos, funcao)
+
+    def gerar(self) -> str:
+        return self.registro.gerar()
+
+
+_OPERACOES = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+
+def operacao_sql(statement: str) -> str:
+    """Primeira palavra da instrução (SELECT, INSERT...) ou OUTRA."""
+    partes = statement.lstrip().split(None, 1)
+    operacao = partes[0].upper() if partes else ""
+    return operacao if operacao in _OPERACOES else "OUTRA"
+
+
+def instrumentar_engine(engine, metricas_api: Optional[MetricasAPI] = None):
+    """
+    Conta e mede as consultas SQL do engine (eventos before/after_cursor_execute).
+    """
+    from sqlalchemy import event
+
+    alvo = metricas_api or metricas
+
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+    def depois(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get("inicio_consultas")
+        if not inicios:
+            return
+        duracao = time.perf_counter() - inicios.pop()
+        operacao = operacao_sql(statement)
+        alvo.db_consultas.rotulos(operacao).inc()
+        alvo.db_duracao.rotulos(operacao).observar(duracao)
+
+    def erro(contexto_excecao):
+        # Consulta com erro: descarta o início para não desalinhar a pilha
+        conn = contexto_excecao.connection
+        if conn is not None and conn.info.get("inicio_consultas"):
+            conn.info["inicio_consultas"].pop()
+
+    event.listen(engine, "before_cursor_execute", antes)
+    event.listen(engine, "after_cursor_execute", depois)
+    event.listen(engine, "handle_error", erro)
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que mede cada requisição HTTP.
+    A rota é o caminho declarado (ex.: /api/editais/{edital_id}), para não
+    criar uma série por ID; requisições sem rota usam "nao_mapeada".
+    A duração vai até o fim do corpo da resposta (sem as BackgroundTasks).
+    """
+
+    def __init__(self, app, metricas_api: Optional[MetricasAPI] = None):
+        self.app = app
+        self.metricas = metricas_api or metricas
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metricas_api = self.metricas
+        inicio = time.perf_counter()
+        estado = {"status": 500, "fim": None}
+
+        async def enviar(mensagem):
+            if mensagem["type"] == "http.response.start":
+                estado["status"] = mensagem["status"]
+            elif mensagem["type"] == "http.response.body" and not mensagem.get("more_body", False):
+                estado["fim"] = time.perf_counter()
+            await send(mensagem)
+
+        metricas_api.http_em_andamento.inc()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            metricas_api.http_em_andamento.dec()
+            fim = estado["fim"] or time.perf_counter()
+            rota = getattr(scope.get("route"), "path", None) or "nao_mapeada"
+            metodo = scope["method"]
+            metricas_api.http_requisicoes.rotulos(metodo, rota, str(estado["status"])).inc()
+            metricas_api.http_duracao.rotulos(metodo, rota).observar(fim - inicio)
+
+
+# Métricas do processo, expostas em GET /metrics
+metricas = MetricasAPI()
@@ -0,0 +1,450 @@
+"""
+Rastreamento distribuído (spans no modelo do OpenTelemetry) da API às crews,
+ferramentas, consultas SQL, coletas e chamadas de LLM.
+
+O span corrente fica em um ContextVar: spans abertos dentro dele (no mesmo
+contexto, em asyncio.to_thread ou em BackgroundTasks da requisição) viram filhos.
+O contexto chega e sai pelo cabeçalho W3C `traceparent`
+(MiddlewareRastreamento, ClienteInferencia).
+
+Exportação (TRACING_EXPORTADOR):
+- otlp: OTLP/HTTP JSON para OTEL_EXPORTER_OTLP_ENDPOINT (ex.: http://jaeger:4318);
+- arquivo: uma linha JSON por span em TRACING_ARQUIVO (coletor local sem backend);
+- console: uma linha JSON por span no log;
+- nenhum: spans criados e propagados, mas não exportados.
+Sem TRACING_EXPORTADOR, usa otlp se OTEL_EXPORTER_OTLP_ENDPOINT estiver
+definida e nenhum caso contrário. A exportação roda em uma thread, em lotes;
+com a fila cheia os spans são descartados em vez de atrasar as requisições.
+"""
+
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NOME_SERVICO = os.getenv("OTEL_SERVICE_NAME", "licitacao-api")
+ENDPOINT_OTLP = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+EXPORTADOR = os.getenv("TRACING_EXPORTADOR", "otlp" if ENDPOINT_OTLP else "nenhum")
+ARQUIVO = os.getenv("TRACING_ARQUIVO", "logs/traces.jsonl")
+# Fração dos traces iniciados aqui que são exportados (filhos seguem o pai)
+AMOSTRAGEM = float(os.getenv("TRACING_AMOSTRAGEM", "1.0"))
+TAMANHO_LOTE = 256
+FILA_MAX = 10000
+INTERVALO_EXPORTACAO_S = 2.0
+LIMITE_SQL = 500
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Tipos de span do OTLP
+INTERNO, SERVIDOR, CLIENTE = 1, 2, 3
+
+
+class Span:
+    """Uma operação medida, com atributos e status."""
+
+    __slots__ = ("nome", "trace_id", "span_id", "pai_id", "tipo", "amostrado",
+                 "inicio_ns", "fim_ns", "atributos", "erro")
+
+    def __init__(self, nome: str, trace_id: str, pai_id: Optional[str], amostrado: bool,
+                 tipo: int = INTERNO, atributos: Optional[Dict[str, Any]] = None):
+        self.nome = nome
+        self.trace_id = trace_id
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.pai_id = pai_id
+        self.tipo = tipo
+        self.amostrado = amostrado
+        self.inicio_ns = time.time_ns()
+        self.fim_ns: Optional[int] = None
+        self.atributos: Dict[str, Any] = dict(atributos or {})
+        self.erro: Optional[str] = None
+
+    def definir(self, chave: str, valor: Any):
+        """Inclui ou substitui um atributo."""
+        self.atributos[chave] = valor
+
+    def registrar_erro(self, erro: BaseException):
+        self.erro = f"{type(erro).__name__}: {erro}"
+
+    def finalizar(self):
+        if self.fim_ns is None:
+            self.fim_ns = time.time_ns()
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.amostrado else '00'}"
+
+    def para_dict(self) -> Dict[str, Any]:
+        """Representação usada pelos exportadores de arquivo e console."""
+        return {
+            "servico": NOME_SERVICO,
+            "nome": self.nome,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "pai_id": self.pai_id,
+            "inicio_ns": self.inicio_ns,
+            "duracao_ms": round(((self.fim_ns or time.time_ns()) - self.inicio_ns) / 1e6, 3),
+            "atributos": self.atributos,
+            "erro": self.erro,
+        }
+
+
+def ler_traceparent(cabecalho: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    (trace_id, span_id do pai, amostrado) de um cabeçalho traceparent,
+    ou None se ausente/inválido.
+    """
+    if not cabecalho:
+        return None
+    encontrado = _TRACEPARENT.match(cabecalho.strip().lower())
+    if not encontrado or encontrado.group(1) == "0" * 32 or encontrado.group(2) == "0" * 16:
+        return None
+    return encontrado.group(1), encontrado.group(2), bool(int(encontrado.group(3), 16) & 1)
+
+
+# === Exportadores ===
+
+class ExportadorConsole:
+    """Uma linha JSON por span no log."""
+
+    def exportar(self, spans: List[Span]):
+        for span in spans:
+            logger.info(json.dumps(span.para_dict(), ensure_ascii=False, default=str))
+
+
+class ExportadorArquivo:
+    """Uma linha JSON por span em um arquivo (para inspeção local ou ingestão posterior)."""
+
+    def __init__(self, caminho: str = ARQUIVO):
+        self.caminho = caminho
+
+    def exportar(self, spans: List[Span]):
+        diretorio = os.path.dirname(self.caminho)
+        if diretorio:
+            os.makedirs(diretorio, exist_ok=True)
+        with open(self.caminho, "a", encoding="utf-8") as arquivo:
+            for span in spans:
+                arquivo.write(json.dumps(span.para_dict(), ensure_ascii=False, default=str) + "\n")
+
+
+def _valor_otlp(valor: Any) -> Dict[str, Any]:
+    if isinstance(valor, bool):
+        return {"boolValue": valor}
+    if isinstance(valor, int):
+        return {"intValue": str(valor)}
+    if isinstance(valor, float):
+        return {"doubleValue": valor}
+    return {"stringValue": str(valor)}
+
+
+def _atributos_otlp(atributos: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": k, "value": _valor_otlp(v)} for k, v in atributos.items() if v is not None]
+
+
+def corpo_otlp(spans: List[Span]) -> Dict[str, Any]:
+    """Requisição ExportTraceServiceRequest em JSON (OTLP/HTTP)."""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": _atributos_otlp({"service.name": NOME_SERVICO})},
+            "scopeSpans": [{
+                "scope": {"name": "licitacao-ai"},
+                "spans": [
+                    {
+                        "traceId": s.trace_id,
+                        "spanId": s.span_id,
+                        **({"parentSpanId": s.pai_id} if s.pai_id else {}),
+                        "name": s.nome,
+                        "kind": s.tipo,
+                        "startTimeUnixNano": str(s.inicio_ns),
+                        "endTimeUnixNano": str(s.fim_ns or s.inicio_ns),
+                        "attributes": _atributos_otlp(s.atributos),
+                        "status": {"code": 2, "message": s.erro} if s.erro else {"code": 1},
+                    }
+                    for s in spans
+                ],
+            }],
+        }]
+    }
+
+
+class ExportadorOTLP:
+    """Envia os spans por OTLP/HTTP JSON (Jaeger com COLLECTOR_OTLP_ENABLED, OpenTelemetry Collector)."""
+
+    def __init__(self, endpoint: str = ENDPOINT_OTLP, timeout: float = 5.0):
+        import httpx
+
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.cliente = httpx.Client(timeout=timeout)
+
+    def exportar(self, spans: List[Span]):
+        resposta = self.cliente.post(self.url, json=corpo_otlp(spans))
+        resposta.raise_for_status()
+
+
+def criar_exportador(nome: str = EXPORTADOR):
+    """Exportador configurado (None para 'nenhum')."""
+    if nome == "otlp" and ENDPOINT_OTLP:
+        return ExportadorOTLP()
+    if nome == "arquivo":
+        return ExportadorArquivo()
+    if nome == "console":
+        return ExportadorConsole()
+    return None
+
+
+class Rastreador:
+    """
+    Cria os spans e os entrega ao exportador em lotes, em uma thread própria.
+    """
+
+    def __init__(self, exportador=None, amostragem: float = AMOSTRAGEM, fila_max: int = FILA_MAX,
+                 intervalo: float = INTERVALO_EXPORTACAO_S):
+        self.exportador = exportador
+        self.amostragem = amostragem
+        self.intervalo = intervalo
+        self.descartados = 0
+        self._fila: "queue.Queue[Span]" = queue.Queue(maxsize=fila_max)
+        self._span_atual: ContextVar[Optional[Span]] = ContextVar(f"span_atual_{id(self)}", default=None)
+        self._thread: Optional[threading.Thread] = None
+        self._trava = threading.Lock()
+        self._parar = threading.Event()
+
+    def span_atual(self) -> Optional[Span]:
+        return self._span_atual.get()
+
+    def iniciar_span(self, nome: str, tipo: int = INTERNO, atributos: Optional[Dict[str, Any]] = None,
+                     traceparent: Optional[str] = None) -> Span:
+        """
+        Cria um span filho do span corrente, do traceparent recebido ou um novo trace.
+        O span não vira o corrente: use `span()` para isso.
+        """
+        remoto = ler_traceparent(traceparent) if traceparent else None
+        pai = self._span_atual.get()
+        if remoto is not None:
+            trace_id, pai_id, amostrado = remoto
+        elif pai is not None:
+            trace_id, pai_id, amostrado = pai.trace_id, pai.span_id, pai.amostrado
+        else:
+            trace_id, pai_id = f"{random.getrandbits(128):032x}", None
+            amostrado = self.amostragem >= 1 or random.random() < self.amostragem
+        return Span(nome, trace_id, pai_id, amostrado, tipo, atributos)
+
+    def encerrar_span(self, span: Span):
+        """Finaliza o span e o coloca na fila de exportação."""
+        span.finalizar()
+        if self.exportador is None or not span.amostrado:
+            return
+        try:
+            self._fila.put_nowait(span)
+        except queue.Full:
+            self.descartados += 1
+            return
+        if self._thread is None:
+            self._iniciar_thread()
+
+    @contextmanager
+    def span(self, nome: str, tipo: int = INTERNO, traceparent: Optional[str] = None, **atributos):
+        """
+        Abre um span como corrente durante o bloco. Exceções marcam o span com erro.
+        """
+        novo = self.iniciar_span(nome, tipo, atributos, traceparent)
+        token = self._span_atual.set(novo)
+        try:
+            yield novo
+        except BaseException as e:
+            novo.registrar_erro(e)
+            raise
+        finally:
+            self._span_atual.reset(token)
+            self.encerrar_span(novo)
+
+    def rastrear(self, nome: Optional[str] = None, **atributos):
+        """Decorador que executa a função (síncrona ou async) dentro de um span."""
+        def decorar(funcao: Callable):
+            nome_span = nome or f"{funcao.__module__}.{funcao.__qualname__}"
+            if inspect.iscoroutinefunction(funcao):
+                @functools.wraps(funcao)
+                async def envolver_async(*args, **kwargs):
+                    with self.span(nome_span, **atributos):
+                        return await funcao(*args, **kwargs)
+                return envolver_async
+
+            @functools.wraps(funcao)
+            def envolver(*args, **kwargs):
+                with self.span(nome_span, **atributos):
+                    return funcao(*args, **kwargs)
+            return envolver
+        return decorar
+
+    def ferramenta(self, classe: type) -> type:
+        """
+        Decorador de classe de ferramenta: cada execução de `_run` vira um span
+        "tool.<nome>" no trace corrente.
+        """
+        original = classe.__dict__["_run"]
+        nome_classe = classe.__name__
+
+        @functools.wraps(original)
+        def _run(instancia, *args, **kwargs):
+            nome = getattr(instancia, "name", None) or nome_classe
+            with self.span(f"tool.{nome}", **{"tool.classe": nome_classe}):
+                return original(instancia, *args, **kwargs)
+
+        classe._run = _run
+        return classe
+
+    def traceparent_atual(self) -> Optional[str]:
+        """Cabeçalho traceparent para propagar o span corrente a outro serviço."""
+        atual = self._span_atual.get()
+        return atual.traceparent if atual is not None else None
+
+    # === Exportação ===
+
+    def _iniciar_thread(self):
+        with self._trava:
+            if self._thread is None and not self._parar.is_set():
+                self._thread = threading.Thread(target=self._exportar_continuamente, name="exportador-spans",
+                                                daemon=True)
+                self._thread.start()
+
+    def _exportar_continuamente(self):
+        while not self._parar.wait(self.intervalo):
+            self.exportar_pendentes()
+
+    def parar(self, timeout: float = 5.0) -> int:
+        """
+        Interrompe a thread de exportação e exporta os spans ainda na fila
+        (chamada no shutdown da aplicação).
+
+        Returns:
+            int: Quantidade de spans exportados na descarga final
+        """
+        self._parar.set()
+        with self._trava:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout=timeout)
+        if self.exportador is None:
+            return 0
+        return self.exportar_pendentes()
+
+    def exportar_pendentes(self) -> int:
+        """
+        Exporta os spans da fila em lotes. Falhas do exportador são registradas no log.
+
+        Returns:
+            int: Quantidade de spans exportados
+        """
+        exportados = 0
+        while True:
+            lote: List[Span] = []
+            try:
+                while len(lote) < TAMANHO_LOTE:
+                    lote.append(self._fila.get_nowait())
+            except queue.Empty:
+                pass
+            if not lote:
+                return exportados
+            try:
+                self.exportador.exportar(lote)
+                exportados += len(lote)
+            except Exception as e:
+                logger.warning(f"Erro ao exportar {len(lote)} spans: {str(e)}")
+
+
+# === Integrações ===
+
+def rastrear_consultas(engine, rastreador_alvo: Optional[Rastreador] = None):
+    """
+    Span por consulta SQL, apenas dentro de um span existente (requisição, crew, coleta),
+    para que consultas avulsas do startup não virem traces próprios.
+    """
+    from sqlalchemy import event
+
+    alvo = rastreador_alvo or rastreador
+
+    def antes(conn, cursor, statement, parameters, context, executemany):
+        pilha = conn.info.setdefault("spans_consultas", [])
+        if alvo.span_atual() is None:
+            pilha.append(None)
+            return
+        operacao = (statement.lstrip().split(None, 1) or [""])[0].upper()
+        pilha.append(alvo.iniciar_span(f"db.{operacao or 'SQL'}", CLIENTE, {
+            "db.system": engine.dialect.name,
+            "db.operation": operacao,
+            "db.statement": statement[:LIMITE_SQL],
+        }))
+
+    def depois(conn, cursor, statement, parameters, context, executemany):
+        pilha = conn.info.get("spans_consultas")
+        span_consulta = pilha.pop() if pilha else None
+        if span_consulta is not None:
+            alvo.encerrar_span(span_consulta)
+
+    def erro(contexto_excecao):
+        conn = contexto_excecao.connection
+        pilha = conn.info.get("spans_consultas") if conn is not None else None
+        span_consulta = pilha.pop() if pilha else None
+        if span_consulta is not None:
+            span_consulta.registrar_erro(contexto_excecao.original_exception)
+            alvo.encerrar_span(span_consulta)
+
+    event.listen(engine, "before_cursor_execute", antes)
+    event.listen(engine, "after_cursor_execute", depois)
+    event.listen(engine, "handle_error", erro)
+
+
+class MiddlewareRastreamento:
+    """
+    Middleware ASGI que abre o span raiz de cada requisição HTTP, continuando o
+    trace do cabeçalho traceparent recebido, e devolve o trace em X-Trace-Id.
+    BackgroundTasks da requisição rodam dentro do mesmo span.
+    """
+
+    def __init__(self, app, rastreador_alvo: Optional[Rastreador] = None):
+        self.app = app
+        self.rastreador = rastreador_alvo or rastreador
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        cabecalhos = dict(scope.get("headers") or [])
+        traceparent = cabecalhos.get(b"traceparent", b"").decode("latin-1") or None
+        metodo = scope["method"]
+        with self.rastreador.span(f"HTTP {metodo}", SERVIDOR, traceparent, **{
+            "http.method": metodo, "http.target": scope.get("path"),
+        }) as span_requisicao:
+            async def enviar(mensagem):
+                if mensagem["type"] == "http.response.start":
+                    span_requisicao.definir("http.status_code", mensagem["status"])
+                    mensagem.setdefault("headers", [])
+                    mensagem["headers"] = list(mensagem["headers"]) + [
+                        (b"x-trace-id", span_requisicao.trace_id.encode("latin-1"))
+                    ]
+                await send(mensagem)
+
+            try:
+                await self.app(scope, receive, enviar)
+            finally:
+                rota = getattr(scope.get("route"), "path", None)
+                if rota:
+                    span_requisicao.nome = f"HTTP {metodo} {rota}"
+                    span_requisicao.definir("http.route", rota)
+                if span_requisicao.atributos.get("http.status_code", 200) >= 500 and span_requisicao.erro is None:
+                    span_requisicao.erro = f"HTTP {span_requisicao.atributos['http.status_code']}"
+
+
+# Rastreador do processo
+rastreador = Rastreador(criar_exportador())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Verifica o tempo de importação da API (usado no startup de cada worker uvicorn/gunicorn).
+
+Importa o módulo em um processo novo com `python -X importtime`, mostra os
+módulos mais lentos e falha quando:
+- o tempo acumulado de importação passa do limite;
+- alguma dependência pesada (crewai, playwright, openai, llama_index, textblob...)
+  é carregada no startup em vez de no primeiro uso.
+
+Uso:
+    python scripts/check_import_time.py [--modulo api.app] [--limite-ms 1500] [--repeticoes 3]
+
+Saída: 0 dentro do orçamento, 1 fora do orçamento, 2 se o módulo não puder ser importado.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+DIRETORIO_BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependências que só devem ser importadas quando usadas
+PROIBIDOS_NO_STARTUP = (
+    "crewai", "crewai_tools", "playwright", "openai", "llama_index", "llama_cpp",
+    "textblob", "langchain", "pypdf", "docx",
+)
+
+LIMITE_PADRAO_MS = float(os.getenv("IMPORT_TIME_LIMITE_MS", "1500"))
+
+# __import__ passa pelo mecanismo de importação medido pelo -X importtime
+# (importlib.import_module não aparece como uma linha própria)
+_CODIGO = (
+    "import json, sys\n"
+    "__import__(sys.argv[1])\n"
+    "print(json.dumps(sorted(sys.modules)))\n"
+)
+
+
+def _ler_importtime(saida: str) -> List[Dict[str, Any]]:
+    """Linhas 'import time: self [us] | cumulative | modulo' do -X importtime."""
+    registros = []
+    for linha in saida.splitlines():
+        if not linha.startswith("import time:"):
+            continue
+        partes = linha[len("import time:"):].split("|")
+        if len(partes) != 3 or not partes[0].strip().isdigit():
+            continue  # Cabeçalho
+        nome = partes[2].rstrip()
+        registros.append({
+            "modulo": nome.strip(),
+            "nivel": (len(nome) - len(nome.lstrip())) // 2,
+            "proprio_us": int(partes[0]),
+            "acumulado_us": int(partes[1]),
+        })
+    return registros
+
+
+def medir_importacao(modulo: str = "api.app") -> Dict[str, Any]:
+    """
+    Importa o módulo em um interpretador novo e mede o tempo.
+
+    Returns:
+        dict: tempo acumulado do módulo (ms), registros do importtime e módulos carregados
+    """
+    processo = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CODIGO, modulo],
+        cwd=DIRETORIO_BACKEND, capture_output=True, text=True
+    )
+    if processo.returncode != 0:
+        raise RuntimeError(f"Falha ao importar {modulo}:\n{processo.stderr[-2000:]}")
+
+    registros = _ler_importtime(processo.stderr)
+    principal = next((r for r in registros if r["modulo"] == modulo), None)
+    if principal is None:
+        raise RuntimeError(f"{modulo} não aparece na saída do -X importtime (já importado por sitecustomize?)")
+    return {
+        "modulo_ms": principal["acumulado_us"] / 1000,
+        "registros": registros,
+        "modulos": json.loads(processo.stdout.strip().splitlines()[-1]),
+    }
+
+
+def proibidos_carregados(modulos: List[str], proibidos=PROIBIDOS_NO_STARTUP) -> List[str]:
+    """Pacotes pesados presentes em sys.modules após a importação."""
+    return sorted({m.split(".")[0] for m in modulos if m.split(".")[0] in proibidos})
+
+
+def main():
+    """Função principal da verificação"""
+    parser = argparse.ArgumentParser(description="Verifica o tempo de importação da API")
+    parser.add_argument("--modulo", default="api.app", help="Módulo importado no startup")
+    parser.add_argument("--limite-ms", type=float, default=LIMITE_PADRAO_MS, help="Orçamento de importação em ms")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Medições (vale a menor, para reduzir ruído)")
+    parser.add_argument("--top", type=int, default=15, help="Quantidade de módulos mais lentos exibidos")
+    args = parser.parse_args()
+
+    try:
+        medicoes = [medir_importacao(args.modulo) for _ in range(max(args.repeticoes, 1))]
+    except RuntimeError as e:
+        print(f"❌ {str(e)}")
+        return 2
+    melhor = min(medicoes, key=lambda m: m["modulo_ms"])
+
+    print(f"⏱️ Importação de {args.modulo}: {melhor['modulo_ms']:.0f} ms "
+          f"(limite {args.limite_ms:.0f} ms, menor de {len(medicoes)} medições)")
+    print("\n🐢 Módulos mais lentos (tempo próprio):")
+    for r in sorted(melhor["registros"], key=lambda r: r["proprio_us"], reverse=True)[:args.top]:
+        print(f"  {r['proprio_us'] / 1000:8.1f} ms  {r['modulo']}")
+
+    falhou = False
+    carregados = proibidos_carregados(melhor["modulos"])
+    if carregados:
+        falhou = True
+        print(f"\n❌ Dependências pesadas importadas no startup: {', '.join(carregados)}")
+    if melhor["modulo_ms"] > args.limite_ms:
+        falhou = True
+        print(f"\n❌ Importação acima do limite: {melhor['modulo_ms']:.0f} ms > {args.limite_ms:.0f} ms")
+    if not falhou:
+        print("\n✅ Importação dentro do orçamento")
+    return 1 if falhou else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
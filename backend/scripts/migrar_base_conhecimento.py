@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Migração única dos arquivos data/knowledge_base_*.json para a tabela base_conhecimento.
+
+Uso:
+    python scripts/migrar_base_conhecimento.py [--diretorio data/] [--arquivar]
+
+Com --arquivar, os arquivos migrados são movidos para <diretorio>/knowledge_base_migrados/,
+deixando de ser lidos em novas execuções. Sem a opção, a migração pode ser
+repetida sem duplicar licitações.
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+# Adicionar o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.database import SessionLocal, create_db_tables
+from services.knowledge_base_insights import reconstruir_insights
+from services.knowledge_base_store import contar_licitacoes, migrar_arquivos_json
+
+def main():
+    """Função principal da migração"""
+    parser = argparse.ArgumentParser(description="Migra a base de conhecimento em JSON para o banco de dados")
+    parser.add_argument("--diretorio", default="data/", help="Diretório dos arquivos knowledge_base_*.json")
+    parser.add_argument("--arquivar", action="store_true", help="Move os arquivos migrados para knowledge_base_migrados/")
+    args = parser.parse_args()
+
+    create_db_tables()
+    db = SessionLocal()
+    try:
+        resultado = migrar_arquivos_json(db, args.diretorio)
+        total = contar_licitacoes(db)
+        # Garante snapshots de estatísticas também para licitações gravadas antes deles
+        grupos = reconstruir_insights(db)
+    finally:
+        db.close()
+
+    print(f"📂 Arquivos migrados: {len(resultado['arquivos'])}")
+    print(f"💾 Registros gravados: {resultado['registros']} (total na base: {total})")
+    print(f"📊 Snapshots de estatísticas: {grupos} grupos (categoria, tipo de licitação)")
+    for caminho, erro in resultado["erros"].items():
+        print(f"❌ {caminho}: {erro}")
+
+    if args.arquivar and resultado["arquivos"]:
+        destino = os.path.join(args.diretorio, "knowledge_base_migrados")
+        os.makedirs(destino, exist_ok=True)
+        for caminho in resultado["arquivos"]:
+            shutil.move(caminho, os.path.join(destino, os.path.basename(caminho)))
+        print(f"📦 Arquivos movidos para {destino}")
+
+    return 1 if resultado["erros"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
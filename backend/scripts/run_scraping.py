@@ -43,11 +43,11 @@ async def main():
         
         if licitacoes:
             # Salvar na base de conhecimento
-            filepath = await scraper.save_to_knowledge_base(licitacoes)
+            total = await scraper.save_to_knowledge_base(licitacoes)
             
             print(f"✅ Scraping concluído com sucesso!")
             print(f"📊 Total de licitações coletadas: {len(licitacoes)}")
-            print(f"💾 Dados salvos em: {filepath}")
+            print(f"💾 Licitações gravadas na base de conhecimento: {total}")
             
             # Estatísticas por categoria
             categorias_count = {}
@@ -0,0 +1,132 @@
+"""
+Expressões cron (5 campos) para os agendamentos armazenados no banco.
+
+Formato: minuto hora dia-do-mês mês dia-da-semana, com *, listas (1,15),
+intervalos (1-5), passos (*/15, 8-18/2) e nomes em inglês (jan, mon).
+Domingo é 0 ou 7. Como no cron tradicional, se dia-do-mês e dia-da-semana
+forem ambos restritos, basta um deles casar. Também aceita os atalhos
+@hourly, @daily, @weekly, @monthly e @yearly.
+"""
+
+from datetime import datetime, timedelta
+from typing import FrozenSet, List, Tuple
+
+ATALHOS = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *",
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+}
+
+# (mínimo, máximo) de cada campo
+LIMITES: List[Tuple[int, int]] = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+NOMES_MESES = {nome: i for i, nome in enumerate(
+    ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"), start=1
+)}
+NOMES_DIAS = {nome: i for i, nome in enumerate(("sun", "mon", "tue", "wed", "thu", "fri", "sat"))}
+
+# Limite de busca da próxima execução (evita laço infinito em "0 0 30 2 *")
+ANOS_BUSCA = 5
+
+
+def _valor(texto: str, nomes: dict) -> int:
+    texto = texto.lower()
+    if texto in nomes:
+        return nomes[texto]
+    if not texto.isdigit():
+        raise ValueError(f"Valor inválido na expressão cron: {texto!r}")
+    return int(texto)
+
+
+def _campo(texto: str, minimo: int, maximo: int, nomes: dict) -> FrozenSet[int]:
+    """Valores permitidos de um campo da expressão."""
+    valores = set()
+    for parte in texto.split(","):
+        faixa, _, passo = parte.partition("/")
+        passo = int(passo) if passo else 1
+        if passo < 1:
+            raise ValueError(f"Passo inválido na expressão cron: {parte!r}")
+
+        if faixa == "*":
+            inicio, fim = minimo, maximo
+        elif "-" in faixa:
+            inicio, fim = (_valor(v, nomes) for v in faixa.split("-", 1))
+        else:
+            inicio = _valor(faixa, nomes)
+            # "5/15" significa de 5 até o máximo, de 15 em 15
+            fim = maximo if "/" in parte else inicio
+
+        if not minimo <= inicio <= fim <= maximo:
+            raise ValueError(f"Fora do intervalo {minimo}-{maximo} na expressão cron: {parte!r}")
+        valores.update(range(inicio, fim + 1, passo))
+    return frozenset(valores)
+
+
+class ExpressaoCron:
+    """
+    Expressão cron interpretada.
+
+    Exemplo:
+        ExpressaoCron("30 6 * * mon-fri").proxima(datetime(2024, 1, 6))  # segunda, 8/1 às 06:30
+    """
+
+    def __init__(self, expressao: str):
+        self.expressao = expressao.strip()
+        campos = ATALHOS.get(self.expressao.lower(), self.expressao).split()
+        if len(campos) != 5:
+            raise ValueError(f"Expressão cron deve ter 5 campos: {expressao!r}")
+
+        nomes = [{}, {}, {}, NOMES_MESES, NOMES_DIAS]
+        minutos, horas, dias, meses, dias_semana = (
+            _campo(texto, minimo, maximo, nomes[i])
+            for i, (texto, (minimo, maximo)) in enumerate(zip(campos, LIMITES))
+        )
+        self.minutos = sorted(minutos)
+        self.horas = frozenset(horas)
+        self.dias = dias
+        self.meses = meses
+        self.dias_semana = frozenset(d % 7 for d in dias_semana)
+        self._dia_restrito = campos[2] != "*"
+        self._semana_restrita = campos[4] != "*"
+
+    def _dia_valido(self, momento: datetime) -> bool:
+        dia_semana = (momento.weekday() + 1) % 7  # cron: domingo = 0
+        no_mes = momento.day in self.dias
+        na_semana = dia_semana in self.dias_semana
+        if self._dia_restrito and self._semana_restrita:
+            return no_mes or na_semana
+        return no_mes and na_semana
+
+    def proxima(self, apos: datetime) -> datetime:
+        """
+        Próximo instante (estritamente posterior a `apos`) que satisfaz a expressão.
+        A busca salta meses, dias e horas inteiros que não casam.
+        """
+        momento = apos.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limite = apos.year + ANOS_BUSCA
+
+        while momento.year <= limite:
+            if momento.month not in self.meses:
+                ano, mes = (momento.year + 1, 1) if momento.month == 12 else (momento.year, momento.month + 1)
+                momento = datetime(ano, mes, 1)
+                continue
+            if not self._dia_valido(momento):
+                momento = datetime(momento.year, momento.month, momento.day) + timedelta(days=1)
+                continue
+            if momento.hour not in self.horas:
+                momento = momento.replace(minute=0) + timedelta(hours=1)
+                continue
+
+            minuto = next((m for m in self.minutos if m >= momento.minute), None)
+            if minuto is None:
+                momento = momento.replace(minute=0) + timedelta(hours=1)
+                continue
+            return momento.replace(minute=minuto)
+
+        raise ValueError(f"Expressão cron sem ocorrência nos próximos {ANOS_BUSCA} anos: {self.expressao!r}")
+
+    def __repr__(self) -> str:
+        return f"ExpressaoCron({self.expressao!r})"
@@ -1,22 +1,45 @@
 """
 Serviços de automação para coleta de feedback.
 Envia notificações automáticas e agenda coletas de feedback.
+
+As solicitações e lembretes ficam na tabela feedback_agendamento, criados
+quando o edital muda de status (geração, publicação, resultado). O laço de
+automação lê apenas os itens vencidos, em lotes, pelo índice (status, due_at):
+o custo de cada rodada depende do trabalho vencido, não do total de editais.
 """
 
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional
 import json
 import logging
 
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from api.database import SessionLocal, EditalRequest
+from api.database_feedback import AgendamentoFeedback
+from api.feedback_rollups import MODELOS_FEEDBACK
+
 logger = logging.getLogger(__name__)
 
+# Itens vencidos lidos por lote
+TAMANHO_LOTE = 500
+# Reservas mais antigas que isso (processo encerrado no meio do lote) voltam para a fila
+TEMPO_RESERVA = timedelta(minutes=5)
+
 class FeedbackAutomationService:
     """
     Serviço para automação da coleta de feedback.
     """
-    
-    def __init__(self):
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        notificador: Optional[Callable[[Dict[str, Any]], None]] = None
+    ):
         self.config = {
             'feedback_setor_ativo': True,
             'feedback_empresa_ativo': True,
@@ -27,65 +50,264 @@ class FeedbackAutomationService:
             'enviar_lembretes': True,
             'intervalo_lembretes': 7,
             'maximo_lembretes': 3,
-            'emails_notificacao': []
+            'emails_notificacao': [],
+            'intervalo_verificacao_s': 60
         }
-    
+        self.session_factory = session_factory or SessionLocal
+        # Envio efetivo (email, fila de mensagens...); padrão: apenas registra no log
+        self.notificador = notificador or self._notificar_log
+        self._tarefa: Optional[asyncio.Task] = None
+
+    # === Agendamento ===
+
+    def agendar_por_status(self, db: Session, edital, status: str, data_evento: Optional[datetime] = None) -> int:
+        """
+        Agenda as solicitações de feedback decorrentes de uma mudança de status.
+        Deve ser chamada antes do commit que grava o novo status.
+
+        Args:
+            db: Sessão do banco de dados
+            edital: Instância de EditalGerado
+            status: Novo status (rascunho, publicado, cancelado) ou "resultado"
+            data_evento: Momento da mudança (padrão: agora)
+
+        Returns:
+            int: Quantidade de agendamentos criados ou cancelados
+        """
+        agora = data_evento or datetime.now()
+
+        if status == "cancelado":
+            return db.query(AgendamentoFeedback).filter(
+                AgendamentoFeedback.edital_id == edital.id,
+                AgendamentoFeedback.status == "pendente"
+            ).update({AgendamentoFeedback.status: "cancelado"}, synchronize_session=False)
+
+        agendamentos = []
+        # Setor requisitante: contado a partir da geração, qualquer que seja o status
+        if self.config['feedback_setor_ativo']:
+            gerado_em = edital.data_criacao or agora
+            agendamentos.append(("setor", gerado_em + timedelta(days=self.config['dias_apos_geracao_setor'])))
+        if status == "publicado" and self.config['feedback_empresa_ativo']:
+            agendamentos.append(("empresa", agora + timedelta(days=self.config['dias_apos_publicacao_empresa'])))
+        if status == "resultado" and self.config['feedback_licitacao_ativo']:
+            agendamentos.append(("licitacao", agora + timedelta(days=self.config['dias_apos_resultado_licitacao'])))
+
+        for tipo, due_at in agendamentos:
+            self._inserir_agendamento(db, {
+                "edital_id": edital.id,
+                "tipo_stakeholder": tipo,
+                "numero_lembrete": 0,
+                "due_at": due_at,
+                "destinatarios": self._destinatarios(db, edital, tipo),
+                "status": "pendente",
+                "data_criacao": agora
+            })
+        return len(agendamentos)
+
+    def _inserir_agendamento(self, db: Session, valores: Dict[str, Any]):
+        """Insere um agendamento ignorando o que já existe para o mesmo envio"""
+        dialeto = db.get_bind().dialect.name
+        if dialeto in ("sqlite", "postgresql"):
+            insert = sqlite_insert if dialeto == "sqlite" else pg_insert
+            db.execute(insert(AgendamentoFeedback.__table__).values(**valores).on_conflict_do_nothing())
+            return
+
+        existente = db.query(AgendamentoFeedback.id).filter(
+            AgendamentoFeedback.edital_id == valores["edital_id"],
+            AgendamentoFeedback.tipo_stakeholder == valores["tipo_stakeholder"],
+            AgendamentoFeedback.numero_lembrete == valores["numero_lembrete"]
+        ).first()
+        if existente is None:
+            db.add(AgendamentoFeedback(**valores))
+
+    def _destinatarios(self, db: Session, edital, tipo: str) -> List[str]:
+        """Emails que recebem a solicitação: o setor requisitante ou a lista configurada"""
+        destinatarios = list(self.config['emails_notificacao'])
+        if tipo == "setor":
+            setor = db.query(EditalRequest.setor_requisitante).filter(EditalRequest.id == edital.request_id).scalar()
+            if isinstance(setor, str):
+                setor = json.loads(setor)
+            if setor and setor.get("email"):
+                destinatarios.insert(0, setor["email"])
+        return destinatarios
+
+    # === Processamento dos itens vencidos ===
+
     async def processar_feedback_automatico(self):
         """
         Processa coleta automática de feedback baseada em eventos.
         """
         logger.info("Iniciando processamento automático de feedback")
-        
+
         try:
-            # Verificar editais que precisam de feedback do setor
-            await self._processar_feedback_setor()
-            
-            # Verificar editais que precisam de feedback das empresas
-            await self._processar_feedback_empresa()
-            
-            # Verificar editais que precisam de feedback do setor de licitação
-            await self._processar_feedback_licitacao()
-            
-            # Enviar lembretes para feedbacks pendentes
-            await self._enviar_lembretes()
-            
-            logger.info("Processamento automático de feedback concluído")
-            
+            resultado = await asyncio.to_thread(self.processar_vencidos)
+            logger.info(f"Processamento automático de feedback concluído: {resultado}")
+            return resultado
+
         except Exception as e:
             logger.error(f"Erro no processamento automático: {str(e)}")
-    
-    async def _processar_feedback_setor(self):
-        """Processa solicitações de feedback para setores requisitantes"""
-        if not self.config['feedback_setor_ativo']:
-            return
-        
-        print("📧 Processando solicitações de feedback para setores requisitantes...")
-        # Simulação de processamento
-        await asyncio.sleep(0.1)
-    
-    async def _processar_feedback_empresa(self):
-        """Processa solicitações de feedback para empresas licitantes"""
-        if not self.config['feedback_empresa_ativo']:
-            return
-        
-        print("📧 Processando solicitações de feedback para empresas licitantes...")
-        # Simulação de processamento
-        await asyncio.sleep(0.1)
-    
-    async def _processar_feedback_licitacao(self):
-        """Processa solicitações de feedback para setor de licitação"""
-        if not self.config['feedback_licitacao_ativo']:
+
+    def processar_vencidos(self, agora: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Envia as solicitações e lembretes vencidos, em lotes.
+
+        Args:
+            agora: Referência de vencimento (padrão: agora)
+
+        Returns:
+            Dict[str, int]: Quantidade de itens por resultado (enviado, respondido, cancelado, erro)
+        """
+        agora = agora or datetime.now()
+        resultado = {"enviado": 0, "respondido": 0, "cancelado": 0, "erro": 0}
+        db = self.session_factory()
+        try:
+            self._recuperar_reservas(db, agora)
+            while True:
+                itens = self._reservar_vencidos(db, agora)
+                if not itens:
+                    break
+                for status, quantidade in self._processar_lote(db, itens, agora).items():
+                    resultado[status] += quantidade
+                if len(itens) < TAMANHO_LOTE:
+                    break
+            return resultado
+        finally:
+            db.close()
+
+    def _recuperar_reservas(self, db: Session, agora: datetime):
+        a = AgendamentoFeedback
+        db.query(a).filter(
+            a.status == "processando", a.reservado_em < agora - TEMPO_RESERVA
+        ).update({a.status: "pendente"}, synchronize_session=False)
+        db.commit()
+
+    def _reservar_vencidos(self, db: Session, agora: datetime) -> List[AgendamentoFeedback]:
+        """Reserva o próximo lote de itens vencidos (range scan em status, due_at)"""
+        a = AgendamentoFeedback
+        ids = [i for (i,) in db.query(a.id).filter(
+            a.status == "pendente", a.due_at <= agora
+        ).order_by(a.due_at).limit(TAMANHO_LOTE)]
+        if not ids:
+            return []
+
+        reservado_em = datetime.now()
+        db.query(a).filter(a.id.in_(ids), a.status == "pendente").update(
+            {a.status: "processando", a.reservado_em: reservado_em}, synchronize_session=False
+        )
+        db.commit()
+        # Itens tomados por outro processo entre a leitura e a reserva ficam de fora
+        return db.query(a).filter(
+            a.id.in_(ids), a.status == "processando", a.reservado_em == reservado_em
+        ).order_by(a.due_at).all()
+
+    def _respondidos(self, db: Session, itens: List[AgendamentoFeedback]) -> set:
+        """Pares (edital_id, tipo) que já têm feedback: uma consulta por tipo"""
+        por_tipo: Dict[str, set] = {}
+        for item in itens:
+            por_tipo.setdefault(item.tipo_stakeholder, set()).add(item.edital_id)
+
+        respondidos = set()
+        for tipo, editais in por_tipo.items():
+            modelo = MODELOS_FEEDBACK[tipo]
+            for (edital_id,) in db.query(modelo.edital_id).filter(modelo.edital_id.in_(editais)).distinct():
+                respondidos.add((edital_id, tipo))
+        return respondidos
+
+    def _processar_lote(self, db: Session, itens: List[AgendamentoFeedback], agora: datetime) -> Dict[str, int]:
+        resultado = {"enviado": 0, "respondido": 0, "cancelado": 0, "erro": 0}
+        respondidos = self._respondidos(db, itens)
+
+        for item in itens:
+            if not self.config[f'feedback_{item.tipo_stakeholder}_ativo']:
+                item.status = "cancelado"
+            elif (item.edital_id, item.tipo_stakeholder) in respondidos:
+                # Feedback já recebido: nada a enviar nem a lembrar
+                item.status = "respondido"
+            else:
+                try:
+                    self.notificador({
+                        "edital_id": item.edital_id,
+                        "tipo_stakeholder": item.tipo_stakeholder,
+                        "lembrete": item.numero_lembrete,
+                        "destinatarios": item.destinatarios or [],
+                        "link_formulario": f"/api/feedback/formulario/{item.tipo_stakeholder}"
+                    })
+                except Exception as e:
+                    item.status = "erro"
+                    item.erro = str(e)
+                    resultado["erro"] += 1
+                    continue
+                item.status = "enviado"
+                item.data_envio = agora
+                self._agendar_lembrete(db, item, agora)
+            resultado[item.status] += 1
+
+        db.commit()
+        return resultado
+
+    def _agendar_lembrete(self, db: Session, item: AgendamentoFeedback, agora: datetime):
+        """Agenda o próximo lembrete enquanto não atingir o máximo configurado"""
+        if not self.config['enviar_lembretes'] or item.numero_lembrete >= self.config['maximo_lembretes']:
             return
-        
-        print("📧 Processando solicitações de feedback para setor de licitação...")
-        # Simulação de processamento
-        await asyncio.sleep(0.1)
-    
-    async def _enviar_lembretes(self):
-        """Envia lembretes para feedbacks pendentes"""
-        if not self.config['enviar_lembretes']:
+        self._inserir_agendamento(db, {
+            "edital_id": item.edital_id,
+            "tipo_stakeholder": item.tipo_stakeholder,
+            "numero_lembrete": item.numero_lembrete + 1,
+            "due_at": agora + timedelta(days=self.config['intervalo_lembretes']),
+            "destinatarios": item.destinatarios,
+            "status": "pendente",
+            "data_criacao": agora
+        })
+
+    def _notificar_log(self, envio: Dict[str, Any]):
+        """Notificador padrão: registra o envio no log"""
+        tipo_envio = f"Lembrete {envio['lembrete']}" if envio['lembrete'] else "Solicitação"
+        logger.info(
+            f"📧 {tipo_envio} de feedback ({envio['tipo_stakeholder']}) do edital {envio['edital_id']} "
+            f"para {', '.join(envio['destinatarios']) or 'destinatários não informados'}"
+        )
+
+    # === Laço de execução ===
+
+    def proximo_vencimento(self) -> Optional[datetime]:
+        """Vencimento do próximo item pendente (consulta ao índice)"""
+        db = self.session_factory()
+        try:
+            return db.query(func.min(AgendamentoFeedback.due_at)).filter(
+                AgendamentoFeedback.status == "pendente"
+            ).scalar()
+        finally:
+            db.close()
+
+    async def iniciar(self):
+        """Inicia o laço que processa os itens vencidos."""
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self):
+        """Interrompe o laço de processamento."""
+        if self._tarefa is None:
             return
-        
-        print("🔔 Enviando lembretes para feedbacks pendentes...")
-        # Simulação de envio de lembretes
-        await asyncio.sleep(0.1)
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+
+    async def _executar(self):
+        while True:
+            await self.processar_feedback_automatico()
+            # Dorme até o próximo vencimento, limitado ao intervalo de verificação
+            # (agendamentos novos podem vencer antes)
+            espera = self.config['intervalo_verificacao_s']
+            try:
+                proximo = await asyncio.to_thread(self.proximo_vencimento)
+                if proximo is not None:
+                    espera = min(espera, max((proximo - datetime.now()).total_seconds(), 1))
+            except Exception as e:
+                logger.error(f"Erro ao consultar próximo vencimento: {str(e)}")
+            await asyncio.sleep(espera)
+
+# Instância usada pela API (iniciada no startup de api/app.py)
+automacao_feedback = FeedbackAutomationService()
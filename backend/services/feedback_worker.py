@@ -0,0 +1,440 @@
+"""
+Worker de processamento dos feedbacks registrados.
+
+Os endpoints de registro apenas gravam o feedback e uma entrada pendente em
+feedback_processamento, na mesma transação. Este worker consome a fila em
+micro-lotes e, para cada lote:
+- classifica todos os textos livres de uma vez (autômato de palavras-chave);
+- calcula o sentimento em lote, usando o cache de sentimento;
+- soma os incrementos dos rollups diários e grava um upsert por linha afetada;
+- marca os itens como processados e registra o atraso (registro -> processamento).
+
+Os itens são reservados com um UPDATE condicional (status pendente), então
+mais de um processo pode consumir a mesma fila sem processar o mesmo item
+duas vezes. Reservas abandonadas (processo encerrado no meio de um lote)
+voltam para pendente após TEMPO_RESERVA; um worker lento que termina depois
+disso não grava o resultado nem os rollups dos itens que perdeu. Itens
+processados são removidos da fila após RETENCAO_PROCESSADOS, para que a
+tabela não cresça com todo o histórico de feedbacks.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import Counter, defaultdict, deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from api.database import SessionLocal
+from api.database_feedback import FeedbackProcessamento
+from api.feedback_rollups import MODELOS_FEEDBACK, atualizar_rollups_lote
+from monitoring.tracing import rastreador
+from services.sentiment_service import obter_sentimentos, rotulo_sentimento, textos_do_feedback
+
+logger = logging.getLogger(__name__)
+
+# Máximo de feedbacks por lote
+TAMANHO_LOTE = int(os.getenv("FEEDBACK_WORKER_LOTE", "200"))
+# Espera após uma notificação para acumular registros próximos no mesmo lote
+JANELA_LOTE_S = float(os.getenv("FEEDBACK_WORKER_JANELA_S", "0.5"))
+# Intervalo de varredura da fila sem notificações (outros processos, recuperação)
+INTERVALO_VARREDURA_S = float(os.getenv("FEEDBACK_WORKER_INTERVALO_S", "5"))
+MAX_TENTATIVAS = 5
+TEMPO_RESERVA = timedelta(minutes=5)
+# Tempo que itens processados ficam na fila (consulta e depuração) e intervalo da limpeza
+RETENCAO_PROCESSADOS = timedelta(days=float(os.getenv("FEEDBACK_FILA_RETENCAO_DIAS", "7")))
+INTERVALO_LIMPEZA_S = 3600
+# Status de itens ainda não concluídos (medidor fila_feedback_itens)
+STATUS_ABERTOS = ("pendente", "processando", "erro")
+# Quantidade de atrasos recentes usados nos percentis
+JANELA_METRICAS = 1000
+
+
+
+@lru_cache(maxsize=None)
+def _analise():
+    """
+    Classificador de feedback e ordem de prioridade das áreas.
+    Importados no primeiro lote (numpy) para não pesar no startup da API.
+    """
+    from crewai_agents.feedback_analysis_tools import AREAS_PROBLEMA, PALAVRAS_RELEVANTES, FeedbackAnalysisTool
+    prioridade = {area: i for i, area in enumerate(AREAS_PROBLEMA)}
+    return FeedbackAnalysisTool(), prioridade, PALAVRAS_RELEVANTES
+
+
+def enfileirar_feedback(db: Session, tipo: str, feedback_id: str) -> None:
+    """
+    Inclui um feedback na fila de processamento.
+    Deve ser chamada antes do commit que grava o feedback.
+    """
+    db.add(FeedbackProcessamento(feedback_id=feedback_id, tipo_stakeholder=tipo, data_registro=datetime.now()))
+
+
+def reservar_lote(db: Session, worker_id: str, limite: int = TAMANHO_LOTE) -> List[FeedbackProcessamento]:
+    """
+    Reserva os próximos itens pendentes da fila para um worker.
+
+    Returns:
+        List[FeedbackProcessamento]: Itens reservados, em ordem de chegada
+    """
+    f = FeedbackProcessamento
+    ids = [i for (i,) in db.query(f.id).filter(f.status == "pendente").order_by(f.id).limit(limite)]
+    if not ids:
+        return []
+
+    # A condição de status garante que um item reservado por outro worker não é tomado
+    db.query(f).filter(f.id.in_(ids), f.status == "pendente").update({
+        f.status: "processando",
+        f.reservado_por: worker_id,
+        f.reservado_em: datetime.now(),
+        f.tentativas: f.tentativas + 1
+    }, synchronize_session=False)
+    db.commit()
+
+    return db.query(f).filter(
+        f.id.in_(ids), f.status == "processando", f.reservado_por == worker_id
+    ).order_by(f.id).all()
+
+
+def recuperar_reservas(db: Session, tempo_reserva: timedelta = TEMPO_RESERVA) -> int:
+    """
+    Devolve à fila os itens reservados há mais de tempo_reserva.
+
+    Returns:
+        int: Quantidade de itens devolvidos
+    """
+    f = FeedbackProcessamento
+    devolvidos = db.query(f).filter(
+        f.status == "processando", f.reservado_em < datetime.now() - tempo_reserva
+    ).update({f.status: "pendente", f.reservado_por: None}, synchronize_session=False)
+    db.commit()
+    return devolvidos
+
+
+def limpar_processados(db: Session, retencao: timedelta = RETENCAO_PROCESSADOS) -> int:
+    """
+    Remove da fila os itens processados há mais de `retencao`.
+    Os rollups não dependem deles: feedback fora da fila conta como processado.
+
+    Returns:
+        int: Quantidade de itens removidos
+    """
+    f = FeedbackProcessamento
+    removidos = db.query(f).filter(
+        f.status == "processado", f.data_processamento < datetime.now() - retencao
+    ).delete(synchronize_session=False)
+    db.commit()
+    return removidos
+
+
+def contar_fila(db: Session, status: tuple = STATUS_ABERTOS) -> Dict[str, int]:
+    """Itens da fila nos status informados (índice status, id)."""
+    f = FeedbackProcessamento
+    por_status = dict(db.query(f.status, func.count(f.id)).filter(f.status.in_(status)).group_by(f.status).all())
+    return {s: por_status.get(s, 0) for s in status}
+
+
+def _resumir(textos: List[str], classificacoes: Dict[str, Dict], sentimentos: Dict[str, Dict]) -> Dict[str, Any]:
+    """Combina a análise dos textos de um feedback no resultado gravado na fila."""
+    if not textos:
+        return {"area_principal": None, "palavras_chave": [], "impacto_estimado": None,
+                "polaridade_media": None, "sentimento": None}
+
+    _, prioridade_area, palavras_relevantes = _analise()
+    analises = [classificacoes[texto] for texto in textos]
+    areas = Counter(a["area"] for a in analises if a["area"] != "outros")
+    palavras = {p for a in analises for p in a["palavras_chave"]}
+    polaridades = [sentimentos[t]["polaridade"] for t in textos if t in sentimentos]
+    media = sum(polaridades) / len(polaridades) if polaridades else None
+
+    return {
+        # Empate entre áreas resolvido pela ordem de prioridade de AREAS_PROBLEMA
+        "area_principal": max(areas, key=lambda a: (areas[a], -prioridade_area[a])) if areas else "outros",
+        "palavras_chave": [p for p in palavras_relevantes if p in palavras],
+        "impacto_estimado": max(a["impacto"] for a in analises),
+        "polaridade_media": media,
+        "sentimento": rotulo_sentimento(media) if media is not None else None,
+    }
+
+
+def processar_lote(db: Session, itens: List[FeedbackProcessamento], worker_id: str) -> List[float]:
+    """
+    Processa um lote reservado: classificação, sentimento e rollups em bloco.
+    Resultado, rollups e status dos itens são gravados em um único commit.
+
+    Só são gravados os itens que ainda estão reservados por worker_id: se a
+    reserva expirou e o item voltou à fila (recuperar_reservas), outro worker
+    o processa e os rollups não são contados duas vezes.
+
+    Returns:
+        List[float]: Atraso em segundos (registro -> processamento) de cada item processado
+    """
+    # Uma consulta por tipo de stakeholder para carregar os feedbacks
+    por_tipo = defaultdict(list)
+    for item in itens:
+        por_tipo[item.tipo_stakeholder].append(item.feedback_id)
+    feedbacks = {}
+    for tipo, ids in por_tipo.items():
+        modelo = MODELOS_FEEDBACK[tipo]
+        for feedback in db.query(modelo).filter(modelo.id.in_(ids)):
+            feedbacks[feedback.id] = feedback
+
+    textos = {
+        item.id: textos_do_feedback(item.tipo_stakeholder, feedbacks[item.feedback_id])
+        for item in itens if item.feedback_id in feedbacks
+    }
+    distintos = list(dict.fromkeys(t for lista in textos.values() for t in lista))
+    classificacoes = dict(zip(distintos, _analise()[0].classificar_textos(distintos)))
+    # Cache de sentimento gravado no mesmo commit do lote
+    sentimentos = obter_sentimentos(db, distintos, commit=False)
+
+    # Finaliza só os itens ainda reservados por este worker; a linha fica
+    # bloqueada até o commit, então a recuperação de reservas não a devolve no meio
+    f = FeedbackProcessamento
+    agora = datetime.now()
+    db.query(f).filter(
+        f.id.in_([item.id for item in itens]), f.reservado_por == worker_id, f.status == "processando"
+    ).update({f.status: "processado", f.data_processamento: agora, f.erro: None}, synchronize_session=False)
+    finalizados = {
+        i for (i,) in db.query(f.id).filter(
+            f.id.in_([item.id for item in itens]), f.reservado_por == worker_id,
+            f.status == "processado", f.data_processamento == agora
+        )
+    }
+
+    atrasos = []
+    rollups = []
+    resultados = []
+    for item in itens:
+        if item.id not in finalizados:
+            continue
+        feedback = feedbacks.get(item.feedback_id)
+        if feedback is None:
+            resultados.append({"id": item.id, "status": "erro", "erro": "Feedback não encontrado"})
+            continue
+
+        resultados.append({"id": item.id, **_resumir(textos[item.id], classificacoes, sentimentos)})
+        rollups.append((item.tipo_stakeholder, feedback))
+        atrasos.append((agora - item.data_registro).total_seconds())
+
+    if len(finalizados) < len(itens):
+        logger.warning(f"{len(itens) - len(finalizados)} feedbacks do lote com reserva expirada não foram gravados")
+    if resultados:
+        db.execute(update(f), resultados)
+    atualizar_rollups_lote(db, rollups)
+    db.commit()
+    return atrasos
+
+
+def _devolver(db: Session, item_id: int, worker_id: str, erro: str) -> None:
+    """Devolve um item à fila após falha, ou o marca com erro ao esgotar as tentativas."""
+    f = FeedbackProcessamento
+    db.query(f).filter(f.id == item_id, f.reservado_por == worker_id, f.status == "processando").update({
+        f.status: case((f.tentativas >= MAX_TENTATIVAS, "erro"), else_="pendente"),
+        f.reservado_por: None,
+        f.erro: erro,
+    }, synchronize_session=False)
+    db.commit()
+
+
+def _percentil(valores: List[float], percentil: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(percentil / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+class FeedbackWorker:
+    """
+    Consome a fila de feedbacks em micro-lotes dentro do loop de eventos da API.
+    O acesso ao banco roda em thread (asyncio.to_thread) para não bloquear o loop.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        tamanho_lote: int = TAMANHO_LOTE,
+        janela_lote: float = JANELA_LOTE_S,
+        intervalo_varredura: float = INTERVALO_VARREDURA_S
+    ):
+        self.session_factory = session_factory or SessionLocal
+        self.tamanho_lote = tamanho_lote
+        self.janela_lote = janela_lote
+        self.intervalo_varredura = intervalo_varredura
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._evento: Optional[asyncio.Event] = None
+        self._tarefa: Optional[asyncio.Task] = None
+
+        self._atrasos = deque(maxlen=JANELA_METRICAS)
+        self._ultima_limpeza: Optional[float] = None
+        self.metricas = {
+            "lotes_processados": 0,
+            "feedbacks_processados": 0,
+            "falhas": 0,
+            "ultimo_lote_em": None,
+            "tamanho_ultimo_lote": 0,
+            "duracao_ultimo_lote_ms": 0.0,
+        }
+
+    async def iniciar(self):
+        """Recupera reservas abandonadas e inicia o laço de consumo."""
+        if self._tarefa is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._evento = asyncio.Event()
+        await asyncio.to_thread(self._recuperar)
+        self._tarefa = asyncio.create_task(self._executar())
+        logger.info(f"Worker de feedback iniciado ({self.worker_id})")
+
+    async def parar(self):
+        """Interrompe o laço de consumo; itens não processados ficam na fila."""
+        if self._tarefa is None:
+            return
+        self._tarefa.cancel()
+        try:
+            await self._tarefa
+        except asyncio.CancelledError:
+            pass
+        self._tarefa = None
+        logger.info("Worker de feedback parado")
+
+    def notificar(self):
+        """Avisa que há feedback novo na fila. Pode ser chamada de qualquer thread."""
+        if self._loop is not None and self._evento is not None:
+            self._loop.call_soon_threadsafe(self._evento.set)
+
+    async def _executar(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._evento.wait(), timeout=self.intervalo_varredura)
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(self._recuperar)
+            self._evento.clear()
+            # Micro-lote: registros que chegam dentro da janela vão no mesmo lote
+            await asyncio.sleep(self.janela_lote)
+
+            try:
+                # Com fila acumulada, lotes cheios seguem sem esperar
+                while await asyncio.to_thread(self.processar_pendentes) >= self.tamanho_lote:
+                    pass
+            except Exception as e:
+                logger.error(f"Erro no worker de feedback: {str(e)}")
+
+    def _recuperar(self):
+        db = self.session_factory()
+        try:
+            devolvidos = recuperar_reservas(db)
+            if devolvidos:
+                logger.warning(f"{devolvidos} feedbacks com reserva expirada devolvidos à fila")
+            agora = time.monotonic()
+            if self._ultima_limpeza is None or agora - self._ultima_limpeza >= INTERVALO_LIMPEZA_S:
+                self._ultima_limpeza = agora
+                removidos = limpar_processados(db)
+                if removidos:
+                    logger.info(f"{removidos} itens processados removidos da fila de feedback")
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Erro na manutenção da fila de feedback: {str(e)}")
+        finally:
+            db.close()
+
+    def processar_pendentes(self) -> int:
+        """
+        Reserva e processa um lote da fila.
+
+        Returns:
+            int: Quantidade de itens reservados (0 se a fila estava vazia)
+        """
+        db = self.session_factory()
+        try:
+            itens = reservar_lote(db, self.worker_id, self.tamanho_lote)
+            if not itens:
+                return 0
+
+            inicio = time.perf_counter()
+            ids = [item.id for item in itens]
+            # Span só para lotes não vazios: consultas de espera não geram traces
+            with rastreador.span("feedback.processar_lote", **{"feedback.itens": len(ids)}):
+                try:
+                    atrasos = processar_lote(db, itens, self.worker_id)
+                except Exception as e:
+                    # Um item com problema não deve travar o lote: reprocessa um a um
+                    db.rollback()
+                    logger.warning(f"Falha no lote de {len(ids)} feedbacks, processando individualmente: {str(e)}")
+                    atrasos = self._processar_individualmente(db, ids)
+
+            self._registrar_metricas(len(ids), atrasos, time.perf_counter() - inicio)
+            return len(ids)
+        finally:
+            db.close()
+
+    def _processar_individualmente(self, db: Session, ids: List[int]) -> List[float]:
+        atrasos = []
+        for item_id in ids:
+            try:
+                atrasos.extend(processar_lote(db, [db.get(FeedbackProcessamento, item_id)], self.worker_id))
+            except Exception as e:
+                db.rollback()
+                self.metricas["falhas"] += 1
+                logger.error(f"Erro ao processar item {item_id} da fila de feedback: {str(e)}")
+                _devolver(db, item_id, self.worker_id, str(e))
+        return atrasos
+
+    def _registrar_metricas(self, tamanho: int, atrasos: List[float], duracao: float):
+        self._atrasos.extend(atrasos)
+        self.metricas["lotes_processados"] += 1
+        self.metricas["feedbacks_processados"] += len(atrasos)
+        self.metricas["ultimo_lote_em"] = datetime.now().isoformat()
+        self.metricas["tamanho_ultimo_lote"] = tamanho
+        self.metricas["duracao_ultimo_lote_ms"] = round(duracao * 1000, 2)
+
+    def contagem_fila(self) -> Dict[str, int]:
+        """
+        Itens não concluídos da fila por status (medidor fila_feedback_itens de
+        GET /metrics). Os processados ficam de fora: a contagem lê só o trecho
+        do índice (status, id) dos itens abertos.
+        """
+        db = self.session_factory()
+        try:
+            return contar_fila(db)
+        finally:
+            db.close()
+
+    def status(self, db: Session) -> Dict[str, Any]:
+        """
+        Situação da fila e métricas de processamento deste worker.
+
+        Returns:
+            Dict: itens por status, idade do pendente mais antigo, contadores
+            e percentis do atraso registro -> processamento (segundos)
+        """
+        f = FeedbackProcessamento
+        mais_antigo = db.query(func.min(f.data_registro)).filter(f.status == "pendente").scalar()
+
+        atrasos = list(self._atrasos)
+        return {
+            "worker_id": self.worker_id,
+            "ativo": self._tarefa is not None and not self._tarefa.done(),
+            # Processados: apenas os ainda dentro de RETENCAO_PROCESSADOS
+            "fila": contar_fila(db, ("pendente", "processando", "processado", "erro")),
+            "pendente_mais_antigo_s": round((datetime.now() - mais_antigo).total_seconds(), 3) if mais_antigo else None,
+            **self.metricas,
+            "atraso_s": {
+                "amostras": len(atrasos),
+                "p50": round(_percentil(atrasos, 50), 3) if atrasos else None,
+                "p95": round(_percentil(atrasos, 95), 3) if atrasos else None,
+                "max": round(max(atrasos), 3) if atrasos else None,
+            },
+        }
+
+
+# Instância usada pela API (iniciada no startup de api/app.py)
+worker_feedback = FeedbackWorker()
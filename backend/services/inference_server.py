@@ -0,0 +1,450 @@
+"""
+Servidor local de inferência para os agentes que usam o modelo Llama (LlamaCPP).
+
+Roda em um processo separado e expõe uma API compatível com a da OpenAI:
+- POST /v1/chat/completions e /v1/completions (com "stream": true responde em SSE);
+- GET /v1/models;
+- GET /metrics: fila, lote em execução, tokens/s e tempo até o primeiro token.
+
+Os pedidos de todas as crews entram em uma fila única. Uma thread dona do
+modelo (o LlamaCPP não é thread-safe) mantém um lote de sequências ativas: a
+cada rodada admite pedidos novos da fila e avança um token de cada sequência.
+O tamanho do lote é o menor entre LOTE_MAX e `sequencias_simultaneas` do
+motor; só motores com decodificação de várias sequências independentes
+(cache por sequência) declaram mais de uma. O LlamaCPP tem um único contexto
+e cache KV, então atende uma sequência por vez: a fila ainda dá streaming,
+backpressure (503 com a fila cheia) e um único modelo carregado para todas
+as crews.
+
+Uso:
+    uvicorn services.inference_server:app --port 8100
+    uvicorn services.inference_server:app --uds /tmp/inferencia.sock
+
+Os agentes passam a usar o servidor com LLM_INFERENCE_URL
+(ex.: http://localhost:8100 ou unix:///tmp/inferencia.sock), ver crewai_agents/llm_registry.py.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from monitoring.tracing import MiddlewareRastreamento, rastreador
+
+logger = logging.getLogger(__name__)
+
+# Sequências geradas em conjunto, se o motor decodificar várias de forma independente
+LOTE_MAX = int(os.getenv("INFERENCIA_LOTE_MAX", "4"))
+# Espera por mais pedidos antes de iniciar um lote a partir da fila vazia
+JANELA_LOTE_S = float(os.getenv("INFERENCIA_JANELA_LOTE_MS", "20")) / 1000
+# Pedidos aguardando além disso são recusados com 503
+FILA_MAX = int(os.getenv("INFERENCIA_FILA_MAX", "256"))
+MAX_TOKENS_PADRAO = 256
+NOME_MODELO = os.getenv("INFERENCIA_MODELO", "llama-local")
+# Janela das métricas de vazão e latência
+JANELA_METRICAS_S = 60
+AMOSTRAS_LATENCIA = 1000
+
+_FIM = object()
+
+
+def _percentil(valores: List[float], percentil: float) -> float:
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, int(round(percentil / 100 * (len(ordenados) - 1))))
+    return ordenados[indice]
+
+
+def prompt_das_mensagens(messages: List[Dict[str, Any]]) -> str:
+    """Mesmo prompt montado por CustomLLM_LlamaIndex.chat_completion."""
+    return "\n".join([m.get("content", "") or "" for m in messages])
+
+
+def contar_tokens(texto: str) -> int:
+    """Estimativa de tokens do prompt (palavras), usada no campo usage."""
+    return len(texto.split())
+
+
+class Pedido:
+    """Um pedido de geração e o canal por onde seus tokens voltam ao loop de eventos."""
+
+    def __init__(self, prompt: str, max_tokens: int, temperature: Optional[float],
+                 loop: asyncio.AbstractEventLoop):
+        self.id = uuid.uuid4().hex
+        self.prompt = prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.criado_em = time.monotonic()
+        self.primeiro_token_em: Optional[float] = None
+        self.tokens_gerados = 0
+        self.motivo_fim: Optional[str] = None
+        self.cancelado = False
+        self.saida: asyncio.Queue = asyncio.Queue()
+        self._loop = loop
+
+    def entregar(self, item: Any):
+        """Envia um token, _FIM ou uma exceção para quem aguarda o pedido."""
+        self._loop.call_soon_threadsafe(self.saida.put_nowait, item)
+
+    async def tokens(self):
+        """Tokens do pedido, na ordem em que foram gerados."""
+        while True:
+            item = await self.saida.get()
+            if item is _FIM:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+
+class MotorLlamaCPP:
+    """
+    Geração com o modelo Llama local via LlamaIndex.
+    O LlamaCPP tem um único contexto e cache KV: intercalar duas sequências faria
+    uma continuar do estado deixado pela outra, então o motor atende uma por vez.
+    A temperatura do pedido vale durante a sua geração.
+    """
+
+    sequencias_simultaneas = 1
+
+    def __init__(self, model_path: Optional[str] = None):
+        from crewai_agents.llm_registry import CustomLLM_LlamaIndex
+        self.llm = CustomLLM_LlamaIndex(model_path).llm
+
+    def gerar(self, pedido: Pedido) -> Iterator[str]:
+        originais = dict(self.llm.generate_kwargs)
+        if pedido.temperature is not None:
+            self.llm.generate_kwargs["temperature"] = pedido.temperature
+        try:
+            for parcial in self.llm.stream_complete(pedido.prompt):
+                if parcial.delta:
+                    yield parcial.delta
+        finally:
+            self.llm.generate_kwargs.clear()
+            self.llm.generate_kwargs.update(originais)
+
+
+class ServidorInferencia:
+    """
+    Fila de pedidos e thread de geração em lote.
+    O lote é limitado por `sequencias_simultaneas` do motor (1 se não declarado).
+    """
+
+    def __init__(self, criar_motor: Callable[[], Any], lote_max: int = LOTE_MAX,
+                 janela_lote: float = JANELA_LOTE_S, fila_max: int = FILA_MAX):
+        self.criar_motor = criar_motor
+        self.motor = None
+        self.lote_max = lote_max
+        self.janela_lote = janela_lote
+        self._fila: "queue.Queue[Pedido]" = queue.Queue(maxsize=fila_max)
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._trava = threading.Lock()
+        self._ativos = 0
+        self._rodadas = 0
+        self._soma_lote = 0
+        self._requisicoes = 0
+        self._recusadas = 0
+        self._erros = 0
+        self._tokens_total = 0
+        self._tokens_recentes: deque = deque()  # (instante, tokens) por rodada
+        self._primeiro_token: deque = deque(maxlen=AMOSTRAS_LATENCIA)
+        self._duracoes: deque = deque(maxlen=AMOSTRAS_LATENCIA)
+
+    def iniciar(self):
+        """Carrega o motor e inicia a thread de geração."""
+        if self._thread is not None:
+            return
+        self.motor = self.criar_motor()
+        self.lote_max = max(1, min(self.lote_max, getattr(self.motor, "sequencias_simultaneas", 1)))
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="inferencia", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        """Interrompe a geração; pedidos pendentes recebem erro."""
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+        self._thread = None
+        while True:
+            try:
+                self._fila.get_nowait().entregar(RuntimeError("Servidor de inferência encerrado"))
+            except queue.Empty:
+                break
+
+    def enviar(self, prompt: str, max_tokens: int, temperature: Optional[float] = None) -> Pedido:
+        """Enfileira um pedido (chamado no loop de eventos)."""
+        pedido = Pedido(prompt, max_tokens, temperature, asyncio.get_running_loop())
+        try:
+            self._fila.put_nowait(pedido)
+        except queue.Full:
+            with self._trava:
+                self._recusadas += 1
+            raise
+        with self._trava:
+            self._requisicoes += 1
+        return pedido
+
+    def _admitir(self, ativos: Dict[Pedido, Iterator[str]], espera: float = 0.0):
+        """Completa o lote com pedidos da fila."""
+        limite = time.monotonic() + espera
+        while len(ativos) < self.lote_max:
+            restante = limite - time.monotonic()
+            try:
+                pedido = self._fila.get(timeout=restante) if restante > 0 else self._fila.get_nowait()
+            except queue.Empty:
+                return
+            self._iniciar_sequencia(ativos, pedido)
+
+    def _iniciar_sequencia(self, ativos: Dict[Pedido, Iterator[str]], pedido: Pedido):
+        if pedido.cancelado:
+            return
+        try:
+            ativos[pedido] = iter(self.motor.gerar(pedido))
+        except Exception as e:
+            self._falhar(pedido, e)
+
+    def _executar(self):
+        ativos: Dict[Pedido, Iterator[str]] = {}
+        while not self._parar.is_set():
+            if not ativos:
+                # Fila vazia: aguarda o primeiro pedido e uma janela curta por outros
+                try:
+                    pedido = self._fila.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                self._iniciar_sequencia(ativos, pedido)
+                self._admitir(ativos, self.janela_lote)
+            else:
+                self._admitir(ativos)
+            with self._trava:
+                self._ativos = len(ativos)
+            if ativos:
+                self.gerar_rodada(ativos)
+        for pedido, gerador in ativos.items():
+            self._encerrar(pedido, gerador, erro=RuntimeError("Servidor de inferência encerrado"))
+
+    def gerar_rodada(self, ativos: Dict[Pedido, Iterator[str]]):
+        """Avança um token de cada sequência ativa."""
+        tamanho, tokens = len(ativos), 0
+        for pedido, gerador in list(ativos.items()):
+            if pedido.cancelado:
+                self._encerrar(pedido, gerador)
+                del ativos[pedido]
+                continue
+            try:
+                token = next(gerador)
+            except StopIteration:
+                pedido.motivo_fim = "stop"
+                self._encerrar(pedido, gerador)
+                del ativos[pedido]
+                continue
+            except Exception as e:
+                self._encerrar(pedido, gerador, erro=e)
+                del ativos[pedido]
+                continue
+
+            if pedido.primeiro_token_em is None:
+                pedido.primeiro_token_em = time.monotonic()
+            pedido.tokens_gerados += 1
+            tokens += 1
+            pedido.entregar(token)
+            if pedido.tokens_gerados >= pedido.max_tokens:
+                pedido.motivo_fim = "length"
+                self._encerrar(pedido, gerador)
+                del ativos[pedido]
+
+        agora = time.monotonic()
+        with self._trava:
+            self._rodadas += 1
+            self._soma_lote += tamanho
+            self._tokens_total += tokens
+            self._tokens_recentes.append((agora, tokens))
+            while self._tokens_recentes and self._tokens_recentes[0][0] < agora - JANELA_METRICAS_S:
+                self._tokens_recentes.popleft()
+
+    def _encerrar(self, pedido: Pedido, gerador: Iterator[str], erro: Optional[Exception] = None):
+        fechar = getattr(gerador, "close", None)
+        if fechar is not None:
+            fechar()
+        if erro is not None:
+            self._falhar(pedido, erro)
+            return
+        agora = time.monotonic()
+        with self._trava:
+            if pedido.primeiro_token_em is not None:
+                self._primeiro_token.append(pedido.primeiro_token_em - pedido.criado_em)
+            self._duracoes.append(agora - pedido.criado_em)
+        pedido.entregar(_FIM)
+
+    def _falhar(self, pedido: Pedido, erro: Exception):
+        logger.error(f"Erro na geração do pedido {pedido.id}: {str(erro)}")
+        with self._trava:
+            self._erros += 1
+        pedido.entregar(erro)
+
+    def metricas(self) -> Dict[str, Any]:
+        """Profundidade da fila, tamanho do lote, vazão e latências recentes."""
+        agora = time.monotonic()
+        with self._trava:
+            recentes = [(t, n) for t, n in self._tokens_recentes if t >= agora - JANELA_METRICAS_S]
+            primeiro_token = list(self._primeiro_token)
+            duracoes = list(self._duracoes)
+            janela = min(JANELA_METRICAS_S, agora - recentes[0][0]) if recentes else 0
+            return {
+                "modelo": NOME_MODELO,
+                "fila": self._fila.qsize(),
+                "em_execucao": self._ativos,
+                "lote_max": self.lote_max,
+                "tamanho_medio_lote": round(self._soma_lote / self._rodadas, 2) if self._rodadas else 0,
+                "requisicoes": self._requisicoes,
+                "recusadas": self._recusadas,
+                "erros": self._erros,
+                "tokens_gerados": self._tokens_total,
+                "tokens_por_segundo": round(sum(n for _, n in recentes) / janela, 2) if janela > 0 else 0.0,
+                "primeiro_token_s": {
+                    "p50": round(_percentil(primeiro_token, 50), 3) if primeiro_token else None,
+                    "p95": round(_percentil(primeiro_token, 95), 3) if primeiro_token else None,
+                },
+                "duracao_s": {
+                    "p50": round(_percentil(duracoes, 50), 3) if duracoes else None,
+                    "p95": round(_percentil(duracoes, 95), 3) if duracoes else None,
+                },
+            }
+
+
+class ChatCompletionRequest(BaseModel):
+    """Corpo de /v1/chat/completions (campos usados pelos agentes)."""
+    model: Optional[str] = None
+    messages: List[Dict[str, Any]]
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    stream: bool = False
+
+
+class CompletionRequest(BaseModel):
+    """Corpo de /v1/completions."""
+    model: Optional[str] = None
+    prompt: str
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    stream: bool = False
+
+
+def criar_app(servidor: ServidorInferencia) -> FastAPI:
+    """Aplicação HTTP do servidor de inferência."""
+    aplicacao = FastAPI(title="Inferência local (LlamaCPP)")
+    # Continua o trace recebido da API (cabeçalho traceparent)
+    aplicacao.add_middleware(MiddlewareRastreamento)
+
+    @aplicacao.on_event("startup")
+    async def iniciar():
+        # A carga do modelo bloqueia: roda fora do loop de eventos
+        await asyncio.to_thread(servidor.iniciar)
+
+    @aplicacao.on_event("shutdown")
+    async def parar():
+        await asyncio.to_thread(servidor.parar)
+        await asyncio.to_thread(rastreador.parar)
+
+    def _enviar(prompt: str, max_tokens: Optional[int], temperature: Optional[float]) -> Pedido:
+        try:
+            return servidor.enviar(prompt, max_tokens or MAX_TOKENS_PADRAO, temperature)
+        except queue.Full:
+            raise HTTPException(status_code=503, detail="Fila de inferência cheia")
+
+    def _usage(pedido: Pedido) -> Dict[str, int]:
+        prompt_tokens = contar_tokens(pedido.prompt)
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": pedido.tokens_gerados,
+            "total_tokens": prompt_tokens + pedido.tokens_gerados,
+        }
+
+    async def _sse(pedido: Pedido, objeto: str, parte: Callable[[Optional[str], Optional[str]], Dict]):
+        criado = int(time.time())
+        try:
+            async for token in pedido.tokens():
+                yield f"data: {json.dumps({'id': pedido.id, 'object': objeto, 'created': criado, 'model': NOME_MODELO, 'choices': [parte(token, None)]}, ensure_ascii=False)}\n\n"
+            yield f"data: {json.dumps({'id': pedido.id, 'object': objeto, 'created': criado, 'model': NOME_MODELO, 'choices': [parte(None, pedido.motivo_fim)]})}\n\n"
+        except Exception as e:
+            yield f"data: {json.dumps({'error': {'message': str(e)}}, ensure_ascii=False)}\n\n"
+        finally:
+            # Cliente desconectado: libera a vaga no lote
+            pedido.cancelado = True
+        yield "data: [DONE]\n\n"
+
+    async def _texto_completo(pedido: Pedido) -> str:
+        try:
+            return "".join([token async for token in pedido.tokens()])
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Erro na geração: {str(e)}")
+
+    @aplicacao.post("/v1/chat/completions")
+    async def chat_completions(corpo: ChatCompletionRequest):
+        pedido = _enviar(prompt_das_mensagens(corpo.messages), corpo.max_tokens, corpo.temperature)
+        if corpo.stream:
+            def parte(token, motivo):
+                return {"index": 0, "delta": {"content": token} if token is not None else {}, "finish_reason": motivo}
+            return StreamingResponse(_sse(pedido, "chat.completion.chunk", parte), media_type="text/event-stream")
+
+        texto = await _texto_completo(pedido)
+        return {
+            "id": f"chatcmpl-{pedido.id}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": NOME_MODELO,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": texto},
+                "finish_reason": pedido.motivo_fim,
+            }],
+            "usage": _usage(pedido),
+        }
+
+    @aplicacao.post("/v1/completions")
+    async def completions(corpo: CompletionRequest):
+        pedido = _enviar(corpo.prompt, corpo.max_tokens, corpo.temperature)
+        if corpo.stream:
+            def parte(token, motivo):
+                return {"index": 0, "text": token or "", "finish_reason": motivo}
+            return StreamingResponse(_sse(pedido, "text_completion", parte), media_type="text/event-stream")
+
+        texto = await _texto_completo(pedido)
+        return {
+            "id": f"cmpl-{pedido.id}",
+            "object": "text_completion",
+            "created": int(time.time()),
+            "model": NOME_MODELO,
+            "choices": [{"index": 0, "text": texto, "finish_reason": pedido.motivo_fim}],
+            "usage": _usage(pedido),
+        }
+
+    @aplicacao.get("/v1/models")
+    def modelos():
+        return {"object": "list", "data": [{"id": NOME_MODELO, "object": "model", "owned_by": "local"}]}
+
+    @aplicacao.get("/metrics")
+    def metricas():
+        return servidor.metricas()
+
+    @aplicacao.get("/health")
+    def saude():
+        return {"status": "ok" if servidor.motor is not None else "carregando"}
+
+    return aplicacao
+
+
+# Aplicação usada pelo uvicorn (o modelo é carregado no startup do processo)
+servidor_inferencia = ServidorInferencia(MotorLlamaCPP)
+app = criar_app(servidor_inferencia)
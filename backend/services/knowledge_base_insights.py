@@ -0,0 +1,353 @@
+"""
+Snapshots das estatísticas da base de conhecimento (tabela base_conhecimento_insights).
+
+Cada grupo (categoria, tipo_licitacao) tem uma linha com contagens, somas,
+mínimos/máximos, mediana de valores e frequências de fatores de sucesso,
+especificações, critérios, modalidades, sites e meses de resultado.
+`salvar_licitacoes` (services/knowledge_base_store.py) atualiza apenas os
+grupos das licitações gravadas, com a diferença entre as versões anterior e
+nova de cada licitação (`aplicar_alteracoes`): contagens, somas e frequências
+são aditivas, e o banco só é consultado para mínimos, máximos e mediana quando
+os valores do grupo mudam.
+As análises de /api/scraping/base-conhecimento combinam um snapshot por grupo,
+sem percorrer as licitações.
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from api.database_scraping import InsightConhecimento, LicitacaoConhecimento
+
+Grupo = Tuple[str, str]
+
+
+def grupo_da_licitacao(categoria: Optional[str], tipo_licitacao: Optional[str]) -> Grupo:
+    """Chave do snapshot de uma licitação ("" quando o campo está vazio)."""
+    return (categoria or "", tipo_licitacao or "")
+
+
+def _filtro(coluna, valor: str):
+    # O grupo "" reúne as licitações sem o campo preenchido
+    return or_(coluna.is_(None), coluna == "") if valor == "" else coluna == valor
+
+
+# Campos da licitação que entram nos snapshots
+CAMPOS_INSIGHTS = (
+    "categoria", "tipo_licitacao", "site_origem", "valor_contratado", "valor_estimado",
+    "prazo_execucao", "numero_propostas", "fatores_sucesso", "especificacoes_tecnicas",
+    "criterio_julgamento", "modalidade", "data_resultado",
+)
+
+# Frequências do snapshot e os itens que cada licitação soma a elas
+FREQUENCIAS = {
+    "fatores_sucesso": lambda l: l.get("fatores_sucesso") or [],
+    "especificacoes": lambda l: l.get("especificacoes_tecnicas") or [],
+    "criterios_julgamento": lambda l: [l["criterio_julgamento"]] if l.get("criterio_julgamento") else [],
+    "modalidades": lambda l: [l["modalidade"]] if l.get("modalidade") else [],
+    "sites_origem": lambda l: [l["site_origem"]],
+    "meses_resultado": lambda l: [l["data_resultado"][:7]] if l.get("data_resultado") else [],
+}
+
+
+def _positivo(valor):
+    return valor if valor and valor > 0 else None
+
+
+def _valor(licitacao: Dict[str, Any]) -> Optional[float]:
+    """valor_contratado ou, na falta, valor_estimado (None se não for positivo)."""
+    return _positivo(licitacao.get("valor_contratado") or licitacao.get("valor_estimado"))
+
+
+def _coluna_valor():
+    l = LicitacaoConhecimento
+    return case((and_(l.valor_contratado.isnot(None), l.valor_contratado != 0), l.valor_contratado),
+                else_=l.valor_estimado)
+
+
+def _filtro_grupo(grupo: Grupo):
+    return (_filtro(LicitacaoConhecimento.categoria, grupo[0]),
+            _filtro(LicitacaoConhecimento.tipo_licitacao, grupo[1]))
+
+
+def _snapshot_vazio(grupo: Grupo) -> InsightConhecimento:
+    return InsightConhecimento(
+        categoria=grupo[0], tipo_licitacao=grupo[1], total=0,
+        total_com_valor=0, soma_valores=0.0, total_com_prazo=0, soma_prazos=0.0,
+        total_com_propostas=0, soma_propostas=0, **{campo: {} for campo in FREQUENCIAS}
+    )
+
+
+def _acumular(snapshot: InsightConhecimento, licitacoes: List[Dict[str, Any]], sinal: int):
+    """Soma (sinal 1) ou subtrai (sinal -1) as parcelas aditivas das licitações no snapshot."""
+    if not licitacoes:
+        return
+    valores = [v for v in map(_valor, licitacoes) if v is not None]
+    prazos = [p for p in (_positivo(l.get("prazo_execucao")) for l in licitacoes) if p is not None]
+    propostas = [p for p in (_positivo(l.get("numero_propostas")) for l in licitacoes) if p is not None]
+
+    snapshot.total += sinal * len(licitacoes)
+    snapshot.total_com_valor += sinal * len(valores)
+    snapshot.soma_valores += sinal * float(sum(valores))
+    snapshot.total_com_prazo += sinal * len(prazos)
+    snapshot.soma_prazos += sinal * float(sum(prazos))
+    snapshot.total_com_propostas += sinal * len(propostas)
+    snapshot.soma_propostas += sinal * sum(propostas)
+
+    for campo, itens in FREQUENCIAS.items():
+        contagem = Counter(getattr(snapshot, campo) or {})
+        for licitacao in licitacoes:
+            for item in itens(licitacao):
+                contagem[item] += sinal
+        setattr(snapshot, campo, {item: n for item, n in contagem.items() if n > 0})
+
+
+def _atualizar_extremos(db: Session, snapshot: InsightConhecimento, grupo: Grupo,
+                        anteriores: List[Dict[str, Any]], novas: List[Dict[str, Any]]):
+    """
+    Mínimo, máximo e mediana dos valores e mínimo e máximo dos prazos.
+    Só consulta o banco quando os valores (ou prazos) do grupo mudaram:
+    a mediana é relida a cada mudança de valores, e mínimo/máximo quando um
+    valor saiu do grupo (entradas apenas são comparadas com os extremos atuais).
+    """
+    for coluna, extrair, prefixo, mediana in (
+        (_coluna_valor(), _valor, "valor", True),
+        (LicitacaoConhecimento.prazo_execucao, lambda l: _positivo(l.get("prazo_execucao")), "prazo", False),
+    ):
+        saidas = Counter(v for v in map(extrair, anteriores) if v is not None)
+        entradas = Counter(v for v in map(extrair, novas) if v is not None)
+        if saidas == entradas:
+            continue
+        filtro = _filtro_grupo(grupo) + (coluna > 0,)
+        if saidas - entradas:
+            minimo, maximo = db.query(func.min(coluna), func.max(coluna)).filter(*filtro).one()
+        else:
+            atuais = [v for v in (getattr(snapshot, f"{prefixo}_minimo"), getattr(snapshot, f"{prefixo}_maximo"))
+                      if v is not None]
+            minimo, maximo = min(atuais + list(entradas)), max(atuais + list(entradas))
+        setattr(snapshot, f"{prefixo}_minimo", minimo)
+        setattr(snapshot, f"{prefixo}_maximo", maximo)
+        if mediana:
+            # Mesmo critério usado em KnowledgeBaseTool._extract_insights: sorted(valores)[n // 2]
+            total = snapshot.total_com_valor
+            snapshot.valor_mediana = db.query(coluna).filter(*filtro).order_by(coluna) \
+                .offset(total // 2).limit(1).scalar() if total else None
+
+
+def _licitacoes_do_grupo(db: Session, grupo: Grupo) -> List[Dict[str, Any]]:
+    colunas = [getattr(LicitacaoConhecimento, campo) for campo in CAMPOS_INSIGHTS]
+    return [dict(zip(CAMPOS_INSIGHTS, linha)) for linha in db.query(*colunas).filter(*_filtro_grupo(grupo))]
+
+
+def _gravar_snapshot(db: Session, snapshot: InsightConhecimento) -> bool:
+    """Grava o snapshot (ou o remove, se o grupo ficou sem licitações)."""
+    if snapshot.total <= 0:
+        if snapshot in db:
+            db.delete(snapshot)
+        else:
+            db.query(InsightConhecimento).filter_by(
+                categoria=snapshot.categoria, tipo_licitacao=snapshot.tipo_licitacao
+            ).delete()
+        return False
+    snapshot.data_atualizacao = datetime.now()
+    db.merge(snapshot)
+    return True
+
+
+def atualizar_insights(db: Session, grupos: Iterable[Grupo]) -> int:
+    """
+    Recalcula por inteiro os snapshots dos grupos informados, lendo do
+    índice (categoria, tipo_licitacao) só as colunas usadas nas estatísticas.
+    A gravação só é efetivada no commit da sessão recebida.
+
+    Args:
+        db: Sessão do banco de dados
+        grupos: Pares (categoria, tipo_licitacao) a recalcular
+
+    Returns:
+        int: Quantidade de snapshots gravados
+    """
+    gravados = 0
+    for grupo in set(grupos):
+        licitacoes = _licitacoes_do_grupo(db, grupo)
+        snapshot = _snapshot_vazio(grupo)
+        _acumular(snapshot, licitacoes, 1)
+        _atualizar_extremos(db, snapshot, grupo, [], licitacoes)
+        gravados += _gravar_snapshot(db, snapshot)
+    return gravados
+
+
+def aplicar_alteracoes(db: Session, anteriores: Iterable[Dict[str, Any]], novas: Iterable[Dict[str, Any]]) -> int:
+    """
+    Atualiza os snapshots com a diferença de um lote já gravado: subtrai as
+    versões anteriores das licitações alteradas e soma as versões novas, sem
+    reler os grupos. Grupos ainda sem snapshot são recalculados por inteiro.
+    A gravação só é efetivada no commit da sessão recebida.
+
+    Args:
+        db: Sessão do banco de dados
+        anteriores: Licitações como estavam antes do lote (campos de CAMPOS_INSIGHTS)
+        novas: Licitações como foram gravadas
+
+    Returns:
+        int: Quantidade de snapshots gravados
+    """
+    por_grupo: Dict[Grupo, Tuple[List, List]] = {}
+    for indice, licitacoes in enumerate((anteriores, novas)):
+        for licitacao in licitacoes:
+            grupo = grupo_da_licitacao(licitacao.get("categoria"), licitacao.get("tipo_licitacao"))
+            por_grupo.setdefault(grupo, ([], []))[indice].append(licitacao)
+
+    gravados = 0
+    for grupo, (saidas, entradas) in por_grupo.items():
+        snapshot = db.get(InsightConhecimento, {"categoria": grupo[0], "tipo_licitacao": grupo[1]})
+        if snapshot is None:
+            gravados += atualizar_insights(db, [grupo])
+            continue
+        _acumular(snapshot, saidas, -1)
+        _acumular(snapshot, entradas, 1)
+        _atualizar_extremos(db, snapshot, grupo, saidas, entradas)
+        gravados += _gravar_snapshot(db, snapshot)
+    return gravados
+
+
+def reconstruir_insights(db: Session) -> int:
+    """
+    Recalcula todos os snapshots a partir das licitações da base.
+    Usada em bases que já tinham licitações antes dos snapshots existirem.
+
+    Returns:
+        int: Quantidade de snapshots gravados
+    """
+    grupos = {
+        grupo_da_licitacao(categoria, tipo)
+        for categoria, tipo in db.query(LicitacaoConhecimento.categoria, LicitacaoConhecimento.tipo_licitacao).distinct()
+    }
+    db.query(InsightConhecimento).delete()
+    gravados = atualizar_insights(db, grupos)
+    db.commit()
+    return gravados
+
+
+def _somar(destino: Counter, origem: Optional[Dict[str, int]]):
+    destino.update(origem or {})
+
+
+def analise_geral(snapshots: List[InsightConhecimento]) -> Dict[str, Any]:
+    """Totais por categoria e tipo e estatísticas de valores da base inteira."""
+    categorias, tipos = Counter(), Counter()
+    for s in snapshots:
+        categorias[s.categoria or "indefinida"] += s.total
+        tipos[s.tipo_licitacao or "indefinido"] += s.total
+
+    com_valor = [s for s in snapshots if s.total_com_valor]
+    total_com_valor = sum(s.total_com_valor for s in com_valor)
+    return {
+        "total_licitacoes": sum(s.total for s in snapshots),
+        "distribuicao_categorias": dict(categorias),
+        "distribuicao_tipos": dict(tipos),
+        "estatisticas_valores": {
+            "total_com_valor": total_com_valor,
+            "valor_minimo": min(s.valor_minimo for s in com_valor) if com_valor else 0,
+            "valor_maximo": max(s.valor_maximo for s in com_valor) if com_valor else 0,
+            "valor_medio": sum(s.soma_valores for s in com_valor) / total_com_valor if com_valor else 0
+        },
+        "data_analise": datetime.now().isoformat()
+    }
+
+
+def analise_por_categoria(snapshots: List[InsightConhecimento]) -> Dict[str, Any]:
+    """Totais, médias de valor e de propostas e sites de origem por categoria."""
+    por_categoria: Dict[str, Dict[str, Any]] = {}
+    for s in snapshots:
+        c = por_categoria.setdefault(s.categoria or "indefinida", {
+            "total": 0, "com_valor": 0, "soma_valores": 0.0, "com_propostas": 0, "soma_propostas": 0, "sites": Counter()
+        })
+        c["total"] += s.total
+        c["com_valor"] += s.total_com_valor
+        c["soma_valores"] += s.soma_valores
+        c["com_propostas"] += s.total_com_propostas
+        c["soma_propostas"] += s.soma_propostas
+        _somar(c["sites"], s.sites_origem)
+
+    return {
+        categoria: {
+            "total": c["total"],
+            "valor_medio": c["soma_valores"] / c["com_valor"] if c["com_valor"] else 0,
+            "propostas_media": c["soma_propostas"] / c["com_propostas"] if c["com_propostas"] else 0,
+            "sites_origem": list(c["sites"])
+        }
+        for categoria, c in por_categoria.items()
+    }
+
+
+def analise_tendencias(snapshots: List[InsightConhecimento]) -> Dict[str, Any]:
+    """Licitações por mês de resultado."""
+    meses = Counter()
+    for s in snapshots:
+        _somar(meses, s.meses_resultado)
+    return {
+        "tendencias_temporais": dict(sorted(meses.items())),
+        "periodo_analise": f"{min(meses)} a {max(meses)}" if meses else "N/A",
+        "total_periodos": len(meses)
+    }
+
+
+ANALISES = {
+    "geral": analise_geral,
+    "categoria": analise_por_categoria,
+    "tendencias": analise_tendencias,
+}
+
+
+def listar_snapshots(db: Session) -> List[InsightConhecimento]:
+    """Snapshots de todos os grupos (uma linha por categoria e tipo de licitação)."""
+    return db.query(InsightConhecimento).all()
+
+
+def analisar_base(db: Session, tipo_analise: str = "geral") -> Dict[str, Any]:
+    """
+    Análise da base de conhecimento a partir dos snapshots.
+
+    Args:
+        db: Sessão do banco de dados
+        tipo_analise: geral, categoria ou tendencias (desconhecido = geral)
+
+    Returns:
+        dict: Relatório no formato de KnowledgeBaseAnalyticsTool
+    """
+    snapshots = listar_snapshots(db)
+    if not snapshots:
+        return {
+            "erro": "Base de conhecimento vazia",
+            "sugestao": "Execute o scraper para coletar dados"
+        }
+    return ANALISES.get(tipo_analise, analise_geral)(snapshots)
+
+
+def resumo_base(db: Session) -> Dict[str, Any]:
+    """Totais por categoria, tipo e site de origem, com a data da última atualização."""
+    snapshots = listar_snapshots(db)
+    if not snapshots:
+        return {
+            "total_licitacoes": 0,
+            "categorias": [],
+            "ultima_atualizacao": None,
+            "status": "vazia"
+        }
+
+    geral = analise_geral(snapshots)
+    sites = Counter()
+    for s in snapshots:
+        _somar(sites, s.sites_origem)
+    return {
+        "total_licitacoes": geral["total_licitacoes"],
+        "distribuicao_categorias": geral["distribuicao_categorias"],
+        "distribuicao_tipos": geral["distribuicao_tipos"],
+        "sites_origem": dict(sites),
+        "ultima_atualizacao": max(s.data_atualizacao for s in snapshots).isoformat(),
+        "status": "ativa"
+    }
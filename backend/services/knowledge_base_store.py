@@ -0,0 +1,187 @@
+"""
+Armazenamento da base de conhecimento de licitações bem-sucedidas (tabela base_conhecimento).
+
+Antes cada coleta gravava um novo data/knowledge_base_<timestamp>.json e os
+leitores precisavam abrir e mesclar todos os arquivos. Agora cada licitação é
+uma linha identificada por (numero_edital, site_origem): coletas repetidas
+atualizam a linha existente (upsert), e as consultas por categoria e tipo de
+licitação usam índice. `migrar_arquivos_json` importa os arquivos antigos uma única vez
+(ver scripts/migrar_base_conhecimento.py).
+"""
+
+import glob
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from api.database_scraping import LicitacaoConhecimento
+from services.knowledge_base_insights import CAMPOS_INSIGHTS, aplicar_alteracoes
+
+logger = logging.getLogger(__name__)
+
+CHAVE = ("numero_edital", "site_origem")
+
+# Campos de LicitacaoSucesso (web_scraping/gov_procurement_scraper.py) gravados na tabela
+CAMPOS = (
+    "numero_edital", "site_origem", "objeto", "categoria", "tipo_licitacao", "modalidade",
+    "orgao", "valor_estimado", "valor_contratado", "numero_propostas", "data_abertura",
+    "data_resultado", "especificacoes_tecnicas", "criterio_julgamento", "prazo_execucao",
+    "fatores_sucesso", "observacoes", "url_fonte",
+)
+CAMPOS_LISTA = ("especificacoes_tecnicas", "fatores_sucesso")
+
+# Linhas por comando de upsert (o SQLite limita as variáveis de um comando)
+TAMANHO_LOTE = 200
+
+
+def _normalizar(licitacao: Dict[str, Any], agora: datetime) -> Optional[Dict[str, Any]]:
+    """Valores da linha a partir do dicionário coletado (None se faltar a chave)."""
+    valores = {campo: licitacao.get(campo) for campo in CAMPOS}
+    if not valores["numero_edital"] or not valores["site_origem"]:
+        return None
+    for campo in CAMPOS_LISTA:
+        valores[campo] = list(valores[campo] or [])
+    valores["data_coleta"] = agora
+    valores["data_atualizacao"] = agora
+    return valores
+
+
+def salvar_licitacoes(db: Session, licitacoes: Iterable[Dict[str, Any]]) -> int:
+    """
+    Insere ou atualiza licitações na base de conhecimento e atualiza os
+    snapshots de estatísticas dos grupos afetados.
+    A gravação só é efetivada no commit da sessão recebida.
+
+    Args:
+        db: Sessão do banco de dados
+        licitacoes: Dicionários no formato de LicitacaoSucesso
+
+    Returns:
+        int: Quantidade de licitações distintas gravadas
+    """
+    agora = datetime.now()
+    # Repetições da mesma chave no lote: vale a última
+    linhas: Dict[tuple, Dict[str, Any]] = {}
+    for licitacao in licitacoes:
+        valores = _normalizar(licitacao, agora)
+        if valores is None:
+            logger.warning("Licitação sem numero_edital/site_origem ignorada na base de conhecimento")
+            continue
+        linhas[tuple(valores[c] for c in CHAVE)] = valores
+    if not linhas:
+        return 0
+
+    lista = list(linhas.values())
+    # Versões anteriores das licitações já gravadas: os snapshots recebem a diferença
+    anteriores = _existentes(db, linhas)
+
+    _gravar(db, lista)
+    aplicar_alteracoes(db, anteriores, lista)
+    return len(lista)
+
+
+def _existentes(db: Session, linhas: Dict[tuple, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Campos dos snapshots (CAMPOS_INSIGHTS) das licitações do lote que já estão na base."""
+    l = LicitacaoConhecimento
+    colunas = [l.numero_edital] + [getattr(l, campo) for campo in CAMPOS_INSIGHTS]
+    numeros = sorted({numero for numero, _ in linhas})
+    existentes = []
+    for inicio in range(0, len(numeros), TAMANHO_LOTE):
+        for numero, *valores in db.query(*colunas).filter(l.numero_edital.in_(numeros[inicio:inicio + TAMANHO_LOTE])):
+            licitacao = dict(zip(CAMPOS_INSIGHTS, valores))
+            if (numero, licitacao["site_origem"]) in linhas:
+                existentes.append(licitacao)
+    return existentes
+
+
+def _gravar(db: Session, lista: List[Dict[str, Any]]):
+    """Upsert das linhas pela chave (numero_edital, site_origem)."""
+    dialeto = db.get_bind().dialect.name
+    tabela = LicitacaoConhecimento.__table__
+
+    if dialeto in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialeto == "sqlite" else pg_insert
+        for inicio in range(0, len(lista), TAMANHO_LOTE):
+            stmt = insert(tabela).values(lista[inicio:inicio + TAMANHO_LOTE])
+            # data_coleta fica com o valor da primeira coleta
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(CHAVE),
+                set_={c: stmt.excluded[c] for c in CAMPOS + ("data_atualizacao",) if c not in CHAVE}
+            )
+            db.execute(stmt)
+        return
+
+    # Demais bancos: leitura e atualização dentro da transação corrente
+    for valores in lista:
+        linha = db.query(LicitacaoConhecimento).filter_by(
+            numero_edital=valores["numero_edital"], site_origem=valores["site_origem"]
+        ).first()
+        if linha is None:
+            db.add(LicitacaoConhecimento(**valores))
+        else:
+            valores.pop("data_coleta")
+            for campo, valor in valores.items():
+                setattr(linha, campo, valor)
+
+
+def licitacao_para_dict(linha: LicitacaoConhecimento) -> Dict[str, Any]:
+    """Licitação no mesmo formato dos antigos arquivos JSON."""
+    dados = {campo: getattr(linha, campo) for campo in CAMPOS}
+    for campo in CAMPOS_LISTA:
+        dados[campo] = dados[campo] or []
+    return dados
+
+
+def carregar_licitacoes(
+    db: Session,
+    categoria: Optional[str] = None,
+    tipo_licitacao: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Licitações da base, opcionalmente filtradas (índice categoria, tipo_licitacao)."""
+    query = db.query(LicitacaoConhecimento)
+    if categoria:
+        query = query.filter(LicitacaoConhecimento.categoria == categoria)
+    if tipo_licitacao:
+        query = query.filter(LicitacaoConhecimento.tipo_licitacao == tipo_licitacao)
+    return [licitacao_para_dict(linha) for linha in query.order_by(LicitacaoConhecimento.id)]
+
+
+def contar_licitacoes(db: Session) -> int:
+    """Total de licitações na base de conhecimento."""
+    return db.query(func.count(LicitacaoConhecimento.id)).scalar() or 0
+
+
+def migrar_arquivos_json(db: Session, diretorio: str = "data/") -> Dict[str, Any]:
+    """
+    Importa os arquivos knowledge_base_*.json para a tabela.
+    Os arquivos são lidos em ordem de nome (timestamp), então a coleta mais
+    recente de um edital prevalece. Pode ser executada mais de uma vez sem duplicar linhas.
+
+    Args:
+        db: Sessão do banco de dados
+        diretorio: Diretório com os arquivos
+
+    Returns:
+        dict: Arquivos migrados, arquivos com erro e registros gravados
+              (um edital presente em vários arquivos conta uma vez por arquivo)
+    """
+    resultado = {"arquivos": [], "erros": {}, "registros": 0}
+    for caminho in sorted(glob.glob(os.path.join(diretorio, "knowledge_base_*.json"))):
+        try:
+            with open(caminho, "r", encoding="utf-8") as f:
+                dados = json.load(f)
+            resultado["registros"] += salvar_licitacoes(db, dados)
+            db.commit()
+            resultado["arquivos"].append(caminho)
+        except Exception as e:
+            db.rollback()
+            resultado["erros"][caminho] = str(e)
+            logger.error(f"Erro ao migrar {caminho}: {str(e)}")
+    return resultado
@@ -0,0 +1,301 @@
+"""
+Registro das execuções de coleta (tabela scrape_runs).
+
+Cada coleta roda dentro de `registrar_execucao`, que grava a linha no início
+e as métricas no fim. O código de scraping obtém o rastreador da execução
+corrente com `execucao_atual()` (via contextvars, sem alterar assinaturas) e
+reporta páginas, linhas extraídas, bytes baixados, erros e o tempo de cada site.
+Fora de uma execução registrada, `execucao_atual()` devolve um rastreador
+avulso, que não é gravado. Execuções que ficaram em "executando" porque o
+processo terminou no meio da coleta são marcadas como "interrompido" por
+`marcar_interrompidas` (no startup da API e nas consultas de status).
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from api.database import SessionLocal
+from api.database_scraping import ExecucaoScraping
+from monitoring.metrics import metricas
+from monitoring.tracing import rastreador
+
+logger = logging.getLogger(__name__)
+
+# Execução marcada como em andamento há mais que isso é considerada abandonada
+TEMPO_MAX_EXECUCAO = timedelta(hours=float(os.getenv("SCRAPING_TEMPO_MAX_EXECUCAO_H", "6")))
+
+_EXECUCAO_ATUAL: ContextVar[Optional["RastreadorExecucao"]] = ContextVar("execucao_scraping", default=None)
+_CONTEXTO: ContextVar[Dict[str, Any]] = ContextVar("contexto_execucao_scraping", default={})
+
+
+class RastreadorExecucao:
+    """
+    Contadores de uma execução de coleta.
+    Usado apenas no loop de eventos da coleta, por isso sem travas.
+    """
+
+    def __init__(self, alvo: str, origem: str = "manual", agendamento_id: Optional[str] = None,
+                 parametros: Optional[Dict[str, Any]] = None):
+        self.id = str(uuid.uuid4())
+        self.alvo = alvo
+        self.origem = origem
+        self.agendamento_id = agendamento_id
+        self.parametros = parametros or {}
+        self.iniciado_em = datetime.now()
+        self.paginas = 0
+        self.linhas_extraidas = 0
+        self.bytes_baixados = 0
+        self.erros = 0
+        self.ultimo_erro: Optional[str] = None
+        self.duracao_por_site: Dict[str, float] = {}
+
+    def pagina(self, quantidade: int = 1):
+        """Conta páginas carregadas (resultados, paginação)."""
+        self.paginas += quantidade
+        metricas.scraping_paginas.rotulos(self.alvo).inc(quantidade)
+
+    def linhas(self, quantidade: int = 1):
+        """Conta registros extraídos."""
+        self.linhas_extraidas += quantidade
+
+    def erro(self, mensagem: str):
+        """Conta um erro e guarda a última mensagem."""
+        self.erros += 1
+        self.ultimo_erro = mensagem[:2000]
+
+    @contextmanager
+    def site(self, nome: str):
+        """Mede o tempo gasto em um site (acumulado se repetido)."""
+        inicio = time.perf_counter()
+        try:
+            with rastreador.span("scraping.site", **{"scraping.alvo": self.alvo, "scraping.site": nome}):
+                yield
+        finally:
+            duracao = time.perf_counter() - inicio
+            self.duracao_por_site[nome] = round(self.duracao_por_site.get(nome, 0.0) + duracao, 3)
+            metricas.scraping_site_duracao.rotulos(self.alvo, nome).observar(duracao)
+
+    def observar_pagina(self, page):
+        """Soma o Content-Length de todas as respostas recebidas por uma página do Playwright."""
+        page.on("response", self._resposta)
+
+    def _resposta(self, response):
+        try:
+            self.bytes_baixados += int(response.headers.get("content-length") or 0)
+        except (TypeError, ValueError):
+            pass
+
+    def status_final(self) -> str:
+        """sucesso, parcial (erros com dados extraídos) ou erro."""
+        if not self.erros:
+            return "sucesso"
+        return "parcial" if self.linhas_extraidas else "erro"
+
+
+def execucao_atual() -> RastreadorExecucao:
+    """Rastreador da execução corrente (ou um avulso, não gravado)."""
+    return _EXECUCAO_ATUAL.get() or RastreadorExecucao("avulsa")
+
+
+@contextmanager
+def contexto_execucao(origem: str, agendamento_id: Optional[str] = None):
+    """Define a origem das execuções iniciadas dentro do bloco (ex.: agendador)."""
+    token = _CONTEXTO.set({"origem": origem, "agendamento_id": agendamento_id})
+    try:
+        yield
+    finally:
+        _CONTEXTO.reset(token)
+
+
+def _gravar_inicio(session_factory: Callable[[], Session], execucao: RastreadorExecucao):
+    db = session_factory()
+    try:
+        db.add(ExecucaoScraping(
+            id=execucao.id, alvo=execucao.alvo, origem=execucao.origem,
+            agendamento_id=execucao.agendamento_id, parametros=execucao.parametros,
+            status="executando", iniciado_em=execucao.iniciado_em
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _gravar_fim(session_factory: Callable[[], Session], execucao: RastreadorExecucao, status: str):
+    finalizado_em = datetime.now()
+    db = session_factory()
+    try:
+        db.query(ExecucaoScraping).filter(ExecucaoScraping.id == execucao.id).update({
+            ExecucaoScraping.status: status,
+            ExecucaoScraping.finalizado_em: finalizado_em,
+            ExecucaoScraping.duracao_segundos: round((finalizado_em - execucao.iniciado_em).total_seconds(), 3),
+            ExecucaoScraping.paginas: execucao.paginas,
+            ExecucaoScraping.linhas_extraidas: execucao.linhas_extraidas,
+            ExecucaoScraping.bytes_baixados: execucao.bytes_baixados,
+            ExecucaoScraping.erros: execucao.erros,
+            ExecucaoScraping.ultimo_erro: execucao.ultimo_erro,
+            ExecucaoScraping.duracao_por_site: execucao.duracao_por_site
+        }, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def registrar_execucao(
+    alvo: str,
+    parametros: Optional[Dict[str, Any]] = None,
+    session_factory: Optional[Callable[[], Session]] = None
+):
+    """
+    Registra uma execução de coleta em scrape_runs.
+    Blocos aninhados do mesmo alvo reaproveitam a execução externa.
+
+    Args:
+        alvo: Coleta executada (gov_procurement, correios)
+        parametros: Parâmetros da coleta, gravados para consulta
+        session_factory: Fábrica de sessões (padrão: SessionLocal)
+    """
+    existente = _EXECUCAO_ATUAL.get()
+    if existente is not None and existente.alvo == alvo:
+        yield existente
+        return
+
+    contexto = _CONTEXTO.get()
+    execucao = RastreadorExecucao(
+        alvo, origem=contexto.get("origem", "manual"),
+        agendamento_id=contexto.get("agendamento_id"), parametros=parametros
+    )
+    fabrica = session_factory or SessionLocal
+    # Falhas ao gravar as métricas não interrompem a coleta
+    try:
+        await asyncio.to_thread(_gravar_inicio, fabrica, execucao)
+    except Exception as e:
+        logger.error(f"Erro ao registrar início da coleta {alvo}: {str(e)}")
+
+    token = _EXECUCAO_ATUAL.set(execucao)
+    em_andamento = metricas.scraping_em_andamento.rotulos(alvo)
+    em_andamento.inc()
+    falhou = False
+    # Span da coleta: sites e consultas SQL da execução ficam abaixo dele
+    with rastreador.span(f"scraping.{alvo}", **{
+        "scraping.execucao_id": execucao.id, "scraping.origem": execucao.origem,
+    }):
+        try:
+            yield execucao
+        except BaseException as e:
+            falhou = True
+            execucao.erro(str(e) or type(e).__name__)
+            raise
+        finally:
+            _EXECUCAO_ATUAL.reset(token)
+            em_andamento.dec()
+            try:
+                await asyncio.to_thread(_gravar_fim, fabrica, execucao, "erro" if falhou else execucao.status_final())
+            except Exception as e:
+                logger.error(f"Erro ao registrar fim da coleta {alvo}: {str(e)}")
+
+
+def marcar_interrompidas(db: Session, agora: Optional[datetime] = None) -> int:
+    """
+    Marca como "interrompido" as execuções em "executando" iniciadas há mais
+    de TEMPO_MAX_EXECUCAO (o processo terminou sem gravar o fim da coleta).
+    A duração fica vazia: o momento real da interrupção não é conhecido.
+
+    Args:
+        db: Sessão do banco de dados (a alteração é confirmada aqui)
+        agora: Momento de referência (padrão: agora)
+
+    Returns:
+        int: Quantidade de execuções marcadas
+    """
+    agora = agora or datetime.now()
+    total = db.query(ExecucaoScraping).filter(
+        ExecucaoScraping.status == "executando",
+        ExecucaoScraping.iniciado_em < agora - TEMPO_MAX_EXECUCAO
+    ).update({
+        ExecucaoScraping.status: "interrompido",
+        ExecucaoScraping.finalizado_em: agora,
+        ExecucaoScraping.ultimo_erro: "Execução interrompida sem registro de fim da coleta",
+    }, synchronize_session=False)
+    if total:
+        db.commit()
+        logger.warning(f"{total} execução(ões) de scraping abandonada(s) marcada(s) como interrompida(s)")
+    return total
+
+
+def execucao_para_dict(execucao: ExecucaoScraping) -> Dict[str, Any]:
+    """Representação de uma execução, com a vazão calculada."""
+    duracao = execucao.duracao_segundos
+    if duracao is None and execucao.status == "executando":
+        duracao = (datetime.now() - execucao.iniciado_em).total_seconds()
+    return {
+        "id": execucao.id,
+        "alvo": execucao.alvo,
+        "origem": execucao.origem,
+        "agendamento_id": execucao.agendamento_id,
+        "parametros": execucao.parametros,
+        "status": execucao.status,
+        "iniciado_em": execucao.iniciado_em.isoformat(),
+        "finalizado_em": execucao.finalizado_em.isoformat() if execucao.finalizado_em else None,
+        "duracao_segundos": round(duracao, 3) if duracao is not None else None,
+        "paginas": execucao.paginas,
+        "linhas_extraidas": execucao.linhas_extraidas,
+        "bytes_baixados": execucao.bytes_baixados,
+        "erros": execucao.erros,
+        "ultimo_erro": execucao.ultimo_erro,
+        "duracao_por_site": execucao.duracao_por_site or {},
+        "linhas_por_segundo": round(execucao.linhas_extraidas / duracao, 3) if duracao else None,
+    }
+
+
+def listar_execucoes(
+    db: Session,
+    alvo: Optional[str] = None,
+    status: Optional[str] = None,
+    limit: int = 50
+) -> List[ExecucaoScraping]:
+    """Execuções mais recentes primeiro (índices por alvo/status e início)."""
+    query = db.query(ExecucaoScraping)
+    if alvo:
+        query = query.filter(ExecucaoScraping.alvo == alvo)
+    if status:
+        query = query.filter(ExecucaoScraping.status == status)
+    return query.order_by(ExecucaoScraping.iniciado_em.desc()).limit(limit).all()
+
+
+def resumir_execucoes(execucoes: List[ExecucaoScraping]) -> Dict[str, Any]:
+    """Médias de duração e vazão por alvo entre execuções concluídas."""
+    por_alvo: Dict[str, Dict[str, Any]] = {}
+    for execucao in execucoes:
+        if execucao.status == "executando" or not execucao.duracao_segundos:
+            continue
+        resumo = por_alvo.setdefault(execucao.alvo, {
+            "execucoes": 0, "falhas": 0, "duracao_total": 0.0, "linhas": 0, "paginas": 0, "bytes": 0
+        })
+        resumo["execucoes"] += 1
+        resumo["falhas"] += execucao.status == "erro"
+        resumo["duracao_total"] += execucao.duracao_segundos
+        resumo["linhas"] += execucao.linhas_extraidas
+        resumo["paginas"] += execucao.paginas
+        resumo["bytes"] += execucao.bytes_baixados
+
+    return {
+        alvo: {
+            "execucoes": r["execucoes"],
+            "falhas": r["falhas"],
+            "duracao_media_segundos": round(r["duracao_total"] / r["execucoes"], 3),
+            "linhas_por_segundo": round(r["linhas"] / r["duracao_total"], 3),
+            "paginas_por_segundo": round(r["paginas"] / r["duracao_total"], 3),
+            "bytes_por_segundo": round(r["bytes"] / r["duracao_total"], 1),
+        }
+        for alvo, r in por_alvo.items()
+    }
@@ -0,0 +1,250 @@
+"""
+Agendador interno da coleta de licitações (web scraping).
+
+Os agendamentos ficam na tabela agendamento_scraping com uma expressão cron.
+O agendador roda no loop de eventos da API e, a cada verificação:
+- lê apenas os agendamentos vencidos (índice ativo, proxima_execucao);
+- pula a execução se a anterior do mesmo agendamento ainda está em andamento;
+- após um período parado, executa uma única vez as execuções perdidas
+  (ou apenas avança, se recuperar_perdidas=False);
+- soma um atraso aleatório (jitter) ao próximo horário, para espalhar as coletas;
+- limita as coletas simultâneas com um semáforo.
+
+A reserva de cada execução é um UPDATE condicionado ao horário previsto, então
+vários processos da API podem rodar o agendador sem disparar a mesma coleta duas vezes.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from api.database import SessionLocal
+from api.database_scraping import AgendamentoScraping
+from services.cron import ExpressaoCron
+from services.scrape_runs import TEMPO_MAX_EXECUCAO, contexto_execucao
+
+logger = logging.getLogger(__name__)
+
+# Coletas simultâneas (cada uma abre um navegador)
+MAX_CONCORRENTES = int(os.getenv("SCRAPING_MAX_CONCORRENTES", "2"))
+# Intervalo máximo entre verificações dos agendamentos
+INTERVALO_VERIFICACAO_S = float(os.getenv("SCRAPING_INTERVALO_VERIFICACAO_S", "30"))
+# Atraso tolerado para uma execução não ser tratada como perdida
+TOLERANCIA_ATRASO = timedelta(minutes=5)
+
+# Frequências aceitas pelo endpoint de agendamento
+FREQUENCIAS_CRON = {
+    "diaria": "0 6 * * *",
+    "semanal": "0 6 * * 1",
+    "mensal": "0 6 1 * *",
+}
+
+
+async def _coletar_gov_procurement(parametros: Dict[str, Any]):
+    """Coleta nos portais de compras governamentais para a base de conhecimento"""
+    from api.scraping_endpoints import CATEGORIAS_PADRAO, executar_scraping_background
+    await executar_scraping_background(
+        parametros.get("categorias") or CATEGORIAS_PADRAO,
+        parametros.get("sites"),
+        parametros.get("salvar_automatico", True)
+    )
+
+
+async def _coletar_correios(parametros: Dict[str, Any]):
+    """Busca no portal dos Correios as licitações publicadas nos últimos dias"""
+    from web_scraping.mcp_playwright import search_new_licitacoes_correios
+    hoje = datetime.now()
+    inicio = hoje - timedelta(days=parametros.get("dias_retroativos", 1))
+    await search_new_licitacoes_correios(
+        data_inicial=inicio.strftime("%d/%m/%Y"),
+        data_final=hoje.strftime("%d/%m/%Y")
+    )
+
+
+EXECUTORES: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]] = {
+    "gov_procurement": _coletar_gov_procurement,
+    "correios": _coletar_correios,
+}
+
+
+def calcular_proxima(agendamento: AgendamentoScraping, apos: datetime) -> datetime:
+    """Próximo horário da expressão cron após `apos`, com o jitter do agendamento."""
+    proxima = ExpressaoCron(agendamento.expressao_cron).proxima(apos)
+    if agendamento.jitter_segundos:
+        proxima += timedelta(seconds=random.uniform(0, agendamento.jitter_segundos))
+    return proxima
+
+
+class AgendadorScraping:
+    """
+    Dispara as coletas agendadas no banco.
+    """
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable[[], Session]] = None,
+        executores: Optional[Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]]] = None,
+        max_concorrentes: int = MAX_CONCORRENTES,
+        intervalo_verificacao: float = INTERVALO_VERIFICACAO_S
+    ):
+        self.session_factory = session_factory or SessionLocal
+        self.executores = executores or EXECUTORES
+        self.max_concorrentes = max_concorrentes
+        self.intervalo_verificacao = intervalo_verificacao
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._tarefa: Optional[asyncio.Task] = None
+        self._execucoes: Dict[str, asyncio.Task] = {}
+
+    async def iniciar(self):
+        """Inicia o laço de verificação dos agendamentos."""
+        if self._tarefa is None:
+            self._tarefa = asyncio.create_task(self._executar())
+
+    async def parar(self):
+        """Interrompe o laço e as coletas em andamento."""
+        tarefas = list(self._execucoes.values())
+        if self._tarefa is not None:
+            tarefas.append(self._tarefa)
+        for tarefa in tarefas:
+            tarefa.cancel()
+        await asyncio.gather(*tarefas, return_exceptions=True)
+        self._tarefa = None
+
+    async def _executar(self):
+        while True:
+            try:
+                await self.verificar()
+            except Exception as e:
+                logger.error(f"Erro ao verificar agendamentos de scraping: {str(e)}")
+
+            espera = self.intervalo_verificacao
+            try:
+                proxima = await asyncio.to_thread(self.proxima_execucao)
+                if proxima is not None:
+                    espera = min(espera, max((proxima - datetime.now()).total_seconds(), 1))
+            except Exception as e:
+                logger.error(f"Erro ao consultar próxima execução de scraping: {str(e)}")
+            await asyncio.sleep(espera)
+
+    async def verificar(self, agora: Optional[datetime] = None) -> List[str]:
+        """
+        Dispara as coletas vencidas.
+
+        Returns:
+            List[str]: IDs dos agendamentos disparados
+        """
+        if self._semaforo is None:
+            self._semaforo = asyncio.Semaphore(self.max_concorrentes)
+
+        reservas = await asyncio.to_thread(self.reservar_vencidos, agora or datetime.now())
+        for reserva in reservas:
+            tarefa = asyncio.create_task(self._rodar(reserva))
+            self._execucoes[reserva["id"]] = tarefa
+            tarefa.add_done_callback(lambda _, i=reserva["id"]: self._execucoes.pop(i, None))
+        return [reserva["id"] for reserva in reservas]
+
+    async def aguardar(self):
+        """Aguarda as coletas em andamento (usado em testes e no encerramento)."""
+        await asyncio.gather(*list(self._execucoes.values()), return_exceptions=True)
+
+    def reservar_vencidos(self, agora: datetime) -> List[Dict[str, Any]]:
+        """
+        Avança os agendamentos vencidos e reserva os que devem executar.
+
+        Returns:
+            List[Dict]: id, alvo e parâmetros de cada coleta a disparar
+        """
+        a = AgendamentoScraping
+        db = self.session_factory()
+        try:
+            vencidos = db.query(a).filter(a.ativo.is_(True), a.proxima_execucao <= agora).order_by(a.proxima_execucao).all()
+            reservas = []
+            for agendamento in vencidos:
+                prevista = agendamento.proxima_execucao
+                valores = {a.proxima_execucao: calcular_proxima(agendamento, agora)}
+
+                em_andamento = agendamento.em_execucao and agendamento.execucao_iniciada_em and \
+                    agendamento.execucao_iniciada_em > agora - TEMPO_MAX_EXECUCAO
+                perdida = prevista < agora - TOLERANCIA_ATRASO and not agendamento.recuperar_perdidas
+
+                if em_andamento or perdida:
+                    # Sobreposição ou execução perdida sem recuperação: só avança o horário
+                    valores[a.ultimo_status] = "pulada"
+                    if em_andamento:
+                        valores[a.execucoes_puladas] = a.execucoes_puladas + 1
+                else:
+                    valores.update({
+                        a.em_execucao: True,
+                        a.execucao_iniciada_em: agora,
+                        a.ultima_execucao: agora,
+                    })
+
+                # Condição no horário previsto: outro processo pode ter reservado antes
+                reservado = db.query(a).filter(a.id == agendamento.id, a.proxima_execucao == prevista) \
+                    .update(valores, synchronize_session=False)
+                if reservado and not (em_andamento or perdida):
+                    reservas.append({
+                        "id": agendamento.id,
+                        "alvo": agendamento.alvo,
+                        "parametros": agendamento.parametros or {},
+                        "prevista": prevista
+                    })
+                elif reservado:
+                    logger.warning(f"Coleta {agendamento.id} pulada ({'em andamento' if em_andamento else 'perdida'})")
+            db.commit()
+            return reservas
+        finally:
+            db.close()
+
+    async def _rodar(self, reserva: Dict[str, Any]):
+        """Executa uma coleta respeitando o limite de coletas simultâneas."""
+        status, erro = "sucesso", None
+        try:
+            async with self._semaforo:
+                executor = self.executores.get(reserva["alvo"])
+                if executor is None:
+                    raise ValueError(f"Alvo de scraping desconhecido: {reserva['alvo']}")
+                logger.info(f"Iniciando coleta agendada {reserva['id']} ({reserva['alvo']})")
+                # Execuções registradas em scrape_runs ficam ligadas ao agendamento
+                with contexto_execucao("agendado", reserva["id"]):
+                    await executor(reserva["parametros"])
+        except asyncio.CancelledError:
+            status, erro = "erro", "Execução interrompida"
+            raise
+        except Exception as e:
+            status, erro = "erro", str(e)
+            logger.error(f"Erro na coleta agendada {reserva['id']}: {str(e)}")
+        finally:
+            await asyncio.to_thread(self._concluir, reserva["id"], status, erro)
+
+    def _concluir(self, agendamento_id: str, status: str, erro: Optional[str]):
+        db = self.session_factory()
+        try:
+            db.query(AgendamentoScraping).filter(AgendamentoScraping.id == agendamento_id).update({
+                AgendamentoScraping.em_execucao: False,
+                AgendamentoScraping.ultima_conclusao: datetime.now(),
+                AgendamentoScraping.ultimo_status: status,
+                AgendamentoScraping.ultimo_erro: erro
+            }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def proxima_execucao(self) -> Optional[datetime]:
+        """Horário do próximo agendamento ativo (consulta ao índice)."""
+        db = self.session_factory()
+        try:
+            return db.query(func.min(AgendamentoScraping.proxima_execucao)).filter(
+                AgendamentoScraping.ativo.is_(True)
+            ).scalar()
+        finally:
+            db.close()
+
+# Instância usada pela API (iniciada no startup de api/app.py)
+agendador_scraping = AgendadorScraping()
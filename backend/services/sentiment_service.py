@@ -0,0 +1,261 @@
+"""
+Serviço de análise de sentimento para textos de feedback.
+
+- Pontuação em lote, distribuída em um pool de processos para volumes grandes.
+- Cache no banco (tabela sentimento_texto) indexado pelo hash do texto, de
+  modo que cada texto é analisado uma única vez por motor.
+- Motor padrão: léxico de português com tratamento de negação e intensidade.
+  O TextBlob é opcional (SENTIMENT_ENGINE=textblob) e só é importado quando usado.
+"""
+
+import hashlib
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from crewai_agents.keyword_matcher import dobrar_acentos
+
+logger = logging.getLogger(__name__)
+
+MOTOR_LEXICO = "lexico-v1"
+MOTOR_TEXTBLOB = "textblob"
+
+# Campos de texto livre de cada tipo de feedback
+CAMPOS_TEXTO = {
+    "setor": ("pontos_positivos", "pontos_negativos", "sugestoes_melhoria", "problemas_encontrados"),
+    "empresa": ("aspectos_positivos", "aspectos_negativos", "sugestoes_especificas", "comparacao_outros_editais"),
+    "licitacao": ("pontos_fortes", "areas_melhoria", "erros_identificados", "sugestoes_tecnicas"),
+}
+
+# A partir deste número de textos distintos o lote é dividido entre processos
+LIMIAR_PROCESSOS = int(os.getenv("SENTIMENT_LIMIAR_PROCESSOS", "2000"))
+TAMANHO_BLOCO = 500
+
+# Léxico (sem acentos) usado pelo motor padrão
+PALAVRAS_POSITIVAS = frozenset("""
+    bom boa bons boas otimo otima excelente claro clara claros claras facil faceis rapido rapida
+    eficiente eficientes satisfeito satisfeita satisfatorio adequado adequada adequados util uteis
+    pratico pratica agil simples completo completa organizado organizada intuitivo intuitiva
+    melhorou melhoria economia preciso precisa correto correta gostei aprovado aprovada recomendo
+    positivo positiva funcional objetivo objetiva transparente padronizado padronizada
+""".split())
+PALAVRAS_NEGATIVAS = frozenset("""
+    ruim ruins pessimo pessima dificil dificeis lento lenta confuso confusa erro erros falha falhas
+    problema problemas demora demorado demorada atraso atrasos incompleto incompleta restritivo
+    restritiva restritivas inadequado inadequada complicado complicada burocratico burocratica
+    insatisfeito insatisfeita travou travando bug bugs ambiguo ambigua impreciso imprecisa vago vaga
+    excessivo excessiva excessivas caro cara falta faltou faltam negativo negativa reclamacao
+    reclamacoes impugnacao impugnacoes retrabalho
+""".split())
+NEGACOES = frozenset({"nao", "nunca", "nem", "sem", "jamais", "nenhum", "nenhuma"})
+INTENSIFICADORES = {"muito": 1.5, "bastante": 1.5, "extremamente": 2.0, "super": 1.5, "pouco": 0.5}
+# Quantidade de palavras seguintes afetadas por uma negação
+ALCANCE_NEGACAO = 3
+
+_TOKEN = re.compile(r"[^\W_]+")
+
+
+def motor_padrao() -> str:
+    """Motor configurado em SENTIMENT_ENGINE (léxico se ausente ou indisponível)."""
+    if os.getenv("SENTIMENT_ENGINE", "").lower() == MOTOR_TEXTBLOB and _textblob() is not None:
+        return MOTOR_TEXTBLOB
+    return MOTOR_LEXICO
+
+
+@lru_cache(maxsize=1)
+def _textblob():
+    """Importa o TextBlob sob demanda; None se não estiver instalado."""
+    try:
+        from textblob import TextBlob
+        return TextBlob
+    except ImportError:
+        logger.warning("TextBlob não instalado; usando o léxico de português")
+        return None
+
+
+def polaridade_lexico(texto: str) -> float:
+    """
+    Polaridade de um texto pelo léxico de português.
+
+    Returns:
+        float: Valor entre -1 (negativo) e 1 (positivo); 0 sem termos opinativos
+    """
+    soma, ocorrencias = 0.0, 0
+    negacao_restante, intensidade = 0, 1.0
+
+    for token in _TOKEN.findall(dobrar_acentos(texto)):
+        if token in NEGACOES:
+            negacao_restante = ALCANCE_NEGACAO
+            continue
+        if token in INTENSIFICADORES:
+            intensidade = INTENSIFICADORES[token]
+            continue
+
+        valor = 1.0 if token in PALAVRAS_POSITIVAS else -1.0 if token in PALAVRAS_NEGATIVAS else 0.0
+        if valor:
+            if negacao_restante:
+                valor = -valor
+            soma += valor * intensidade
+            ocorrencias += 1
+        intensidade = 1.0
+        negacao_restante = max(negacao_restante - 1, 0)
+
+    if not ocorrencias:
+        return 0.0
+    return max(-1.0, min(1.0, soma / ocorrencias))
+
+
+def pontuar_texto(texto: str, motor: str = MOTOR_LEXICO) -> float:
+    """Polaridade de um texto com o motor indicado."""
+    if motor == MOTOR_TEXTBLOB:
+        TextBlob = _textblob()
+        if TextBlob is not None:
+            return float(TextBlob(texto).sentiment.polarity)
+    return polaridade_lexico(texto)
+
+
+def rotulo_sentimento(polaridade: float) -> str:
+    """Classifica a polaridade em negativo, neutro ou positivo."""
+    if polaridade > 0.1:
+        return "positivo"
+    if polaridade < -0.1:
+        return "negativo"
+    return "neutro"
+
+
+def _pontuar_bloco(motor: str, textos: List[str]) -> List[float]:
+    """Pontua um bloco de textos (executado nos processos do pool)."""
+    return [pontuar_texto(texto, motor) for texto in textos]
+
+
+def pontuar_lote(textos: Iterable[str], motor: Optional[str] = None, processos: Optional[int] = None) -> Dict[str, float]:
+    """
+    Pontua vários textos, dividindo o trabalho entre processos quando o lote é grande.
+
+    Args:
+        textos: Textos a pontuar (repetidos são pontuados uma vez)
+        motor: Motor de sentimento (padrão: motor_padrao())
+        processos: Número de processos do pool (padrão: núcleos disponíveis)
+
+    Returns:
+        Dict[str, float]: Polaridade de cada texto distinto
+    """
+    motor = motor or motor_padrao()
+    unicos = list(dict.fromkeys(texto for texto in textos if texto))
+    if not unicos:
+        return {}
+
+    processos = processos or os.cpu_count() or 1
+    if len(unicos) < LIMIAR_PROCESSOS or processos < 2:
+        return dict(zip(unicos, _pontuar_bloco(motor, unicos)))
+
+    blocos = [unicos[i:i + TAMANHO_BLOCO] for i in range(0, len(unicos), TAMANHO_BLOCO)]
+    polaridades: List[float] = []
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        for resultado in executor.map(_pontuar_bloco, [motor] * len(blocos), blocos):
+            polaridades.extend(resultado)
+    return dict(zip(unicos, polaridades))
+
+
+def hash_texto(texto: str) -> str:
+    """Hash estável do texto (espaços normalizados) usado como chave do cache."""
+    return hashlib.sha256(" ".join(texto.split()).encode("utf-8")).hexdigest()
+
+
+def _gravar_cache(db, linhas: List[Dict]) -> None:
+    """Insere entradas no cache ignorando hashes já gravados por outro processo."""
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
+    from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+    from api.database_feedback import SentimentoTexto
+
+    dialeto = db.get_bind().dialect.name
+    if dialeto in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialeto == "sqlite" else pg_insert
+        db.execute(insert(SentimentoTexto.__table__).values(linhas).on_conflict_do_nothing())
+    else:
+        for linha in linhas:
+            db.merge(SentimentoTexto(**linha))
+
+
+def obter_sentimentos(db, textos: Iterable[str], motor: Optional[str] = None, commit: bool = True) -> Dict[str, Dict]:
+    """
+    Sentimento de cada texto, lido do cache ou calculado e gravado no cache.
+
+    Args:
+        db: Sessão do banco de dados
+        textos: Textos de feedback
+        motor: Motor de sentimento (padrão: motor_padrao())
+        commit: False para gravar o cache na transação do chamador
+
+    Returns:
+        Dict[str, Dict]: {texto: {"polaridade": float, "rotulo": str}}
+    """
+    from api.database_feedback import SentimentoTexto
+
+    motor = motor or motor_padrao()
+    hashes = {texto: hash_texto(texto) for texto in set(textos) if texto and texto.strip()}
+    if not hashes:
+        return {}
+
+    # Consulta em blocos para não exceder o limite de parâmetros do banco
+    em_cache: Dict[str, float] = {}
+    valores_hash = list(set(hashes.values()))
+    for i in range(0, len(valores_hash), TAMANHO_BLOCO):
+        bloco = valores_hash[i:i + TAMANHO_BLOCO]
+        for texto_hash, polaridade in db.query(SentimentoTexto.texto_hash, SentimentoTexto.polaridade).filter(
+            SentimentoTexto.motor == motor, SentimentoTexto.texto_hash.in_(bloco)
+        ):
+            em_cache[texto_hash] = polaridade
+
+    faltantes = [texto for texto, h in hashes.items() if h not in em_cache]
+    if faltantes:
+        calculados = pontuar_lote(faltantes, motor)
+        agora = datetime.now()
+        linhas = {}
+        for texto, polaridade in calculados.items():
+            em_cache[hashes[texto]] = polaridade
+            linhas[hashes[texto]] = {
+                "texto_hash": hashes[texto], "motor": motor, "polaridade": polaridade,
+                "rotulo": rotulo_sentimento(polaridade), "data_calculo": agora
+            }
+        lista = list(linhas.values())
+        for i in range(0, len(lista), TAMANHO_BLOCO):
+            _gravar_cache(db, lista[i:i + TAMANHO_BLOCO])
+        if commit:
+            db.commit()
+
+    return {
+        texto: {"polaridade": em_cache[h], "rotulo": rotulo_sentimento(em_cache[h])}
+        for texto, h in hashes.items()
+    }
+
+
+def textos_do_feedback(tipo: str, feedback) -> List[str]:
+    """Textos livres preenchidos de um feedback (objeto ORM ou dicionário)."""
+    obter = feedback.get if isinstance(feedback, dict) else lambda campo: getattr(feedback, campo, None)
+    return [obter(campo) for campo in CAMPOS_TEXTO[tipo] if obter(campo)]
+
+
+def consultar_sentimentos(textos: Iterable[str]) -> Dict[str, Dict]:
+    """
+    Sentimentos usando o cache do banco; sem banco disponível, calcula em memória.
+    Ponto de entrada usado pelas ferramentas de análise dos agentes.
+    """
+    textos = list(textos)
+    try:
+        from api.database import SessionLocal
+        db = SessionLocal()
+        try:
+            return obter_sentimentos(db, textos)
+        finally:
+            db.close()
+    except Exception as e:
+        logger.warning(f"Cache de sentimento indisponível, calculando em memória: {str(e)}")
+        return {
+            texto: {"polaridade": polaridade, "rotulo": rotulo_sentimento(polaridade)}
+            for texto, polaridade in pontuar_lote(textos).items()
+        }
@@ -0,0 +1,12 @@
+"""
+Configuração comum dos testes do backend.
+Os módulos são importados como `api.*`, `services.*` etc., então o diretório
+backend precisa estar no sys.path independentemente de onde o pytest é executado.
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
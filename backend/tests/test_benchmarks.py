@@ -0,0 +1,82 @@
+"""
+Testes da suíte de benchmarks (comparação com baselines).
+"""
+
+from benchmarks import suite
+
+
+def test_comparacao_com_baseline():
+    medicao = {"caso": "c", "escala": "1k", "segundos": 0.13, "relativo": 1.3}
+    assert suite.comparar(medicao, 1.0, 0.25)["status"] == "regressao"
+    assert suite.comparar(medicao, 1.1, 0.25)["status"] == "ok"
+    assert suite.comparar(medicao, None, 0.25)["status"] == "sem_baseline"
+
+
+def test_medicao_relativa_independe_da_velocidade_da_maquina(tmp_path, monkeypatch):
+    # Mesmo caso em uma máquina 3x mais lenta: segundos mudam, o tempo relativo não
+    caso_atual = suite.Caso("c", "", lambda n, diretorio: lambda: None)
+
+    def em_maquina(fator):
+        relogio = iter([0.0, 0.2 * fator])
+        monkeypatch.setattr(suite.time, "perf_counter", lambda: next(relogio))
+        monkeypatch.setattr(suite, "calibrar", lambda repeticoes: 0.1 * fator)
+        return suite.medir(caso_atual, 1000, 1, str(tmp_path))
+
+    rapida, lenta = em_maquina(1), em_maquina(3)
+    assert (rapida["segundos"], lenta["segundos"]) == (0.2, 0.6)
+    assert rapida["relativo"] == lenta["relativo"] == 2.0
+    assert suite.comparar(lenta, rapida["relativo"], 0.25)["status"] == "ok"
+
+
+def test_baselines_cobrem_os_casos_executaveis(tmp_path):
+    # Todo caso que roda neste ambiente tem baseline em todas as escalas até o seu limite
+    gravadas = suite.carregar_baselines()["casos"]
+    assert set(gravadas) <= set(suite.CASOS)
+    with suite.banco_temporario(str(tmp_path)):
+        for nome, caso_atual in suite.CASOS.items():
+            try:
+                caso_atual.preparar(suite.ESCALAS["1k"], str(tmp_path))
+            except ImportError:
+                continue
+            esperadas = {e for e, n in suite.ESCALAS.items() if n <= caso_atual.limite}
+            assert set(gravadas.get(nome, {})) == esperadas, nome
+
+
+def test_suite_mede_e_grava_baselines(tmp_path, monkeypatch):
+    def indisponivel(n, diretorio):
+        import modulo_inexistente  # noqa: F401
+
+    monkeypatch.setitem(suite.CASOS, "indisponivel", suite.Caso("indisponivel", "", indisponivel))
+    baselines = {"casos": {"feedback_analise": {"1k": 1e-9}}}
+
+    resultados = suite.executar_suite(["feedback_analise", "indisponivel"], ["1k", "100k"], repeticoes=1,
+                                      baselines=baselines, diretorio=str(tmp_path))
+    por_caso = {(r["caso"], r["escala"]): r for r in resultados}
+    assert por_caso[("feedback_analise", "1k")]["status"] == "regressao"
+    assert por_caso[("feedback_analise", "100k")]["status"] == "sem_baseline"
+    # Sem a dependência, o caso não é tentado nas demais escalas
+    assert [r["status"] for r in resultados if r["caso"] == "indisponivel"] == ["indisponivel"]
+
+    caminho = tmp_path / "baselines.json"
+    suite.salvar_baselines(resultados, str(caminho))
+    gravadas = suite.carregar_baselines(str(caminho))["casos"]
+    assert set(gravadas) == {"feedback_analise"}
+    assert set(gravadas["feedback_analise"]) == {"1k", "100k"}
+    assert gravadas["feedback_analise"]["1k"] == por_caso[("feedback_analise", "1k")]["relativo"]
+
+
+def test_ferramentas_dos_agentes_sem_crewai_tools():
+    import sys
+
+    ferramenta = suite._ferramenta("crewai_agents.edital_tools", "CalcularRiscoTool")()
+    assert "risco_geral" in ferramenta._run(suite.dados.analises_json()[0])
+    # O BaseTool substituto não fica visível para o restante do processo
+    if "crewai_tools" not in sys.modules:
+        assert "crewai_agents.edital_tools" not in sys.modules
+
+
+def test_salvar_licitacao_tolera_a_variacao_do_disco():
+    medicao = {"caso": "salvar_licitacao", "escala": "1k", "segundos": 1.0, "relativo": 13.0}
+    tolerancia = suite.CASOS["salvar_licitacao"].tolerancia
+    assert suite.comparar(medicao, 10.0, tolerancia)["status"] == "ok"
+    assert suite.comparar(medicao, 10.0, suite.TOLERANCIA_PADRAO)["status"] == "regressao"
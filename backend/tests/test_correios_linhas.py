@@ -0,0 +1,103 @@
+"""
+Testes da leitura das linhas de resultado dos Correios (web_scraping/mcp_playwright.py).
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from benchmarks import dados
+from web_scraping.mcp_playwright import (
+    _JS_LINHAS_CORREIOS, _SELETOR_LINHAS_CORREIOS, _linha_correios, _registro_correios
+)
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "correios_resultados.html")
+
+# O que _JS_LINHAS_CORREIOS lê das linhas com tabela de detalhes da fixture
+LINHAS_FIXTURE = [
+    {
+        "celulas": [
+            ["Objeto:", "Aquisição de equipamentos de triagem"],
+            ["Número:", "00101/2024", "Tipo:", "Menor Preço"],
+            ["Publicação:", "01/03/2024", "Abertura:", "15/03/2024 10:00"],
+            ["Modalidade:", "Pregão Eletrônico", "UASG:", "400101"],
+            ["Dependência:", "CS - Brasília", "UF:", "DF"],
+            ["Itens:", "12", "NUP:", "53180.000101/2024-11"],
+        ],
+        "objeto": "Aquisição de equipamentos de triagem",
+        "url": "detalhe.php?id=101",
+    },
+    {
+        "celulas": [
+            ["Objeto:", "Serviços de manutenção predial"],
+            ["Número:", "00102/2024", "Tipo:", "Menor Preço"],
+            ["Publicação:", "02/03/2024", "Abertura:", "18/03/2024 14:00"],
+            ["Modalidade:", "Pregão Eletrônico", "UASG:", "400102"],
+            ["Dependência:", "SE - São Paulo"],
+        ],
+        "objeto": "Serviços de manutenção predial",
+        "url": "",
+    },
+]
+
+
+def test_js_le_as_linhas_da_pagina_de_resultados():
+    async_api = pytest.importorskip("playwright.async_api")
+    with open(FIXTURE, "r", encoding="utf-8") as arquivo:
+        html = arquivo.read()
+
+    async def ler():
+        async with async_api.async_playwright() as p:
+            try:
+                browser = await p.chromium.launch()
+            except async_api.Error as e:
+                pytest.skip(f"Chromium indisponível: {e}")
+            try:
+                page = await browser.new_page()
+                await page.set_content(html)
+                return await page.locator(_SELETOR_LINHAS_CORREIOS).evaluate_all(_JS_LINHAS_CORREIOS)
+            finally:
+                await browser.close()
+
+    linhas = asyncio.run(ler())
+    # As linhas das tabelas aninhadas e a linha sem detalhes voltam como None
+    assert len(linhas) == 3 + 6 + 5
+    assert [l for l in linhas if l is not None] == LINHAS_FIXTURE
+
+
+def test_linhas_da_fixture_viram_licitacoes():
+    completa, incompleta = (_linha_correios(l) for l in LINHAS_FIXTURE)
+    assert completa == {
+        "objeto": "Aquisição de equipamentos de triagem",
+        "numero_edital": "00101/2024",
+        "tipo_licitacao": "Menor Preço",
+        "data_publicacao": "01/03/2024",
+        "data_abertura": "15/03/2024 10:00",
+        "modalidade": "Pregão Eletrônico",
+        "uasg": "400101",
+        "dependencia": "CS - Brasília",
+        "uf": "DF",
+        "quantidade_itens": "12",
+        "nup": "53180.000101/2024-11",
+        "url": "detalhe.php?id=101",
+    }
+    # Sem a última linha de detalhes nem a UF, e objeto sem link
+    assert (incompleta["uf"], incompleta["nup"], incompleta["quantidade_itens"], incompleta["url"]) == ("", "", "", "")
+    assert incompleta["dependencia"] == "SE - São Paulo"
+
+    registro = _registro_correios(completa, 0)
+    assert registro["id"] == "00101/2024"
+    assert registro["link_original"] == "detalhe.php?id=101"
+    assert "url" not in registro
+
+
+def test_linha_correios_com_celulas_ausentes():
+    linhas = dados.linhas_correios(11)
+    incompleta = _linha_correios(linhas[10])
+    assert (incompleta["uf"], incompleta["nup"], incompleta["quantidade_itens"]) == ("", "", "")
+    assert _linha_correios({"celulas": None, "objeto": None, "url": None})["objeto"] == ""
+
+    registro = _registro_correios({**incompleta, "numero_edital": ""}, 7)
+    assert registro["id"] == "7"
+    assert registro["link_original"] == "detalhe.php?id=10"
@@ -0,0 +1,47 @@
+"""
+Testes da configuração do engine do banco de dados.
+"""
+
+import threading
+
+from sqlalchemy import text
+
+from api.database import criar_engine
+
+
+def test_sqlite_usa_wal_e_busy_timeout(tmp_path, monkeypatch):
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+    engine = criar_engine(f"sqlite:///{tmp_path / 'teste.db'}")
+
+    with engine.connect() as conn:
+        assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+        assert conn.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+    engine.dispose()
+
+
+def test_sqlite_escritores_concorrentes_nao_falham(tmp_path):
+    engine = criar_engine(f"sqlite:///{tmp_path / 'concorrente.db'}")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (id INTEGER PRIMARY KEY, valor TEXT)"))
+
+    erros = []
+
+    def escrever(n):
+        try:
+            for i in range(50):
+                with engine.begin() as conn:
+                    conn.execute(text("INSERT INTO t (valor) VALUES (:v)"), {"v": f"{n}-{i}"})
+        except Exception as e:
+            erros.append(e)
+
+    threads = [threading.Thread(target=escrever, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert erros == []
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT count(*) FROM t")).scalar() == 200
+    engine.dispose()
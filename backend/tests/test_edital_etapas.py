@@ -0,0 +1,158 @@
+"""
+Testes dos registros estruturados das etapas da geração de editais.
+"""
+
+import json
+
+from crewai_agents.edital_etapas import (
+    AREAS_ANALISE, ResultadosEtapas, ValidacaoRequisitos, EditalProduzido, extrair_json
+)
+
+REQUISITOS = {
+    "objeto": "Contratação de serviços de limpeza",
+    "tipo_licitacao": "pregao",
+    "modalidade": "eletronica",
+    "categoria": "servicos",
+    "setor_requisitante": {"nome": "Gerência de Facilities", "justificativa": "Limpeza predial " * 20},
+    "itens": [{"numero": 1, "descricao": "Serviços de limpeza predial", "unidade": "m²", "quantidade": 1000}],
+    "requisitos_juridicos": [{"descricao": "Regularidade fiscal", "base_legal": "Lei 14.133/2021"}],
+    "valor_total_estimado": 50000.0,
+    "prazo_execucao": 365,
+    "prazo_proposta": 10,
+}
+
+EDITAL = "CLÁUSULA PRIMEIRA - DO OBJETO. " * 200
+
+SAIDAS = {
+    "validacao": json.dumps({
+        "status": "aprovado", "complexidade": "media",
+        "problemas_identificados": ["Falta código do setor"],
+        "sugestoes_melhoria": ["Detalhar frequência da limpeza"],
+        "requisitos_normalizados": REQUISITOS,
+    }, ensure_ascii=False),
+    "juridica": "```json\n" + json.dumps({
+        "conforme": True, "risco_juridico": "baixo",
+        "pontos_atencao": ["Prazo de proposta no limite legal"],
+        "sugestoes_melhoria": ["Citar art. 55"], "fundamentacao": "Lei 14.133/2021 " * 100,
+    }) + "\n```",
+    "tecnica": json.dumps({"viabilidade": True, "risco_tecnico": {"nivel": "MEDIO", "justificativa": "x" * 500}}),
+    "financeira": "Os valores estão compatíveis com o mercado.",
+    "risco": json.dumps({
+        "risco_geral": "medio", "probabilidade_sucesso": "0.8",
+        "fatores_risco": ["Especificação genérica"], "medidas_mitigacao": ["Detalhar especificação"],
+        "recomendacao": "Prosseguir",
+    }),
+    "gerado": json.dumps({"conteudo_edital": EDITAL, "template_utilizado": "servicos_v2"}, ensure_ascii=False),
+    "otimizado": json.dumps({
+        "edital_otimizado": EDITAL + "CLÁUSULA FINAL.", "otimizacoes_aplicadas": ["Cláusula de sustentabilidade"],
+    }, ensure_ascii=False),
+}
+
+
+def _etapas_completas():
+    etapas = ResultadosEtapas(REQUISITOS)
+    etapas.registrar_validacao(SAIDAS["validacao"])
+    for area in AREAS_ANALISE:
+        etapas.registrar_analise(area, SAIDAS[area])
+    etapas.registrar_risco(SAIDAS["risco"])
+    etapas.registrar_edital(SAIDAS["gerado"])
+    etapas.registrar_edital(SAIDAS["otimizado"], otimizado=True)
+    return etapas
+
+
+def test_extrair_json_aceita_bloco_e_texto_ao_redor():
+    assert extrair_json('{"a": 1}') == {"a": 1}
+    assert extrair_json('Resultado:\n```json\n{"a": 2}\n```') == {"a": 2}
+    assert extrair_json('Segue a análise: {"a": 3} Fim.') == {"a": 3}
+    assert extrair_json("sem json") is None
+    assert extrair_json("[1, 2]") is None
+
+
+def test_registros_normalizam_campos_das_saidas():
+    etapas = _etapas_completas()
+
+    assert etapas.validacao.status == "aprovado"
+    assert etapas.validacao.problemas == ["Falta código do setor"]
+    assert etapas.analises["juridica"].risco == "baixo"
+    assert etapas.analises["tecnica"].risco == "medio"
+    assert etapas.analises["tecnica"].conforme is True
+    # Saída fora de JSON: apenas um trecho do texto
+    assert etapas.analises["financeira"].texto_livre == "Os valores estão compatíveis com o mercado."
+    assert etapas.risco.probabilidade_sucesso == 0.8
+    assert etapas.edital_gerado.template == "servicos_v2"
+    assert etapas.edital_final.conteudo.endswith("CLÁUSULA FINAL.")
+    assert etapas.edital_final.observacoes == ["Cláusula de sustentabilidade"]
+
+
+def test_validacao_em_texto_livre_nao_tem_status():
+    validacao = ValidacaoRequisitos.de_texto("Requisitos conferidos.")
+    assert validacao.status is None
+    assert validacao.texto_livre == "Requisitos conferidos."
+    assert ValidacaoRequisitos.de_texto('{"status": "reprovado"}').texto_livre is None
+
+
+def test_contextos_trazem_apenas_campos_necessarios():
+    etapas = _etapas_completas()
+
+    juridica = json.loads(etapas.contexto_analise("juridica"))
+    assert "requisitos_juridicos" in juridica["requisitos"]
+    assert "setor_requisitante" not in juridica["requisitos"]
+    assert "itens" not in juridica["requisitos"]
+    assert juridica["validacao"]["status"] == "aprovado"
+
+    risco = json.loads(etapas.contexto_risco())
+    assert risco["analises"]["juridica"] == {
+        "risco": "baixo", "conforme": True,
+        "pontos_atencao": ["Prazo de proposta no limite legal"], "sugestoes": ["Citar art. 55"],
+    }
+    assert "fundamentacao" not in etapas.contexto_risco()
+
+    assert EDITAL not in etapas.contexto_geracao()
+    assert json.loads(etapas.contexto_otimizacao())["conteudo"] == EDITAL
+
+
+def test_coordenacao_recebe_o_edital_uma_unica_vez():
+    contexto = _etapas_completas().contexto_coordenacao()
+
+    assert contexto.count("CLÁUSULA PRIMEIRA") == EDITAL.count("CLÁUSULA PRIMEIRA")
+    assert "CLÁUSULA FINAL." in contexto
+    assert json.loads(contexto)["otimizacoes_aplicadas"] == ["Cláusula de sustentabilidade"]
+
+
+def test_contextos_menores_que_o_repasse_integral():
+    etapas = _etapas_completas()
+
+    # Contextos montados antes dos registros: str() de todas as etapas anteriores
+    anterior = {
+        "risco": json.dumps({
+            "requisitos_validados": SAIDAS["validacao"], "analises_especializadas": SAIDAS["financeira"]
+        }, ensure_ascii=False),
+        "geracao": json.dumps({
+            "requisitos": REQUISITOS, "validacao": SAIDAS["validacao"],
+            "analises": SAIDAS["financeira"], "risco": SAIDAS["risco"],
+        }, ensure_ascii=False),
+        "coordenacao": json.dumps({
+            "requisitos": REQUISITOS, "validacao": SAIDAS["validacao"], "analises": SAIDAS["financeira"],
+            "risco": SAIDAS["risco"], "edital_gerado": SAIDAS["gerado"], "edital_otimizado": SAIDAS["otimizado"],
+        }, ensure_ascii=False),
+    }
+
+    assert len(etapas.contexto_risco()) < len(anterior["risco"])
+    assert len(etapas.contexto_geracao()) < len(anterior["geracao"])
+    assert len(etapas.contexto_coordenacao()) < len(anterior["coordenacao"]) * 0.6
+
+
+def test_medir_registra_tamanho_e_duracao():
+    etapas = ResultadosEtapas(REQUISITOS)
+    with etapas.medir("geracao_edital", "a" * 400, "b" * 400):
+        pass
+
+    metrica = etapas.metricas["geracao_edital"]
+    assert metrica["caracteres_contexto"] == 800
+    assert metrica["tokens_estimados"] == 200
+    assert metrica["duracao_s"] >= 0
+
+
+def test_edital_em_texto_livre_e_guardado_inteiro():
+    edital = EditalProduzido.de_texto("  EDITAL Nº 1/2024 ...  ")
+    assert edital.conteudo == "EDITAL Nº 1/2024 ..."
@@ -0,0 +1,91 @@
+"""
+Testes de regressão do número de consultas na listagem e no detalhe de editais.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base, EditalGerado, EditalRequest
+from api.edital_queries import listar_editais, obter_edital_com_solicitacao
+
+
+def _edital(edital_id, request_id, numero):
+    return EditalGerado(
+        id=edital_id,
+        request_id=request_id,
+        numero_edital=numero,
+        analise_juridica={},
+        analise_tecnica={},
+        analise_financeira={},
+        analise_risco={},
+        conteudo_edital="texto",
+        criado_por="teste"
+    )
+
+
+@pytest.fixture
+def sessao():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    for i in range(50):
+        request_id = f"req-{i}"
+        db.add(EditalRequest(
+            id=request_id,
+            objeto=f"Objeto {i}",
+            tipo_licitacao="pregao",
+            modalidade="eletronico",
+            categoria="servicos",
+            setor_requisitante="TI",
+            itens=[],
+            criado_por="teste"
+        ))
+        db.add(_edital(f"ed-{i}", request_id, f"{i}/2024"))
+    # Edital sem solicitação correspondente
+    db.add(_edital("ed-orfao", "inexistente", "X"))
+    db.commit()
+
+    consultas = []
+    event.listen(engine, "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    db.consultas = consultas
+
+    yield db
+
+    db.close()
+    engine.dispose()
+
+
+@pytest.mark.parametrize("limit", [1, 10, 51])
+def test_listagem_usa_uma_consulta_independente_do_tamanho_da_pagina(sessao, limit):
+    editais = listar_editais(sessao, ["id", "request_id", "data_criacao"], limit=limit)
+
+    assert len(editais) == limit
+    assert len(sessao.consultas) == 1
+    objetos = {edital.id: edital.objeto for edital in editais}
+    if "ed-3" in objetos:
+        assert objetos["ed-3"] == "Objeto 3"
+    if "ed-orfao" in objetos:
+        assert objetos["ed-orfao"] is None
+
+
+def test_detalhe_carrega_edital_e_solicitacao_em_uma_consulta(sessao):
+    edital, solicitacao = obter_edital_com_solicitacao(sessao, "ed-7")
+
+    assert edital.numero_edital == "7/2024"
+    assert solicitacao.objeto == "Objeto 7"
+    assert len(sessao.consultas) == 1
+
+
+def test_detalhe_de_edital_sem_solicitacao_e_inexistente(sessao):
+    edital, solicitacao = obter_edital_com_solicitacao(sessao, "ed-orfao")
+    assert edital.id == "ed-orfao"
+    assert solicitacao is None
+
+    assert obter_edital_com_solicitacao(sessao, "nao-existe") is None
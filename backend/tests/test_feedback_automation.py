@@ -0,0 +1,111 @@
+"""
+Testes do agendamento de solicitações de feedback por vencimento.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base, EditalGerado, EditalRequest
+from api.database_feedback import AgendamentoFeedback, FeedbackEmpresa
+from services.feedback_automation import FeedbackAutomationService
+
+INICIO = datetime(2024, 1, 1, 9, 0)
+
+
+@pytest.fixture
+def ambiente():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    enviados = []
+    servico = FeedbackAutomationService(session_factory=fabrica, notificador=enviados.append)
+    servico.config['emails_notificacao'] = ["compras@exemplo.com"]
+    db = fabrica()
+    db.engine = engine
+    yield servico, db, enviados
+    db.close()
+    engine.dispose()
+
+
+def _edital(db, edital_id, criado_em=INICIO):
+    db.add(EditalRequest(
+        id=f"req-{edital_id}", objeto="Objeto", tipo_licitacao="pregao", modalidade="eletronica",
+        categoria="servicos", setor_requisitante={"nome": "TI", "email": "ti@exemplo.com"},
+        itens=[], criado_por="teste"
+    ))
+    edital = EditalGerado(
+        id=edital_id, request_id=f"req-{edital_id}", analise_juridica={}, analise_tecnica={},
+        analise_financeira={}, analise_risco={}, conteudo_edital="...", criado_por="teste",
+        data_criacao=criado_em
+    )
+    db.add(edital)
+    db.flush()
+    return edital
+
+
+def test_agenda_por_status_sem_duplicar(ambiente):
+    servico, db, _ = ambiente
+    edital = _edital(db, "ed-1")
+    servico.agendar_por_status(db, edital, "rascunho", INICIO)
+    servico.agendar_por_status(db, edital, "publicado", INICIO + timedelta(days=2))
+    servico.agendar_por_status(db, edital, "publicado", INICIO + timedelta(days=3))
+    db.commit()
+
+    agendamentos = {a.tipo_stakeholder: a for a in db.query(AgendamentoFeedback)}
+    assert set(agendamentos) == {"setor", "empresa"}
+    assert agendamentos["setor"].due_at == INICIO + timedelta(days=7)
+    assert agendamentos["setor"].destinatarios == ["ti@exemplo.com", "compras@exemplo.com"]
+    assert agendamentos["empresa"].due_at == INICIO + timedelta(days=32)
+
+    servico.agendar_por_status(db, edital, "cancelado")
+    db.commit()
+    assert {a.status for a in db.query(AgendamentoFeedback)} == {"cancelado"}
+
+
+def test_processa_vencidos_e_agenda_lembretes(ambiente):
+    servico, db, enviados = ambiente
+    for i in range(3):
+        servico.agendar_por_status(db, _edital(db, f"ed-{i}"), "publicado", INICIO)
+    db.add(FeedbackEmpresa(edital_id="ed-0", empresa_cnpj="1", empresa_nome="ACME", participou_licitacao=True))
+    db.commit()
+
+    # Só os pedidos do setor (7 dias) vencem; os das empresas vencem em 30 dias
+    resultado = servico.processar_vencidos(INICIO + timedelta(days=8))
+    assert resultado == {"enviado": 3, "respondido": 0, "cancelado": 0, "erro": 0}
+    assert {e["tipo_stakeholder"] for e in enviados} == {"setor"}
+
+    # Lembretes seguem o intervalo configurado; ed-0 já respondeu como empresa
+    resultado = servico.processar_vencidos(INICIO + timedelta(days=31))
+    assert resultado == {"enviado": 5, "respondido": 1, "cancelado": 0, "erro": 0}
+    lembretes = [e for e in enviados if e["lembrete"]]
+    assert len(lembretes) == 3
+
+    # Máximo de lembretes respeitado
+    servico.processar_vencidos(INICIO + timedelta(days=365))
+    servico.processar_vencidos(INICIO + timedelta(days=730))
+    maximo = max(e["lembrete"] for e in enviados)
+    assert maximo == servico.config['maximo_lembretes']
+
+
+def test_rodada_le_apenas_itens_vencidos(ambiente):
+    servico, db, _ = ambiente
+    for i in range(200):
+        servico.agendar_por_status(db, _edital(db, f"ed-{i}", INICIO + timedelta(days=i)), "rascunho")
+    db.commit()
+
+    consultas = []
+    event.listen(db.engine, "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    resultado = servico.processar_vencidos(INICIO + timedelta(days=9))
+
+    assert resultado["enviado"] == 3
+    # Número de consultas fixo por lote, independente do total de editais agendados
+    assert len(consultas) < 15
+    assert servico.proximo_vencimento() == INICIO + timedelta(days=10)
@@ -0,0 +1,92 @@
+"""
+Testes do dashboard de feedback agregado no banco.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_feedback import FeedbackEmpresa, FeedbackRollupDiario, FeedbackSetor
+from api.feedback_endpoints import dashboard_feedback
+from api.feedback_rollups import reconstruir_rollups
+
+
+def _feedback_setor(notas, problema=None, sugestao=None, dias_atras=0):
+    return FeedbackSetor(
+        edital_id="ed-1",
+        setor_nome="TI",
+        responsavel_nome="Fulano",
+        responsavel_email="fulano@exemplo.com",
+        facilidade_uso=notas[0],
+        qualidade_edital=notas[1],
+        adequacao_requisitos=notas[2],
+        tempo_processamento=notas[3],
+        clareza_especificacoes=notas[4],
+        problemas_encontrados=problema,
+        sugestoes_melhoria=sugestao,
+        data_feedback=datetime.now() - timedelta(days=dias_atras)
+    )
+
+
+@pytest.fixture
+def sessao():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+
+    db.add_all([
+        _feedback_setor([5, 5, 5, 5, 5], problema="lentidão", sugestao="mais modelos"),
+        _feedback_setor([3, 3, 3, 3, 3], problema="lentidão"),
+        _feedback_setor([4, 4, 4, 4, 4], problema="", sugestao="mais modelos"),
+        _feedback_setor([1, 2, 3, 4, 5], problema="erro de formatação"),
+        # Fora do período
+        _feedback_setor([1, 1, 1, 1, 1], problema="antigo", dias_atras=90),
+        FeedbackEmpresa(edital_id="ed-1", empresa_cnpj="1", empresa_nome="ACME", participou_licitacao=True),
+    ])
+    db.commit()
+    reconstruir_rollups(db)
+
+    consultas = []
+    event.listen(engine, "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    db.consultas = consultas
+
+    yield db
+
+    db.close()
+    engine.dispose()
+
+
+def test_dashboard_agrega_no_banco(sessao):
+    resultado = dashboard_feedback(periodo_dias=30, db=sessao)
+
+    assert resultado["estatisticas_gerais"] == {
+        "total_feedbacks_setor": 4,
+        "total_feedbacks_empresa": 1,
+        "total_feedbacks_licitacao": 0,
+        "total_geral": 5
+    }
+    assert resultado["satisfacao"]["media_setor"] == 3.75
+    assert resultado["insights"]["problemas_mais_frequentes"] == {"lentidão": 2, "erro de formatação": 1}
+    assert resultado["insights"]["sugestoes_mais_comuns"] == {"mais modelos": 2}
+    # Número de consultas fixo, independente do volume de feedbacks
+    assert len(sessao.consultas) == 3
+
+
+def test_dashboard_sem_feedbacks(sessao):
+    for modelo in (FeedbackSetor, FeedbackEmpresa, FeedbackRollupDiario):
+        sessao.query(modelo).delete()
+    sessao.commit()
+
+    resultado = dashboard_feedback(periodo_dias=30, db=sessao)
+
+    assert resultado["estatisticas_gerais"]["total_geral"] == 0
+    assert resultado["satisfacao"]["media_setor"] == 0
+    assert resultado["insights"]["problemas_mais_frequentes"] == {}
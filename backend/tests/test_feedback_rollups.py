@@ -0,0 +1,173 @@
+"""
+Testes dos rollups diários de feedback.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import api.database as database
+from api.database import Base
+from api.database_feedback import FeedbackEmpresa, FeedbackLicitacao, FeedbackRollupDiario, FeedbackSetor
+from api.feedback_rollups import (
+    atualizar_rollups, consultar_rollups, metricas_satisfacao, preencher_rollups_vazios, reconstruir_rollups
+)
+
+
+@pytest.fixture
+def sessao():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def _registrar_setor(db, nota, setor="TI", edital_id="ed-1", dias_atras=0):
+    feedback = FeedbackSetor(
+        edital_id=edital_id,
+        setor_nome=setor,
+        responsavel_nome="Fulano",
+        responsavel_email="fulano@exemplo.com",
+        facilidade_uso=nota,
+        qualidade_edital=nota,
+        adequacao_requisitos=nota,
+        tempo_processamento=nota,
+        clareza_especificacoes=nota,
+        data_feedback=datetime.now() - timedelta(days=dias_atras)
+    )
+    db.add(feedback)
+    db.flush()
+    atualizar_rollups(db, "setor", feedback)
+    db.commit()
+
+
+def _snapshot(db):
+    return sorted(
+        (r.dia, r.tipo_stakeholder, r.dimensao, r.chave, r.total_feedbacks, r.total_avaliados,
+         round(r.soma_satisfacao, 6), r.faixa_1, r.faixa_2, r.faixa_3, r.faixa_4, r.faixa_5)
+        for r in db.query(FeedbackRollupDiario)
+    )
+
+
+def test_rollups_incrementais_somam_por_dia_e_dimensao(sessao):
+    _registrar_setor(sessao, 5)
+    _registrar_setor(sessao, 3, setor="Jurídico", edital_id="ed-2")
+    _registrar_setor(sessao, 1, dias_atras=10)
+
+    geral = consultar_rollups(sessao, date.today() - timedelta(days=30))
+    assert len(geral) == 1
+    assert metricas_satisfacao(geral[0]) == {
+        "total_feedbacks": 3,
+        "total_respostas": 3,
+        "media": 3.0,
+        "distribuicao": {1: 33.3, 2: 0.0, 3: 33.3, 4: 0.0, 5: 33.3}
+    }
+
+    # Período curto exclui o feedback de 10 dias atrás
+    recentes = consultar_rollups(sessao, date.today() - timedelta(days=5))
+    assert metricas_satisfacao(recentes[0])["media"] == 4.0
+
+    por_setor = {
+        r["chave"]: metricas_satisfacao(r)["media"]
+        for r in consultar_rollups(sessao, date.today() - timedelta(days=30), dimensao="setor")
+    }
+    assert por_setor == {"TI": 3.0, "Jurídico": 3.0}
+
+    por_edital = consultar_rollups(sessao, date.today() - timedelta(days=30), dimensao="edital", chave="ed-2")
+    assert metricas_satisfacao(por_edital[0])["total_feedbacks"] == 1
+
+
+def test_reconstrucao_equivale_aos_incrementos(sessao):
+    for nota in (1, 2, 4, 5, 5):
+        _registrar_setor(sessao, nota, dias_atras=nota)
+    feedback = FeedbackLicitacao(
+        edital_id="ed-1", avaliador_nome="Ciclano", avaliador_cargo="Pregoeiro",
+        qualidade_tecnica=4, conformidade_legal=5, adequacao_modalidade=None, clareza_redacao=3
+    )
+    sessao.add(feedback)
+    sessao.flush()
+    atualizar_rollups(sessao, "licitacao", feedback)
+    sessao.commit()
+
+    incremental = _snapshot(sessao)
+    reconstruir_rollups(sessao)
+
+    assert _snapshot(sessao) == incremental
+
+
+def test_create_db_tables_popula_rollups_de_base_antiga(sessao, monkeypatch):
+    engine = sessao.get_bind()
+    monkeypatch.setattr(database, "engine", engine)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+
+    # Base anterior aos rollups: feedbacks gravados e nenhuma tabela de rollup
+    for nota in (2, 4, 5):
+        _registrar_setor(sessao, nota, dias_atras=nota)
+    esperado = _snapshot(sessao)
+    FeedbackRollupDiario.__table__.drop(bind=engine)
+
+    database.create_db_tables()
+    assert _snapshot(sessao) == esperado
+
+    # Com a tabela populada, novas chamadas não reconstroem
+    sessao.query(FeedbackRollupDiario).filter(FeedbackRollupDiario.faixa_5 == 1).delete()
+    sessao.commit()
+    database.create_db_tables()
+    assert len(_snapshot(sessao)) == len(esperado) - 3
+
+
+def test_preencher_rollups_vazios_sem_feedbacks(sessao):
+    assert preencher_rollups_vazios(sessao) == 0
+    assert _snapshot(sessao) == []
+
+
+def test_notas_zero_contam_como_no_dashboard_anterior(sessao):
+    notas_setor = [
+        (5, 4, 4, 2, 5),
+        (0, 0, 1, 0, 0),
+        (3, 0, 5, 0, 4),
+        (1, 2, None, 3, 3),  # Sem nota obrigatória: não avaliado
+    ]
+    for notas in notas_setor:
+        sessao.add(FeedbackSetor(
+            edital_id="ed-1", setor_nome="TI", responsavel_nome="Fulano", responsavel_email="f@exemplo.com",
+            **dict(zip(("facilidade_uso", "qualidade_edital", "adequacao_requisitos",
+                        "tempo_processamento", "clareza_especificacoes"), notas))
+        ))
+    sessao.add_all([
+        FeedbackLicitacao(edital_id="ed-1", avaliador_nome="A", avaliador_cargo="Pregoeiro",
+                          qualidade_tecnica=0, conformidade_legal=5, adequacao_modalidade=0),
+        FeedbackEmpresa(edital_id="ed-1", empresa_cnpj="1", empresa_nome="ACME", participou_licitacao=True,
+                        clareza_objeto=5, adequacao_especificacoes=0, prazo_elaboracao_proposta=4),
+        FeedbackEmpresa(edital_id="ed-1", empresa_cnpj="2", empresa_nome="Beta", participou_licitacao=False,
+                        clareza_objeto=0, valor_estimado=0),
+    ])
+    sessao.commit()
+    reconstruir_rollups(sessao)
+
+    # Fórmula do dashboard antes dos rollups: soma das cinco notas / 5, NULL fora da média
+    media_anterior = sessao.query(func.avg((
+        FeedbackSetor.facilidade_uso + FeedbackSetor.qualidade_edital + FeedbackSetor.adequacao_requisitos +
+        FeedbackSetor.tempo_processamento + FeedbackSetor.clareza_especificacoes
+    ) / 5.0)).scalar()
+
+    por_tipo = {
+        r["tipo_stakeholder"]: metricas_satisfacao(r)
+        for r in consultar_rollups(sessao, date.today() - timedelta(days=1))
+    }
+    assert por_tipo["setor"]["media"] == round(media_anterior, 2) == 2.2
+    assert (por_tipo["setor"]["total_feedbacks"], por_tipo["setor"]["total_respostas"]) == (4, 3)
+    assert por_tipo["setor"]["distribuicao"][1] == 0.0
+    # Licitação: 0 é nota e a clareza da redação não preenchida vale 3 -> (0 + 5 + 0 + 3) / 4
+    assert por_tipo["licitacao"]["media"] == 2.0
+    # Empresas: 0 é "sem nota"; feedback sem nenhuma nota não é avaliado
+    assert (por_tipo["empresa"]["media"], por_tipo["empresa"]["total_respostas"]) == (4.5, 1)
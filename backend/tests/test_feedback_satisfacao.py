@@ -0,0 +1,156 @@
+"""
+Testes do cálculo de satisfação do FeedbackAnalysisTool (NumPy) contra a
+implementação anterior com laços Python e `statistics`.
+"""
+
+import statistics
+import warnings
+
+from crewai_agents.feedback_analysis_tools import FeedbackAnalysisTool
+
+
+def _satisfacao_original(data):
+    """Implementação anterior de _calcular_satisfacao (por_stakeholder e geral)."""
+    def distribuicao(valores):
+        faixas = {1: 0, 2: 0, 3: 0, 4: 0, 5: 0}
+        for valor in valores:
+            faixa = int(round(valor))
+            if faixa in faixas:
+                faixas[faixa] += 1
+        return {k: round(v / len(valores) * 100, 1) for k, v in faixas.items()}
+
+    setor, empresa, licitacao = [], [], []
+    for f in data.get("feedback_setor", []):
+        if all(k in f for k in ["facilidade_uso", "qualidade_edital", "adequacao_requisitos"]):
+            setor.append((f["facilidade_uso"] + f["qualidade_edital"] + f["adequacao_requisitos"] +
+                          f.get("tempo_processamento", 3) + f.get("clareza_especificacoes", 3)) / 5)
+    for f in data.get("feedback_empresa", []):
+        notas = [f.get(k, 3) for k in ["clareza_objeto", "adequacao_especificacoes",
+                                       "prazo_elaboracao_proposta", "criterios_julgamento", "valor_estimado"]]
+        empresa.append(sum(v for v in notas if v) / len([v for v in notas if v]))
+    for f in data.get("feedback_licitacao", []):
+        if all(k in f for k in ["qualidade_tecnica", "conformidade_legal"]):
+            licitacao.append((f["qualidade_tecnica"] + f["conformidade_legal"] +
+                              f.get("adequacao_modalidade", 3) + f.get("clareza_redacao", 3)) / 4)
+
+    resultado = {"por_stakeholder": {}}
+    for nome, valores in (("setores", setor), ("empresas", empresa), ("licitacao", licitacao)):
+        if valores:
+            resultado["por_stakeholder"][nome] = {
+                "media": round(statistics.mean(valores), 2),
+                "mediana": round(statistics.median(valores), 2),
+                "total_respostas": len(valores),
+                "distribuicao": distribuicao(valores),
+            }
+    todas = setor + empresa + licitacao
+    resultado["geral"] = {"media": round(statistics.mean(todas), 2), "total_respostas": len(todas)}
+    return resultado
+
+
+# Notas 0, campos com padrão ausentes e feedbacks sem campo obrigatório
+FEEDBACKS = {
+    "feedback_setor": [
+        {"facilidade_uso": 5, "qualidade_edital": 4, "adequacao_requisitos": 4,
+         "tempo_processamento": 2, "clareza_especificacoes": 5},
+        {"facilidade_uso": 0, "qualidade_edital": 0, "adequacao_requisitos": 1,
+         "tempo_processamento": 0, "clareza_especificacoes": 0},
+        {"facilidade_uso": 3, "qualidade_edital": 0, "adequacao_requisitos": 5},
+        {"facilidade_uso": 4, "qualidade_edital": 4},
+    ],
+    "feedback_empresa": [
+        {"clareza_objeto": 5, "adequacao_especificacoes": 0, "prazo_elaboracao_proposta": 4,
+         "criterios_julgamento": None, "valor_estimado": 2},
+        {"clareza_objeto": 1},
+        {},
+        {"clareza_objeto": 0, "adequacao_especificacoes": 0, "prazo_elaboracao_proposta": 0,
+         "criterios_julgamento": 0, "valor_estimado": 4},
+    ],
+    "feedback_licitacao": [
+        {"qualidade_tecnica": 0, "conformidade_legal": 5, "adequacao_modalidade": 0},
+        {"qualidade_tecnica": 4, "conformidade_legal": 4, "adequacao_modalidade": 5, "clareza_redacao": 1},
+        {"conformidade_legal": 2},
+    ],
+}
+
+
+def _comparavel(resultado):
+    return {
+        "por_stakeholder": {
+            nome: {campo: metricas[campo] for campo in ("media", "mediana", "total_respostas", "distribuicao")}
+            for nome, metricas in resultado["por_stakeholder"].items()
+        },
+        "geral": {campo: resultado["geral"][campo] for campo in ("media", "total_respostas")},
+    }
+
+
+def _colunar(data):
+    campos = lambda feedbacks: {c for f in feedbacks for c in f}
+    return {
+        chave: {c: [f.get(c) for f in feedbacks] for c in campos(feedbacks)}
+        for chave, feedbacks in data.items()
+    }
+
+
+def test_satisfacao_igual_a_implementacao_anterior():
+    obtido = FeedbackAnalysisTool()._calcular_satisfacao(FEEDBACKS)
+    assert _comparavel(obtido) == _satisfacao_original(FEEDBACKS)
+    # Nota 0 conta como nota nos setores: (5 + 0 + 3) / 3
+    assert obtido["por_categoria"]["setores"]["facilidade_uso"] == 2.67
+
+
+def test_notas_none_equivalem_a_campo_ausente():
+    # A implementação anterior falhava com None nos setores e na licitação:
+    # agora None vale como campo ausente (obrigatório descarta, com padrão vale 3)
+    com_none = {
+        "feedback_setor": FEEDBACKS["feedback_setor"] + [
+            {"facilidade_uso": 5, "qualidade_edital": None, "adequacao_requisitos": 5},
+            {"facilidade_uso": 1, "qualidade_edital": 2, "adequacao_requisitos": 3, "tempo_processamento": None},
+        ],
+        "feedback_empresa": FEEDBACKS["feedback_empresa"],
+        "feedback_licitacao": FEEDBACKS["feedback_licitacao"] + [
+            {"qualidade_tecnica": 3, "conformidade_legal": 3, "clareza_redacao": None},
+        ],
+    }
+    sem_none = {
+        chave: [{c: v for c, v in f.items() if v is not None} for f in feedbacks]
+        for chave, feedbacks in com_none.items()
+    }
+    # Nas empresas None já ficava fora da média; sem_none só muda setores e licitação
+    sem_none["feedback_empresa"] = com_none["feedback_empresa"]
+
+    obtido = FeedbackAnalysisTool()._calcular_satisfacao(com_none)
+    assert _comparavel(obtido) == _satisfacao_original(sem_none)
+
+
+def test_empresa_sem_nenhuma_nota_e_descartada():
+    data = {"feedback_empresa": [{"clareza_objeto": 4, "valor_estimado": 0}] + [
+        {c: 0 for c in ("clareza_objeto", "adequacao_especificacoes", "prazo_elaboracao_proposta",
+                        "criterios_julgamento", "valor_estimado")}
+    ]}
+    empresas = FeedbackAnalysisTool()._calcular_satisfacao(data)["por_stakeholder"]["empresas"]
+    assert empresas["total_respostas"] == 1
+    assert empresas["media"] == 3.25
+
+
+def test_entrada_colunar_equivale_a_lista():
+    # No formato colunar o campo ausente de um feedback chega como None
+    ferramenta = FeedbackAnalysisTool()
+    colunar = _colunar(FEEDBACKS)
+    lista = {
+        chave: [{c: f.get(c) for c in colunas} for f in FEEDBACKS[chave]]
+        for chave, colunas in colunar.items()
+    }
+    assert _comparavel(ferramenta._calcular_satisfacao(colunar)) == _comparavel(ferramenta._calcular_satisfacao(lista))
+
+
+def test_criterio_sem_nenhuma_avaliacao_nao_emite_aviso():
+    # Nas empresas, 0 e None ficam fora da média: critério todo zerado não tem média
+    data = {"feedback_empresa": [
+        {"clareza_objeto": 4, "adequacao_especificacoes": 0, "valor_estimado": 5},
+        {"clareza_objeto": 2, "adequacao_especificacoes": None, "valor_estimado": 3},
+    ]}
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        categorias = FeedbackAnalysisTool()._calcular_satisfacao(data)["por_categoria"]["empresas"]
+    assert "adequacao_especificacoes" not in categorias
+    assert (categorias["clareza_objeto"], categorias["valor_estimado"]) == (3.0, 4.0)
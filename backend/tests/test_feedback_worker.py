@@ -0,0 +1,219 @@
+"""
+Testes do worker de processamento da fila de feedback.
+"""
+
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_feedback import FeedbackEmpresa, FeedbackProcessamento, FeedbackSetor
+from api.feedback_rollups import consultar_rollups, reconstruir_rollups
+from services.feedback_worker import (
+    FeedbackWorker, enfileirar_feedback, limpar_processados, processar_lote, recuperar_reservas, reservar_lote
+)
+
+
+@pytest.fixture
+def fabrica():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    fabrica.engine = engine
+    yield fabrica
+    engine.dispose()
+
+
+def _registrar_setor(db, nota, problema=None, sugestao=None):
+    feedback = FeedbackSetor(
+        edital_id="ed-1",
+        setor_nome="TI",
+        responsavel_nome="Fulano",
+        responsavel_email="fulano@exemplo.com",
+        facilidade_uso=nota,
+        qualidade_edital=nota,
+        adequacao_requisitos=nota,
+        tempo_processamento=nota,
+        clareza_especificacoes=nota,
+        problemas_encontrados=problema,
+        sugestoes_melhoria=sugestao
+    )
+    db.add(feedback)
+    db.flush()
+    enfileirar_feedback(db, "setor", feedback.id)
+    db.commit()
+    return feedback.id
+
+
+def test_lote_classifica_pontua_e_atualiza_rollups(fabrica):
+    db = fabrica()
+    _registrar_setor(db, 5, problema="Interface confusa e tela lenta", sugestao="Automatizar o prazo")
+    _registrar_setor(db, 3, problema="Muito bom, sem problemas")
+    empresa = FeedbackEmpresa(edital_id="ed-1", empresa_cnpj="1", empresa_nome="ACME", participou_licitacao=True)
+    db.add(empresa)
+    db.flush()
+    enfileirar_feedback(db, "empresa", empresa.id)
+    enfileirar_feedback(db, "setor", "inexistente")
+    db.commit()
+
+    worker = FeedbackWorker(session_factory=fabrica, tamanho_lote=10)
+    assert worker.processar_pendentes() == 4
+    assert worker.processar_pendentes() == 0
+
+    itens = {i.feedback_id: i for i in db.query(FeedbackProcessamento)}
+    assert itens["inexistente"].status == "erro"
+    processados = [i for i in itens.values() if i.status == "processado"]
+    assert len(processados) == 3
+
+    primeiro = db.query(FeedbackProcessamento).order_by(FeedbackProcessamento.id).first()
+    assert primeiro.area_principal == "interface"
+    assert primeiro.impacto_estimado == 5
+    assert "prazo" in primeiro.palavras_chave
+    assert primeiro.sentimento == "negativo"
+    assert itens[empresa.id].sentimento is None
+
+    geral = {r["tipo_stakeholder"]: r for r in consultar_rollups(db, date.today())}
+    assert geral["setor"]["total_feedbacks"] == 2
+    assert geral["setor"]["soma_satisfacao"] == 8
+    assert geral["empresa"]["total_feedbacks"] == 1
+
+    assert worker.metricas["feedbacks_processados"] == 3
+    status = worker.status(db)
+    assert status["fila"] == {"pendente": 0, "processando": 0, "processado": 3, "erro": 1}
+    assert status["atraso_s"]["amostras"] == 3
+    db.close()
+
+
+def test_consultas_por_lote_independem_do_volume(fabrica):
+    db = fabrica()
+    for nota in range(50):
+        _registrar_setor(db, nota % 5 + 1, problema=f"problema {nota % 7} no prazo")
+    db.close()
+
+    consultas = []
+    event.listen(fabrica.engine, "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    FeedbackWorker(session_factory=fabrica, tamanho_lote=100).processar_pendentes()
+
+    # Sem consultas por item: reserva, feedbacks, cache de sentimento e gravação em bloco
+    assert len(consultas) < 20
+
+
+def test_reserva_nao_toma_itens_de_outro_worker(fabrica):
+    db = fabrica()
+    for nota in (1, 2, 3):
+        _registrar_setor(db, nota)
+
+    assert len(reservar_lote(db, "worker-a", limite=2)) == 2
+    restantes = reservar_lote(db, "worker-b", limite=10)
+    assert len(restantes) == 1
+    assert restantes[0].reservado_por == "worker-b"
+
+    # Reservas antigas voltam para a fila
+    db.query(FeedbackProcessamento).update({FeedbackProcessamento.reservado_em: datetime.now() - timedelta(hours=1)})
+    db.commit()
+    assert recuperar_reservas(db) == 3
+    assert db.query(FeedbackProcessamento).filter_by(status="pendente").count() == 3
+    db.close()
+
+
+def test_worker_lento_nao_grava_itens_com_reserva_tomada(fabrica):
+    db = fabrica()
+    for nota in (2, 4):
+        _registrar_setor(db, nota, problema="tela lenta")
+    lento = fabrica()
+    itens = reservar_lote(lento, "worker-lento", limite=10)
+    tomado, mantido = [item.id for item in itens]
+
+    # A reserva do primeiro item expira no meio do lote e outro worker o processa
+    f = FeedbackProcessamento
+    db.query(f).filter(f.id == tomado).update({f.reservado_em: datetime.now() - timedelta(hours=1)})
+    db.commit()
+    assert recuperar_reservas(db) == 1
+    outro = FeedbackWorker(session_factory=fabrica)
+    assert outro.processar_pendentes() == 1
+
+    atrasos = processar_lote(lento, itens, "worker-lento")
+    assert len(atrasos) == 1
+    lento.close()
+
+    db.expire_all()
+    assert {i.id: i.reservado_por for i in db.query(f)} == {tomado: outro.worker_id, mantido: "worker-lento"}
+    assert db.query(f).filter_by(status="processado").count() == 2
+    geral = consultar_rollups(db, date.today(), tipo="setor")
+    assert geral[0]["total_feedbacks"] == 2
+    assert geral[0]["soma_satisfacao"] == 6
+    db.close()
+
+
+def test_reconstruir_ignora_feedbacks_na_fila(fabrica):
+    db = fabrica()
+    _registrar_setor(db, 4)
+    FeedbackWorker(session_factory=fabrica).processar_pendentes()
+    _registrar_setor(db, 2)
+
+    reconstruir_rollups(db)
+    geral = consultar_rollups(db, date.today(), tipo="setor")
+    assert geral[0]["total_feedbacks"] == 1
+
+    FeedbackWorker(session_factory=fabrica).processar_pendentes()
+    geral = consultar_rollups(db, date.today(), tipo="setor")
+    assert geral[0]["total_feedbacks"] == 2
+    db.close()
+
+
+def test_limpeza_de_processados_e_contagem_dos_abertos(fabrica):
+    db = fabrica()
+    for nota in (4, 5, 3):
+        _registrar_setor(db, nota)
+    worker = FeedbackWorker(session_factory=fabrica)
+    worker.processar_pendentes()
+    _registrar_setor(db, 2)
+
+    # Dois itens processados há mais que a retenção
+    antigos = db.query(FeedbackProcessamento).filter_by(status="processado").order_by(FeedbackProcessamento.id).limit(2)
+    for item in antigos.all():
+        item.data_processamento = datetime.now() - timedelta(days=30)
+    db.commit()
+
+    assert limpar_processados(db, retencao=timedelta(days=7)) == 2
+    assert db.query(FeedbackProcessamento).filter_by(status="processado").count() == 1
+
+    consultas = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda *args: consultas.append(args[2:4]))
+    assert worker.contagem_fila() == {"pendente": 1, "processando": 0, "erro": 0}
+    sql, parametros = consultas[0]
+    plano = db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parametros).all()
+    assert "ix_feedback_processamento_fila" in " ".join(str(linha[-1]) for linha in plano)
+
+    # Os rollups continuam contando os feedbacks removidos da fila
+    reconstruir_rollups(db)
+    assert consultar_rollups(db, date.today(), tipo="setor")[0]["total_feedbacks"] == 3
+    db.close()
+
+
+def test_worker_processa_apos_notificacao(fabrica):
+    async def cenario():
+        worker = FeedbackWorker(session_factory=fabrica, janela_lote=0.01, intervalo_varredura=60)
+        await worker.iniciar()
+        db = fabrica()
+        _registrar_setor(db, 5, problema="erro no sistema")
+        worker.notificar()
+        for _ in range(100):
+            if worker.metricas["feedbacks_processados"]:
+                break
+            await asyncio.sleep(0.01)
+        await worker.parar()
+        db.close()
+        return worker
+
+    worker = asyncio.run(cenario())
+    assert worker.metricas["feedbacks_processados"] == 1
+    assert worker.metricas["lotes_processados"] == 1
@@ -0,0 +1,11 @@
+"""
+Teste do startup da API: dependências pesadas só são importadas no primeiro uso.
+"""
+
+from scripts.check_import_time import medir_importacao, proibidos_carregados
+
+
+def test_api_nao_importa_dependencias_pesadas():
+    medicao = medir_importacao("api.app")
+    assert medicao["modulo_ms"] > 0
+    assert proibidos_carregados(medicao["modulos"]) == []
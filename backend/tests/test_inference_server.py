@@ -0,0 +1,150 @@
+"""
+Testes do servidor local de inferência (fila, lote, streaming e métricas).
+"""
+
+import asyncio
+import json
+
+import httpx
+
+from services.inference_server import MotorLlamaCPP, ServidorInferencia, criar_app
+
+
+class _Motor:
+    """Motor falso com sequências independentes: devolve as palavras do prompt, uma por token."""
+
+    sequencias_simultaneas = 4
+
+    def __init__(self):
+        self.ordem = []
+
+    def gerar(self, pedido):
+        for palavra in pedido.prompt.split():
+            self.ordem.append(pedido.id)
+            yield palavra + " "
+
+
+def test_pedidos_concorrentes_gerados_no_mesmo_lote():
+    motor = _Motor()
+    servidor = ServidorInferencia(lambda: motor, lote_max=4, janela_lote=0.05)
+    servidor.iniciar()
+
+    async def cenario():
+        pedidos = [servidor.enviar(f"p{i} a b c", max_tokens=10) for i in range(3)]
+
+        async def consumir(pedido):
+            return "".join([token async for token in pedido.tokens()])
+
+        return pedidos, await asyncio.gather(*(consumir(p) for p in pedidos))
+
+    try:
+        pedidos, textos = asyncio.run(cenario())
+    finally:
+        servidor.parar()
+
+    assert textos == [f"p{i} a b c " for i in range(3)]
+    # Tokens intercalados: cada rodada gera um token de cada pedido do lote
+    assert motor.ordem[:3] == [p.id for p in pedidos]
+    assert motor.ordem[3:6] == [p.id for p in pedidos]
+    metricas = servidor.metricas()
+    assert metricas["tokens_gerados"] == 12
+    assert metricas["tamanho_medio_lote"] > 1
+    assert metricas["primeiro_token_s"]["p50"] is not None
+
+
+class _Parcial:
+    def __init__(self, delta):
+        self.delta = delta
+
+
+class _LlamaFalso:
+    """
+    Como o LlamaCPP: um único contexto compartilhado, que cada stream_complete
+    sobrescreve; gerar a partir dele depois de outra sequência mistura as saídas.
+    """
+
+    def __init__(self):
+        self.generate_kwargs = {"temperature": 0.7}
+        self.contexto = []
+        self.temperaturas = []
+
+    def stream_complete(self, prompt):
+        self.contexto = prompt.split()
+        posicao = 0
+        while posicao < len(self.contexto):
+            self.temperaturas.append((prompt, self.generate_kwargs["temperature"]))
+            yield _Parcial(self.contexto[posicao] + " ")
+            posicao += 1
+
+
+def test_motor_llamacpp_atende_uma_sequencia_por_vez():
+    motor = MotorLlamaCPP.__new__(MotorLlamaCPP)
+    motor.llm = _LlamaFalso()
+    servidor = ServidorInferencia(lambda: motor, lote_max=4, janela_lote=0.05)
+    servidor.iniciar()
+
+    async def cenario():
+        pedidos = [
+            servidor.enviar("um dois três quatro", max_tokens=10, temperature=0.1),
+            servidor.enviar("alfa beta gama delta épsilon", max_tokens=10),
+        ]
+
+        async def consumir(pedido):
+            return "".join([token async for token in pedido.tokens()])
+
+        return await asyncio.gather(*(consumir(p) for p in pedidos))
+
+    try:
+        textos = asyncio.run(cenario())
+        metricas = servidor.metricas()
+    finally:
+        servidor.parar()
+
+    # Cada saída vem só do próprio prompt, sem o contexto do outro pedido
+    assert textos == ["um dois três quatro ", "alfa beta gama delta épsilon "]
+    assert metricas["lote_max"] == 1
+    assert metricas["tamanho_medio_lote"] == 1
+    # Temperatura do pedido durante a sua geração; a configurada volta depois
+    temperaturas = dict(motor.llm.temperaturas)
+    assert temperaturas == {"um dois três quatro": 0.1, "alfa beta gama delta épsilon": 0.7}
+    assert motor.llm.generate_kwargs == {"temperature": 0.7}
+
+
+def test_api_compativel_com_openai():
+    servidor = ServidorInferencia(_Motor, lote_max=2, janela_lote=0.0)
+    app = criar_app(servidor)
+
+    async def cenario():
+        servidor.iniciar()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+                resposta = await cliente.post("/v1/chat/completions", json={
+                    "messages": [{"role": "system", "content": "um dois"}, {"role": "user", "content": "três quatro cinco"}],
+                    "max_tokens": 3,
+                })
+                stream = await cliente.post("/v1/completions", json={"prompt": "a b", "stream": True})
+                metricas = (await cliente.get("/metrics")).json()
+                modelos = (await cliente.get("/v1/models")).json()
+        finally:
+            servidor.parar()
+        return resposta, stream, metricas, modelos
+
+    resposta, stream, metricas, modelos = asyncio.run(cenario())
+
+    assert resposta.status_code == 200
+    corpo = resposta.json()
+    assert corpo["object"] == "chat.completion"
+    assert corpo["choices"][0]["message"]["content"] == "um dois três "
+    assert corpo["choices"][0]["finish_reason"] == "length"
+    assert corpo["usage"]["completion_tokens"] == 3
+
+    assert stream.headers["content-type"].startswith("text/event-stream")
+    eventos = [linha[len("data: "):] for linha in stream.text.splitlines() if linha.startswith("data: ")]
+    assert eventos[-1] == "[DONE]"
+    partes = [json.loads(e)["choices"][0] for e in eventos[:-1]]
+    assert "".join(p["text"] for p in partes) == "a b "
+    assert partes[-1]["finish_reason"] == "stop"
+
+    assert metricas["requisicoes"] == 2
+    assert metricas["fila"] == 0
+    assert modelos["data"][0]["object"] == "model"
@@ -0,0 +1,46 @@
+"""
+Testes do casamento de múltiplas palavras-chave (Aho-Corasick).
+"""
+
+import random
+import unicodedata
+
+from crewai_agents.keyword_matcher import AhoCorasick, ClassificadorPalavrasChave, dobrar_acentos
+
+
+def test_dobrar_acentos():
+    assert dobrar_acentos("ESPECIFICAÇÃO Técnica") == "especificacao tecnica"
+    assert dobrar_acentos(unicodedata.normalize("NFD", "validação")) == "validacao"
+
+
+def test_automato_equivale_a_busca_por_substring():
+    padroes = ["he", "she", "his", "hers", "cor", "corrigir", "a", "integra", "integração"]
+    automato = AhoCorasick(padroes)
+    normalizados = [dobrar_acentos(p) for p in padroes]
+    alfabeto = "hesircogtaçã "
+    aleatorio = random.Random(7)
+
+    for _ in range(2000):
+        texto = "".join(aleatorio.choice(alfabeto) for _ in range(aleatorio.randint(0, 30)))
+        esperado = {i for i, p in enumerate(normalizados) if p in dobrar_acentos(texto)}
+        assert automato.encontrar(texto) == esperado, texto
+
+
+def test_classificador_ignora_acentos_e_caixa():
+    classificador = ClassificadorPalavrasChave({
+        "area": {"interface": ["tela", "navegação"], "performance": ["lento", "reduzir tempo"]},
+        "palavra": {"especificação": ["especificação"]},
+    })
+
+    assert classificador.rotulos("NAVEGACAO confusa na Tela") == {"area": {"interface"}}
+    assert classificador.rotulos("especificacao incompleta") == {"palavra": {"especificação"}}
+    assert classificador.rotulos("Precisamos REDUZIR TEMPÓ de resposta") == {"area": {"performance"}}
+    assert classificador.rotulos("sem ocorrências") == {}
+
+
+def test_lote_reaproveita_textos_repetidos():
+    classificador = ClassificadorPalavrasChave({"area": {"interface": ["tela"]}})
+    resultados = classificador.analisar_lote(["tela lenta", "outro", "tela lenta"])
+
+    assert resultados[0] is resultados[2]
+    assert resultados[1] == frozenset()
@@ -0,0 +1,166 @@
+"""
+Testes dos snapshots de estatísticas da base de conhecimento.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_scraping import InsightConhecimento
+from services.knowledge_base_insights import analisar_base, reconstruir_insights, resumo_base
+from services.knowledge_base_store import salvar_licitacoes
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def db(engine):
+    sessao = sessionmaker(bind=engine)()
+    yield sessao
+    sessao.close()
+
+
+def _licitacao(numero, categoria="servicos", tipo="pregao", valor=None, **campos):
+    dados = {
+        "numero_edital": numero,
+        "site_origem": campos.pop("site_origem", "ComprasNet"),
+        "categoria": categoria,
+        "tipo_licitacao": tipo,
+        "valor_contratado": valor,
+        "numero_propostas": campos.pop("numero_propostas", 4),
+        "data_resultado": campos.pop("data_resultado", "2024-01-15"),
+        "fatores_sucesso": ["Especificação clara"],
+    }
+    dados.update(campos)
+    return dados
+
+
+def test_snapshots_atualizados_por_grupo(db):
+    salvar_licitacoes(db, [
+        _licitacao("S-1", valor=100.0),
+        _licitacao("S-2", valor=300.0, site_origem="Portal TCU", data_resultado="2024-02-01"),
+        _licitacao("B-1", categoria="bens", tipo="concorrencia", valor=50.0, numero_propostas=8),
+    ])
+    db.commit()
+
+    geral = analisar_base(db, "geral")
+    assert geral["total_licitacoes"] == 3
+    assert geral["distribuicao_categorias"] == {"servicos": 2, "bens": 1}
+    assert geral["distribuicao_tipos"] == {"pregao": 2, "concorrencia": 1}
+    assert geral["estatisticas_valores"] == {
+        "total_com_valor": 3, "valor_minimo": 50.0, "valor_maximo": 300.0, "valor_medio": 150.0
+    }
+
+    categoria = analisar_base(db, "categoria")
+    assert categoria["servicos"]["valor_medio"] == 200.0
+    assert categoria["bens"]["propostas_media"] == 8
+    assert sorted(categoria["servicos"]["sites_origem"]) == ["ComprasNet", "Portal TCU"]
+
+    tendencias = analisar_base(db, "tendencias")
+    assert tendencias["tendencias_temporais"] == {"2024-01": 2, "2024-02": 1}
+    assert tendencias["periodo_analise"] == "2024-01 a 2024-02"
+
+    # Licitação muda de categoria: o grupo antigo e o novo são recalculados
+    salvar_licitacoes(db, [_licitacao("B-1", categoria="servicos", valor=50.0)])
+    db.commit()
+    snapshots = {(s.categoria, s.tipo_licitacao): s for s in db.query(InsightConhecimento)}
+    assert set(snapshots) == {("servicos", "pregao")}
+    assert snapshots[("servicos", "pregao")].total == 3
+    assert snapshots[("servicos", "pregao")].valor_mediana == 100.0
+    assert snapshots[("servicos", "pregao")].fatores_sucesso == {"Especificação clara": 3}
+
+
+def test_analises_leem_apenas_snapshots(engine, db):
+    salvar_licitacoes(db, [_licitacao(f"S-{i}", categoria=f"cat-{i % 3}", valor=float(i)) for i in range(1, 301)])
+    db.commit()
+
+    tabelas = []
+    event.listen(engine, "before_cursor_execute", lambda *args: tabelas.append(args[2]))
+    resumo = resumo_base(db)
+    analisar_base(db, "categoria")
+
+    assert resumo["total_licitacoes"] == 300
+    assert resumo["sites_origem"] == {"ComprasNet": 300}
+    assert resumo["status"] == "ativa"
+    assert all("base_conhecimento_insights" in sql for sql in tabelas)
+
+
+def test_base_vazia_e_reconstrucao(db):
+    assert resumo_base(db)["status"] == "vazia"
+    assert analisar_base(db)["erro"] == "Base de conhecimento vazia"
+
+    salvar_licitacoes(db, [_licitacao("S-1", categoria=None, tipo=None)])
+    db.query(InsightConhecimento).delete()
+    db.commit()
+
+    assert reconstruir_insights(db) == 1
+    assert analisar_base(db)["distribuicao_categorias"] == {"indefinida": 1}
+
+
+def _snapshots(db):
+    colunas = [c.name for c in InsightConhecimento.__table__.columns if c.name != "data_atualizacao"]
+    db.expire_all()
+    return {
+        (s.categoria, s.tipo_licitacao): {c: getattr(s, c) for c in colunas}
+        for s in db.query(InsightConhecimento)
+    }
+
+
+def test_diferencas_equivalem_ao_recalculo(db):
+    import random
+
+    aleatorio = random.Random(7)
+    for rodada in range(12):
+        lote = [
+            _licitacao(
+                f"L-{aleatorio.randrange(40)}",
+                categoria=aleatorio.choice(["servicos", "bens", None]),
+                tipo=aleatorio.choice(["pregao", "concorrencia"]),
+                valor=aleatorio.choice([None, 0.0, 10.0, 25.0, 40.0, 100.0]),
+                valor_estimado=aleatorio.choice([None, 5.0, 30.0]),
+                prazo_execucao=aleatorio.choice([None, 0, 30, 60, 90]),
+                numero_propostas=aleatorio.choice([None, 2, 5]),
+                modalidade=aleatorio.choice(["Pregão", None]),
+                fatores_sucesso=aleatorio.sample(["a", "b", "c"], aleatorio.randrange(3)),
+                data_resultado=aleatorio.choice(["2024-01-10", "2024-03-02", None]),
+            )
+            for _ in range(aleatorio.randrange(1, 8))
+        ]
+        salvar_licitacoes(db, lote)
+        db.commit()
+        incremental = _snapshots(db)
+
+        reconstruir_insights(db)
+        assert _snapshots(db) == incremental, rodada
+
+
+def test_atualizacao_nao_rele_o_grupo(engine, db):
+    salvar_licitacoes(db, [_licitacao(f"S-{i}", valor=float(i), prazo_execucao=i) for i in range(1, 301)])
+    db.commit()
+
+    consultas = []
+    event.listen(engine, "before_cursor_execute", lambda *args: consultas.append(args[2]))
+    # Mesmo valor: nenhuma consulta ao grupo; valor novo: só mínimo, máximo e mediana
+    salvar_licitacoes(db, [_licitacao("S-5", valor=5.0, prazo_execucao=5, modalidade="Pregão")])
+    salvar_licitacoes(db, [_licitacao("S-1", valor=1000.0, prazo_execucao=1)])
+    db.commit()
+
+    leituras = [sql for sql in consultas if sql.lstrip().upper().startswith("SELECT") and "FROM base_conhecimento " in sql]
+    assert all("numero_edital IN" in sql or "fatores_sucesso" not in sql for sql in leituras)
+    assert len([sql for sql in leituras if "numero_edital IN" not in sql]) == 2
+
+    snapshot = db.get(InsightConhecimento, {"categoria": "servicos", "tipo_licitacao": "pregao"})
+    assert (snapshot.valor_minimo, snapshot.valor_maximo, snapshot.valor_mediana) == (2.0, 1000.0, 152.0)
+    assert snapshot.modalidades == {"Pregão": 1}
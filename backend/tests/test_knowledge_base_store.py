@@ -0,0 +1,107 @@
+"""
+Testes do armazenamento da base de conhecimento (tabela base_conhecimento).
+"""
+
+import json
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_scraping import LicitacaoConhecimento
+from services.knowledge_base_store import (
+    carregar_licitacoes, contar_licitacoes, migrar_arquivos_json, salvar_licitacoes
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    sessao = sessionmaker(bind=engine)()
+    yield sessao
+    sessao.close()
+    engine.dispose()
+
+
+def _licitacao(numero, site="Portal da Transparência", **campos):
+    dados = {
+        "numero_edital": numero,
+        "site_origem": site,
+        "objeto": "Serviços de limpeza predial",
+        "categoria": "servicos",
+        "tipo_licitacao": "pregao",
+        "valor_contratado": 100000.0,
+        "fatores_sucesso": ["Especificação clara"],
+    }
+    dados.update(campos)
+    return dados
+
+
+def test_upsert_por_edital_e_site(db):
+    assert salvar_licitacoes(db, [
+        _licitacao("PE-1"),
+        _licitacao("PE-1", site="ComprasNet"),
+        _licitacao("PE-2", categoria="bens"),
+        _licitacao("", objeto="sem número"),
+    ]) == 3
+    db.commit()
+    data_coleta = db.query(LicitacaoConhecimento).filter_by(numero_edital="PE-1", site_origem="ComprasNet").one().data_coleta
+
+    # Nova coleta do mesmo edital atualiza a linha, sem duplicar
+    salvar_licitacoes(db, [_licitacao("PE-1", site="ComprasNet", valor_contratado=90000.0)])
+    db.commit()
+    db.expire_all()
+
+    assert contar_licitacoes(db) == 3
+    linha = db.query(LicitacaoConhecimento).filter_by(numero_edital="PE-1", site_origem="ComprasNet").one()
+    assert linha.valor_contratado == 90000.0
+    assert linha.data_coleta == data_coleta
+    assert linha.data_atualizacao >= data_coleta
+
+    servicos = carregar_licitacoes(db, categoria="servicos")
+    assert {l["site_origem"] for l in servicos} == {"Portal da Transparência", "ComprasNet"}
+    assert servicos[0]["especificacoes_tecnicas"] == []
+
+
+def test_migracao_dos_arquivos_json(db, tmp_path):
+    antigo = [_licitacao("PE-1", valor_contratado=1.0), _licitacao("PE-2")]
+    recente = [_licitacao("PE-1", valor_contratado=2.0)]
+    (tmp_path / "knowledge_base_20240101_060000.json").write_text(json.dumps(antigo), encoding="utf-8")
+    (tmp_path / "knowledge_base_20240108_060000.json").write_text(json.dumps(recente), encoding="utf-8")
+    (tmp_path / "knowledge_base_20240115_060000.json").write_text("{corrompido", encoding="utf-8")
+    (tmp_path / "historico_editais.json").write_text("[]", encoding="utf-8")
+
+    resultado = migrar_arquivos_json(db, str(tmp_path))
+    assert len(resultado["arquivos"]) == 2
+    assert list(resultado["erros"]) == [str(tmp_path / "knowledge_base_20240115_060000.json")]
+
+    # Repetir a migração não duplica
+    migrar_arquivos_json(db, str(tmp_path))
+    assert contar_licitacoes(db) == 2
+    pe1 = db.query(LicitacaoConhecimento).filter_by(numero_edital="PE-1").one()
+    assert pe1.valor_contratado == 2.0
+
+
+def test_carga_por_categoria_usa_o_indice(db):
+    salvar_licitacoes(db, [_licitacao(f"PE-{i}", categoria="servicos" if i % 2 else "bens") for i in range(20)])
+    db.commit()
+
+    engine = db.get_bind()
+    executados = []
+    registrar = lambda conn, cursor, sql, params, contexto, varios: executados.append((sql, params))
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        assert len(carregar_licitacoes(db, categoria="servicos")) == 10
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+    sql, params = executados[-1]
+    plano = [linha[-1] for linha in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params)]
+    assert any("ix_base_conhecimento_categoria_tipo" in detalhe for detalhe in plano)
@@ -0,0 +1,119 @@
+"""
+Testes do registro de LLMs locais (carga sob demanda, compartilhamento e descarga).
+"""
+
+import copy
+import threading
+import time
+
+import pytest
+
+from crewai_agents.llm_registry import LLMCompartilhado, RegistroLLM
+
+
+class _Modelo:
+    def __init__(self):
+        self.prompts = []
+
+    def chat_completion(self, messages, temperature, max_tokens):
+        self.prompts.append(messages[-1]["content"])
+        return "ok"
+
+
+class _Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def _registro(tempo_ocioso=60):
+    cargas = []
+
+    def carregar():
+        time.sleep(0.02)  # Carga lenta: chamadas concorrentes devem esperar a mesma instância
+        cargas.append(1)
+        return _Modelo()
+
+    relogio = _Relogio()
+    registro = RegistroLLM(tempo_ocioso=tempo_ocioso, relogio=relogio)
+    registro.registrar("local", carregar)
+    return registro, cargas, relogio
+
+
+def test_carga_sob_demanda_e_unica_por_processo():
+    registro, cargas, _ = _registro()
+    llm = LLMCompartilhado(registro, "local")
+    assert cargas == []
+    assert registro.status()["local"]["carregado"] is False
+
+    instancias = []
+    threads = [threading.Thread(target=lambda: instancias.append(registro.obter("local"))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(cargas) == 1
+    assert len({id(i) for i in instancias}) == 1
+    assert llm.chat_completion([{"role": "user", "content": "olá"}], 0.7, 256) == "ok"
+    assert registro.obter("local").prompts == ["olá"]
+    assert len(cargas) == 1
+
+
+def test_copia_e_introspeccao_nao_carregam_o_modelo():
+    registro, cargas, _ = _registro()
+    llm = LLMCompartilhado(registro, "local")
+
+    assert not hasattr(llm, "_inexistente")
+    assert not hasattr(llm, "__len__")
+    raso, profundo = copy.copy(llm), copy.deepcopy(llm)
+    assert raso._registro is registro and profundo._registro is registro
+    assert profundo._nome == "local"
+
+    # Inspeção feita por frameworks ao montar os agentes (ex.: create_llm do CrewAI)
+    for atributo in ("model", "model_name", "temperature", "prompts", "llm"):
+        assert getattr(llm, atributo, None) is None
+    assert hasattr(raso, "chat_completion")
+    assert cargas == []
+    assert registro.status()["local"]["carregado"] is False
+
+    # Só a chamada carrega o modelo, uma única vez
+    profundo.chat_completion([{"content": "a"}], 0.7, 256)
+    raso.chat_completion([{"content": "b"}], 0.7, 256)
+    assert len(cargas) == 1
+
+
+def test_descarga_de_ociosos_e_recarga():
+    registro, cargas, relogio = _registro(tempo_ocioso=60)
+    llm = LLMCompartilhado(registro, "local")
+    llm.chat_completion([{"content": "a"}], 0.7, 256)
+
+    relogio.agora = 30
+    assert registro.descarregar_ociosos() == 0
+
+    # Modelo em uso não é descarregado, mesmo ocioso há mais tempo que o limite
+    with registro.usar("local"):
+        relogio.agora = 200
+        assert registro.descarregar_ociosos() == 0
+
+    relogio.agora = 300
+    assert registro.descarregar_ociosos() == 1
+    assert registro.status()["local"]["carregado"] is False
+
+    llm.chat_completion([{"content": "b"}], 0.7, 256)
+    assert len(cargas) == 2
+
+
+def test_aquecimento_em_segundo_plano():
+    registro, cargas, _ = _registro()
+    registro.aquecer("local").join()
+    assert len(cargas) == 1
+    assert registro.status()["local"]["tempo_carga_s"] is not None
+
+    registro.registrar("quebrado", lambda: (_ for _ in ()).throw(OSError("modelo não encontrado")))
+    registro.aquecer("quebrado").join()
+    assert registro.status()["quebrado"]["erro"] == "modelo não encontrado"
+    with pytest.raises(KeyError):
+        registro.obter("inexistente")
@@ -0,0 +1,177 @@
+"""
+Testes da contabilização de tokens, tempo e custo das chamadas de LLM (uso_llm).
+"""
+
+import httpx
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_monitoring import UsoLLM
+from crewai_agents.llm_registry import ClienteInferencia, LLMCompartilhado, RegistroLLM
+from monitoring.llm_usage import ContabilizadorUso, chamada_atual, listar_uso, resumir_uso
+
+
+@pytest.fixture
+def fabrica():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class _Modelo:
+    def chat_completion(self, messages, temperature, max_tokens):
+        if messages[-1]["content"] == "falhe":
+            raise RuntimeError("modelo indisponível")
+        return "r" * 40
+
+
+def _llm(contabilizador):
+    registro = RegistroLLM(tempo_ocioso=0)
+    registro.registrar("local", _Modelo)
+    return LLMCompartilhado(registro, "local", contabilizador=contabilizador)
+
+
+def _mensagem(texto):
+    return [{"role": "user", "content": texto}]
+
+
+def test_chamadas_fora_de_execucao_nao_sao_registradas(fabrica):
+    contabilizador = ContabilizadorUso(session_factory=fabrica)
+    assert _llm(contabilizador).chat_completion(_mensagem("oi"), 0.7, 10) == "r" * 40
+
+    assert contabilizador.gravar_pendentes() == 0
+    db = fabrica()
+    assert db.query(UsoLLM).count() == 0
+    db.close()
+
+
+def test_tarefas_somam_tokens_tempo_e_custo_das_chamadas(fabrica):
+    contabilizador = ContabilizadorUso(session_factory=fabrica, custo_prompt_1k=1.0, custo_resposta_1k=2.0)
+    llm = _llm(contabilizador)
+
+    with contabilizador.execucao("geracao_edital", request_id="req-1"):
+        with contabilizador.tarefa("validacao_requisitos", agente="Coletor"):
+            llm.chat_completion(_mensagem("p" * 400), 0.7, 10)
+        with contabilizador.tarefa("geracao_edital", agente="Gerador"):
+            llm.chat_completion(_mensagem("p" * 4000), 0.7, 10)
+            llm.chat_completion(_mensagem("p" * 4000), 0.7, 10)
+        # Gravado apenas no fim da execução
+        db = fabrica()
+        assert db.query(UsoLLM).count() == 0
+        db.close()
+
+    db = fabrica()
+    chamadas = listar_uso(db, request_id="req-1", tipo="chamada")
+    assert len(chamadas) == 3
+    assert {c.agente for c in chamadas} == {"Coletor", "Gerador"}
+    assert all(c.tokens_resposta == 10 and c.tokens_estimados for c in chamadas)
+
+    etapas = {g["etapa"]: g for g in resumir_uso(db, agrupar_por="etapa", request_id="req-1")}
+    geracao = etapas["geracao_edital"]
+    assert geracao["tokens_prompt"] == 2000
+    assert geracao["tokens_resposta"] == 20
+    assert geracao["tentativas"] == 2
+    assert geracao["custo"] == pytest.approx(2.0 + 0.04)
+    assert etapas["validacao_requisitos"]["tokens_prompt"] == 100
+    # Etapa mais cara primeiro
+    assert list(etapas) == ["geracao_edital", "validacao_requisitos"]
+
+    modelos = resumir_uso(db, agrupar_por="modelo", tipo="chamada")
+    assert modelos[0]["modelo"] == "local" and modelos[0]["registros"] == 3
+    db.close()
+
+
+def test_falhas_sao_registradas_e_propagadas(fabrica):
+    contabilizador = ContabilizadorUso(session_factory=fabrica)
+    llm = _llm(contabilizador)
+
+    with contabilizador.execucao("processamento_licitacao", licitacao_id="lic-9"):
+        with pytest.raises(RuntimeError):
+            with contabilizador.tarefa("processamento_licitacao", agente="Gerente"):
+                llm.chat_completion(_mensagem("falhe"), 0.7, 10)
+
+    db = fabrica()
+    registros = {r.tipo: r for r in listar_uso(db, licitacao_id="lic-9")}
+    assert registros["chamada"].sucesso is False
+    assert registros["chamada"].erro == "modelo indisponível"
+    assert registros["tarefa"].sucesso is False
+    assert resumir_uso(db, agrupar_por="licitacao_id")[0]["falhas"] == 1
+    db.close()
+
+
+def test_etapas_sequenciais_trocam_etapa_e_agente_por_tarefa(fabrica):
+    contabilizador = ContabilizadorUso(session_factory=fabrica)
+    llm = _llm(contabilizador)
+    etapas = [("baixar", "Coletor"), ("analisar", "Analisador"), ("salvar", "Estruturador")]
+
+    def kickoff(prompts, task_callback):
+        # Como a Crew sequencial: cada tarefa chama o LLM e, concluída, o task_callback
+        for prompt in prompts:
+            llm.chat_completion(_mensagem(prompt), 0.7, 10)
+            task_callback(object())
+
+    with contabilizador.execucao("processamento_licitacao", licitacao_id="lic-1"):
+        with contabilizador.etapas_sequenciais(etapas) as proxima_etapa:
+            kickoff(["p" * 40, "p" * 400, "p" * 4], proxima_etapa)
+        # Fora das etapas, o agente deixa de ser o da última tarefa
+        with contabilizador.tarefa("pos_processamento"):
+            llm.chat_completion(_mensagem("p"), 0.7, 10)
+
+    with contabilizador.execucao("processamento_licitacao", licitacao_id="lic-2"):
+        with pytest.raises(RuntimeError):
+            with contabilizador.etapas_sequenciais(etapas) as proxima_etapa:
+                kickoff(["p" * 40, "falhe"], proxima_etapa)
+
+    db = fabrica()
+    tarefas = {r.etapa: r for r in listar_uso(db, licitacao_id="lic-1", tipo="tarefa")}
+    assert {e: (r.agente, r.tokens_prompt) for e, r in tarefas.items()} == {
+        "baixar": ("Coletor", 10), "analisar": ("Analisador", 100), "salvar": ("Estruturador", 1),
+        "pos_processamento": (None, 1),
+    }
+    chamadas = listar_uso(db, licitacao_id="lic-1", tipo="chamada")
+    assert sorted((c.etapa, c.agente) for c in chamadas) == sorted(
+        [(e, a) for e, a in etapas] + [("pos_processamento", None)]
+    )
+
+    falha = {r.etapa: r for r in listar_uso(db, licitacao_id="lic-2", tipo="tarefa")}
+    assert set(falha) == {"baixar", "analisar"}
+    assert falha["baixar"].sucesso is True
+    assert (falha["analisar"].sucesso, falha["analisar"].erro) == (False, "modelo indisponível")
+    db.close()
+
+
+def test_cliente_de_inferencia_informa_tokens_e_tentativas(fabrica, monkeypatch):
+    monkeypatch.setattr("crewai_agents.llm_registry.time.sleep", lambda s: None)
+    respostas = iter([503, 503, 200])
+
+    def responder(request):
+        status = next(respostas)
+        if status != 200:
+            return httpx.Response(503, json={"error": {"message": "fila cheia"}})
+        return httpx.Response(200, json={
+            "choices": [{"message": {"role": "assistant", "content": "ok"}}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 3, "total_tokens": 15},
+        })
+
+    cliente = ClienteInferencia(url="http://inferencia", tentativas=3)
+    cliente.cliente = httpx.Client(transport=httpx.MockTransport(responder), base_url="http://inferencia")
+    contabilizador = ContabilizadorUso(session_factory=fabrica)
+
+    with contabilizador.execucao("geracao_edital", request_id="req-2"):
+        with contabilizador.chamada("local", "prompt longo " * 50) as chamada:
+            chamada.resposta(cliente.chat_completion(_mensagem("x"), 0.7, 10))
+            assert chamada_atual() is chamada
+
+    db = fabrica()
+    uso = listar_uso(db, request_id="req-2")[0]
+    assert (uso.tokens_prompt, uso.tokens_resposta, uso.tentativas) == (12, 3, 3)
+    assert uso.tokens_estimados is False
+    db.close()
@@ -0,0 +1,86 @@
+"""
+Testes do LLM falso e do gerador de carga (loadtest/).
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, Response
+
+from loadtest.gerador import Cenario, executar_cenario, instantes_chegada, percentil
+from loadtest.llm_falso import ConfigLLMFalso, criar_app, ler_distribuicao
+
+
+def _chat(app, corpo):
+    async def requisitar():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://llm") as cliente:
+            return await cliente.post("/v1/chat/completions", json=corpo)
+    return asyncio.run(requisitar())
+
+
+def test_llm_falso_responde_no_formato_da_openai():
+    app = criar_app(ConfigLLMFalso(latencia="fixa:0", tokens="5", semente=1))
+    mensagens = [{"role": "user", "content": "p" * 40}]
+
+    dados = _chat(app, {"model": "gpt-3.5-turbo", "messages": mensagens}).json()
+    assert dados["model"] == "gpt-3.5-turbo"
+    assert len(dados["choices"][0]["message"]["content"].split()) == 5
+    assert dados["choices"][0]["finish_reason"] == "stop"
+    assert dados["usage"] == {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+    limitado = _chat(app, {"messages": mensagens, "max_tokens": 3}).json()
+    assert limitado["usage"]["completion_tokens"] == 3
+    assert limitado["choices"][0]["finish_reason"] == "length"
+
+
+def test_llm_falso_simula_falhas_e_valida_distribuicao():
+    app = criar_app(ConfigLLMFalso(latencia="fixa:0", taxa_sobrecarga=1.0))
+    resposta = _chat(app, {"messages": [{"role": "user", "content": "oi"}]})
+    assert resposta.status_code == 503
+    assert resposta.json()["error"]["type"] == "server_overloaded"
+
+    config = ConfigLLMFalso(latencia="lognormal:0.8,0.5", semente=7)
+    assert all(config.sortear_latencia() >= 0 for _ in range(100))
+    assert ler_distribuicao("uniforme:0.2,1.5") == ("uniforme", [0.2, 1.5])
+    with pytest.raises(ValueError):
+        ler_distribuicao("pareto:1")
+    with pytest.raises(ValueError):
+        ler_distribuicao("normal:0.8")
+
+
+def test_percentis_e_chegadas():
+    valores = [float(v) for v in range(1, 101)]
+    assert (percentil(valores, 50), percentil(valores, 95), percentil(valores, 99)) == (50.0, 95.0, 99.0)
+    assert percentil([3.0], 99) == 3.0 and percentil([], 50) is None
+
+    assert instantes_chegada(10, 1, "constante") == [i / 10 for i in range(10)]
+    poisson = instantes_chegada(200, 5)
+    assert 800 < len(poisson) < 1200
+    assert poisson == sorted(poisson)
+
+
+def test_gerador_em_malha_aberta_mede_latencia_e_status():
+    app = FastAPI()
+
+    @app.get("/lento/{i}")
+    async def lento(i: int):
+        await asyncio.sleep(0.05)
+        if i % 5 == 0:
+            return Response(status_code=500)
+        return {"i": i}
+
+    cenario = Cenario("lento", "GET /lento", lambda i, contexto: {"method": "GET", "url": f"/lento/{i}"})
+
+    async def carregar():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as cliente:
+            return await executar_cenario(cliente, cenario, rps=100, duracao=0.2, distribuicao="constante")
+
+    resumo = asyncio.run(carregar()).resumo()
+    assert resumo["enviadas"] == 20 and resumo["descartadas"] == 0
+    assert resumo["status"] == {"200": 16, "500": 4}
+    assert resumo["sucessos"] == 16
+    # Requisições simultâneas: a duração total fica perto da janela de disparo, não de 20 x 50 ms
+    assert resumo["duracao_s"] < 0.6
+    assert resumo["latencia"]["p50_ms"] >= 50
+    assert resumo["latencia"]["p99_ms"] >= resumo["latencia"]["p50_ms"]
@@ -0,0 +1,104 @@
+"""
+Testes das métricas do Prometheus (registro, middleware e consultas SQL).
+"""
+
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from monitoring.metrics import MetricasAPI, MiddlewareMetricas, RegistroMetricas, instrumentar_engine, operacao_sql
+
+
+def _linhas(texto):
+    return {linha for linha in texto.splitlines() if not linha.startswith("#")}
+
+
+def test_exposicao_de_contador_medidor_e_histograma():
+    registro = RegistroMetricas()
+    contador = registro.contador("pedidos_total", "Pedidos", ("tipo",))
+    medidor = registro.medidor("fila", "Fila")
+    histograma = registro.histograma("duracao_segundos", "Duração", buckets=(0.1, 1.0))
+
+    contador.rotulos('a"b').inc()
+    contador.rotulos('a"b').inc(2)
+    medidor.inc(5)
+    medidor.dec()
+    for valor in (0.05, 0.1, 0.5, 3.0):
+        histograma.observar(valor)
+
+    texto = registro.gerar()
+    assert "# TYPE pedidos_total counter" in texto
+    assert "# TYPE duracao_segundos histogram" in texto
+    assert _linhas(texto) >= {
+        'pedidos_total{tipo="a\\"b"} 3',
+        "fila 4",
+        'duracao_segundos_bucket{le="0.1"} 2',
+        'duracao_segundos_bucket{le="1"} 3',
+        'duracao_segundos_bucket{le="+Inf"} 4',
+        "duracao_segundos_sum 3.65",
+        "duracao_segundos_count 4",
+    }
+
+
+def test_medidor_calculado_na_coleta_ignora_falhas():
+    registro = RegistroMetricas()
+    registro.medidor("fila_itens", "Itens por status", ("status",), funcao=lambda: {"pendente": 3, "erro": 1})
+
+    def falhar():
+        raise RuntimeError("banco indisponível")
+    registro.medidor("quebrado", "Falha na coleta", funcao=falhar)
+
+    texto = registro.gerar()
+    assert 'fila_itens{status="pendente"} 3' in texto
+    assert 'fila_itens{status="erro"} 1' in texto
+    assert "# TYPE quebrado gauge" in texto
+
+
+def test_middleware_usa_rota_declarada_e_status():
+    metricas_api = MetricasAPI()
+    app = FastAPI()
+    app.add_middleware(MiddlewareMetricas, metricas_api=metricas_api)
+
+    @app.get("/editais/{edital_id}")
+    def obter(edital_id: str):
+        return {"id": edital_id}
+
+    async def requisitar():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+            for edital_id in ("1", "2", "3"):
+                assert (await cliente.get(f"/editais/{edital_id}")).status_code == 200
+            assert (await cliente.get("/inexistente")).status_code == 404
+
+    asyncio.run(requisitar())
+
+    texto = metricas_api.gerar()
+    assert 'http_requisicoes_total{metodo="GET",rota="/editais/{edital_id}",status="200"} 3' in texto
+    assert 'http_requisicoes_total{metodo="GET",rota="nao_mapeada",status="404"} 1' in texto
+    assert 'http_requisicao_duracao_segundos_count{metodo="GET",rota="/editais/{edital_id}"} 3' in texto
+    assert "http_requisicoes_em_andamento 0" in texto
+
+
+def test_consultas_sql_por_operacao():
+    metricas_api = MetricasAPI()
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    instrumentar_engine(engine, metricas_api)
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        conn.execute(text("INSERT INTO t VALUES (1)"))
+        conn.execute(text("SELECT x FROM t")).all()
+        conn.execute(text("  select count(*) from t")).all()
+        try:
+            conn.execute(text("SELECT y FROM inexistente"))
+        except Exception:
+            pass
+    engine.dispose()
+
+    texto = metricas_api.gerar()
+    assert 'db_consultas_total{operacao="SELECT"} 2' in texto
+    assert 'db_consultas_total{operacao="INSERT"} 1' in texto
+    assert 'db_consultas_total{operacao="OUTRA"} 1' in texto
+    assert operacao_sql("\n  update t set x = 2") == "UPDATE"
@@ -0,0 +1,141 @@
+"""
+Testes da paginação por cursor (keyset) e da listagem /api/licitacoes/.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.app import app
+from api.database import Base, Licitacao, get_db
+from api.pagination import CURSOR_HEADER, decode_cursor, encode_cursor, keyset_paginate
+
+INICIO = datetime(2024, 3, 1, 8, 30)
+
+
+@pytest.fixture
+def fabrica():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    db = fabrica()
+    for i in range(7):
+        db.add(Licitacao(
+            id=f"l{i}", objeto=f"Objeto {i}", uf="DF" if i % 2 else "SP",
+            # l5 e l6 com a mesma data: o id desempata
+            data_processamento=INICIO + timedelta(days=min(i, 5)),
+        ))
+    db.add(Licitacao(id="n1", objeto="Sem data 1", uf="DF"))
+    db.add(Licitacao(id="n2", objeto="Sem data 2", uf="SP"))
+    db.commit()
+    # Registros antigos, sem data de processamento (a coluna tem valor padrão no INSERT)
+    db.query(Licitacao).filter(Licitacao.id.in_(["n1", "n2"])).update({Licitacao.data_processamento: None})
+    db.commit()
+    db.close()
+    yield fabrica
+    engine.dispose()
+
+
+@pytest.fixture
+def listar(fabrica):
+    def sessao():
+        db = fabrica()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = sessao
+
+    def requisitar(**params):
+        async def chamar():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as cliente:
+                return await cliente.get("/api/licitacoes/", params=params)
+        return asyncio.run(chamar())
+
+    yield requisitar
+    app.dependency_overrides.pop(get_db, None)
+
+
+def _todas_as_paginas(listar, **params):
+    ids, cursor, paginas = [], None, 0
+    while True:
+        resposta = listar(**params, **({"cursor": cursor} if cursor else {}))
+        assert resposta.status_code == 200
+        ids.extend(l["id"] for l in resposta.json())
+        paginas += 1
+        cursor = resposta.headers.get(CURSOR_HEADER)
+        if cursor is None:
+            return ids, paginas
+
+
+def test_cursor_ida_e_volta():
+    valores = [INICIO, "l3", None, 7]
+    cursor = encode_cursor(valores)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, 4) == valores
+
+
+@pytest.mark.parametrize("cursor", ["não-é-base64", encode_cursor(["l1"]), "bnVsbA", "e30"])
+def test_cursor_invalido(cursor):
+    with pytest.raises(HTTPException) as erro:
+        decode_cursor(cursor, 2)
+    assert erro.value.status_code == 400
+
+
+def test_paginas_percorrem_todos_os_registros_inclusive_sem_data(listar):
+    ids, paginas = _todas_as_paginas(listar, limit=2)
+    assert ids == ["l6", "l5", "l4", "l3", "l2", "l1", "l0", "n2", "n1"]
+    assert paginas == 5
+
+    # Quantidade múltipla do limite: a última página cheia não traz cursor
+    ids, paginas = _todas_as_paginas(listar, limit=3)
+    assert len(ids) == 9 and paginas == 3
+
+
+def test_filtros_aplicados_em_todas_as_paginas(listar):
+    ids, _ = _todas_as_paginas(listar, limit=2, uf="DF")
+    assert ids == ["l5", "l3", "l1", "n1"]
+
+    ids, _ = _todas_as_paginas(listar, limit=1, processado_desde=(INICIO + timedelta(days=4)).isoformat())
+    assert ids == ["l6", "l5", "l4"]
+
+
+def test_cursor_invalido_na_listagem(listar):
+    assert listar(cursor="xyz").status_code == 400
+    assert listar(cursor=encode_cursor([None, None])).status_code == 400
+
+
+def test_skip_legado_continua_aceito(listar):
+    resposta = listar(skip=2, limit=3)
+    assert resposta.status_code == 200
+    assert [l["id"] for l in resposta.json()] == ["l4", "l3", "l2"]
+    assert resposta.headers["Deprecation"] == "true"
+
+    # O cursor devolvido continua a partir da página obtida com skip
+    seguinte = listar(cursor=resposta.headers[CURSOR_HEADER], limit=3)
+    assert [l["id"] for l in seguinte.json()] == ["l1", "l0", "n2"]
+
+    assert listar(skip=2, cursor=resposta.headers[CURSOR_HEADER]).status_code == 400
+
+
+def test_keyset_paginate_sem_coluna_nula(fabrica):
+    db = fabrica()
+    consulta = db.query(Licitacao.id)
+    pagina, cursor = keyset_paginate(consulta, (Licitacao.id,), None, 4)
+    assert [l.id for l in pagina] == ["n2", "n1", "l6", "l5"]
+    pagina, cursor = keyset_paginate(consulta, (Licitacao.id,), cursor, 4)
+    assert [l.id for l in pagina] == ["l4", "l3", "l2", "l1"]
+    pagina, cursor = keyset_paginate(consulta, (Licitacao.id,), cursor, 4)
+    assert [l.id for l in pagina] == ["l0"] and cursor is None
+    db.close()
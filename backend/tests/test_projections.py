@@ -0,0 +1,104 @@
+"""
+Testes das projeções de colunas (parâmetro `fields`) da listagem de licitações.
+"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.app import LICITACAO_CAMPOS_LISTA, app
+from api.database import Base, Licitacao, get_db
+from api.projections import colunas, colunas_do_modelo, linha_para_dict, resolver_campos
+
+DISPONIVEIS = ("id", "objeto", "resumo", "analise_juridica_texto", "risco_geral", "data_processamento")
+PADRAO = ("id", "objeto")
+
+
+def test_resolver_campos_padrao_extras_e_ordem():
+    assert resolver_campos(None, DISPONIVEIS, PADRAO) == ["id", "objeto"]
+    # Campos obrigatórios entram mesmo sem pedido; a ordem é a do modelo
+    assert resolver_campos(" risco_geral , ,resumo", DISPONIVEIS, PADRAO, obrigatorios=("data_processamento",)) == [
+        "id", "objeto", "resumo", "risco_geral", "data_processamento"
+    ]
+    assert resolver_campos("todos", DISPONIVEIS, PADRAO) == list(DISPONIVEIS)
+    assert resolver_campos("resumo,*", DISPONIVEIS, PADRAO) == list(DISPONIVEIS)
+
+
+def test_resolver_campos_rejeita_desconhecidos():
+    with pytest.raises(HTTPException) as erro:
+        resolver_campos("resumo,senha,__class__", DISPONIVEIS, PADRAO)
+    assert erro.value.status_code == 400
+    assert "senha, __class__" in erro.value.detail
+
+
+def test_colunas_seleciona_apenas_os_campos_pedidos():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Licitacao(id="l1", objeto="Objeto", analise_juridica_texto="texto longo"))
+    db.commit()
+
+    linha = db.query(*colunas(Licitacao, ["id", "objeto"])).one()
+    assert linha_para_dict(linha) == {"id": "l1", "objeto": "Objeto"}
+    assert "analise_juridica_texto" in colunas_do_modelo(Licitacao)
+    db.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def listar():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    db = fabrica()
+    db.add(Licitacao(
+        id="l1", objeto="Serviços de limpeza", resumo="Resumo", uf="DF",
+        analise_juridica_texto="Análise jurídica extensa", pontos_de_atencao_juridica=["Prazo curto"],
+    ))
+    db.commit()
+    db.close()
+
+    def sessao():
+        db = fabrica()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = sessao
+
+    def requisitar(**params):
+        async def chamar():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://api") as cliente:
+                return await cliente.get("/api/licitacoes/", params=params)
+        return asyncio.run(chamar())
+
+    yield requisitar
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+
+
+def test_listagem_retorna_apenas_a_projecao(listar):
+    item = listar().json()[0]
+    assert set(item) == set(LICITACAO_CAMPOS_LISTA)
+    assert item["uf"] == "DF"
+
+    item = listar(fields="pontos_de_atencao_juridica").json()[0]
+    assert item["pontos_de_atencao_juridica"] == ["Prazo curto"]
+    assert "analise_juridica_texto" not in item
+
+    item = listar(fields="todos").json()[0]
+    assert item["analise_juridica_texto"] == "Análise jurídica extensa"
+    assert set(item) == set(colunas_do_modelo(Licitacao))
+
+    resposta = listar(fields="inexistente")
+    assert resposta.status_code == 400
@@ -0,0 +1,157 @@
+"""
+Testes do registro de execuções de scraping (scrape_runs).
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_scraping import ExecucaoScraping
+from services.scrape_runs import (
+    TEMPO_MAX_EXECUCAO, contexto_execucao, execucao_atual, execucao_para_dict, listar_execucoes,
+    marcar_interrompidas, registrar_execucao, resumir_execucoes
+)
+
+
+@pytest.fixture
+def fabrica():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+class _Resposta:
+    def __init__(self, tamanho):
+        self.headers = {"content-length": str(tamanho)} if tamanho is not None else {}
+
+
+class _Pagina:
+    def __init__(self):
+        self.ouvintes = []
+
+    def on(self, evento, ouvinte):
+        self.ouvintes.append(ouvinte)
+
+    def responder(self, tamanho):
+        for ouvinte in self.ouvintes:
+            ouvinte(_Resposta(tamanho))
+
+
+async def _coletar(paginas):
+    # Código de scraping só conhece execucao_atual()
+    execucao = execucao_atual()
+    with execucao.site("portal"):
+        pagina = _Pagina()
+        execucao.observar_pagina(pagina)
+        for _ in range(paginas):
+            execucao.pagina()
+            pagina.responder(1000)
+            pagina.responder(None)
+            execucao.linhas(10)
+
+
+def test_registra_metricas_da_execucao(fabrica):
+    async def cenario():
+        async with registrar_execucao("correios", {"data_inicial": "01/01/2024"}, session_factory=fabrica):
+            # Bloco aninhado do mesmo alvo reaproveita a execução
+            async with registrar_execucao("correios", session_factory=fabrica):
+                await _coletar(3)
+            execucao_atual().erro("linha inválida")
+
+    asyncio.run(cenario())
+    db = fabrica()
+    execucoes = listar_execucoes(db)
+    assert len(execucoes) == 1
+
+    execucao = execucao_para_dict(execucoes[0])
+    assert execucao["status"] == "parcial"
+    assert execucao["origem"] == "manual"
+    assert execucao["paginas"] == 3
+    assert execucao["linhas_extraidas"] == 30
+    assert execucao["bytes_baixados"] == 3000
+    assert execucao["erros"] == 1
+    assert execucao["ultimo_erro"] == "linha inválida"
+    assert "portal" in execucao["duracao_por_site"]
+    assert execucao["parametros"] == {"data_inicial": "01/01/2024"}
+    db.close()
+
+
+def test_falha_e_origem_agendada(fabrica):
+    async def cenario():
+        with contexto_execucao("agendado", "ag-1"):
+            async with registrar_execucao("gov_procurement", session_factory=fabrica):
+                await _coletar(1)
+                raise RuntimeError("navegador fechou")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cenario())
+
+    db = fabrica()
+    execucao = db.query(ExecucaoScraping).one()
+    assert execucao.status == "erro"
+    assert execucao.origem == "agendado"
+    assert execucao.agendamento_id == "ag-1"
+    assert execucao.ultimo_erro == "navegador fechou"
+    assert execucao.finalizado_em is not None
+    db.close()
+
+
+def test_resumo_por_alvo(fabrica):
+    db = fabrica()
+    db.add_all([
+        ExecucaoScraping(alvo="correios", status="sucesso", duracao_segundos=10, paginas=5,
+                         linhas_extraidas=50, bytes_baixados=5000),
+        ExecucaoScraping(alvo="correios", status="erro", duracao_segundos=30, paginas=1),
+        ExecucaoScraping(alvo="correios", status="executando"),
+    ])
+    db.commit()
+
+    resumo = resumir_execucoes(listar_execucoes(db, alvo="correios"))
+    assert resumo == {"correios": {
+        "execucoes": 2,
+        "falhas": 1,
+        "duracao_media_segundos": 20.0,
+        "linhas_por_segundo": 1.25,
+        "paginas_por_segundo": 0.15,
+        "bytes_por_segundo": 125.0,
+    }}
+    assert len(listar_execucoes(db, status="executando")) == 1
+    db.close()
+
+
+def test_execucoes_abandonadas_sao_interrompidas(fabrica):
+    agora = datetime(2024, 3, 1, 12, 0)
+    db = fabrica()
+    db.add_all([
+        ExecucaoScraping(id="abandonada", alvo="correios", status="executando",
+                         iniciado_em=agora - TEMPO_MAX_EXECUCAO - timedelta(minutes=1)),
+        ExecucaoScraping(id="recente", alvo="correios", status="executando",
+                         iniciado_em=agora - timedelta(minutes=5)),
+        ExecucaoScraping(id="antiga", alvo="correios", status="sucesso", duracao_segundos=10,
+                         iniciado_em=agora - timedelta(days=1), finalizado_em=agora - timedelta(days=1)),
+    ])
+    db.commit()
+
+    assert marcar_interrompidas(db, agora=agora) == 1
+    assert marcar_interrompidas(db, agora=agora) == 0
+    db.expire_all()
+
+    abandonada = execucao_para_dict(db.get(ExecucaoScraping, "abandonada"))
+    assert abandonada["status"] == "interrompido"
+    assert abandonada["finalizado_em"] == agora.isoformat()
+    assert abandonada["duracao_segundos"] is None
+    assert db.get(ExecucaoScraping, "recente").status == "executando"
+    assert db.get(ExecucaoScraping, "antiga").status == "sucesso"
+    # Sem duração conhecida, a interrompida fica fora das médias
+    assert resumir_execucoes(listar_execucoes(db))["correios"]["execucoes"] == 1
+    db.close()
@@ -0,0 +1,145 @@
+"""
+Testes das expressões cron e do agendador de scraping.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_scraping import AgendamentoScraping
+from services.cron import ExpressaoCron
+from services.scraping_scheduler import AgendadorScraping
+
+SEGUNDA = datetime(2024, 1, 8, 10, 0)
+
+
+@pytest.mark.parametrize("expressao, apos, esperado", [
+    ("*/15 * * * *", datetime(2024, 1, 1, 10, 7), datetime(2024, 1, 1, 10, 15)),
+    ("0 6 * * 1", datetime(2024, 1, 1, 6, 0), datetime(2024, 1, 8, 6, 0)),
+    ("30 8-18/2 * * mon-fri", datetime(2024, 1, 5, 18, 30), datetime(2024, 1, 8, 8, 30)),
+    ("0 0 1 * *", datetime(2024, 1, 31, 12, 0), datetime(2024, 2, 1, 0, 0)),
+    ("0 0 29 2 *", datetime(2024, 3, 1), datetime(2028, 2, 29, 0, 0)),
+    ("0 12 13 * 5", datetime(2024, 1, 1), datetime(2024, 1, 5, 12, 0)),  # dia 13 OU sexta-feira
+    ("0 0 * * 7", datetime(2024, 1, 1), datetime(2024, 1, 7, 0, 0)),  # 7 = domingo
+    ("@daily", datetime(2024, 12, 31, 23, 59), datetime(2025, 1, 1, 0, 0)),
+])
+def test_proxima_execucao_cron(expressao, apos, esperado):
+    assert ExpressaoCron(expressao).proxima(apos) == esperado
+
+
+@pytest.mark.parametrize("expressao", ["* * * *", "60 * * * *", "0 0 30 2 *", "0 0 * * foo", "*/0 * * * *"])
+def test_expressao_cron_invalida(expressao):
+    with pytest.raises(ValueError):
+        ExpressaoCron(expressao).proxima(datetime(2024, 1, 1))
+
+
+@pytest.fixture
+def fabrica():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def _agendar(fabrica, agendamento_id, proxima, **campos):
+    db = fabrica()
+    db.add(AgendamentoScraping(
+        id=agendamento_id, alvo="teste", expressao_cron="0 * * * *",
+        parametros={"categorias": ["limpeza"]}, proxima_execucao=proxima, **campos
+    ))
+    db.commit()
+    db.close()
+
+
+def _obter(fabrica, agendamento_id):
+    db = fabrica()
+    agendamento = db.get(AgendamentoScraping, agendamento_id)
+    db.close()
+    return agendamento
+
+
+def test_dispara_vencidos_e_recupera_perdidas_uma_vez(fabrica):
+    execucoes = []
+
+    async def coletar(parametros):
+        execucoes.append(parametros)
+
+    # Vencido há três horas: as execuções perdidas viram uma só
+    _agendar(fabrica, "atrasado", SEGUNDA - timedelta(hours=3))
+    _agendar(fabrica, "sem_recuperacao", SEGUNDA - timedelta(hours=3), recuperar_perdidas=False)
+    _agendar(fabrica, "futuro", SEGUNDA + timedelta(hours=2))
+    agendador = AgendadorScraping(session_factory=fabrica, executores={"teste": coletar})
+
+    async def cenario():
+        disparados = await agendador.verificar(SEGUNDA)
+        await agendador.aguardar()
+        return disparados
+
+    assert asyncio.run(cenario()) == ["atrasado"]
+    assert execucoes == [{"categorias": ["limpeza"]}]
+
+    atrasado = _obter(fabrica, "atrasado")
+    assert atrasado.ultimo_status == "sucesso"
+    assert atrasado.em_execucao is False
+    assert atrasado.proxima_execucao == SEGUNDA + timedelta(hours=1)
+    sem_recuperacao = _obter(fabrica, "sem_recuperacao")
+    assert sem_recuperacao.ultimo_status == "pulada"
+    assert sem_recuperacao.proxima_execucao == SEGUNDA + timedelta(hours=1)
+
+
+def test_pula_sobreposicao_e_limita_concorrencia(fabrica):
+    ativos, pico = [0], [0]
+
+    for i in range(4):
+        _agendar(fabrica, f"ag-{i}", SEGUNDA)
+
+    async def cenario():
+        evento = asyncio.Event()
+
+        async def coletar(parametros):
+            ativos[0] += 1
+            pico[0] = max(pico[0], ativos[0])
+            await evento.wait()
+            ativos[0] -= 1
+
+        agendador = AgendadorScraping(session_factory=fabrica, executores={"teste": coletar}, max_concorrentes=2)
+        assert len(await agendador.verificar(SEGUNDA)) == 4
+        await asyncio.sleep(0.05)
+
+        # Uma hora depois as coletas anteriores ainda estão em andamento: nada dispara
+        assert await agendador.verificar(SEGUNDA + timedelta(hours=1)) == []
+        evento.set()
+        await agendador.aguardar()
+
+    asyncio.run(cenario())
+    assert pico[0] == 2
+    agendamento = _obter(fabrica, "ag-0")
+    assert agendamento.execucoes_puladas == 1
+    assert agendamento.ultimo_status == "sucesso"
+
+
+def test_erro_na_coleta_registrado(fabrica):
+    async def falhar(parametros):
+        raise RuntimeError("portal fora do ar")
+
+    _agendar(fabrica, "falha", SEGUNDA)
+    agendador = AgendadorScraping(session_factory=fabrica, executores={"teste": falhar})
+
+    async def cenario():
+        await agendador.verificar(SEGUNDA)
+        await agendador.aguardar()
+
+    asyncio.run(cenario())
+    agendamento = _obter(fabrica, "falha")
+    assert agendamento.ultimo_status == "erro"
+    assert agendamento.ultimo_erro == "portal fora do ar"
+    assert agendamento.em_execucao is False
@@ -0,0 +1,152 @@
+"""
+Testes da busca textual com FTS5 (SQLite).
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base, Licitacao
+from api.search_index import FONTES, _sql_remover_fts5, buscar, criar_indices_busca
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    # Registro anterior à criação do índice deve ser indexado no rebuild inicial
+    db.add(Licitacao(id="antiga", objeto="Aquisição de veículos utilitários", resumo="Frota"))
+    db.commit()
+    db.close()
+
+    criar_indices_busca(engine)
+    criar_indices_busca(engine)  # idempotente
+    yield engine
+    engine.dispose()
+
+
+def test_indexa_registros_existentes_e_ignora_acentos(engine):
+    resultados = buscar(engine, "aquisicao veiculo", ["licitacoes"])
+
+    assert [r["id"] for r in resultados] == ["antiga"]
+    assert "<mark>" in resultados[0]["titulo"]
+
+
+def test_indice_acompanha_insert_update_e_delete(engine):
+    db = sessionmaker(bind=engine)()
+    db.add(Licitacao(id="a", objeto="Serviços de manutenção predial", resumo="Manutenção preventiva e corretiva"))
+    db.add(Licitacao(id="b", objeto="Compra de computadores", resumo="Inclui manutenção"))
+    db.commit()
+
+    ids = [r["id"] for r in buscar(engine, "manutenção", ["licitacoes"])]
+    # Termo no título tem peso maior no ranking
+    assert ids == ["a", "b"]
+
+    db.get(Licitacao, "b").resumo = "Garantia de 36 meses"
+    db.commit()
+    assert [r["id"] for r in buscar(engine, "manutencao", ["licitacoes"])] == ["a"]
+
+    db.delete(db.get(Licitacao, "a"))
+    db.commit()
+    assert buscar(engine, "manutencao", ["licitacoes"]) == []
+    db.close()
+
+
+def test_consulta_sem_termos_e_operadores_fts(engine):
+    assert buscar(engine, "  -- ", ["licitacoes"]) == []
+    # Aspas e operadores digitados pelo usuário não quebram a sintaxe MATCH
+    assert buscar(engine, 'veículos" (\"*', ["licitacoes", "editais"])[0]["id"] == "antiga"
+
+
+def test_busca_correta_apos_vacuum(engine):
+    db = sessionmaker(bind=engine)()
+    db.add_all([
+        Licitacao(id="x1", objeto="Locação de impressoras", resumo="Outsourcing de impressão"),
+        Licitacao(id="x2", objeto="Reforma de agência", resumo="Obras civis"),
+        Licitacao(id="x3", objeto="Vigilância patrimonial", resumo="Segurança armada"),
+    ])
+    db.commit()
+    db.delete(db.get(Licitacao, "antiga"))
+    db.delete(db.get(Licitacao, "x1"))
+    db.commit()
+    db.close()
+
+    # Sem chave INTEGER PRIMARY KEY, o VACUUM pode renumerar o rowid das linhas
+    # restantes sem disparar triggers; a renumeração é feita explicitamente porque
+    # o SQLite não garante quando ela acontece
+    with engine.begin() as conn:
+        conn.exec_driver_sql("UPDATE licitacoes SET rowid = rowid + 100")
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+
+    resultados = buscar(engine, "vigilancia", ["licitacoes"])
+    assert [r["id"] for r in resultados] == ["x3"]
+    assert resultados[0]["titulo"] == "<mark>Vigilância</mark> patrimonial"
+    assert [r["id"] for r in buscar(engine, "reforma", ["licitacoes"])] == ["x2"]
+    assert buscar(engine, "impressoras", ["licitacoes"]) == []
+
+
+@pytest.mark.parametrize("definicao", [
+    "fts5(objeto, resumo, content='licitacoes', content_rowid='rowid', tokenize='unicode61 remove_diacritics 2')",
+    "fts5(id UNINDEXED, objeto, resumo, tokenize='unicode61 remove_diacritics 2')",
+], ids=["content_rowid", "id_unindexed"])
+def test_migra_versoes_anteriores_do_indice(engine, definicao):
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP TABLE licitacoes_fts")
+        conn.exec_driver_sql("DROP TABLE licitacoes_fts_chaves")
+        conn.exec_driver_sql(f"CREATE VIRTUAL TABLE licitacoes_fts USING {definicao}")
+
+    criar_indices_busca(engine)
+    with engine.connect() as conn:
+        atual = conn.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE name = 'licitacoes_fts'"
+        ).scalar()
+    assert "content=" not in atual and "UNINDEXED" not in atual
+    assert [r["id"] for r in buscar(engine, "veiculos", ["licitacoes"])] == ["antiga"]
+
+
+def test_triggers_removem_do_indice_sem_percorrer_a_tabela(engine):
+    fonte = FONTES["licitacoes"]
+    with engine.connect() as conn:
+        plano = conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {_sql_remover_fts5(fonte, '?')}", ("antiga",)
+        ).fetchall()
+        chaves = conn.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN UPDATE {fonte.tabela_chaves} SET id = ? WHERE id = ?", ("nova", "antiga")
+        ).fetchall()
+    detalhes = [linha[-1] for linha in plano + chaves]
+    # FTS5 com idxStr "=" é acesso direto pelo rowid; "INDEX 0:" vazio seria varredura completa
+    assert any(d.startswith("SCAN licitacoes_fts VIRTUAL TABLE INDEX") and d.endswith(":=") for d in detalhes)
+    assert not any(d.startswith("SCAN") and "VIRTUAL TABLE" not in d for d in detalhes)
+
+    # O custo (instruções da VM) de um UPDATE não cresce com o tamanho do índice
+    def instrucoes_por_update(total):
+        with engine.begin() as conn:
+            conn.exec_driver_sql(
+                "INSERT INTO licitacoes (id, objeto, resumo) VALUES " +
+                ", ".join(f"('carga-{total}-{i}', 'Objeto {i}', 'Resumo {i}')" for i in range(total))
+            )
+        bruta = engine.raw_connection()
+        try:
+            contador = [0]
+
+            def contar():
+                contador[0] += 1
+                return 0
+            bruta.driver_connection.set_progress_handler(contar, 1)
+            bruta.cursor().execute("UPDATE licitacoes SET resumo = 'Novo resumo' WHERE id = 'antiga'")
+            bruta.driver_connection.set_progress_handler(None, 1)
+            bruta.commit()
+        finally:
+            bruta.close()
+        return contador[0]
+
+    pequeno = instrucoes_por_update(100)
+    grande = instrucoes_por_update(5000)
+    assert grande < pequeno * 2
@@ -0,0 +1,68 @@
+"""
+Testes do serviço de sentimento (léxico, lote e cache no banco).
+"""
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from api.database import Base
+from api.database_feedback import SentimentoTexto
+from services import sentiment_service
+from services.sentiment_service import (
+    MOTOR_LEXICO, obter_sentimentos, polaridade_lexico, pontuar_lote, rotulo_sentimento
+)
+
+
+@pytest.fixture
+def sessao():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    yield db
+    db.close()
+    engine.dispose()
+
+
+def test_lexico_considera_negacao_e_acentos():
+    assert polaridade_lexico("Sistema ótimo e muito rápido") > 0.5
+    assert polaridade_lexico("Processo lento e confuso") == -1.0
+    assert polaridade_lexico("não é ruim") > 0
+    assert polaridade_lexico("Edital publicado ontem") == 0.0
+    assert rotulo_sentimento(polaridade_lexico("interface intuitiva")) == "positivo"
+
+
+def test_lote_em_processos_equivale_ao_sequencial(monkeypatch):
+    textos = [f"texto {i} {'bom' if i % 2 else 'ruim'} e lento" for i in range(60)]
+    sequencial = pontuar_lote(textos, MOTOR_LEXICO, processos=1)
+
+    monkeypatch.setattr(sentiment_service, "LIMIAR_PROCESSOS", 10)
+    monkeypatch.setattr(sentiment_service, "TAMANHO_BLOCO", 7)
+    paralelo = pontuar_lote(textos + textos, MOTOR_LEXICO, processos=2)
+
+    assert paralelo == sequencial
+
+
+def test_cache_evita_reprocessar_textos(sessao, monkeypatch):
+    textos = ["Prazo muito curto", "Excelente clareza", "Prazo muito curto", "  "]
+    primeiro = obter_sentimentos(sessao, textos, MOTOR_LEXICO)
+
+    assert set(primeiro) == {"Prazo muito curto", "Excelente clareza"}
+    assert primeiro["Excelente clareza"]["rotulo"] == "positivo"
+    assert sessao.query(SentimentoTexto).count() == 2
+
+    chamadas = []
+    original = sentiment_service.pontuar_lote
+    monkeypatch.setattr(sentiment_service, "pontuar_lote", lambda t, m=None: chamadas.append(list(t)) or original(t, m))
+
+    segundo = obter_sentimentos(sessao, ["Excelente  clareza", "Texto novo com erro"], MOTOR_LEXICO)
+
+    # Só o texto inédito é pontuado; espaços extras não mudam o hash
+    assert chamadas == [["Texto novo com erro"]]
+    assert segundo["Excelente  clareza"] == primeiro["Excelente clareza"]
+    assert segundo["Texto novo com erro"]["rotulo"] == "negativo"
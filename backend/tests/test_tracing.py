@@ -0,0 +1,192 @@
+"""
+Testes do rastreamento (spans, propagação por traceparent, SQL, ferramentas e exportadores).
+"""
+
+import asyncio
+import json
+
+import httpx
+from fastapi import BackgroundTasks, FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from monitoring.tracing import (
+    ExportadorArquivo, MiddlewareRastreamento, Rastreador, corpo_otlp, ler_traceparent, rastrear_consultas,
+)
+
+
+class _Coletor:
+    def __init__(self):
+        self.spans = []
+
+    def exportar(self, spans):
+        self.spans.extend(spans)
+
+
+def _rastreador():
+    coletor = _Coletor()
+    return Rastreador(coletor), coletor
+
+
+def _por_nome(spans):
+    return {s.nome: s for s in spans}
+
+
+def test_spans_aninhados_compartilham_trace_e_registram_erro():
+    rastreador, coletor = _rastreador()
+
+    with rastreador.span("edital.geracao", request_id="r1") as raiz:
+        with rastreador.span("crew.calculo_risco"):
+            pass
+        try:
+            with rastreador.span("crew.geracao_edital"):
+                raise ValueError("template ausente")
+        except ValueError:
+            pass
+    assert rastreador.span_atual() is None
+    assert rastreador.exportar_pendentes() == 3
+
+    spans = _por_nome(coletor.spans)
+    assert {s.trace_id for s in coletor.spans} == {raiz.trace_id}
+    assert spans["crew.calculo_risco"].pai_id == raiz.span_id
+    assert spans["edital.geracao"].pai_id is None
+    assert spans["crew.geracao_edital"].erro == "ValueError: template ausente"
+    assert spans["edital.geracao"].atributos == {"request_id": "r1"}
+
+
+def test_traceparent_continua_trace_remoto_e_respeita_amostragem():
+    rastreador, coletor = _rastreador()
+    trace_id, pai = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+
+    with rastreador.span("remoto", traceparent=f"00-{trace_id}-{pai}-01") as span:
+        assert ler_traceparent(rastreador.traceparent_atual()) == (trace_id, span.span_id, True)
+    assert (span.trace_id, span.pai_id) == (trace_id, pai)
+
+    # Não amostrado na origem: propagado, mas não exportado
+    with rastreador.span("descartado", traceparent=f"00-{trace_id}-{pai}-00"):
+        with rastreador.span("filho"):
+            pass
+    assert rastreador.exportar_pendentes() == 1
+    assert [s.nome for s in coletor.spans] == ["remoto"]
+
+    assert ler_traceparent("00-xyz-00f067aa0ba902b7-01") is None
+    assert ler_traceparent(f"00-{'0' * 32}-{pai}-01") is None
+
+
+def test_middleware_cria_span_da_requisicao_com_tarefas_em_segundo_plano():
+    rastreador, coletor = _rastreador()
+    app = FastAPI()
+    app.add_middleware(MiddlewareRastreamento, rastreador_alvo=rastreador)
+
+    def gerar_em_segundo_plano():
+        with rastreador.span("crew.geracao_edital"):
+            pass
+
+    @app.post("/editais/{edital_id}")
+    def gerar(edital_id: str, background_tasks: BackgroundTasks):
+        background_tasks.add_task(gerar_em_segundo_plano)
+        return {"id": edital_id}
+
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+    async def requisitar():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://teste") as cliente:
+            resposta = await cliente.post("/editais/7", headers={"traceparent": f"00-{trace_id}-00f067aa0ba902b7-01"})
+            assert resposta.headers["x-trace-id"] == trace_id
+            assert (await cliente.get("/inexistente")).status_code == 404
+
+    asyncio.run(requisitar())
+    rastreador.exportar_pendentes()
+
+    spans = _por_nome(coletor.spans)
+    requisicao = spans["HTTP POST /editais/{edital_id}"]
+    assert requisicao.trace_id == trace_id
+    assert requisicao.atributos["http.status_code"] == 200
+    assert spans["crew.geracao_edital"].pai_id == requisicao.span_id
+    assert spans["HTTP GET"].atributos["http.status_code"] == 404
+
+
+def test_consultas_sql_apenas_dentro_de_um_span():
+    rastreador, coletor = _rastreador()
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    rastrear_consultas(engine, rastreador)
+
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE t (x INTEGER)"))
+        with rastreador.span("feedback.processar_lote") as lote:
+            conn.execute(text("INSERT INTO t VALUES (1)"))
+            try:
+                conn.execute(text("SELECT y FROM inexistente"))
+            except Exception:
+                pass
+    engine.dispose()
+    rastreador.exportar_pendentes()
+
+    consultas = [s for s in coletor.spans if s.nome.startswith("db.")]
+    assert [s.nome for s in consultas] == ["db.INSERT", "db.SELECT"]
+    assert all(s.pai_id == lote.span_id for s in consultas)
+    assert consultas[0].atributos["db.system"] == "sqlite"
+    assert "inexistente" in consultas[1].erro
+
+
+def test_apenas_ferramentas_decoradas_sao_rastreadas():
+    rastreador, coletor = _rastreador()
+
+    class BaseFerramenta:
+        def run(self, *args, **kwargs):
+            return self._run(*args, **kwargs)
+
+    @rastreador.ferramenta
+    class CalcularRisco(BaseFerramenta):
+        name = "Calcular Risco"
+
+        def _run(self, valor):
+            return valor * 2
+
+    class FerramentaExterna(BaseFerramenta):
+        def _run(self):
+            return "ok"
+
+    with rastreador.span("crew.calculo_risco") as etapa:
+        assert CalcularRisco().run(21) == 42
+        assert FerramentaExterna().run() == "ok"
+    rastreador.exportar_pendentes()
+
+    assert [s.nome for s in coletor.spans] == ["tool.Calcular Risco", "crew.calculo_risco"]
+    ferramenta = _por_nome(coletor.spans)["tool.Calcular Risco"]
+    assert ferramenta.pai_id == etapa.span_id
+    assert ferramenta.atributos["tool.classe"] == "CalcularRisco"
+
+
+def test_parar_exporta_spans_pendentes():
+    coletor = _Coletor()
+    rastreador = Rastreador(coletor, intervalo=3600)
+    with rastreador.span("edital.geracao"):
+        pass
+    assert rastreador._thread is not None and coletor.spans == []
+
+    assert rastreador.parar() == 1
+    assert [s.nome for s in coletor.spans] == ["edital.geracao"]
+    assert rastreador._thread is None
+
+
+def test_exportadores_de_arquivo_e_otlp(tmp_path):
+    caminho = tmp_path / "traces" / "spans.jsonl"
+    rastreador = Rastreador(ExportadorArquivo(str(caminho)))
+    with rastreador.span("scraping.correios", paginas=3):
+        pass
+    rastreador.exportar_pendentes()
+
+    linha = json.loads(caminho.read_text(encoding="utf-8").strip())
+    assert linha["nome"] == "scraping.correios"
+    assert linha["atributos"] == {"paginas": 3}
+
+    rastreador, coletor = _rastreador()
+    with rastreador.span("llm.chat_completion", **{"llm.modelo": "local", "llm.cache": False}):
+        pass
+    rastreador.exportar_pendentes()
+    span = corpo_otlp(coletor.spans)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+    assert span["name"] == "llm.chat_completion"
+    assert "parentSpanId" not in span
+    assert {"key": "llm.cache", "value": {"boolValue": False}} in span["attributes"]
+    assert span["status"] == {"code": 1}
@@ -4,7 +4,6 @@ Cria base de conhecimento para auxiliar na geração de novos editais.
 """
 
 import asyncio
-import json
 import re
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
@@ -13,6 +12,10 @@ import logging
 from dataclasses import dataclass, asdict
 import time
 
+from api.database import SessionLocal
+from services.knowledge_base_store import salvar_licitacoes
+from services.scrape_runs import execucao_atual
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -89,6 +92,8 @@ class GovProcurementScraper:
             categorias = self.categorias_busca
         
         all_licitacoes = []
+        # Métricas da execução corrente (scrape_runs)
+        execucao = execucao_atual()
         
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=True)
@@ -96,21 +101,28 @@ class GovProcurementScraper:
             try:
                 # Scraping do Portal da Transparência
                 logger.info("🔍 Iniciando scraping do Portal da Transparência...")
-                transparencia_data = await self.scrape_portal_transparencia(browser, categorias)
+                with execucao.site("transparencia"):
+                    transparencia_data = await self.scrape_portal_transparencia(browser, categorias)
                 all_licitacoes.extend(transparencia_data)
+                execucao.linhas(len(transparencia_data))
                 
                 # Scraping do ComprasNet (simulado - site complexo)
                 logger.info("🔍 Iniciando scraping do ComprasNet...")
-                comprasnet_data = await self.scrape_comprasnet_simulation(browser, categorias)
+                with execucao.site("comprasnet"):
+                    comprasnet_data = await self.scrape_comprasnet_simulation(browser, categorias)
                 all_licitacoes.extend(comprasnet_data)
+                execucao.linhas(len(comprasnet_data))
                 
                 # Scraping de dados públicos de editais (simulação baseada em padrões reais)
                 logger.info("🔍 Coletando dados de editais públicos...")
-                public_data = await self.collect_public_procurement_data(categorias)
+                with execucao.site("dados_publicos"):
+                    public_data = await self.collect_public_procurement_data(categorias)
                 all_licitacoes.extend(public_data)
+                execucao.linhas(len(public_data))
                 
             except Exception as e:
                 logger.error(f"Erro durante scraping: {str(e)}")
+                execucao.erro(str(e))
             finally:
                 await browser.close()
         
@@ -123,11 +135,14 @@ class GovProcurementScraper:
         Nota: Implementação simulada devido à complexidade do site real.
         """
         licitacoes = []
+        execucao = execucao_atual()
         page = await browser.new_page()
+        execucao.observar_pagina(page)
         
         try:
             # Simular navegação no Portal da Transparência
             await page.goto('https://www.portaltransparencia.gov.br/licitacoes')
+            execucao.pagina()
             await page.wait_for_timeout(2000)
             
             # Em um cenário real, aqui faríamos:
@@ -145,6 +160,7 @@ class GovProcurementScraper:
                     
         except Exception as e:
             logger.error(f"Erro no Portal da Transparência: {str(e)}")
+            execucao.erro(f"Portal da Transparência: {str(e)}")
         finally:
             await page.close()
         
@@ -398,21 +414,27 @@ class GovProcurementScraper:
         ])
         return factors
 
-    async def save_to_knowledge_base(self, licitacoes: List[LicitacaoSucesso], filename: str = None):
-        """Salva dados coletados na base de conhecimento"""
-        if filename is None:
-            filename = f"knowledge_base_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        # Converter para dicionários
+    async def save_to_knowledge_base(self, licitacoes: List[LicitacaoSucesso]) -> int:
+        """
+        Salva dados coletados na base de conhecimento (tabela base_conhecimento).
+        Licitações já coletadas (mesmo numero_edital e site_origem) são atualizadas.
+
+        Returns:
+            int: Quantidade de licitações gravadas
+        """
         data = [asdict(licitacao) for licitacao in licitacoes]
-        
-        # Salvar arquivo
-        filepath = f"data/{filename}"
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
-        
-        logger.info(f"💾 Base de conhecimento salva em: {filepath}")
-        return filepath
+        total = await asyncio.to_thread(self._gravar_base_conhecimento, data)
+        logger.info(f"💾 {total} licitações gravadas na base de conhecimento")
+        return total
+
+    def _gravar_base_conhecimento(self, data: List[Dict]) -> int:
+        db = SessionLocal()
+        try:
+            total = salvar_licitacoes(db, data)
+            db.commit()
+            return total
+        finally:
+            db.close()
 
 async def main():
     """Função principal para executar o scraping"""
@@ -434,8 +456,8 @@ async def main():
     
     # Salvar na base de conhecimento
     if licitacoes:
-        filepath = await scraper.save_to_knowledge_base(licitacoes)
-        print(f"✅ {len(licitacoes)} licitações coletadas e salvas em {filepath}")
+        total = await scraper.save_to_knowledge_base(licitacoes)
+        print(f"✅ {len(licitacoes)} licitações coletadas, {total} gravadas na base de conhecimento")
         
         # Mostrar resumo
         print("\n📊 Resumo dos dados coletados:")
@@ -1,5 +1,3 @@
-from playwright.sync_api import sync_playwright
-from playwright.async_api import async_playwright
 import os
 import time
 from datetime import datetime, timedelta
@@ -7,6 +5,8 @@ import json
 import re # Para extrair IDs de URLs
 import uuid
 
+from services.scrape_runs import registrar_execucao
+
 # Caminho para o arquivo que registra licitações já processadas
 PROCESSED_LICITACOES_REGISTER = "backend/data/processed_licitacoes_register.json"
 
@@ -60,6 +60,7 @@ def download_licitacao_edital(url: str, download_path: str = "backend/data/raw_l
         os.makedirs(download_path)
 
     try:
+        from playwright.sync_api import sync_playwright
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=False, args=["--ignore-certificate-errors"])
             context = p.chromium.launch_new_context(ignore_https_errors=True)
@@ -140,6 +141,7 @@ async def search_new_licitacoes_comprasnet(
 
     browser = None
     try:
+        from playwright.async_api import async_playwright
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=False, args=["--ignore-certificate-errors"])
             context = await browser.new_context(ignore_https_errors=True)
@@ -191,6 +193,63 @@ async def search_new_licitacoes_comprasnet(
         if browser:
             await browser.close()
 
+# Linhas da tabela de resultados dos Correios. Também casa as linhas das tabelas de
+# detalhes aninhadas, que _JS_LINHAS_CORREIOS devolve como None.
+_SELETOR_LINHAS_CORREIOS = '#resultado > div > table tbody tr'
+
+# Textos das células de cada linha de resultado: tabela de detalhes da 2ª célula,
+# texto/link do objeto (negrito da 1ª linha). None quando a linha não tem detalhes.
+_JS_LINHAS_CORREIOS = """
+rows => rows.map(row => {
+    const celula = row.querySelectorAll('td')[1];
+    const tabela = celula ? celula.querySelector('table') : null;
+    if (!tabela) return null;
+    const trs = Array.from(tabela.querySelectorAll('tr'));
+    const objeto = trs.length && trs[0].querySelectorAll('td')[1]
+        ? trs[0].querySelectorAll('td')[1].querySelector('b') : null;
+    const link = objeto ? objeto.querySelector('a') : null;
+    return {
+        celulas: trs.map(tr => Array.from(tr.querySelectorAll('td')).map(td => td.innerText)),
+        objeto: objeto ? objeto.innerText : "",
+        url: link ? (link.getAttribute('href') || "") : ""
+    };
+})
+"""
+
+# (linha, coluna) de cada campo na tabela de detalhes dos Correios
+_CAMPOS_CORREIOS = {
+    "numero_edital": (1, 1),
+    "tipo_licitacao": (1, 3),
+    "data_publicacao": (2, 1),
+    "data_abertura": (2, 3),
+    "modalidade": (3, 1),
+    "uasg": (3, 3),
+    "dependencia": (4, 1),
+    "uf": (4, 3),
+    "quantidade_itens": (5, 1),
+    "nup": (5, 3),
+}
+
+def _linha_correios(detalhes: dict) -> dict:
+    """
+    Converte as células de uma linha de resultado dos Correios (lidas por
+    _JS_LINHAS_CORREIOS) no dicionário da licitação. Células ausentes viram "".
+    """
+    celulas = detalhes.get("celulas") or []
+    licitacao = {"objeto": detalhes.get("objeto") or ""}
+    for campo, (linha, coluna) in _CAMPOS_CORREIOS.items():
+        valores = celulas[linha] if linha < len(celulas) else ()
+        licitacao[campo] = valores[coluna] if coluna < len(valores) else ""
+    licitacao["url"] = detalhes.get("url") or ""
+    return licitacao
+
+def _registro_correios(licitacao: dict, posicao: int) -> dict:
+    """Dados de uma licitação dos Correios no formato de salvar_licitacao_no_banco."""
+    registro = {campo: licitacao[campo] for campo in ("objeto", *_CAMPOS_CORREIOS)}
+    registro["id"] = licitacao["numero_edital"] or licitacao["nup"] or str(posicao)
+    registro["link_original"] = licitacao["url"]
+    return registro
+
 async def search_new_licitacoes_correios(
     search_url: str = "https://editais.correios.com.br/app/consultar/licitacoes/index.php",
     download_path: str = "backend/data/raw_licitacoes",
@@ -201,16 +260,25 @@ async def search_new_licitacoes_correios(
     """
     Busca licitações no portal oficial dos Correios, filtrando apenas por data inicial e final.
     Retorna uma lista de dicionários com os dados das licitações encontradas.
+    A execução e suas métricas (páginas, linhas, bytes, erros) ficam registradas em scrape_runs.
     """
+    async with registrar_execucao("correios", {"data_inicial": data_inicial, "data_final": data_final}) as execucao:
+        with execucao.site("correios"):
+            return await _buscar_licitacoes_correios(execucao, search_url, download_path, data_inicial, data_final)
+
+async def _buscar_licitacoes_correios(execucao, search_url, download_path, data_inicial, data_final) -> list:
+    """Navegação e extração no portal dos Correios (ver search_new_licitacoes_correios)."""
     if not os.path.exists(download_path):
         os.makedirs(download_path)
 
     new_licitacoes_found = []
     try:
+        from playwright.async_api import async_playwright
         async with async_playwright() as p:
             browser = await p.chromium.launch(headless=False, args=["--ignore-certificate-errors"])
             context = await browser.new_context(ignore_https_errors=True)
             page = await context.new_page()
+            execucao.observar_pagina(page)
             await page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
 
             # Preencher selects obrigatórios
@@ -241,80 +309,23 @@ async def search_new_licitacoes_correios(
 
             new_licitacoes_found = []
             while True:
-                rows = page.locator('#resultado > div > table tbody tr')
-                count = await rows.count()
-                for i in range(count):
-                    row = rows.nth(i)
-                    tds = row.locator('td')
-                    # Acessa a tabela de detalhes de cada item
-                    detalhes_td = tds.nth(1)
-                    tabela_detalhes = detalhes_td.locator('table')
-                    if await tabela_detalhes.count() == 0:
+                execucao.pagina()
+                rows = page.locator(_SELETOR_LINHAS_CORREIOS)
+                # Uma única leitura do DOM por página (em vez de uma ida ao navegador por célula)
+                linhas = await rows.evaluate_all(_JS_LINHAS_CORREIOS)
+                for i, detalhes in enumerate(linhas):
+                    if detalhes is None:
                         print(f"Linha {i}: tabela de detalhes não encontrada, pulando.")
                         continue
-                    trs = tabela_detalhes.locator('tr')
-                    # Objeto
-                    objeto = await trs.nth(0).locator('td').nth(1).locator('b').inner_text() if await trs.nth(0).locator('td').nth(1).locator('b').count() > 0 else ""
-                    # Número Edital
-                    numero_edital = await trs.nth(1).locator('td').nth(1).inner_text() if await trs.nth(1).locator('td').nth(1).count() > 0 else ""
-                    # Tipo Licitação
-                    tipo_licitacao = await trs.nth(1).locator('td').nth(3).inner_text() if await trs.nth(1).locator('td').nth(3).count() > 0 else ""
-                    # Data Publicação
-                    data_publicacao = await trs.nth(2).locator('td').nth(1).inner_text() if await trs.nth(2).locator('td').nth(1).count() > 0 else ""
-                    # Data Abertura
-                    data_abertura = await trs.nth(2).locator('td').nth(3).inner_text() if await trs.nth(2).locator('td').nth(3).count() > 0 else ""
-                    # Modalidade
-                    modalidade = await trs.nth(3).locator('td').nth(1).inner_text() if await trs.nth(3).locator('td').nth(1).count() > 0 else ""
-                    # UASG
-                    uasg = await trs.nth(3).locator('td').nth(3).inner_text() if await trs.nth(3).locator('td').nth(3).count() > 0 else ""
-                    # Dependência
-                    dependencia = await trs.nth(4).locator('td').nth(1).inner_text() if await trs.nth(4).locator('td').nth(1).count() > 0 else ""
-                    # UF
-                    uf = await trs.nth(4).locator('td').nth(3).inner_text() if await trs.nth(4).locator('td').nth(3).count() > 0 else ""
-                    # Quantidade Itens
-                    quantidade_itens = await trs.nth(5).locator('td').nth(1).inner_text() if await trs.nth(5).locator('td').nth(1).count() > 0 else ""
-                    # NUP
-                    nup = await trs.nth(5).locator('td').nth(3).inner_text() if await trs.nth(5).locator('td').nth(3).count() > 0 else ""
-                    # Link do edital (se houver na lista)
-                    url = ""
-                    objeto_b = trs.nth(0).locator('td').nth(1).locator('b')
-                    if await objeto_b.count() > 0:
-                        a_tag = objeto_b.locator('a')
-                        if await a_tag.count() > 0:
-                            url = await a_tag.first.get_attribute('href')
-                    new_licitacoes_found.append({
-                        "objeto": objeto,
-                        "numero_edital": numero_edital,
-                        "tipo_licitacao": tipo_licitacao,
-                        "data_publicacao": data_publicacao,
-                        "data_abertura": data_abertura,
-                        "modalidade": modalidade,
-                        "uasg": uasg,
-                        "dependencia": dependencia,
-                        "uf": uf,
-                        "quantidade_itens": quantidade_itens,
-                        "nup": nup,
-                        "url": url
-                    })
+                    licitacao = _linha_correios(detalhes)
+                    new_licitacoes_found.append(licitacao)
+                    execucao.linhas()
                     # Salva no banco de dados
                     try:
-                        salvar_licitacao_no_banco({
-                            "id": numero_edital or nup or str(i),
-                            "objeto": objeto,
-                            "data_abertura": data_abertura,
-                            "modalidade": modalidade,
-                            "link_original": url,
-                            "numero_edital": numero_edital,
-                            "tipo_licitacao": tipo_licitacao,
-                            "data_publicacao": data_publicacao,
-                            "uasg": uasg,
-                            "dependencia": dependencia,
-                            "uf": uf,
-                            "quantidade_itens": quantidade_itens,
-                            "nup": nup
-                        })
+                        salvar_licitacao_no_banco(_registro_correios(licitacao, i))
                     except Exception as e:
                         print(f"Erro ao salvar licitação no banco: {e}")
+                        execucao.erro(f"Erro ao salvar licitação {licitacao['numero_edital'] or licitacao['nup']}: {e}")
                 # Verifica se há próxima página
                 next_btn = page.locator('a.box-navegacao[title="Próxima Página"]')
                 if await next_btn.count() > 0 and await next_btn.is_visible():
@@ -326,6 +337,7 @@ async def search_new_licitacoes_correios(
             return new_licitacoes_found
     except Exception as e:
         print(f"Erro grave ao buscar licitações no portal dos Correios: {e}")
+        execucao.erro(str(e))
         return []
     finally:
         if 'browser' in locals() and browser:
@@ -33,7 +33,9 @@ function LicitacoesAnalise() {
   // Função para buscar licitações do backend
   const fetchLicitacoes = async () => {
     try {
-      const response = await fetch(API_URL + '/licitacoes/');
+      // A listagem retorna só as colunas resumidas, mais os pontos de atenção usados nos KPIs e filtros.
+      // Os textos longos das análises são buscados ao abrir o modal (LicitacoesTable).
+      const response = await fetch(`${API_URL}/licitacoes/?fields=pontos_de_atencao_juridica`);
       if (!response.ok) {
         throw new Error(`HTTP error! status: ${response.status}`);
       }
@@ -58,10 +60,7 @@ function LicitacoesAnalise() {
   const filteredLicitacoes = licitacoes.filter(licitacao => {
     const matchesSearch = searchTerm === '' ||
       licitacao.objeto.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      licitacao.resumo.toLowerCase().includes(searchTerm.toLowerCase()) ||
-      (licitacao.analise_juridica_texto && licitacao.analise_juridica_texto.toLowerCase().includes(searchTerm.toLowerCase())) ||
-      (licitacao.analise_mercado_texto && licitacao.analise_mercado_texto.toLowerCase().includes(searchTerm.toLowerCase())) ||
-      (licitacao.resumo_executivo_gerencial && licitacao.resumo_executivo_gerencial.toLowerCase().includes(searchTerm.toLowerCase()));
+      (licitacao.resumo && licitacao.resumo.toLowerCase().includes(searchTerm.toLowerCase()));
 
     const hasJuridicalAttention = licitacao.pontos_de_atencao_juridica && licitacao.pontos_de_atencao_juridica.length > 0;
     const isHighOrMediumRisk = licitacao.risco_geral && (licitacao.risco_geral.toLowerCase() === 'alto' || licitacao.risco_geral.toLowerCase() === 'médio');
@@ -151,7 +150,7 @@ function LicitacoesAnalise() {
         <section className="filters-section">
           <input
             type="text"
-            placeholder="Buscar por objeto, resumo ou análise..."
+            placeholder="Buscar por objeto ou resumo..."
             value={searchTerm}
             onChange={(e) => setSearchTerm(e.target.value)}
             className="search-input"
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useRef } from 'react';
 import './LicitacoesTable.css';
 import { saveAs } from "file-saver";
 
@@ -9,17 +9,34 @@ function LicitacoesTable({ licitacoes }) {
   const [selected, setSelected] = useState(null); // Licitação selecionada
   const [loadingAnalise, setLoadingAnalise] = useState(false); // Status de geração de análise
   const [erroAnalise, setErroAnalise] = useState(null); // Erro na geração de análise
+  const [loadingDetalhes, setLoadingDetalhes] = useState(false); // Carregamento dos textos das análises
   const API_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
+  const detalhesRef = useRef(null); // Licitação cujos detalhes estão sendo carregados
 
-  // Abre o modal de detalhes
-  const openModal = (lic) => {
+  // Abre o modal com os dados da lista e carrega os textos das análises, que a listagem não traz
+  const openModal = async (lic) => {
     setSelected(lic);
     setModalOpen(true);
+    setLoadingDetalhes(true);
+    detalhesRef.current = lic.id;
+    try {
+      const resp = await fetch(`${API_URL}/licitacoes/${encodeURIComponent(lic.id)}`);
+      if (!resp.ok) throw new Error(`HTTP error! status: ${resp.status}`);
+      const data = await resp.json();
+      // Ignora a resposta se o modal foi fechado ou outra licitação foi aberta
+      if (detalhesRef.current === lic.id) setSelected(data);
+    } catch (e) {
+      console.error("Erro ao carregar detalhes da licitação:", e);
+    } finally {
+      if (detalhesRef.current === lic.id) setLoadingDetalhes(false);
+    }
   };
   // Fecha o modal
   const closeModal = () => {
+    detalhesRef.current = null;
     setModalOpen(false);
     setSelected(null);
+    setLoadingDetalhes(false);
   };
 
   // Chama o backend para gerar análise via IA
@@ -98,6 +115,7 @@ function LicitacoesTable({ licitacoes }) {
               {erroAnalise && <span style={{color:'#dc3545', marginLeft:10}}>{erroAnalise}</span>}
             </div>
             <div className="licitacao-modal-content">
+              {loadingDetalhes && <p className="loading-message">Carregando análises...</p>}
               {/* Blocos de análise destacados */}
               {selected.risco_geral && (
                 <div className={`modal-risco-geral risco-${(selected.risco_geral || '').toLowerCase()}`.replace(' ', '-') }>